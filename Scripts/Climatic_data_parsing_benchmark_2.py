@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 15:37:12 2026
+
+@author: Pierre Jouannais, Department of Planning, DCEA, Aalborg University
+pijo@plan.aau.dk
+"""
+
+
+'''
+Compares the time needed to read all the csvs of the folder climatic_data with :
+
+    -the pandas reader "read_pvgis_daily_csv"
+    -the fast reader "read_pvgis_daily_file", one file at a time
+    -the batch reader "read_pvgis_daily_files", all files at once
+    -the fast reader with only the global irradiance and the temperature
+
+and checks that they give the same values.
+
+'''
+
+
+import os
+import time
+import numpy as np
+
+# Set working directory to file location
+# (works only when executing the whole file and not only sections (Run Current cell))
+
+currentfolder=os.path.dirname(os.path.realpath(__file__))
+os.chdir(currentfolder)
+
+import Retrieving_solar_and_climatic_data_1 as solardata
+
+
+# Number of times each reader reads all the files
+repetitions = 10
+
+paths = [solardata.climatic_data_folder + nameofthefile
+         for nameofthefile in sorted(os.listdir(solardata.climatic_data_folder))
+         if nameofthefile.startswith("dailydataforlat=")]
+
+print(len(paths), 'files')
+
+
+def time_reader(reader):
+    """Returns the values read by the reader and the average time to read all the files ; s"""
+
+    start = time.perf_counter()
+
+    for repetition in range(repetitions):
+
+        values = reader()
+
+    return [values, (time.perf_counter() - start)/repetitions]
+
+
+readers = {'pandas': lambda: np.array([solardata.read_pvgis_daily_csv(path) for path in paths]),
+
+           'fast': lambda: np.array([solardata.read_pvgis_daily_file(path) for path in paths]),
+
+           'batch': lambda: solardata.read_pvgis_daily_files(paths),
+
+           'fast global and temperature': lambda: np.array([solardata.read_pvgis_daily_file(path, columns=(1, 4))
+                                                            for path in paths])}
+
+results = {name: time_reader(readers[name]) for name in readers}
+
+for name in results:
+
+    print(name, ':', round(results[name][1]*1000, 2), 'ms',
+          '(x', round(results['pandas'][1]/results[name][1], 1), ')')
+
+
+# Same values with all readers
+
+reference = results['pandas'][0]
+
+print('Same values :',
+      np.array_equal(reference, results['fast'][0]),
+      np.array_equal(reference, results['batch'][0]),
+      np.array_equal(reference[:, :, [0, 3]], results['fast global and temperature'][0]))
@@ -30,6 +30,13 @@ import Functions_for_physical_and_biological_calculations_1 as functions
 import Retrieving_solar_and_climatic_data_1 as solardata
 import math
 import pandas as pd
+import collections
+import copy
+import hashlib
+import inspect
+import pickle
+import random
+import calendar
 
 
 
@@ -141,7 +148,8 @@ def modelthermo_1hour_timestep10(x,
                                  volumetodrypers,  
                                  recyclingrateaftercentrifuge, 
                                  pumpefficiency,
-                                 night_monitoring):
+                                 night_monitoring,
+                                 step_duration=10):
     '''
     Differential equations system solving.
     Defines the derivatives for temperature, energy, water pumping,
@@ -150,7 +158,7 @@ def modelthermo_1hour_timestep10(x,
     the water pumping , the energy needed to centrifugate.
     Over 1 hour.
     
-    Time step = 10s
+    Time step = step_duration (10 s by default, see "thermal_time_grid")
     
      #Inputs :
             
@@ -175,11 +183,12 @@ def modelthermo_1hour_timestep10(x,
           #pumpefficiency _: efficiency of the pump ; .
           #night_monitoring: 'yes' = Thermoregulation  at night,
           'no' = No Thermoregulation  at night 
+          #step_duration : duration of a time step ; s
 
 
       #Outputs : 
           
-          Derivatives for every 10 seconds during for further integration over an hour: 
+          Derivatives for every time step during for further integration over an hour: 
               All powers in kW. Volumes in L         
          
           #dEcooldt ; derivative cooling energy (asbolute thermal energy) ; kW
@@ -221,8 +230,8 @@ def modelthermo_1hour_timestep10(x,
     # Convective exchange with air
     #############
 
-    # * 10 because time step 10 s
-    Qenv = hconv*exchangearea*(Tair-temp)*10  # W
+    # * step_duration, duration of the time step (10 s by default)
+    Qenv = hconv*exchangearea*(Tair-temp)*step_duration  # W
 
 
     #############
@@ -244,12 +253,12 @@ def modelthermo_1hour_timestep10(x,
 
         # Volume to vaporize is replaced by water from the well
 
-        # * 10 because time step 10 s
-        dEdryingcooldt = volumetodrypers*Cp*(Twell-temp)*10  # kW
+        # * step_duration, duration of the time step (10 s by default)
+        dEdryingcooldt = volumetodrypers*Cp*(Twell-temp)*step_duration  # kW
 
         dEcooldt = 0  # kW , No cooling
 
-        dWaterpumpedwelldt = volumetodrypers*10  # L.s-1
+        dWaterpumpedwelldt = volumetodrypers*step_duration  # L.s-1
 
         dWaterpumpedfacilitydt = 0  # L.s-1
 
@@ -268,27 +277,27 @@ def modelthermo_1hour_timestep10(x,
 
         # Q provided by injecting this water
         
-        # * 10 because time step 10 s
+        # * step_duration, duration of the time step (10 s by default)
 
         Qwateraftercentrifugation = (supernatant_pers*Cp
-                                     * (Trecylecedaftercentrifuge - temp)*10)  # kW
+                                     * (Trecylecedaftercentrifuge - temp)*step_duration)  # kW
 
         dEcentrifugdt = Qwateraftercentrifugation  # kW
 
         # The supernatant which is not reinjected needs to be
         # replaced by water pumped from the well
         
-        # * 10 because time step 10 s
+        # * step_duration, duration of the time step (10 s by default)
 
         dWaterpumpedwelldt += (supernatant_pers
-                               * (1 - recyclingrateaftercentrifuge)*10)  # L.s-1
+                               * (1 - recyclingrateaftercentrifuge)*step_duration)  # L.s-1
 
         # The supernatant which isreinjected needs to be
         # replaced by water pumped from the facility
-        dWaterpumpedfacilitydt += supernatant_pers*recyclingrateaftercentrifuge*10  # L.s-1
+        dWaterpumpedfacilitydt += supernatant_pers*recyclingrateaftercentrifuge*step_duration  # L.s-1
 
         # /1000 for conversion W to kW
-        dtempdt = ((Qsun*10/1000)
+        dtempdt = ((Qsun*step_duration/1000)
                    + (Qenv/1000)
                    + dEdryingcooldt
                    + dEdryingheatdt
@@ -302,7 +311,7 @@ def modelthermo_1hour_timestep10(x,
         if temp > Tmax:  # If the culture is too hot
 
             # Cooling necessary to bring culture back to Tmax
-            dEcooldtpre = m*Cp*(Tmax - temp)*10  # kW, negative
+            dEcooldtpre = m*Cp*(Tmax - temp)*step_duration  # kW, negative
             # "pre" as the actual active cooling which is needed will depend on
             # the cooling provided by the harvesting/recycling system
 
@@ -310,13 +319,13 @@ def modelthermo_1hour_timestep10(x,
 
             # Volume to vaporize is replaced by water from the well
 
-            dEdryingcooldt = volumetodrypers*Cp*(Twell-temp)*10  # kW
+            dEdryingcooldt = volumetodrypers*Cp*(Twell-temp)*step_duration  # kW
 
             dEcooldt = dEcooldtpre-dEdryingcooldt  # Actual necessary Cooling, kW, negative
 
             # Volume to vaporize is replaced by water from the well
 
-            dWaterpumpedwelldt = volumetodrypers*10    # L.s-1
+            dWaterpumpedwelldt = volumetodrypers*step_duration    # L.s-1
 
             dWaterpumpedfacilitydt = 0  # L.s-1
 
@@ -338,12 +347,12 @@ def modelthermo_1hour_timestep10(x,
 
         elif temp < Tmin:  # If the culture is too cold
 
-            dEheatdtpre = m*Cp*(Tmin - temp)*10  # kW , positive
+            dEheatdtpre = m*Cp*(Tmin - temp)*step_duration  # kW , positive
 
             dEcooldt = 0  # kW, No Cooling
 
             # Volume to vaporize is replaced by water from the well
-            dEdryingcooldt = volumetodrypers*Cp*(Twell-temp)*10  # kW
+            dEdryingcooldt = volumetodrypers*Cp*(Twell-temp)*step_duration  # kW
 
             # MODIF : The vaporized water is never recycled and
             # always replaced by well/river water
@@ -352,7 +361,7 @@ def modelthermo_1hour_timestep10(x,
             # Heating must also compensate the injection of cold water
             dEheatdt = dEheatdtpre - dEdryingcooldt
 
-            dWaterpumpedwelldt = volumetodrypers*10    # L.s-1
+            dWaterpumpedwelldt = volumetodrypers*step_duration    # L.s-1
 
             dWaterpumpedfacilitydt = 0    # L.s-1
 
@@ -368,9 +377,9 @@ def modelthermo_1hour_timestep10(x,
 
             dEheatdt = 0  # kW, No heating
 
-            dEdryingmixdt = volumetodrypers*Cp*(Twell - temp)*10  # kW
+            dEdryingmixdt = volumetodrypers*Cp*(Twell - temp)*step_duration  # kW
 
-            dWaterpumpedwelldt = volumetodrypers*10   # L.s-1
+            dWaterpumpedwelldt = volumetodrypers*step_duration   # L.s-1
 
             dWaterpumpedfacilitydt = 0    # L.s-1
 
@@ -388,19 +397,19 @@ def modelthermo_1hour_timestep10(x,
                                      * (1 - recyclingrateaftercentrifuge))  # °C
 
         dEcentrifugdt = (supernatant_pers*Cp
-                         * (Trecylecedaftercentrifuge-temp)*10)  # kW
+                         * (Trecylecedaftercentrifuge-temp)*step_duration)  # kW
 
 
         # The harvested volume which is not reinjected needs to
         # be replaced by water pumped from the well/river
         dWaterpumpedwelldt += (supernatant_pers
-                               * (1 - recyclingrateaftercentrifuge)*10)  # L.s-1
+                               * (1 - recyclingrateaftercentrifuge)*step_duration)  # L.s-1
        
         # The supernatant which is reinjected needs to be pumped back
         # from the facility
-        dWaterpumpedfacilitydt += supernatant_pers*recyclingrateaftercentrifuge*10
+        dWaterpumpedfacilitydt += supernatant_pers*recyclingrateaftercentrifuge*step_duration
 
-        dtempdt = ((Qsun*10/1000)
+        dtempdt = ((Qsun*step_duration/1000)
                    + (Qenv/1000)
                    + dEcooldt
                    + dEheatdt
@@ -423,6 +432,1008 @@ def modelthermo_1hour_timestep10(x,
             dWaterpumpedheatechanger]
 
 
+# Engines available to integrate the temperature and energy demands over a day
+thermal_engines = ['odeint', 'fixedstep', 'analytical', 'reduced']
+
+
+def thermal_time_grid(timestep):
+    '''
+    Returns the time points of the thermal simulation for a given time step.
+
+    As with the original step of 10 s (360 points per hour), the first and last
+    points of an hour are 3590 s apart and the last point of an hour is the 
+    first point of the next hour. The hours therefore last the same time 
+    whatever the time step and the actual duration of a step is
+    3590/(points_per_hour - 1) s (10 s for 10 s, 60.8 s for 60 s, 326 s for 300 s).
+
+    #Inputs :
+
+        #timestep : nominal time step, divisor of 3600 s with at least 3 points per hour ; s
+
+    #Outputs :
+
+        #points_per_hour : number of time points per hour
+        #step_duration : duration of a step in the equations ; s
+
+        '''
+
+    if timestep <= 0 or 3600 % timestep != 0 or 3600//timestep < 3:
+        raise ValueError('timestep must divide 3600 s with at least 3 points per hour')
+
+    points_per_hour = int(3600//timestep)
+
+    step_duration = 3590/(points_per_hour - 1)
+
+    return [points_per_hour, step_duration]
+
+# Columns of the trajectory over the day (8640 points x 11 variables),
+# in the order of the outputs of "modelthermo_1hour_timestep10"
+day_trajectory_fields = ['cooling_kWh',
+                         'heating_kWh',
+                         'temperature_C',
+                         'supernatant_recycling_kWh',
+                         'drying_heat_kWh',
+                         'drying_cool_kWh',
+                         'drying_mix_kWh',
+                         'water_pumped_well_L',
+                         'water_pumped_facility_L',
+                         'heat_exchanger_kWh',
+                         'water_heat_exchanger_L']
+
+# Energies, integrated in kJ and converted to kWh
+day_trajectory_energy_columns = [0, 1, 3, 4, 5, 6, 9]
+
+# Hour of the harvest (9 PM) with the default harvest schedule
+harvest_hour = 21
+
+# Flow centrifuged by the centrifuge of the whole PBR unit when harvesting ; L.s-1
+centrifuge_flow_wholeunit = 5000/3600  # 5m3.h-1
+
+
+def harvest_schedule_array(harvest_schedule=None):
+    '''
+    Returns a harvest schedule as an array and checks it.
+
+    #Inputs :
+
+        #harvest_schedule : None for the whole harvest at "harvest_hour", 
+        or fractions of the daily harvest centrifuged during each hour
+        (24 values which sum to 1), or array (schedules x 24 hours) 
+        for several schedules at once
+
+    #Outputs :
+
+        #harvest_schedule : array (24 values or schedules x 24 hours)
+
+        '''
+
+    if harvest_schedule is None:
+        schedule = np.zeros(24)
+
+        schedule[harvest_hour] = 1
+
+        return schedule
+
+    schedule = np.asarray(harvest_schedule, dtype=np.float64)
+
+    if (schedule.shape[-1:] != (24,) or schedule.ndim > 2 or np.any(schedule < 0)
+            or np.any(np.abs(schedule.sum(axis=-1) - 1) > 1e-9)):
+        raise ValueError('harvest_schedule must be 24 fractions >= 0 which sum to 1, '
+                         'or an array (schedules x 24 hours) of such fractions')
+
+    return schedule
+
+# Summary of the day returned by "thermosimulation_1day_timestep10" with trajectories=False
+thermal_summary_fields = ['cooling_kWh',
+                          'heating_kWh',
+                          'water_pumped_facility_L',
+                          'water_pumped_well_L',
+                          'centrifugation_kWh',
+                          'heat_exchanger_kWh',
+                          'water_heat_exchanger_L',
+                          'temperature_mean_C',
+                          'temperature_harvest_C',
+                          'temperature_end_C']
+
+# Summary of the day returned by "cultivation_simulation_timestep10" with trajectories=False
+day_summary_fields = ['cooling_kWh',
+                      'heating_kWh',
+                      'water_pumped_facility_L',
+                      'water_pumped_well_L',
+                      'production_g',
+                      'production_harvested_g',
+                      'production_loss_g',
+                      'volumetric_yield_g_m3',
+                      'centrifugation_kWh',
+                      'heat_exchanger_kWh',
+                      'water_heat_exchanger_L',
+                      'water_centrifuged_L',
+                      'temperature_mean_C',
+                      'temperature_harvest_C',
+                      'centrifugation_rate_min_L_s',
+                      'centrifugation_rate_max_L_s',
+                      'temperature_end_C',
+                      'biomass_concentration_end_g_L']
+
+
+def thermo_derivative_coefficients(Qsun,
+                                   Tair,
+                                   Twell,
+                                   depth_well,
+                                   Cp,
+                                   exchangearea,
+                                   hconv,
+                                   Tmax,
+                                   Tmin,
+                                   m,
+                                   supernatant_pers,
+                                   volumetodrypers,
+                                   recyclingrateaftercentrifuge,
+                                   pumpefficiency,
+                                   step_duration=10):
+    '''
+    Returns the derivatives of "modelthermo_1hour_timestep10" as affine
+    functions of the culture temperature : derivative = c0 + c1 * temp.
+    Every branch of the model is affine in the temperature.
+
+    Time step = step_duration (10 s by default)
+
+     #Inputs : same as "modelthermo_1hour_timestep10". 
+     All inputs can be arrays which are broadcast together (for instance 
+     24 values for the 24 hours of the day, or samples x 24 hours).
+
+     #Outputs :
+
+         #c0 : array (shape of the inputs x 4 branches x 11 derivatives)
+         #c1 : array (shape of the inputs x 4 branches x 11 derivatives) ; .°C-1
+
+         Branches :
+             0 : culture too hot (temp > Tmax)
+             1 : culture too cold (temp < Tmin)
+             2 : culture within the thermal range
+             3 : night without thermoregulation (Qsun = 0 and night_monitoring = 'no')
+
+         Derivatives in the same order as the outputs of "modelthermo_1hour_timestep10".
+
+          '''
+
+    [Qsun, Tair, Twell, depth_well, Cp, exchangearea, hconv, Tmax, Tmin, m,
+     supernatant_pers, volumetodrypers, recyclingrateaftercentrifuge, pumpefficiency] = np.broadcast_arrays(
+        *[np.asarray(a, dtype=np.float64) for a in [Qsun, Tair, Twell, depth_well, Cp, exchangearea, hconv,
+                                                    Tmax, Tmin, m, supernatant_pers, volumetodrypers,
+                                                    recyclingrateaftercentrifuge, pumpefficiency]])
+
+    c0 = np.zeros(Qsun.shape + (4, 11))
+    c1 = np.zeros(Qsun.shape + (4, 11))
+
+    # * step_duration, duration of the time step (10 s by default)
+
+    # Solar power and convective exchange with air ; kW
+    c0_environment = Qsun*step_duration/1000 + hconv*exchangearea*Tair*step_duration/1000
+    c1_environment = -hconv*exchangearea*step_duration/1000
+
+    # Replacing the vaporized water by water from the well ; kW
+    c0_drying = volumetodrypers*Cp*Twell*step_duration
+    c1_drying = -volumetodrypers*Cp*step_duration
+
+    # Reinjecting the supernatant mixed with water from the well ; kW
+    c0_centrifug = supernatant_pers*Cp*(1 - recyclingrateaftercentrifuge)*Twell*step_duration
+    c1_centrifug = -supernatant_pers*Cp*(1 - recyclingrateaftercentrifuge)*step_duration
+
+    # Water pumped from the well and from the facility, identical for all branches ; L
+    c0[..., 7] = (volumetodrypers*step_duration
+                  + supernatant_pers*(1 - recyclingrateaftercentrifuge)*step_duration)[..., None]
+
+    c0[..., 8] = (supernatant_pers*recyclingrateaftercentrifuge*step_duration)[..., None]
+
+    # Supernatant reinjection, identical for all branches
+    c0[..., 3] = c0_centrifug[..., None]
+    c1[..., 3] = c1_centrifug[..., None]
+
+    # 0 : Too hot
+    
+    # Actual necessary cooling, negative
+    c0_cool = m*Cp*Tmax*step_duration - c0_drying
+    c1_cool = -m*Cp*step_duration - c1_drying
+
+    c0[..., 0, 0] = c0_cool
+    c1[..., 0, 0] = c1_cool
+
+    c0[..., 0, 5] = c0_drying
+    c1[..., 0, 5] = c1_drying
+
+    # Heat exchanger
+    c0[..., 0, 10] = -c0_cool/((Tmax-Twell)*Cp)
+    c1[..., 0, 10] = -c1_cool/((Tmax-Twell)*Cp)
+
+    c0[..., 0, 9] = c0[..., 0, 10]*depth_well*1.05*9.81/(pumpefficiency*1000)
+    c1[..., 0, 9] = c1[..., 0, 10]*depth_well*1.05*9.81/(pumpefficiency*1000)
+
+    c0[..., 0, 2] = (c0_environment + c0_cool + c0_centrifug)/(m*Cp)
+    c1[..., 0, 2] = (c1_environment + c1_cool + c1_centrifug)/(m*Cp)
+
+    # 1 : Too cold
+
+    # Heating must also compensate the injection of cold water
+    c0_heat = m*Cp*Tmin*step_duration - c0_drying
+    c1_heat = -m*Cp*step_duration - c1_drying
+
+    c0[..., 1, 1] = c0_heat
+    c1[..., 1, 1] = c1_heat
+
+    c0[..., 1, 5] = c0_drying
+    c1[..., 1, 5] = c1_drying
+
+    c0[..., 1, 2] = (c0_environment + c0_heat + c0_centrifug)/(m*Cp)
+    c1[..., 1, 2] = (c1_environment + c1_heat + c1_centrifug)/(m*Cp)
+
+    # 2 : Within the thermal range
+
+    c0[..., 2, 6] = c0_drying
+    c1[..., 2, 6] = c1_drying
+
+    c0[..., 2, 2] = (c0_environment + c0_centrifug + c0_drying)/(m*Cp)
+    c1[..., 2, 2] = (c1_environment + c1_centrifug + c1_drying)/(m*Cp)
+
+    # 3 : Night without thermoregulation
+
+    c0[..., 3, 5] = c0_drying
+    c1[..., 3, 5] = c1_drying
+
+    c0[..., 3, 2] = (c0_environment + c0_drying + c0_centrifug)/(m*Cp)
+    c1[..., 3, 2] = (c1_environment + c1_drying + c1_centrifug)/(m*Cp)
+
+    return [c0, c1]
+
+
+def exponential_phi_functions(z):
+    '''
+    Returns phi1(z) = (exp(z) - 1)/z and phi2(z) = (exp(z) - 1 - z)/z**2,
+    with their Taylor series close to 0 to avoid cancellation errors.
+    '''
+
+    z = np.array(z, dtype=np.float64)
+
+    small = np.abs(z) < 1e-3
+
+    z_safe = np.where(small, 1, z)
+
+    expm1 = np.expm1(z_safe)
+
+    phi1 = expm1/z_safe
+
+    phi2 = (expm1 - z_safe)/z_safe**2
+
+    if small.any():
+
+        z_small = z[small]
+
+        phi1[small] = 1 + z_small/2 + z_small**2/6 + z_small**3/24
+
+        phi2[small] = 1/2 + z_small/6 + z_small**2/24 + z_small**3/120
+
+    return [phi1, phi2]
+
+
+def thermosimulation_hours_fixedstep(x0, c0, c1, night_hours, Tmax, Tmin, points_per_hour=360):
+    '''
+    Fixed-step integrator of "modelthermo_1hour_timestep10", 
+    with the same time points as odeint in "thermosimulation_1day_timestep10"
+    (360 points per hour by default, the last point of an hour is the first one of the next hour).
+
+    The branch of the model is chosen with the temperature at the beginning
+    of each time step and the affine equations of this branch are 
+    integrated exactly over the step (exponential integrator).
+    As long as the branch does not change, the temperature at the end of
+    the following steps is calculated at once with the exact solution.
+    The other variables are then calculated at once for the whole day.
+
+     #Inputs :
+
+         #x0 : initial values of the 11 variables (as for odeint)
+         #c0, c1 : coefficients for each hour as given by "thermo_derivative_coefficients" 
+         (hours x 4 branches x 11 derivatives)
+         #night_hours : array of booleans, True for the hours without
+         thermoregulation (Qsun = 0 and night_monitoring = 'no')
+         #Tmax : Maximal temperature for the strain ; °C
+         #Tmin : Minimal temperature for the strain ; °C
+         #points_per_hour : number of time points per hour (360 for 10 s, see "thermal_time_grid")
+
+     #Outputs :
+
+         #x : array (hours x points_per_hour points x 11 variables) as the outputs of odeint
+
+          '''
+
+    number_hours = c0.shape[0]
+
+    number_steps = points_per_hour - 1
+
+    x0 = np.array(x0, dtype=np.float64)
+
+    # hours x points
+    temperatures = np.empty((number_hours, points_per_hour))
+
+    # Branch of each step, hours x steps
+    branches = np.empty((number_hours, number_steps), dtype=np.int64)
+
+    # Temperature derivative : a + b * temp, for each hour and branch
+    a = c0[:, :, 2]
+    b = c1[:, :, 2]
+
+    # Integration over 1 step
+    [phi1, phi2] = exponential_phi_functions(b)
+
+    # Integral of the temperature over the step = phi1 * temp(beginning of the step) + a * phi2
+    integral_constant = a*phi2
+
+    steps = np.arange(1, points_per_hour)
+
+    temp = x0[2]
+
+    for hour in range(number_hours):
+
+        temperatures[hour, 0] = temp
+
+        step = 0
+
+        # Number of steps calculated at once
+        window = number_steps
+
+        while step < number_steps:
+
+            if night_hours[hour]:
+                branch = 3
+            elif temp > Tmax:
+                branch = 0
+            elif temp < Tmin:
+                branch = 1
+            else:
+                branch = 2
+
+            following_steps = steps[:min(window, number_steps - step)]
+
+            # Exact solution in this branch
+            if b[hour, branch] != 0:
+                segment = (temp + (a[hour, branch] + b[hour, branch]*temp)
+                           * np.expm1(b[hour, branch]*following_steps)/b[hour, branch])
+            else:
+                segment = temp + a[hour, branch]*following_steps
+
+            # The segment ends when the temperature leaves the range of the branch
+            if branch == 0:
+                changes = segment[:-1] <= Tmax
+            elif branch == 1:
+                changes = segment[:-1] >= Tmin
+            elif branch == 2:
+                changes = (segment[:-1] > Tmax) | (segment[:-1] < Tmin)
+            else:
+                changes = np.zeros(len(segment) - 1, dtype=bool)
+
+            changes = np.flatnonzero(changes)
+
+            if len(changes) == 0:
+                length = len(segment)
+            else:
+                length = changes[0] + 1
+
+            temperatures[hour, step + 1:step + 1 + length] = segment[:length]
+
+            branches[hour, step:step + length] = branch
+
+            step += length
+
+            temp = temperatures[hour, step]
+
+            # Short segments when the temperature oscillates around Tmax or Tmin
+            window = max(16, 4*length)
+
+    # Position of the coefficients of each step in the arrays (hours x 4 branches)
+    positions = np.arange(number_hours)[:, None]*4 + branches
+
+    # Integral of the temperature over each step
+    integrals = (np.take(phi1, positions)*temperatures[:, :-1]
+                 + np.take(integral_constant, positions))
+
+    # hours x steps x 11 variables
+    increments = (np.take(c0.reshape((-1, 11)), positions, axis=0)
+                  + np.take(c1.reshape((-1, 11)), positions, axis=0)*integrals[:, :, None])
+
+    cumulated = x0 + np.cumsum(increments.reshape((-1, 11)), axis=0).reshape(increments.shape)
+
+    x = np.empty((number_hours, points_per_hour, 11))
+
+    # The first point of each hour is the last point of the previous hour
+    x[0, 0] = x0
+    x[1:, 0] = cumulated[:-1, -1]
+    x[:, 1:] = cumulated
+
+    x[:, :, 2] = temperatures
+
+    return x
+
+
+# Statistics of the thermal solvers, cumulated since the last call to
+# "reset_thermal_solver_stats"
+thermal_solver_stats = {'days': 0,
+                        'hours': 0,
+                        'odeint_function_evaluations': 0,
+                        'analytical_segments': 0,
+                        'analytical_events': 0,
+                        'analytical_sliding_segments': 0,
+                        'steady_state_solves': 0,
+                        'steady_state_iterations': 0,
+                        'steady_state_max_residual': 0}
+
+
+def reset_thermal_solver_stats():
+    '''Sets all the statistics in "thermal_solver_stats" back to 0'''
+
+    for key in thermal_solver_stats:
+        thermal_solver_stats[key] = 0
+
+
+def analytical_branch(temp, a, b, night_hour, Tmax, Tmin):
+    '''
+    Returns the branch of "modelthermo_1hour_timestep10" followed by the
+    temperature from a given temperature, and the threshold (Tmax or Tmin)
+    which is reached in this branch if any.
+
+     #Inputs :
+
+         #temp : temperature of the culture ; °C
+         #a, b : temperature derivative a + b * temp for each of the 4 branches
+         (as in "thermo_derivative_coefficients")
+         #night_hour : True if the hour is without thermoregulation
+         #Tmax : Maximal temperature for the strain ; °C
+         #Tmin : Minimal temperature for the strain ; °C
+
+     #Outputs :
+
+         #branch : 0 too hot, 1 too cold, 2 within the range, 3 night
+         #sliding : True if the temperature stays at Tmax (branch 0) or Tmin (branch 1)
+         #threshold : temperature reached at the end of the segment, None if
+         the temperature stays in the branch
+         #duration : number of time steps to reach the threshold, infinite
+         if the threshold is None
+
+          '''
+
+    threshold = None
+
+    sliding = False
+
+    if night_hour:
+
+        branch = 3
+
+    elif temp > Tmax:
+
+        branch = 0
+
+        if a[0] + b[0]*Tmax < 0:
+            threshold = Tmax
+
+    elif temp < Tmin:
+
+        branch = 1
+
+        if a[1] + b[1]*Tmin > 0:
+            threshold = Tmin
+
+    elif temp == Tmax and a[2] + b[2]*Tmax > 0:
+
+        # Leaving the range from above, or sliding if the culture
+        # too hot would come back to Tmax
+        branch = 0
+
+        sliding = a[0] + b[0]*Tmax <= 0
+
+    elif temp == Tmin and a[2] + b[2]*Tmin < 0:
+
+        # Leaving the range from below, or sliding if the culture
+        # too cold would come back to Tmin
+        branch = 1
+
+        sliding = a[1] + b[1]*Tmin >= 0
+
+    else:
+
+        branch = 2
+
+        if a[2] + b[2]*temp > 0 and a[2] + b[2]*Tmax > 0 and temp < Tmax:
+            threshold = Tmax
+
+        elif a[2] + b[2]*temp < 0 and a[2] + b[2]*Tmin < 0 and temp > Tmin:
+            threshold = Tmin
+
+    # Duration to reach the threshold
+    if threshold is None:
+
+        duration = math.inf
+
+    elif b[branch] != 0:
+
+        duration = math.log1p(b[branch]*(threshold - temp)/(a[branch] + b[branch]*temp))/b[branch]
+
+    else:
+
+        duration = (threshold - temp)/a[branch]
+
+    return [branch, sliding, threshold, duration]
+
+
+def thermosimulation_hour_analytical(x0, c0, c1, night_hour, Tmax, Tmin, points_per_hour=360):
+    '''
+    Piecewise-analytical solution of "modelthermo_1hour_timestep10" over
+    one hour, with the same time points as odeint in "thermosimulation_1day_timestep10".
+
+    Within a branch (too hot, too cold, within the range, night), all
+    derivatives are affine in the temperature with constant coefficients, 
+    so that the temperature and the integrals of the other variables have
+    a closed-form exponential solution. The times at which the temperature
+    reaches Tmax or Tmin (events) are calculated exactly and a new segment
+    starts at each event.
+
+    When the derivatives on both sides of Tmax or Tmin point towards the 
+    threshold, the temperature stays at the threshold (sliding mode, Filippov).
+    The derivatives are then the combination of the derivatives of both branches
+    which keeps the temperature constant.
+    With odeint and the fixed-step integrator, this corresponds to the 
+    temperature oscillating around the threshold.
+
+     #Inputs :
+
+         #x0 : initial values of the 11 variables (as for odeint)
+         #c0, c1 : coefficients for the hour as given by "thermo_derivative_coefficients" 
+         (4 branches x 11 derivatives)
+         #night_hour : True if the hour is without thermoregulation
+         #Tmax : Maximal temperature for the strain ; °C
+         #Tmin : Minimal temperature for the strain ; °C
+         #points_per_hour : number of time points per hour (360 for 10 s, see "thermal_time_grid")
+
+     #Outputs :
+
+         #x : array (points_per_hour points x 11 variables) as the outputs of odeint
+         #number_segments : number of segments in the hour
+         #number_events : number of times the temperature reached Tmax or Tmin
+         #number_sliding : number of segments in sliding mode
+
+          '''
+
+    # Temperature derivative : a + b * temp, for each branch
+    a = c0[:, 2]
+    b = c1[:, 2]
+
+    number_steps = points_per_hour - 1
+
+    x = np.empty((points_per_hour, 11))
+
+    x[0] = x0
+
+    state = np.array(x0, dtype=np.float64)
+
+    temp = state[2]
+
+    time = 0.0
+
+    number_segments = 0
+    number_events = 0
+    number_sliding = 0
+
+    while time < number_steps:
+
+        number_segments += 1
+
+        [branch, sliding, threshold, duration] = analytical_branch(temp, a, b, night_hour, Tmax, Tmin)
+
+        # Output points in the segment
+        if sliding:
+
+            number_sliding += 1
+
+            # Share of the branch outside the range which keeps the temperature constant
+            rate_outside = a[branch] + b[branch]*temp
+            rate_range = a[2] + b[2]*temp
+
+            share = rate_range/(rate_range - rate_outside)
+
+            derivatives = (share*(c0[branch] + c1[branch]*temp)
+                           + (1 - share)*(c0[2] + c1[2]*temp))
+
+            derivatives[2] = 0
+
+            end = float(number_steps)
+
+            points = np.arange(np.floor(time) + 1, points_per_hour)
+
+            x[points.astype(np.int64)] = state + (points - time)[:, None]*derivatives
+
+            state = state + (end - time)*derivatives
+
+            state[2] = temp
+
+            time = end
+
+            continue
+
+        rate = a[branch] + b[branch]*temp
+
+        if time + duration >= number_steps:
+
+            end = float(number_steps)
+
+            threshold = None
+
+        else:
+
+            end = time + duration
+
+        points = np.arange(np.floor(time) + 1, np.floor(end) + 1)
+
+        # Exact solution at the output points and at the end of the segment
+        durations = np.append(points - time, end - time)
+
+        [phi1, phi2] = exponential_phi_functions(b[branch]*durations)
+
+        temperatures = temp + rate*durations*phi1
+
+        # Integral of the temperature
+        integrals = temp*durations + rate*durations**2*phi2
+
+        values = (state
+                  + durations[:, None]*c0[branch]
+                  + integrals[:, None]*c1[branch])
+
+        values[:, 2] = temperatures
+
+        x[points.astype(np.int64)] = values[:-1]
+
+        state = values[-1]
+
+        if threshold is not None:
+
+            number_events += 1
+
+            state[2] = threshold
+
+        temp = state[2]
+
+        time = end
+
+    return [x, number_segments, number_events, number_sliding]
+
+
+def thermosimulation_hours_analytical(x0, c0, c1, night_hours, Tmax, Tmin, points_per_hour=360):
+    '''
+    Piecewise-analytical integration of "modelthermo_1hour_timestep10" over 
+    several hours with "thermosimulation_hour_analytical".
+    The statistics of the solver are added to "thermal_solver_stats".
+
+     #Inputs : same as "thermosimulation_hours_fixedstep"
+
+     #Outputs :
+
+         #x : array (hours x points_per_hour points x 11 variables) as the outputs of odeint
+
+          '''
+
+    number_hours = c0.shape[0]
+
+    x = np.empty((number_hours, points_per_hour, 11))
+
+    state = np.array(x0, dtype=np.float64)
+
+    for hour in range(number_hours):
+
+        [x[hour],
+         number_segments,
+         number_events,
+         number_sliding] = thermosimulation_hour_analytical(state,
+                                                             c0[hour],
+                                                             c1[hour],
+                                                             night_hours[hour],
+                                                             Tmax,
+                                                             Tmin,
+                                                             points_per_hour)
+
+        state = x[hour, -1]
+
+        thermal_solver_stats['analytical_segments'] += number_segments
+        thermal_solver_stats['analytical_events'] += number_events
+        thermal_solver_stats['analytical_sliding_segments'] += number_sliding
+
+    return x
+
+
+def modeltemperature_1hour_timestep10(temp, t, a, b, night_hour, Tmax, Tmin):
+    '''
+    Temperature derivative of "modelthermo_1hour_timestep10" alone, 
+    the only variable which feeds back into the dynamics.
+
+    Time step = step_duration (10 s by default)
+
+     #Inputs :
+
+         #temp : temperature of the culture ; °C
+         #t : time (not used, needed for odeint)
+         #a, b : temperature derivative a + b * temp for each of the 4 branches
+         (as in "thermo_derivative_coefficients")
+         #night_hour : True if the hour is without thermoregulation
+         #Tmax : Maximal temperature for the strain ; °C
+         #Tmin : Minimal temperature for the strain ; °C
+
+     #Outputs :
+
+         #dtempdt : temperature derivative ; °C.s-1
+
+          '''
+
+    temp = temp[0]
+
+    if night_hour:
+        branch = 3
+    elif temp > Tmax:
+        branch = 0
+    elif temp < Tmin:
+        branch = 1
+    else:
+        branch = 2
+
+    return a[branch] + b[branch]*temp
+
+
+def thermosimulation_hours_reduced(x0, c0, c1, night_hours, Tmax, Tmin, points_per_hour=360):
+    '''
+    Integrates the temperature alone with odeint 
+    ("modeltemperature_1hour_timestep10"), with the same time points as in 
+    "thermosimulation_1day_timestep10". 
+    The other variables, which are integrals of functions of the temperature,
+    are then calculated at once for the whole day with the trapezoidal rule
+    on the temperature evolution.
+
+     #Inputs : same as "thermosimulation_hours_fixedstep"
+
+     #Outputs :
+
+         #x : array (hours x points_per_hour points x 11 variables) as the outputs of odeint
+
+          '''
+
+    number_hours = c0.shape[0]
+
+    x0 = np.array(x0, dtype=np.float64)
+
+    # hours x points
+    temperatures = np.empty((number_hours, points_per_hour))
+
+    a = c0[:, :, 2].tolist()
+    b = c1[:, :, 2].tolist()
+
+    t = range(1, points_per_hour + 1)
+
+    temp = x0[2]
+
+    for hour in range(number_hours):
+
+        [temperature_hour, infodict] = odeint(modeltemperature_1hour_timestep10,
+                                              [temp],
+                                              t,
+                                              args=(a[hour], b[hour], bool(night_hours[hour]), Tmax, Tmin),
+                                              full_output=True)
+
+        thermal_solver_stats['odeint_function_evaluations'] += infodict['nfe'][-1]
+
+        temperatures[hour] = temperature_hour[:, 0]
+
+        temp = temperatures[hour, -1]
+
+    # Average temperature and temperature change over each step, hours x steps
+    temperatures_average = (temperatures[:, :-1] + temperatures[:, 1:])/2
+
+    temperatures_change = temperatures[:, 1:] - temperatures[:, :-1]
+
+    # The derivatives are affine in the temperature, so that the trapezoidal 
+    # rule gives the derivatives of the branch at the average temperature.
+    # When the temperature is out of the range at the beginning or at the
+    # end of the step, the step is shared between the range and the branch 
+    # out of the range so that the temperature change is respected. 
+    # This gives the time spent at Tmax or Tmin when the culture is
+    # kept at a threshold by the thermoregulation.
+
+    hours = np.arange(number_hours)[:, None]
+
+    # Branch out of the range on the side of the average temperature
+    branches_out = np.where(temperatures_average > (Tmax + Tmin)/2, 0, 1)
+
+    out_of_range = (temperatures > Tmax) | (temperatures < Tmin)
+
+    mixed = (out_of_range[:, :-1] | out_of_range[:, 1:]) & ~np.asarray(night_hours)[:, None]
+
+    rates_out = (np.take(c0[:, :, 2].ravel(), hours*4 + branches_out)
+                 + np.take(c1[:, :, 2].ravel(), hours*4 + branches_out)*temperatures_average)
+
+    rates_range = c0[:, 2, 2][:, None] + c1[:, 2, 2][:, None]*temperatures_average
+
+    rates_difference = np.where(mixed, rates_out - rates_range, 1)
+
+    # Share of the step out of the range, hours x steps
+    shares = np.where(mixed,
+                      np.clip((temperatures_change - rates_range)/rates_difference, 0, 1),
+                      0)
+
+    # Night hours or within the range
+    branches = np.where(np.asarray(night_hours)[:, None], 3, 2)
+
+    positions_range = hours*4 + branches
+    positions_out = hours*4 + branches_out
+
+    # Increments over each step, hours x steps x 11 variables
+    increments = ((1 - shares[:, :, None])
+                  * (np.take(c0.reshape((-1, 11)), positions_range, axis=0)
+                     + np.take(c1.reshape((-1, 11)), positions_range, axis=0)*temperatures_average[:, :, None])
+                  + shares[:, :, None]
+                  * (np.take(c0.reshape((-1, 11)), positions_out, axis=0)
+                     + np.take(c1.reshape((-1, 11)), positions_out, axis=0)*temperatures_average[:, :, None]))
+
+    cumulated = x0 + np.cumsum(increments.reshape((-1, 11)), axis=0).reshape(increments.shape)
+
+    x = np.empty((number_hours, points_per_hour, 11))
+
+    # The first point of each hour is the last point of the previous hour
+    x[0, 0] = x0
+    x[1:, 0] = cumulated[:-1, -1]
+    x[:, 1:] = cumulated
+
+    x[:, :, 2] = temperatures
+
+    return x
+
+
+# Methods to start the day when there is no thermoregulation at night
+# 'twopass' : the day is simulated again starting with the final temperature of a first simulation
+# 'periodic' : the day starts with the temperature for which the final temperature is the same (periodic steady state)
+night_steady_states = ['twopass', 'periodic']
+
+# Convergence tolerance on the difference between the final and initial
+# temperatures of the day for the periodic steady state ; °C
+periodic_steady_state_tolerance = 1e-9
+
+# Maximum number of secant iterations for the periodic steady state
+periodic_steady_state_max_iterations = 50
+
+
+def day_final_temperature(temperature0, a, b, night_hours, Tmax, Tmin, points_per_hour=360):
+    '''
+    Returns the temperature at the end of the day for a given initial
+    temperature, with the piecewise-analytical solution of 
+    "thermosimulation_hour_analytical" (temperature only).
+
+     #Inputs :
+
+         #temperature0 : initial temperature ; °C
+         #a, b : temperature derivative a + b * temp for each hour and branch
+         (lists, 24 hours x 4 branches)
+         #night_hours : list of booleans, True for the hours without thermoregulation
+         #Tmax : Maximal temperature for the strain ; °C
+         #Tmin : Minimal temperature for the strain ; °C
+         #points_per_hour : number of time points per hour (360 for 10 s, see "thermal_time_grid")
+
+     #Outputs :
+
+         #temp : temperature at the end of the day ; °C
+
+          '''
+
+    number_steps = points_per_hour - 1
+
+    temp = temperature0
+
+    for hour in range(len(a)):
+
+        a_hour = a[hour]
+        b_hour = b[hour]
+
+        time = 0.0
+
+        while time < number_steps:
+
+            [branch, sliding, threshold, duration] = analytical_branch(temp, a_hour, b_hour,
+                                                                       night_hours[hour],
+                                                                       Tmax, Tmin)
+
+            if sliding:
+                break
+
+            if time + duration >= number_steps:
+
+                # Until the end of the hour in this branch
+                if b_hour[branch] != 0:
+                    temp = (temp + (a_hour[branch] + b_hour[branch]*temp)
+                            * math.expm1(b_hour[branch]*(number_steps - time))/b_hour[branch])
+                else:
+                    temp = temp + a_hour[branch]*(number_steps - time)
+
+                break
+
+            temp = threshold
+
+            time += duration
+
+    return temp
+
+
+def periodic_initial_temperature(c0, c1, night_hours, Tmax, Tmin, temperature0=5, points_per_hour=360):
+    '''
+    Returns the initial temperature for which the temperature at the end
+    of the day is the same as at the beginning (periodic steady state),
+    when there is no thermoregulation at night.
+
+    The final temperature is an increasing piecewise-affine function of the 
+    initial temperature (the exact solution is affine between the times at 
+    which the temperature reaches Tmax or Tmin). The periodic initial 
+    temperature is found with secant iterations on this function, which give 
+    the exact fixed point as soon as two iterates are on the same affine piece.
+
+     #Inputs :
+
+         #c0, c1 : coefficients for each hour as given by "thermo_derivative_coefficients" 
+         (24 hours x 4 branches x 11 derivatives)
+         #night_hours : array of booleans, True for the hours without thermoregulation
+         #Tmax : Maximal temperature for the strain ; °C
+         #Tmin : Minimal temperature for the strain ; °C
+         #temperature0 : first guess ; °C
+         #points_per_hour : number of time points per hour (360 for 10 s, see "thermal_time_grid")
+
+     #Outputs :
+
+         #temperature : periodic initial temperature ; °C
+         #residual : difference between the final and initial temperatures ; °C
+         #iterations : number of days simulated (temperature only)
+
+          '''
+
+    a = c0[:, :, 2].tolist()
+    b = c1[:, :, 2].tolist()
+
+    night_hours = np.asarray(night_hours).tolist()
+
+    temperature_previous = temperature0
+
+    residual_previous = day_final_temperature(temperature_previous, a, b, night_hours, Tmax, Tmin, points_per_hour) - temperature_previous
+
+    # First iteration as with 'twopass'
+    temperature = temperature_previous + residual_previous
+
+    residual = day_final_temperature(temperature, a, b, night_hours, Tmax, Tmin, points_per_hour) - temperature
+
+    iterations = 2
+
+    while (abs(residual) > periodic_steady_state_tolerance
+           and residual != residual_previous
+           and iterations < periodic_steady_state_max_iterations):
+
+        # Secant iteration
+        temperature_next = temperature - residual*(temperature - temperature_previous)/(residual - residual_previous)
+
+        temperature_previous = temperature
+
+        residual_previous = residual
+
+        temperature = temperature_next
+
+        residual = day_final_temperature(temperature, a, b, night_hours, Tmax, Tmin, points_per_hour) - temperature
+
+        iterations += 1
+
+    thermal_solver_stats['steady_state_solves'] += 1
+    thermal_solver_stats['steady_state_iterations'] += iterations
+    thermal_solver_stats['steady_state_max_residual'] = max(thermal_solver_stats['steady_state_max_residual'],
+                                                            abs(residual))
+
+    return [temperature, residual, iterations]
+
+
 def thermosimulation_1day_timestep10(hconv,
                                      Twell,
                                      depth_well,
@@ -449,798 +1460,2912 @@ def thermosimulation_1day_timestep10(hconv,
                                      rhoalgae,
                                      rhomedium,
                                      dcell,
-                                     night_monitoring):
+                                     night_monitoring,
+                                     engine='odeint',
+                                     night_steady_state='twopass',
+                                     trajectories='lists',
+                                     known_hours=None,
+                                     last_hour=24,
+                                     timestep=10,
+                                     initial_temperature=None,
+                                     harvest_schedule=None):
     '''Integrates the function "modelthermo_1hour_timestep10" over the whole day,
     Calculates the temperature evolution and thermal energy requirements over a day.
 
-    #Inputs :
+    #Inputs :
+
+        #hconv : Convective coefficient air  ; W.m−2.K−1
+        #Twell : Well water temperature ; °C
+        #depth_well : Well depth ; m
+        #facility_volume : PBR volume per m2 ; m3
+        #exchangearea :Total exchange area with air per m2 ; m2
+        #Tmax : Maximal temperature for the strain ; °C
+        #Tmin : Minimal temperature for the strain ; °C
+        #percentage yield : Fraction of the maximum yield achieved ; .
+        # biomassconcentration : Biomass concentration ; g.L-1
+        #flowrate : Flow rate in the pipe ; m.s-1
+        #m : Water mass in the PBR per m2; kg
+        #centrifugation_efficiency : Fraction of the biomass which is separated
+        and harvested ; .
+
+        #pumpefficiency, efficiency of the pump ; .
+
+        # slurry_concentration : Mass Fraction biomass in the slurry ; kg dw.kg slurry-1
+        #water_after_drying : Mass fraction of water in the dried biomass ; kg water.kg dbio-1
+        #recyclingrateaftercentrifuge : share of the supernatant which can
+          be reinjected in the PBR ; .
+
+        #volumetodrypers_list : List of the averaged(from 1 hour to 1 s)
+        volumetric flows to vaporize for every hour of the day. 24 values in L.s-1
+
+        #supernatant_pers_list : List of the averaged(from 1 hour to 1 s)
+        volumetric flows of supernatant produced for every hour of the day.
+        24 values in L.s-1
+
+        #centrifugedvolumepers_list : List of the averaged(from 1 hour to 1 s)
+        volumetric flows centrifuged every hour of the day.
+        24 values in L.s-1
+
+        #centrifugedvolumepers_list_wholeunit : List of the averaged(from 1 hour to 1 s)
+        volumetric flows centrifuged every hour of the day,
+        considering the whole PBR unit and not just 1m2.
+        24 values in L.s-1
+
+        #hourly_temperature_list : list of the air temperatures, for every hour of the day
+        24 values in °C
+
+
+        #hourly_collected_power_list : list of solar irradiance powers collected by 1m2 of the PBR, 
+        for every hour of the day
+        24 values in W.
+
+        #rhoalgae : Density of the algae cell ; kg.m-3
+        #rhomedium : Density of the medium (without algae) ; kg.m-3
+        #dcell : Diameter of the cell ; m
+        #night_monitoring: 'yes' = Thermoregulation  at night,
+        'no' = No Thermoregulation  at night
+
+        #engine : 'odeint' to integrate each hour with scipy odeint,
+        'fixedstep' to use the exponential integrator with a fixed step of 10 s 
+        ("thermosimulation_hours_fixedstep"), about 6 times faster.
+        Differences with odeint measured on 2100 days (3 locations, 14 months,
+        hconv from 4 to 20 W.m-2.K-1, Twell from 8 to 16 °C, 5 thermal ranges,
+        with and without thermoregulation at night) and on 37.189/-3.572 in
+        July with hconv = 8 W.m-2.K-1 (0.632 % on the heat exchanger) :
+        < 0.2 % on the thermal energy demands, < 0.7 % on the energy and water
+        for the heat exchanger, < 0.02 °C on the temperature.
+        'analytical' to solve each hour exactly between the times at which
+        the temperature reaches Tmax or Tmin ("thermosimulation_hours_analytical").
+        'reduced' to integrate only the temperature with odeint and to calculate
+        the other variables afterwards with the trapezoidal rule on the 
+        temperature evolution ("thermosimulation_hours_reduced"), which gives
+        < 0.06 % on the thermal energy demands and < 0.3 % on the heat exchanger.
+        As with 'odeint', odeint can fail when the derivatives on both sides of
+        Tmax or Tmin point towards the threshold, which 'analytical' solves exactly.
+        The statistics of the solvers are cumulated in "thermal_solver_stats".
+
+        #night_steady_state : without thermoregulation at night,
+        'twopass' to simulate the day again starting with the final
+        temperature of a first simulation, 'periodic' to simulate the day once
+        starting with the temperature for which the final temperature is the
+        same ("periodic_initial_temperature", within periodic_steady_state_tolerance).
+
+        #trajectories : 'lists' for the outputs below, False for a summary 
+        of the day only (list of values in the order of "thermal_summary_fields"),
+        True for the summary and an array (8640 points x 11 variables) with 
+        the evolution of all variables (columns in "day_trajectory_fields").
+
+        #known_hours : None, or array (hours x points per hour x 11 variables, 
+        energies in kJ) of the first hours of the day already simulated with
+        the same inputs, which are not integrated again.
+        #last_hour : the day is integrated until this hour. Below 24, the
+        output is the array (last_hour x points per hour x 11 variables, energies
+        in kJ) of these hours, to be given later as known_hours.
+        Without thermoregulation at night and with night_steady_state='twopass',
+        these are the first hours of the first simulation of the day (which
+        starts at 5 °C), the second simulation being integrated entirely.
+        known_hours and last_hour are not possible without thermoregulation
+        at night with night_steady_state='periodic' (and no initial_temperature),
+        as the start of the day then depends on the whole day.
+
+        #timestep : time step of the simulation ; s. 10 s by default,
+        larger steps (for instance 60 s or 300 s) for faster screening runs,
+        see "thermal_time_grid" and "timestep_error_estimate".
+        The trajectories then have 24*3600/timestep points.
+
+        #initial_temperature : None for the default start of the day (5 °C
+        at midnight with thermoregulation at night, steady state given by
+        night_steady_state otherwise), or temperature at midnight carried over
+        from the previous day ; °C. The day is then simulated once from this
+        temperature, also without thermoregulation at night.
+
+        #harvest_schedule : None for the harvest at "harvest_hour", or
+        fractions of the harvest for each hour ("harvest_schedule_array"),
+        used for the temperature at harvest time of the summary (average 
+        temperature at the start of the hours of harvest, weighted by the fractions).
+        The harvest flows are given by the lists above.
+
+
+    #Outputs (trajectories='lists') :
+
+        #totalenergycool : Total thermal energy demand for cooling over a day ; kWh.d-1
+        #totalenergyheat : total thermal energy demand for heating over a day ; kWh.d-1
+        #totalwaterpumpedfacility : Total water needed to be pumped from the facility  over a day ; L.d-1
+        #totalwaterpumpedwell : Total water needed to be pumped from the well over a day ; L.d-1
+        #totalenergytocentrifugeaverage : Total enery needed to centrifuge and harvest the culture, over a day ; kwH.day-1
+        #flatdaytotaltemp : Temperature evolution over a day ;  °C
+        #flatdaytotalEcentrifugkwh : Evolution of the thermal energy provided
+        by the recyling/recplacement of the supernatant, over a day; kWh
+
+        #flatdaytotalEdryingheatkw : Evolution of the thermal energy provided
+        by the recycling of vapor(0 due to the modificaton), over a day ; kWh
+
+        #flatdaytotalEdryingcoolkwh : Evolution of the thermal energy provided
+        by the replacement of vaporized water by well/river water, over a day ; kWh
+
+        #flatdaytotalEdryingmixkwh : Evolution of the thermal energy provided
+        by the replacement of vaporized water by well/river water when there is
+        no need for thermoregulation, over a day  ; kWh
+
+        #flatdaytotalEheatkwh : Evolution of the thermal energy demand for heating over a day ; kWh
+
+        #flatdaytotalEcoolkwh : Evolution of the thermal energy demand for cooling over a day ; kWh
+
+        #flatdaytotalenergyforheatexchangerkwh : Evolution of the energy demand
+        for the cooling heat exchanger over a day ; kWh
+
+        #totalenergyheatexchanger : total  energy demand for the cooling
+        heat exchanger, over a day ; kWh.d-1
+
+        #flatdaytotalwaterforheatexchanger : Evolution of water demand for the cooling
+        heat exchanger over a day; L
+
+        #totalwaterpumpedheatexchanger : Total water demand for the cooling
+        heat exchanger over a day; L.d-1
+
+        '''
+
+    if engine not in thermal_engines:
+        raise ValueError('engine must be one of ' + str(thermal_engines))
+
+    if night_steady_state not in night_steady_states:
+        raise ValueError('night_steady_state must be one of ' + str(night_steady_states))
+
+    [points_per_hour, step_duration] = thermal_time_grid(timestep)
+
+    if known_hours is None:
+        number_known_hours = 0
+    else:
+        number_known_hours = known_hours.shape[0]
+
+    if ((number_known_hours > 0 or last_hour < 24)
+            and night_monitoring != 'yes' and initial_temperature is None
+            and night_steady_state == 'periodic'):
+        raise ValueError('known_hours and last_hour require night_monitoring=\'yes\', '
+                         'initial_temperature or night_steady_state=\'twopass\'')
+
+    if last_hour == 24:
+        thermal_solver_stats['days'] += 1
+
+    if engine != 'odeint':
+
+        return thermosimulation_1day_fixedstep(hconv,
+                                               Twell,
+                                               depth_well,
+                                               Cp,
+                                               exchangearea,
+                                               Tmax,
+                                               Tmin,
+                                               m,
+                                               pumpefficiency,
+                                               recyclingrateaftercentrifuge,
+                                               volumetodrypers_list,
+                                               supernatant_pers_list,
+                                               centrifugedvolumepers_list,
+                                               centrifugedvolumepers_list_wholeunit,
+                                               hourly_temperature_list,
+                                               hourly_collected_power_list,
+                                               rhoalgae,
+                                               rhomedium,
+                                               dcell,
+                                               night_monitoring,
+                                               engine,
+                                               night_steady_state,
+                                               trajectories,
+                                               known_hours,
+                                               last_hour,
+                                               timestep,
+                                               initial_temperature,
+                                               harvest_schedule)
+
+    t = range(1, points_per_hour + 1)  # 3600s per hour, time step of 10s by default
+
+    # Preallocated array that will contain the results of the integration
+    # of all variables over a day (hours x points x 11 variables)
+    # Energies in kJ (1 kW for 1 s = 1kJ), temperature in °C, water in L
+    x_day = np.empty((last_hour, points_per_hour, 11))
+
+    # Initializing values for the integration over the first hour
+    x0 = [0, 0, 5, 0, 0, 0, 0, 0, 0, 0, 0]
+
+    #By default, temperature at 12.00 PM is set at 5 degrees but this
+    #has no influence on the final result
+
+    if initial_temperature is not None:
+        # Temperature carried over from the previous day
+        x0[2] = initial_temperature
+
+    # Without thermoregulation at night, the day can directly start at the
+    # periodic steady state instead of being simulated twice
+    elif night_monitoring == 'no' and night_steady_state == 'periodic':
+
+        hourly_collected_power = np.asarray(hourly_collected_power_list, dtype=np.float64)
+
+        [c0, c1] = thermo_derivative_coefficients(hourly_collected_power,
+                                                  np.asarray(hourly_temperature_list, dtype=np.float64),
+                                                  Twell,
+                                                  depth_well,
+                                                  Cp,
+                                                  exchangearea,
+                                                  hconv,
+                                                  Tmax,
+                                                  Tmin,
+                                                  m,
+                                                  np.asarray(supernatant_pers_list, dtype=np.float64),
+                                                  np.asarray(volumetodrypers_list, dtype=np.float64),
+                                                  recyclingrateaftercentrifuge,
+                                                  pumpefficiency,
+                                                  step_duration)
+
+        x0[2] = periodic_initial_temperature(c0, c1, hourly_collected_power == 0, Tmax, Tmin,
+                                             points_per_hour=points_per_hour)[0]
+
+    #############
+    # If there is no thermoregulation at night,
+    # then the initial temperature value at 12 PM must be the final temperature
+    # value of the simulated day (simulate steady state over a month)
+    #############
+
+    # We resimulate the day with the new initial value for the temperature
+    # (only the first simulation for the hours before last_hour)
+    if (night_monitoring == 'no' and night_steady_state == 'twopass'
+            and initial_temperature is None and last_hour == 24):
+        number_simulations = 2
+    else:
+        number_simulations = 1
+
+    for simulation in range(number_simulations):
+
+        if simulation == 1:
+
+            # Modification of the initial temperature
+            x0 = [0, 0, x_day[-1, -1, 2], 0, 0, 0, 0, 0, 0, 0, 0]
+
+        # Initializing the variable that will contain the total energy demand for
+        # centrifugation
+        totalenergytocentrifugeaverage = 0
+
+        # For each hour, we integrate all the variables starting with the last
+        # point of the previous hour.
+        for hour in range(0, last_hour):
+            # For each hour, the associated value of each variable is chosen
+            Tair = hourly_temperature_list[hour]
+
+            Qsun = hourly_collected_power_list[hour]
+
+            centrifugedvolumepers = centrifugedvolumepers_list[hour]
+
+            supernatant_pers = supernatant_pers_list[hour]
+
+            volumetodrypers = volumetodrypers_list[hour]
+
+            # Only needed for centrifugation energy requirement as non linear.
+            centrifugedvolumepers_wholeunit = centrifugedvolumepers_list_wholeunit[hour]
+
+            if simulation == 0 and hour < number_known_hours:
+                # Already simulated
+                x = known_hours[hour]
+
+            else:
+                # Integration of all variables over an hour
+                [x, infodict] = odeint(modelthermo_1hour_timestep10,
+                                       x0,
+                                       t,
+                                       args=(Qsun, Tair, Twell, depth_well,  # environment
+                                             Cp, exchangearea, hconv,  # thermo
+                                             Tmax, Tmin, m,  # strain
+                                             centrifugedvolumepers,
+                                             supernatant_pers,
+                                             volumetodrypers,
+                                             recyclingrateaftercentrifuge,
+                                             pumpefficiency,
+                                             night_monitoring,
+                                             step_duration),
+                                       full_output=True)
+
+                thermal_solver_stats['hours'] += 1
+                thermal_solver_stats['odeint_function_evaluations'] += infodict['nfe'][-1]
+
+            # New starting values (temperature, energy demands etc.) for next hour
+            x0 = list(x[-1])
+
+            # The array receives the evolution of the variables over this hour.
+            x_day[hour] = x
+
+            #############
+            # Centrifuging energy calculation
+            #############
+
+            # The energey to centrifuge 1m3 depends on the temperature
+            # So we collect the average temperature during this hour
+            Tmeanperhour = sum(x[:, 2])/(points_per_hour + 1)
+
+            # The energy requirement to centrifuge 1m3 depends non linearly on the
+            # centrifugating flow (harvesting flow).
+            # Assuming that there is one centrifuge for each square meter is wrong
+            #and we instead assume that there is one centrifuge for the whole PBR unit.
+
+            #MODIF : In this version, the harvesting flow is constant and fixed at
+            #5m3.h-1 for the whole unit
+            #This does not change the validity of the line below.
+            
+            # Conversion flow from L.s-1 to m3.h-1  #Disk centrifuge
+            centrifuging_energy_averaged = ((centrifugedvolumepers/1000)
+                                            * 3600
+                                            * functions.Centrifugationenergy_m3(rhoalgae,
+                                                                              rhomedium,
+                                                                              Tmeanperhour,
+                                                                              dcell,
+                                                                              (centrifugedvolumepers_wholeunit/1000) * 3600)[0])  
+
+            # Summing over the day
+            totalenergytocentrifugeaverage += centrifuging_energy_averaged
+
+    if last_hour < 24:
+        return x_day
+
+    return thermosimulation_1day_outputs(x_day,
+                                         totalenergytocentrifugeaverage,
+                                         trajectories,
+                                         harvest_schedule)
+
+
+def thermosimulation_1day_outputs(x_day, totalenergytocentrifugeaverage, trajectories='lists', harvest_schedule=None):
+    '''Returns the outputs of "thermosimulation_1day_timestep10" from the 
+    values of the 11 variables over the day.
+
+    #Inputs :
+
+        #x_day : array (24 hours x points per hour x 11 variables) as the outputs
+        of odeint. Modified in place (conversion of the energies to kWh).
+        #totalenergytocentrifugeaverage : Total enery needed to centrifuge and harvest the culture, over a day ; kwH.day-1
+        #trajectories : 'lists', True or False, see "thermosimulation_1day_timestep10"
+        #harvest_schedule : see "thermosimulation_1day_timestep10"
+
+    #Outputs : see "thermosimulation_1day_timestep10"
+
+        '''
+
+    # Whole day, 8640 points x 11 variables with a time step of 10 s
+    flatday = x_day.reshape((-1, 11))
+
+    # Conversion from kJ to kWh, in place
+    flatday[:, day_trajectory_energy_columns] /= 3600
+
+    # Total  and water demands are  the last values of the list - the second values
+    # Removing the initial energies and water consumptions (first 10 sec of the day)
+    # allows to erase the effect of the arbitrary choice of an initial value for 
+    # the temperature in the case of a thermoregulation at night.
+    # It's a way to make the model operate at steady state.
+
+    totalenergycool = flatday[-1, 0] - flatday[1, 0]  # kWh.d-1
+
+    totalenergyheat = flatday[-1, 1] - flatday[1, 1]  # kWh.d-1
+
+    totalenergyheatexchanger = flatday[-1, 9] - flatday[1, 9]  # kWh.d-1
+
+    totalwaterpumpedheatexchanger = flatday[-1, 10] - flatday[1, 9]  # kWh.d-1
+
+    totalwaterpumpedfacility = flatday[-1, 8]  # L
+
+    totalwaterpumpedwell = flatday[-1, 7]  # L
+
+    if trajectories == 'lists':
+
+        return [totalenergycool,
+                totalenergyheat,
+                totalwaterpumpedfacility,
+                totalwaterpumpedwell,
+                totalenergytocentrifugeaverage,
+                flatday[:, 2].tolist(),
+                flatday[:, 3].tolist(),
+                flatday[:, 4].tolist(),
+                flatday[:, 5].tolist(),
+                flatday[:, 6].tolist(),
+                flatday[:, 1].tolist(),
+                flatday[:, 0].tolist(),
+                flatday[:, 9].tolist(),
+                totalenergyheatexchanger,
+                flatday[:, 10].tolist(),
+                totalwaterpumpedheatexchanger]
+
+    # Summary in the order of "thermal_summary_fields"
+    summary = [totalenergycool,
+               totalenergyheat,
+               totalwaterpumpedfacility,
+               totalwaterpumpedwell,
+               totalenergytocentrifugeaverage,
+               totalenergyheatexchanger,
+               totalwaterpumpedheatexchanger,
+               flatday[:, 2].mean(),
+               np.dot(harvest_schedule_array(harvest_schedule), x_day[:, 0, 2]),
+               flatday[-1, 2]]
+
+    if trajectories:
+        return [summary, flatday]
+
+    return summary
+
+
+def thermosimulation_1day_fixedstep(hconv,
+                                    Twell,
+                                    depth_well,
+                                    Cp,
+                                    exchangearea,
+                                    Tmax,
+                                    Tmin,
+                                    m,
+                                    pumpefficiency,
+                                    recyclingrateaftercentrifuge,
+                                    volumetodrypers_list,
+                                    supernatant_pers_list,
+                                    centrifugedvolumepers_list,
+                                    centrifugedvolumepers_list_wholeunit,
+                                    hourly_temperature_list,
+                                    hourly_collected_power_list,
+                                    rhoalgae,
+                                    rhomedium,
+                                    dcell,
+                                    night_monitoring,
+                                    engine='fixedstep',
+                                    night_steady_state='twopass',
+                                    trajectories='lists',
+                                    known_hours=None,
+                                    last_hour=24,
+                                    timestep=10,
+                                    initial_temperature=None,
+                                    harvest_schedule=None):
+    '''Same as "thermosimulation_1day_timestep10" with the fixed-step 
+    integrator "thermosimulation_hours_fixedstep" (engine='fixedstep'),
+    the piecewise-analytical solver "thermosimulation_hours_analytical"
+    (engine='analytical') or odeint on the temperature alone 
+    "thermosimulation_hours_reduced" (engine='reduced') instead of odeint
+    on the 11 variables.
+    
+    #Inputs and Outputs : same as "thermosimulation_1day_timestep10"
+
+        '''
+
+    hours_integrator = {'fixedstep': thermosimulation_hours_fixedstep,
+                        'analytical': thermosimulation_hours_analytical,
+                        'reduced': thermosimulation_hours_reduced}[engine]
+
+    [points_per_hour, step_duration] = thermal_time_grid(timestep)
+
+    hourly_collected_power = np.asarray(hourly_collected_power_list, dtype=np.float64)
+
+    [c0, c1] = thermo_derivative_coefficients(hourly_collected_power,
+                                              np.asarray(hourly_temperature_list, dtype=np.float64),
+                                              Twell,
+                                              depth_well,
+                                              Cp,
+                                              exchangearea,
+                                              hconv,
+                                              Tmax,
+                                              Tmin,
+                                              m,
+                                              np.asarray(supernatant_pers_list, dtype=np.float64),
+                                              np.asarray(volumetodrypers_list, dtype=np.float64),
+                                              recyclingrateaftercentrifuge,
+                                              pumpefficiency,
+                                              step_duration)
+
+    # Hours without thermoregulation
+    night_hours = (hourly_collected_power == 0) & (night_monitoring == 'no')
+
+    # Initial temperature 5 °C, as with odeint
+    temperature0 = 5
+
+    if initial_temperature is not None:
+        temperature0 = initial_temperature
+
+    elif night_monitoring == 'no' and night_steady_state == 'periodic':
+
+        temperature0 = periodic_initial_temperature(c0, c1, night_hours, Tmax, Tmin,
+                                                    points_per_hour=points_per_hour)[0]
+
+    if known_hours is None:
+
+        x = hours_integrator([0, 0, temperature0, 0, 0, 0, 0, 0, 0, 0, 0],
+                             c0[:last_hour], c1[:last_hour], night_hours[:last_hour], Tmax, Tmin,
+                             points_per_hour)
+
+        thermal_solver_stats['hours'] += last_hour
+
+    else:
+        # Only the following hours are integrated
+        first_hour = known_hours.shape[0]
+
+        x = np.concatenate((known_hours,
+                            hours_integrator(known_hours[-1, -1],
+                                             c0[first_hour:last_hour],
+                                             c1[first_hour:last_hour],
+                                             night_hours[first_hour:last_hour],
+                                             Tmax,
+                                             Tmin,
+                                             points_per_hour)))
+
+        thermal_solver_stats['hours'] += last_hour - first_hour
+
+    if last_hour < 24:
+        return x
+
+    # Without thermoregulation at night, the day is simulated again starting
+    # with the final temperature (steady state over a month)
+    if night_monitoring == 'no' and night_steady_state == 'twopass' and initial_temperature is None:
+
+        x = hours_integrator([0, 0, x[-1, -1, 2], 0, 0, 0, 0, 0, 0, 0, 0],
+                             c0, c1, night_hours, Tmax, Tmin, points_per_hour)
+
+        thermal_solver_stats['hours'] += 24
+
+    # Centrifuging energy, as with odeint
+
+    totalenergytocentrifugeaverage = 0
+
+    Tmeanperhour_list = x[:, :, 2].sum(axis=1)/(points_per_hour + 1)
+
+    for hour in range(0, 24):
+
+        Tmeanperhour = Tmeanperhour_list[hour]
+
+        centrifugedvolumepers = centrifugedvolumepers_list[hour]
+
+        centrifugedvolumepers_wholeunit = centrifugedvolumepers_list_wholeunit[hour]
+
+        centrifuging_energy_averaged = ((centrifugedvolumepers/1000)
+                                        * 3600
+                                        * functions.Centrifugationenergy_m3(rhoalgae,
+                                                                          rhomedium,
+                                                                          Tmeanperhour,
+                                                                          dcell,
+                                                                          (centrifugedvolumepers_wholeunit/1000) * 3600)[0])  
+
+        totalenergytocentrifugeaverage += centrifuging_energy_averaged
+
+    return thermosimulation_1day_outputs(x,
+                                         totalenergytocentrifugeaverage,
+                                         trajectories,
+                                         harvest_schedule)
+
+
+def thermosimulation_hours_ensemble(temperature0, c0, c1, night_hours, Tmax, Tmin,
+                                    temperature_evolution=False, points_per_hour=360):
+    '''
+    Same integrator as "thermosimulation_hours_fixedstep" for many samples
+    at once. All samples are advanced together step by step and the branch
+    of each sample (too hot, too cold, within the range, night) is chosen
+    with masks.
+
+    Only the temperature is calculated at each step. For the other variables,
+    the number of steps and the integral of the temperature in each branch 
+    are summed over each hour.
+
+     #Inputs :
+
+         #temperature0 : initial temperatures (samples) ; °C
+         #c0, c1 : coefficients as given by "thermo_derivative_coefficients" 
+         (samples x 24 hours x 4 branches x 11 derivatives)
+         #night_hours : array of booleans (samples x 24 hours), True for the 
+         hours without thermoregulation
+         #Tmax : Maximal temperatures for the strain (samples) ; °C
+         #Tmin : Minimal temperatures for the strain (samples) ; °C
+         #temperature_evolution : True to keep all the temperatures
+         #points_per_hour : number of time points per hour (360 for 10 s, see "thermal_time_grid")
+
+     #Outputs :
+
+         #x_first : values of the 11 variables after the first step of the day (samples x 11)
+         #x_end : values of the 11 variables at the end of the day (samples x 11)
+         #temperature_sums : sum of the temperatures of each hour (samples x 24) ; °C
+         #temperatures : temperature evolution (samples x 24 hours x points per hour) ; °C.
+         None if temperature_evolution is False.
+
+          '''
+
+    number_samples = c0.shape[0]
+
+    steps_per_hour = points_per_hour - 1
+
+    x = np.zeros((number_samples, 11))
+    x[:, 2] = temperature0
+
+    # Temperature derivative : a + b * temp, for each sample, hour and branch
+    a = c0[:, :, :, 2]
+    b = c1[:, :, :, 2]
+
+    [phi1, phi2] = exponential_phi_functions(b)
+
+    # temp(end of the step) = alpha * temp(beginning of the step) + gamma
+    alpha = np.exp(b)
+    gamma = a*phi1
+
+    # Integral of the temperature over the step = phi1 * temp(beginning of the step) + a * phi2
+    integral_constant = a*phi2
+
+    # Position of the first branch of each sample in the arrays (samples x 4 branches)
+    first_branches = np.arange(number_samples)*4
+
+    samples = np.arange(number_samples)
+
+    temperature_sums = np.empty((number_samples, 24))
+
+    if temperature_evolution:
+        temperatures_day = np.empty((number_samples, 24, points_per_hour))
+    else:
+        temperatures_day = None
+
+    temp = x[:, 2].copy()
+
+    for hour in range(24):
+
+        alpha_hour = alpha[:, hour].ravel()
+        gamma_hour = gamma[:, hour].ravel()
+
+        night_hour = night_hours[:, hour]
+
+        any_night = night_hour.any()
+
+        temperatures = np.empty((number_samples, points_per_hour))
+        temperatures[:, 0] = temp
+
+        # Branch of each sample and each step (position in the arrays)
+        positions = np.empty((number_samples, steps_per_hour), dtype=np.int64)
+
+        for step in range(steps_per_hour):
+
+            # 0 : too hot, 1 : too cold, 2 : within the range
+            branches = 2 - 2*(temp > Tmax) - (temp < Tmin)
+
+            if any_night:
+                branches = np.where(night_hour, 3, branches)
+
+            position = first_branches + branches
+
+            temp = np.take(alpha_hour, position)*temp + np.take(gamma_hour, position)
+
+            positions[:, step] = position
+
+            temperatures[:, step + 1] = temp
+
+        integrals = (np.take(phi1[:, hour].ravel(), positions)*temperatures[:, :-1]
+                     + np.take(integral_constant[:, hour].ravel(), positions))
+
+        if hour == 0:
+
+            branch_first = positions[:, 0] - first_branches
+
+            x_first = (x
+                       + c0[samples, 0, branch_first]
+                       + c1[samples, 0, branch_first]*integrals[:, 0, None])
+
+            x_first[:, 2] = temperatures[:, 1]
+
+        # Summing the increments of the hour branch by branch
+        branches = positions - first_branches[:, None]
+
+        for branch in range(4):
+
+            in_branch = branches == branch
+
+            number_steps = in_branch.sum(axis=1)
+
+            if not number_steps.any():
+                continue
+
+            integrals_sum = np.where(in_branch, integrals, 0).sum(axis=1)
+
+            x += (number_steps[:, None]*c0[:, hour, branch]
+                  + integrals_sum[:, None]*c1[:, hour, branch])
+
+        x[:, 2] = temp
+
+        temperature_sums[:, hour] = temperatures.sum(axis=1)
+
+        if temperature_evolution:
+            temperatures_day[:, hour] = temperatures
+
+    return [x_first, x, temperature_sums, temperatures_day]
+
+
+def thermosimulation_1day_ensemble(hconv,
+                                   Twell,
+                                   depth_well,
+                                   Cp,
+                                   exchangearea,
+                                   Tmax,
+                                   Tmin,
+                                   m,
+                                   pumpefficiency,
+                                   recyclingrateaftercentrifuge,
+                                   volumetodrypers_list,
+                                   supernatant_pers_list,
+                                   centrifugedvolumepers_list,
+                                   centrifugedvolumepers_list_wholeunit,
+                                   hourly_temperature_list,
+                                   hourly_collected_power_list,
+                                   rhoalgae,
+                                   rhomedium,
+                                   dcell,
+                                   night_monitoring,
+                                   temperature_evolution=False,
+                                   night_steady_state='twopass',
+                                   timestep=10):
+    '''Simulates the temperature evolution and the thermal energy requirements
+    over a day for many sets of parameters at once (ensemble), with the 
+    fixed-step integrator of "thermosimulation_1day_fixedstep".
+
+    #Inputs : same as "thermosimulation_1day_timestep10" except :
+
+        #Parameters (hconv, Twell, depth_well, Cp, exchangearea, Tmax, Tmin,
+        m, pumpefficiency, recyclingrateaftercentrifuge, rhoalgae, rhomedium, dcell) :
+        single values or arrays with one value per sample
+
+        #Hourly lists (volumetodrypers_list, supernatant_pers_list,
+        centrifugedvolumepers_list, centrifugedvolumepers_list_wholeunit,
+        hourly_temperature_list, hourly_collected_power_list) : 
+        arrays (samples x 24 hours) or 24 values for all samples
+
+        #night_monitoring : 'yes' or 'no', or array with one value per sample
+
+        #temperature_evolution : True to return the temperature evolution
+        of each sample
+
+        #night_steady_state : 'twopass' or 'periodic', start of the day without
+        thermoregulation at night. See "thermosimulation_1day_timestep10".
+
+        #timestep : time step of the simulation ; s. See "thermal_time_grid".
+
+    #Outputs : arrays with one value per sample
+
+        #totalenergycool : Total thermal energy demand for cooling over a day ; kWh.d-1
+        #totalenergyheat : total thermal energy demand for heating over a day ; kWh.d-1
+        #totalwaterpumpedfacility : Total water needed to be pumped from the facility  over a day ; L.d-1
+        #totalwaterpumpedwell : Total water needed to be pumped from the well over a day ; L.d-1
+        #totalenergytocentrifugeaverage : Total enery needed to centrifuge and harvest the culture, over a day ; kwH.day-1
+        #flatdaytotaltemp : Temperature evolution over a day (samples x 8640 points with a time step of 10 s) ;  °C
+        None if temperature_evolution is False.
+        #totalenergyheatexchanger : total  energy demand for the cooling
+        heat exchanger, over a day ; kWh.d-1
+        #totalwaterpumpedheatexchanger : Total water demand for the cooling
+        heat exchanger over a day; L.d-1
+        #Tmeanperhour : Average temperature for each hour (samples x 24 hours) ; °C
+
+        '''
+
+    if night_steady_state not in night_steady_states:
+        raise ValueError('night_steady_state must be one of ' + str(night_steady_states))
+
+    [points_per_hour, step_duration] = thermal_time_grid(timestep)
+
+    parameters = [np.asarray(parameter, dtype=np.float64) 
+                  for parameter in [hconv, Twell, depth_well, Cp, exchangearea, Tmax, Tmin, m,
+                                    pumpefficiency, recyclingrateaftercentrifuge,
+                                    rhoalgae, rhomedium, dcell]]
+
+    hourly = [np.asarray(hourly_list, dtype=np.float64)
+              for hourly_list in [volumetodrypers_list, supernatant_pers_list,
+                                  centrifugedvolumepers_list, centrifugedvolumepers_list_wholeunit,
+                                  hourly_temperature_list, hourly_collected_power_list]]
+
+    night_no = np.asarray(night_monitoring) == 'no'
+
+    shape = np.broadcast_shapes(*[parameter.shape + (1,) for parameter in parameters + [night_no]],
+                                *[hourly_array.shape for hourly_array in hourly],
+                                (1, 24))
+
+    number_samples = shape[0]
+
+    [hconv, Twell, depth_well, Cp, exchangearea, Tmax, Tmin, m,
+     pumpefficiency, recyclingrateaftercentrifuge,
+     rhoalgae, rhomedium, dcell] = [np.broadcast_to(parameter, (number_samples,)) for parameter in parameters]
+
+    [volumetodrypers, supernatant_pers, centrifugedvolumepers, centrifugedvolumepers_wholeunit,
+     hourly_temperature, hourly_collected_power] = [np.broadcast_to(hourly_array, (number_samples, 24))
+                                                    for hourly_array in hourly]
+
+    night_no = np.broadcast_to(night_no, (number_samples,))
+
+    # samples x 24 hours x 4 branches x 11 derivatives
+    [c0, c1] = thermo_derivative_coefficients(hourly_collected_power,
+                                              hourly_temperature,
+                                              Twell[:, None],
+                                              depth_well[:, None],
+                                              Cp[:, None],
+                                              exchangearea[:, None],
+                                              hconv[:, None],
+                                              Tmax[:, None],
+                                              Tmin[:, None],
+                                              m[:, None],
+                                              supernatant_pers,
+                                              volumetodrypers,
+                                              recyclingrateaftercentrifuge[:, None],
+                                              pumpefficiency[:, None],
+                                              step_duration)
+
+    night_hours = (hourly_collected_power == 0) & night_no[:, None]
+
+    # Initial temperature 5 °C, as with odeint
+    temperature0 = np.full(number_samples, 5.0)
+
+    if night_steady_state == 'periodic':
+
+        for sample in np.flatnonzero(night_no):
+
+            temperature0[sample] = periodic_initial_temperature(c0[sample], c1[sample], night_hours[sample],
+                                                                Tmax[sample], Tmin[sample],
+                                                                points_per_hour=points_per_hour)[0]
+
+    [x_first, x_end, temperature_sums, temperatures] = thermosimulation_hours_ensemble(temperature0,
+                                                                                       c0, c1, night_hours, Tmax, Tmin,
+                                                                                       temperature_evolution,
+                                                                                       points_per_hour)
+
+    # Without thermoregulation at night, the day is simulated again starting
+    # with the final temperature (steady state over a month)
+    if night_no.any() and night_steady_state == 'twopass':
+
+        again = np.flatnonzero(night_no)
+
+        results_again = thermosimulation_hours_ensemble(x_end[again, 2],
+                                                        c0[again], c1[again], night_hours[again],
+                                                        Tmax[again], Tmin[again],
+                                                        temperature_evolution,
+                                                        points_per_hour)
+
+        x_first[again] = results_again[0]
+        x_end[again] = results_again[1]
+        temperature_sums[again] = results_again[2]
+
+        if temperature_evolution:
+            temperatures[again] = results_again[3]
+
+    # Centrifuging energy, as with odeint
+
+    Tmeanperhour = temperature_sums/(points_per_hour + 1)
+
+    centrifuging_energy_averaged = ((centrifugedvolumepers/1000)
+                                    * 3600
+                                    * functions.Centrifugationenergy_m3(rhoalgae[:, None],
+                                                                      rhomedium[:, None],
+                                                                      Tmeanperhour,
+                                                                      dcell[:, None],
+                                                                      (centrifugedvolumepers_wholeunit/1000) * 3600)[0])  
+
+    totalenergytocentrifugeaverage = centrifuging_energy_averaged.sum(axis=1)
+
+    # Same totals as with odeint
+
+    totalenergycool = (x_end[:, 0] - x_first[:, 0])/3600  # kWh.d-1
+
+    totalenergyheat = (x_end[:, 1] - x_first[:, 1])/3600  # kWh.d-1
+
+    totalenergyheatexchanger = (x_end[:, 9] - x_first[:, 9])/3600  # kWh.d-1
+
+    totalwaterpumpedheatexchanger = x_end[:, 10] - x_first[:, 9]/3600  # kWh.d-1
+
+    totalwaterpumpedfacility = x_end[:, 8]  # L
+
+    totalwaterpumpedwell = x_end[:, 7]  # L
+
+    if temperature_evolution:
+        flatdaytotaltemp = temperatures.reshape((number_samples, -1))
+    else:
+        flatdaytotaltemp = None
+
+    return [totalenergycool,
+            totalenergyheat,
+            totalwaterpumpedfacility,
+            totalwaterpumpedwell,
+            totalenergytocentrifugeaverage,
+            flatdaytotaltemp,
+            totalenergyheatexchanger,
+            totalwaterpumpedheatexchanger,
+            Tmeanperhour]
+
+
+#################
+# Stages of the daily simulation
+#################
+
+
+def cultivation_climate_stage(lat,
+                              long,
+                              month,
+                              azimuthfrontal,
+                              height,
+                              tubediameter,
+                              gapbetweentubes,
+                              horizontaldistance,
+                              length_of_PBRunit,
+                              width_of_PBR_unit,
+                              transposition,
+                              solar_data):
+    '''
+    Climate stage of "cultivation_simulation_timestep10".
+
+    #Inputs : same as "cultivation_simulation_timestep10"
+
+    #Outputs :
+
+        #hourly_collected_power_list : solar power collected by the PBR 
+        (averaged over 1m2), for each hour ; W
+        #hourly_temperature_list : air temperature, for each hour ; °C
+        #hourly_ground_irradiance_list : ground irradiance, for each hour ; W.m-2
+
+        '''
+
+    # Collecting climatic data
+    if solar_data is None:
+        data = solardata.Qreceived_bym2PBR_month(lat,
+                                                 long,
+                                                 month,
+                                                 azimuthfrontal,
+                                                 height,
+                                                 tubediameter,
+                                                 gapbetweentubes,
+                                                 horizontaldistance,
+                                                 length_of_PBRunit,
+                                                 width_of_PBR_unit,
+                                                 transposition)
+    else:
+        data = solar_data
+
+    # List of sunlight powers collected by the PBR (averaged over 1m2), for each hour    
+    hourly_collected_power_list = data[0]['Average']  # W
+    # Also equivalent to Wh as it's the average power over an hour. 
+    # 1 W during 1h = 1Wh 
+    
+    # List of air temperature, for each hour
+    hourly_temperature_list = data[1]  # °C
+
+    # List of ground irradiances, for each hour    
+    hourly_ground_irradiance_list = data[2]
+
+    return [hourly_collected_power_list,
+            hourly_temperature_list,
+            hourly_ground_irradiance_list]
+
+
+def cultivation_geometry_stage(height,
+                               tubediameter,
+                               gapbetweentubes,
+                               horizontaldistance,
+                               length_of_PBRunit,
+                               width_of_PBR_unit,
+                               rhosuspension):
+    '''
+    Geometry stage of "cultivation_simulation_timestep10".
+
+    #Inputs : same as "cultivation_simulation_timestep10"
+
+    #Outputs :
+
+        #facility_volume : PBR volume per m2 ; m3
+        #exchangearea : Total exchange area with air per m2 ; m2
+        #m : Mass of the culture in 1 m2 of PBR ; kg
+
+        '''
+
+    # Collecting some geometric features
+    geometry = functions.PBR_geometry(height,
+                                      tubediameter,
+                                      gapbetweentubes,
+                                      horizontaldistance,
+                                      length_of_PBRunit,
+                                      width_of_PBR_unit)
+
+    facility_volume = geometry[0]  # m3
+    exchangearea = geometry[5]  # m2
+
+    # Calculating the mass of the culture in 1 m2 of PBR
+    m = rhosuspension*facility_volume  # kg
+
+    return [facility_volume, exchangearea, m]
+
+
+def cultivation_production_stage(climate,
+                                 Biodict,
+                                 ash_dw,
+                                 Nsource,
+                                 fraction_maxyield,
+                                 water_after_drying,
+                                 elemental_contents):
+    '''
+    Production stage of "cultivation_simulation_timestep10".
+
+    #Inputs :
+
+        #climate : outputs of "cultivation_climate_stage"
+        #elemental_contents : table with the elemental composition of the 
+        macronutrients, preferably already extracted with 
+        "elemental_contents_matrix" once for all the days
+        #Other inputs : same as "cultivation_simulation_timestep10"
+
+    #Outputs :
+
+        #totalproduction : Total daily production ; g.d-1
+
+        '''
+
+    hourly_ground_irradiance_list = climate[2]
+
+    # Maximum theoretical yield in g ashfree dw.h-1    
+    yieldbiomass_on_energy = functions.energeticyield_biomass_perkjenergy(Biodict['lipid_af_dw'], #g ashfree dw.kJsunlight-1
+                                                                          ash_dw,
+                                                                          water_after_drying,
+                                                                          Biodict['PAR'],
+                                                                          Biodict['losspigmentantenna'],
+                                                                          Biodict['quantumyield'],
+                                                                          Biodict['lossvoltagejump'],
+                                                                          Biodict['losstoATPNADPH'],
+                                                                          Biodict['losstohexose'],
+                                                                          Biodict['lossrespiration'],
+                                                                          Nsource,
+                                                                          Biodict['phospholipid_fraction'],
+                                                                          elemental_contents)  
+
+    # Maximum theoretical productions per hour without ash
+    # *3.6 to convert irradiance (Wh) into kJ
+    maximum_production_per_hour_list = (hourly_ground_irradiance_list #g ashfree dw.h-1
+                                        * 3.6
+                                        * yieldbiomass_on_energy)
+    
+    # Maximum theoretical production with ash
+    maximum_production_per_hour_list_with_ash = (maximum_production_per_hour_list  # g dw .h-1
+                                                 / (1 - ash_dw))  
+
+    # Actual production depending on how much of the maximum yield can be achieved
+    actual_production_per_hour_list = maximum_production_per_hour_list_with_ash*fraction_maxyield  # g dw.h-1
+
+    # Total production over the dat
+    totalproduction = sum(actual_production_per_hour_list)  # g dw.d-1
+
+    return totalproduction
+
+
+def cultivation_harvest_stage(totalproduction,
+                              geometry,
+                              biomassconcentration,
+                              centrifugation_efficiency,
+                              recyclingrateaftercentrifuge,
+                              slurry_concentration,
+                              water_after_drying,
+                              initial_biomassconcentration,
+                              harvest_schedule):
+    '''
+    Harvest flows stage of "cultivation_simulation_timestep10".
+
+    #Inputs :
+
+        #totalproduction : output of "cultivation_production_stage"
+        #geometry : outputs of "cultivation_geometry_stage"
+        #Other inputs : same as "cultivation_simulation_timestep10"
+
+    #Outputs :
+
+        #totalwater_centrifuged_perday : total amount of water centrifuged over a day ; L.d-1
+        #volumetodrypers_list : volumetric flows to vaporize, array of 24 values ; L.s-1
+        #supernatant_pers_list : volumetric flows of supernatant, array of 24 values ; L.s-1
+        #centrifugedvolumepers_list : volumetric flows centrifuged, array of 24 values ; L.s-1
+        #centrifugedvolumepers_list_wholeunit : volumetric flows centrifuged
+        considering the whole PBR unit, array of 24 values ; L.s-1
+        #removed_biomass : biomass leaving the culture with the harvest ; g.d-1
+        #biomassconcentration_end : biomass concentration after the harvest ; g.L-1
+
+        The flows are distributed over the hours with harvest_schedule
+        ("harvest_schedule_array") : all flows are 0 except at the harvest 
+        hour ("harvest_hour") by default. With an array of schedules, the 
+        flows are arrays (schedules x 24 hours).
+
+        '''
+
+    facility_volume = geometry[0]
+
+    if initial_biomassconcentration is None:
+
+        # The biomass at the end of the day
+        biomass_at_harvest = (biomassconcentration                   # g.L-1
+                              + totalproduction/(facility_volume*1000))
+
+        # Steady state : the harvest removes the production of the day
+        removed_biomass = totalproduction  # g.d-1
+
+    else:
+        # Concentration carried over from the previous day
+        biomass_at_harvest = (initial_biomassconcentration           # g.L-1
+                              + totalproduction/(facility_volume*1000))
+
+        # The harvest brings the concentration back to biomassconcentration,
+        # no harvest before it is reached
+        removed_biomass = (max(biomass_at_harvest - biomassconcentration, 0)  # g.d-1
+                           * facility_volume*1000)
+
+    biomassconcentration_end = (biomass_at_harvest   # g.L-1
+                                - removed_biomass/(facility_volume*1000))
+
+    ###
+    # Centrifuged volumes and water recycling/reinjection
+    ###
+
+    # We consider the centrifugation efficiency and the recycling of part of 
+    # the biomass so that the biomass concentration at the end of the day is
+    # back to biomassconcentration (the same as at the beginning at steady state)
+    totalwater_centrifuged_perday = (removed_biomass           # L.d-1
+                                     / (biomass_at_harvest
+                                        * (centrifugation_efficiency
+                                           + (1 - centrifugation_efficiency)
+                                           * (1-recyclingrateaftercentrifuge))))
+
+
+    # To simplify the code, we assume that all the thermal exchanges due to the 
+    # harvesting of each hour of the schedule are concentrated over this hour
+    # (21h by default), even if  the real harvest (5m3.h-1 for the whole unit) 
+    # may take more or less time
+
+    schedule = harvest_schedule_array(harvest_schedule)
+
+    centrifugedvolumeperhour_list = schedule*totalwater_centrifuged_perday  # L
+
+    centrifugedvolumepers_list = centrifugedvolumeperhour_list/3600
+
+
+    # The energy requirement to centrifuge 1m3 depends non linearly on the
+    # centrifugating flow (harvesting flow).
+    # Assuming that there is one centrifuge for each square meter is wrong
+    # and we instead assume that there is one centrifuge for the whole PBR unit.
+
+    centrifugedvolumepers_list_wholeunit = np.where(schedule > 0, centrifuge_flow_wholeunit, 0)  # L.s-1
+
+
+    # Calculation of the volumes of water to vaporize and the volumes of
+    # supernatant for each hour
+
+    modified_harvested_production_per_hour_list = schedule*removed_biomass
+
+    Water_in_1kg_slurry = 1-slurry_concentration  # kgwater.kgslurry-1
+
+    Water_in_slurry__producedperhour_list = (Water_in_1kg_slurry    #  L
+                                             * modified_harvested_production_per_hour_list 
+                                             / (1000*slurry_concentration))  
+
+    Water_in_slurry__producedpers_list = Water_in_slurry__producedperhour_list/3600  # L
+
+    #If the centrifuged water is not in the slurry, it is in the supernatant
+    supernatant_perhour_list =(centrifugedvolumeperhour_list
+                                -Water_in_slurry__producedperhour_list)
+
+    supernatant_pers_list = supernatant_perhour_list/3600
+
+    volumetodrypers_list = ((1-water_after_drying/slurry_concentration)
+                            * Water_in_slurry__producedpers_list)  # L
+
+    return [totalwater_centrifuged_perday,
+            volumetodrypers_list,
+            supernatant_pers_list,
+            centrifugedvolumepers_list,
+            centrifugedvolumepers_list_wholeunit,
+            removed_biomass,
+            biomassconcentration_end]
+
+
+def cultivation_thermal_before_harvest_stage(climate,
+                                             geometry,
+                                             hconv,
+                                             Twell,
+                                             depth_well,
+                                             Cp,
+                                             Tmax,
+                                             Tmin,
+                                             pumpefficiency,
+                                             recyclingrateaftercentrifuge,
+                                             rhoalgae,
+                                             rhomedium,
+                                             dcell,
+                                             night_monitoring,
+                                             engine,
+                                             night_steady_state,
+                                             timestep,
+                                             initial_temperature,
+                                             harvest_schedule):
+    '''
+    Thermal stage of "cultivation_simulation_timestep10" for the hours 
+    before the harvest, which do not depend on the production.
+    Without thermoregulation at night and with night_steady_state='twopass',
+    these are the hours of the first simulation of the day, which starts 
+    at 5 °C : the second simulation, starting with the final temperature of
+    the first one, is entirely integrated by "cultivation_thermal_stage".
+
+    #Inputs :
+
+        #climate : outputs of "cultivation_climate_stage"
+        #geometry : outputs of "cultivation_geometry_stage"
+        #Other inputs : same as "cultivation_simulation_timestep10"
+
+    #Outputs :
+
+        #x_before_harvest : array (hours before the first hour of harvest x
+        points per hour x 11 variables, energies in kJ), or None without 
+        thermoregulation at night and initial_temperature with 
+        night_steady_state='periodic', as the start of the day then depends
+        on the whole day (or with a harvest from midnight).
+
+        '''
+
+    if (night_monitoring != 'yes' and initial_temperature is None
+            and night_steady_state == 'periodic'):
+        return None
+
+    # First hour with a harvest
+    first_harvest_hour = int(np.flatnonzero(harvest_schedule_array(harvest_schedule))[0])
+
+    if first_harvest_hour == 0:
+        return None
+
+    [hourly_collected_power_list, hourly_temperature_list] = climate[0:2]
+
+    [facility_volume, exchangearea, m] = geometry
+
+    # No flows before the harvest
+    no_flows = [0]*24
+
+    # fraction_maxyield, biomassconcentration, flowrate, centrifugation_efficiency,
+    # slurry_concentration and water_after_drying are not used by the thermal simulation
+    return thermosimulation_1day_timestep10(hconv,
+                                            Twell,
+                                            depth_well,
+                                            Cp,
+                                            facility_volume,
+                                            exchangearea,
+                                            Tmax,
+                                            Tmin,
+                                            None,
+                                            None,
+                                            None,
+                                            m,
+                                            None,
+                                            pumpefficiency,
+                                            None,
+                                            None,
+                                            recyclingrateaftercentrifuge,
+                                            no_flows,
+                                            no_flows,
+                                            no_flows,
+                                            no_flows,
+                                            hourly_temperature_list,
+                                            hourly_collected_power_list,
+                                            rhoalgae,
+                                            rhomedium,
+                                            dcell,
+                                            night_monitoring,
+                                            engine,
+                                            night_steady_state,
+                                            last_hour=first_harvest_hour,
+                                            timestep=timestep,
+                                            initial_temperature=initial_temperature)
+
+
+def cultivation_thermal_stage(climate,
+                              geometry,
+                              harvest,
+                              x_before_harvest,
+                              hconv,
+                              Twell,
+                              depth_well,
+                              Cp,
+                              Tmax,
+                              Tmin,
+                              pumpefficiency,
+                              recyclingrateaftercentrifuge,
+                              rhoalgae,
+                              rhomedium,
+                              dcell,
+                              night_monitoring,
+                              engine,
+                              night_steady_state,
+                              trajectories,
+                              timestep,
+                              initial_temperature,
+                              harvest_schedule):
+    '''
+    Thermal stage of "cultivation_simulation_timestep10" : 
+    "thermosimulation_1day_timestep10" for the whole day, starting from the
+    hours before the harvest when they are known.
+
+    #Inputs :
+
+        #climate : outputs of "cultivation_climate_stage"
+        #geometry : outputs of "cultivation_geometry_stage"
+        #harvest : outputs of "cultivation_harvest_stage"
+        #x_before_harvest : output of "cultivation_thermal_before_harvest_stage"
+        #Other inputs : same as "cultivation_simulation_timestep10"
+
+    #Outputs : same as "thermosimulation_1day_timestep10"
+
+        '''
+
+    [hourly_collected_power_list, hourly_temperature_list] = climate[0:2]
+
+    [facility_volume, exchangearea, m] = geometry
+
+    [totalwater_centrifuged_perday,
+     volumetodrypers_list,
+     supernatant_pers_list,
+     centrifugedvolumepers_list,
+     centrifugedvolumepers_list_wholeunit] = harvest[0:5]
+
+    # Call the function that simulates temperature and thermoregulation
+    return thermosimulation_1day_timestep10(hconv,
+                                            Twell,
+                                            depth_well,
+                                            Cp,
+                                            facility_volume,
+                                            exchangearea,
+                                            Tmax,
+                                            Tmin,
+                                            None,
+                                            None,
+                                            None,
+                                            m,
+                                            None,
+                                            pumpefficiency,
+                                            None,
+                                            None,
+                                            recyclingrateaftercentrifuge,
+                                            volumetodrypers_list,
+                                            supernatant_pers_list,
+                                            centrifugedvolumepers_list,
+                                            centrifugedvolumepers_list_wholeunit,
+                                            hourly_temperature_list,
+                                            hourly_collected_power_list,
+                                            rhoalgae,
+                                            rhomedium,
+                                            dcell,
+                                            night_monitoring,
+                                            engine,
+                                            night_steady_state,
+                                            trajectories,
+                                            known_hours=x_before_harvest,
+                                            timestep=timestep,
+                                            initial_temperature=initial_temperature,
+                                            harvest_schedule=harvest_schedule)
+
+
+def cultivation_day_stage(totalproduction,
+                          geometry,
+                          harvest,
+                          resultsthermo,
+                          centrifugation_efficiency,
+                          recyclingrateaftercentrifuge,
+                          trajectories):
+    '''
+    Last stage of "cultivation_simulation_timestep10" which collects the 
+    results of the day.
+
+    #Inputs :
+
+        #totalproduction : output of "cultivation_production_stage"
+        #geometry : outputs of "cultivation_geometry_stage"
+        #harvest : outputs of "cultivation_harvest_stage"
+        #resultsthermo : outputs of "cultivation_thermal_stage"
+        #Other inputs : same as "cultivation_simulation_timestep10"
+
+    #Outputs : same as "cultivation_simulation_timestep10"
+
+        '''
+
+    facility_volume = geometry[0]
+
+    totalwater_centrifuged_perday = harvest[0]
+
+    centrifugedvolumepers_list_wholeunit = harvest[4]
+
+    [removed_biomass, biomassconcentration_end] = harvest[5:7]
+
+    #Adjusting the actual harvested and lost productions
+
+    totalproduction_harvested = (removed_biomass                
+                                 * (centrifugation_efficiency
+                                    + (1 - centrifugation_efficiency)
+                                    * recyclingrateaftercentrifuge))
+    
+    totalproduction_loss = removed_biomass - totalproduction_harvested #g.d-1
+
+    volumetric_yield = totalproduction/facility_volume  # g.m-3
+
+    if trajectories != 'lists':
+
+        if trajectories:
+            [thermal_summary, trajectory] = resultsthermo
+        else:
+            thermal_summary = resultsthermo
+
+        # Centrifugation rates of the whole unit when harvesting
+        centrifugation_rates_not_0 = [rate for rate in centrifugedvolumepers_list_wholeunit if rate != 0]
+
+        # Summary in the order of "day_summary_fields"
+        summary = (thermal_summary[0:4]
+                   + [totalproduction,
+                      totalproduction_harvested,
+                      totalproduction_loss,
+                      volumetric_yield]
+                   + thermal_summary[4:7]
+                   + [totalwater_centrifuged_perday]
+                   + thermal_summary[7:9]
+                   + [min(centrifugation_rates_not_0),
+                      max(centrifugation_rates_not_0),
+                      thermal_summary[9],
+                      biomassconcentration_end])
+
+        if trajectories:
+            return [summary, trajectory]
+
+        return summary
+
+    #Collecting results
+
+
+    totalenergyneeded_tocool_perday = resultsthermo[0]
+
+    totalenergyneeded_toheat_perday = resultsthermo[1]
+
+    totalwaterpumpedfromthefacility_perday = resultsthermo[2]
+
+    totalwaterpumpedfromthewell_perday = resultsthermo[3]
+
+    totalenergyneededtocentrifuge = resultsthermo[4]
+
+    temperature_evolution = resultsthermo[5]
+
+    energy_evolution_supernatant_recycling_replacing_kWh = resultsthermo[6]
+
+    energy_evolution_drying_heat_kWh = resultsthermo[7]
+
+    energy_evolution_drying_cool_kWh = resultsthermo[8]
+
+    energy_evolution_drying_mix_kWh = resultsthermo[9]
+
+    heatingenergyevolution = resultsthermo[10]
+
+    coolingenergyevolution = resultsthermo[11]
+
+    energyevolution_heatexchanger = resultsthermo[12]
+
+    totalenergyneeded_heatexchanger_perday = resultsthermo[13]
+
+    heatexchanger_water_evolution = resultsthermo[14]
+
+    totalwaterheatexchanger = resultsthermo[15]
+
+    return [totalenergyneeded_tocool_perday,
+            totalenergyneeded_toheat_perday,
+            totalwaterpumpedfromthefacility_perday,
+            totalwaterpumpedfromthewell_perday,
+            totalproduction,
+            totalproduction_harvested,
+            totalproduction_loss,
+            volumetric_yield,
+            totalenergyneededtocentrifuge,
+            temperature_evolution,
+            energy_evolution_supernatant_recycling_replacing_kWh,
+            energy_evolution_drying_heat_kWh,
+            energy_evolution_drying_cool_kWh,
+            energy_evolution_drying_mix_kWh,
+            heatingenergyevolution,
+            coolingenergyevolution,
+            energyevolution_heatexchanger,
+            totalenergyneeded_heatexchanger_perday,
+            heatexchanger_water_evolution,
+            totalwaterheatexchanger,
+            centrifugedvolumepers_list_wholeunit,
+            totalwater_centrifuged_perday]
+
+
+# Stages of "cultivation_simulation_timestep10" in the order of calculation,
+# with their function and inputs (arguments of "cultivation_simulation_timestep10"
+# or outputs of previous stages) :
+# climate -> geometry -> production -> harvest flows -> thermal
+cultivation_stages = collections.OrderedDict([
+    ('climate', [cultivation_climate_stage,
+                 ['lat', 'long', 'month', 'azimuthfrontal',
+                  'height', 'tubediameter', 'gapbetweentubes', 'horizontaldistance',
+                  'length_of_PBRunit', 'width_of_PBR_unit',
+                  'transposition', 'solar_data']]),
+    ('geometry', [cultivation_geometry_stage,
+                  ['height', 'tubediameter', 'gapbetweentubes', 'horizontaldistance',
+                   'length_of_PBRunit', 'width_of_PBR_unit', 'rhosuspension']]),
+    ('production', [cultivation_production_stage,
+                    ['climate', 'Biodict', 'ash_dw', 'Nsource', 'fraction_maxyield',
+                     'water_after_drying', 'elemental_contents']]),
+    ('harvest', [cultivation_harvest_stage,
+                 ['production', 'geometry', 'biomassconcentration',
+                  'centrifugation_efficiency', 'recyclingrateaftercentrifuge',
+                  'slurry_concentration', 'water_after_drying',
+                  'initial_biomassconcentration', 'harvest_schedule']]),
+    ('thermal_before_harvest', [cultivation_thermal_before_harvest_stage,
+                                ['climate', 'geometry', 'hconv', 'Twell', 'depth_well',
+                                 'Cp', 'Tmax', 'Tmin', 'pumpefficiency',
+                                 'recyclingrateaftercentrifuge', 'rhoalgae',
+                                 'rhomedium', 'dcell', 'night_monitoring', 'engine',
+                                 'night_steady_state', 'timestep', 'initial_temperature',
+                                 'harvest_schedule']]),
+    ('thermal', [cultivation_thermal_stage,
+                 ['climate', 'geometry', 'harvest', 'thermal_before_harvest',
+                  'hconv', 'Twell', 'depth_well', 'Cp', 'Tmax', 'Tmin',
+                  'pumpefficiency', 'recyclingrateaftercentrifuge', 'rhoalgae',
+                  'rhomedium', 'dcell', 'night_monitoring', 'engine',
+                  'night_steady_state', 'trajectories', 'timestep',
+                  'initial_temperature', 'harvest_schedule']]),
+    ('day', [cultivation_day_stage,
+             ['production', 'geometry', 'harvest', 'thermal',
+              'centrifugation_efficiency', 'recyclingrateaftercentrifuge',
+              'trajectories']])])
+
+
+def cultivation_simulation_timestep10(hconv,
+                                      Twell,
+                                      depth_well,
+                                      lat,
+                                      long,
+                                      azimuthfrontal,
+                                      month,
+                                      Cp, 
+                                      height,
+                                      tubediameter,
+                                      gapbetweentubes,
+                                      horizontaldistance,
+                                      length_of_PBRunit,
+                                      width_of_PBR_unit, 
+                                      rhoalgae,
+                                      rhomedium,
+                                      rhosuspension,
+                                      dcell,
+                                      Tmax,
+                                      Tmin,
+                                      Biodict,
+                                      ash_dw,
+                                      Nsource, 
+                                      fraction_maxyield, 
+                                      biomassconcentration,
+                                      flowrate,  
+                                      centrifugation_efficiency,
+                                      pumpefficiency, 
+                                      slurry_concentration,
+                                      water_after_drying,
+                                      recyclingrateaftercentrifuge,
+                                      night_monitoring,
+                                      elemental_contents,
+                                      transposition=None,
+                                      solar_data=None,
+                                      engine='odeint',
+                                      night_steady_state='twopass',
+                                      trajectories='lists',
+                                      timestep=10,
+                                      initial_temperature=None,
+                                      initial_biomassconcentration=None,
+                                      harvest_schedule=None):
+
+
+    '''
+    #function that simulates the cultivation over a day.
+    The day is calculated stage by stage, as declared in "cultivation_stages".
+
+    #Inputs :
+
+        #hconv : convective coefficient air  ; W m−2 K−1
+        #Twell : Well water temperature ; °C
+        #depth_well : Well depth ; m
+        #PBR geometry parameters :
+            height ; m
+            tubediameter ; m
+            gapbetweentube ; m
+            horizontaldistance ; m
+            length_of_PBRunit ; m
+            width_of_PBR_unit ; m
+
+        #location parameters :
+            lat : latitute expressed in format ; XX.XXX or X.XXX
+            long : longitude expressed in format ; XX.XXX or X.XXX
+            azimuthfrontal : azimuth of the frontal side of the PBR unit ;  180:-180
+
+        #rhoalgae : Density of the algae cell ; kg.m-3
+        #rhomedium : Density of the medium (without algae) ; kg.m-3
+        #rhosuspension : Density of the culture suspension ; kg.m-3
+        #dcell : Diameter of the cell ; m
+        #Tmax : Maximal temperature for the strain ; °C
+        #Tmin : Minimal temperature for the strain ; °C
+
+
+        #Biodict : Dictionnary containing all strain specific parameters.
+
+        *No conflict with other parameters called individually.
+        Avoids having too many input parameters in the function.
+
+        #ash_dw : ash content in dry biomass ; g.g-1 dw
+        #Nsource :Source of nitrogen ; Nitrate or Ammonium (no3 or nh3)
+        #pourcentage yield : Fraction of the maximum yield achieved ; .
+        # biomassconcentration : Biomass concentration ; g.L-1
+        #flowrate : Flow rate in the pipe ; m.s-1
+        #centrifugation_efficiency : Fraction of the biomass which is separated
+        and harvested ; .
+
+        #pumpefficiency, efficiency of the pump ; .
+        # slurry_concentration : Mass Fraction biomass in the slurry ; kg dw.kg slurry-1
+        #water_after_drying : Mass fraction of water in the dried biomass ; kg water.kg dbio-1
+        #recyclingrateaftercentrifuge : share of the supernatant which can
+          be reinjected in the PBR ; .
+
+        #night_monitoring: 'yes' = Thermoregulation  at night,
+        'no' = No Thermoregulation  at night
+
+        #transposition : None to use the PVGIS vertical surfaces, or sky model
+        used to calculate them locally from the horizontal surface
+        ('haydavies' or 'isotropic'). See Solar_transposition_1.
+
+        #solar_data : None to use the PVGIS average day of the month,
+        or the output of "Qreceived_bym2PBR_day" to simulate a given day of
+        an hourly time series (month is then ignored).
+
+        #engine : integrator for the temperature, 'odeint', 'fixedstep', 'analytical' or 'reduced'.
+        See "thermosimulation_1day_timestep10".
+        #night_steady_state : 'twopass' or 'periodic', start of the day without
+        thermoregulation at night. See "thermosimulation_1day_timestep10".
+
+        #trajectories : 'lists' for the outputs below, False for a summary 
+        of the day only (list of values in the order of "day_summary_fields"),
+        True for the summary and an array (8640 points x 11 variables) with 
+        the evolution of all variables (columns in "day_trajectory_fields").
+
+        #timestep : time step of the thermal simulation ; s. 10 s by default, 
+        60 s or 300 s for faster screening runs (the trajectories then have
+        24*3600/timestep points). The days simulated with another time step
+        are sampled to estimate the error ("timestep_error_estimate").
+
+        #initial_temperature : None for the steady state of an average day,
+        or temperature at midnight carried over from the previous day ; °C.
+        See "thermosimulation_1day_timestep10".
+        #initial_biomassconcentration : None for the steady state of an average
+        day (the harvest removes the production of the day), or biomass 
+        concentration at midnight carried over from the previous day ; g.L-1.
+        The harvest then brings the concentration back to biomassconcentration.
+        See "cultivation_simulation_season".
+
+        #harvest_schedule : None for the whole harvest at 9 PM ("harvest_hour"), 
+        or fractions of the daily harvest centrifuged during each hour 
+        (24 values which sum to 1, see "harvest_schedule_array").
+        See "cultivation_harvest_schedules" to compare many schedules at once.
+
+
+    # Outputs (trajectories='lists') :
+  
+       #totalenergyneeded_tocool_perday : Total thermal enery demand for cooling the system over a day  ; kWh.d-1
+       #totalenergyneeded_toheat_perday : Total thermal energy demand for heating over a day ; kWh.d-1
+       #totalwaterpumpedfromthefacility_perday : Total water which needs to be pumped from the facility  over a day ; L.d-1
+       #totalwaterpumpedfromthewell_perday : Total water which needs to be pumped from the well over a day ; L.d-1
+       #totalproduction : Total daily production ; g.d-1
+       #totalproduction_harvested : Total harvested daily production ; g.d-1
+       #totalproduction_loss : Total lost daily production ; g.d-1
+       #volumetric_yield : Volumetric yield ; g.m-3
+       #totalenergyneededtocentrifuge : Total energy demand for centrifugation ; kWh.d-1
+       #temperature_evolution ; Temperature evolution over the day (8640 points) ; °C  
+       #energy_evolution_supernatant_recycling_replacing_kWh : Evolution of the energy
+       provided by supernatant recycling/replacement ; kWh
+
+       #energy_evolution_drying_heat_kWh : Evolution of the energy provided by 
+       recycling vapor when heating is required ; kWh# MODIF: Always 0.
+
+       #energy_evolution_drying_cool_kWh : Evolution of the energy provided by 
+       replacing the vapor  ; kWh
+       MODIF: The vapor is always replaced by well water.
+
+       #energy_evolution_drying_mix_kWh : Evolution of the energy provided by 
+       replacing the vapor when no thermoregulation is needed  ; kWh 
+       MODIF: The vapor is always replaced by well water.
+              
+       #heatingenergyevolution : Evolution of the thermal energy demand for heating ; kWh   
+       #coolingenergyevolution : Evolution of the thermal energy demand for cooling ; kWh
+       #energyevolution_heatexchanger : Evolution of the energy demand for 
+       the cooling heat exchanger ; kWh
+
+       #totalenergyneeded_heatexchanger_perday : Total energy demand for the cooling heating exchanger over a day ; kWh.d-1 
+       #heatexchanger_water_evolution : Evolution of water demand for the heat exchanger ; kWh
+       #totalwaterheatexchanger : Total water demand for the heat exchanger over a day; kWh.d-1
+       
+       
+       
+       #centrifugedvolumepers_list_wholeunit : List of the averaged(from 1 hour to 1 s)
+        volumetric flows centrifuged every hour of the day,
+        considering the whole PBR unit and not just 1m2.
+        24 values in L.s-1
+        
+        
+       #totalwater_centrifuged_perday : total amount of water centrifuged over a day ; L.d-1
+
+       '''
+
+    # Values of the arguments
+    values = locals().copy()
+
+    if timestep != timestep_reference:
+        record_timestep_error_sample(values)
+
+    return cultivation_stages_results(values)
+
+
+def cultivation_stages_results(values):
+    '''
+    Calculates the stages of "cultivation_simulation_timestep10" one after the other.
+
+    #Inputs :
+
+        #values : dictionnary with the values of all the arguments of
+        "cultivation_simulation_timestep10", completed in place with the
+        outputs of each stage
+
+    #Outputs : same as "cultivation_simulation_timestep10"
+
+        '''
+
+    for stage in cultivation_stages:
+
+        [stage_function, stage_inputs] = cultivation_stages[stage]
+
+        values[stage] = stage_function(*[values[name] for name in stage_inputs])
+
+    return values['day']
+
+
+
+#################
+# Harvest schedules
+#################
+
+
+def cultivation_harvest_schedules(harvest_schedules, *args, **kwargs):
+    '''
+    Simulates the same day with many harvest schedules in one pass, for 
+    instance to choose the hours of harvest which minimize the energy for
+    centrifugation and cooling. The climate, geometry and production are 
+    calculated once, the harvest flows of all the schedules as arrays and 
+    the temperature of all the schedules at once with "thermosimulation_1day_ensemble"
+    (fixed-step integrator, whatever the engine).
+
+    #Inputs :
+
+        #harvest_schedules : array (schedules x 24 hours) with the fractions
+        of the daily harvest centrifuged during each hour (see "harvest_schedule_array"),
+        for instance numpy.eye(24) for a harvest at each hour of the day
+        #args, kwargs : arguments of "cultivation_simulation_timestep10"
+        (harvest_schedule and trajectories are not used, initial_temperature
+        must be None)
+
+    #Outputs :
+
+        #results : dataframe with one row per schedule and the columns
+        "thermal_summary_fields"
+
+        '''
+
+    arguments = cultivation_signature.bind(*args, **kwargs)
+
+    arguments.apply_defaults()
+
+    values = dict(arguments.arguments)
 
-        #hconv : Convective coefficient air  ; W.m−2.K−1
-        #Twell : Well water temperature ; °C
-        #depth_well : Well depth ; m
-        #facility_volume : PBR volume per m2 ; m3
-        #exchangearea :Total exchange area with air per m2 ; m2
-        #Tmax : Maximal temperature for the strain ; °C
-        #Tmin : Minimal temperature for the strain ; °C
-        #percentage yield : Fraction of the maximum yield achieved ; .
-        # biomassconcentration : Biomass concentration ; g.L-1
-        #flowrate : Flow rate in the pipe ; m.s-1
-        #m : Water mass in the PBR per m2; kg
-        #centrifugation_efficiency : Fraction of the biomass which is separated
-        and harvested ; .
+    if values['initial_temperature'] is not None:
+        raise ValueError('initial_temperature is not possible with several harvest schedules')
 
-        #pumpefficiency, efficiency of the pump ; .
+    schedules = harvest_schedule_array(harvest_schedules).reshape((-1, 24))
 
-        # slurry_concentration : Mass Fraction biomass in the slurry ; kg dw.kg slurry-1
-        #water_after_drying : Mass fraction of water in the dried biomass ; kg water.kg dbio-1
-        #recyclingrateaftercentrifuge : share of the supernatant which can
-          be reinjected in the PBR ; .
+    values['harvest_schedule'] = schedules
 
-        #volumetodrypers_list : List of the averaged(from 1 hour to 1 s)
-        volumetric flows to vaporize for every hour of the day. 24 values in L.s-1
+    # Stages which do not depend on the temperature, harvest flows for all the schedules
+    for stage in ['climate', 'geometry', 'production', 'harvest']:
 
-        #supernatant_pers_list : List of the averaged(from 1 hour to 1 s)
-        volumetric flows of supernatant produced for every hour of the day.
-        24 values in L.s-1
+        [stage_function, stage_inputs] = cultivation_stages[stage]
 
-        #centrifugedvolumepers_list : List of the averaged(from 1 hour to 1 s)
-        volumetric flows centrifuged every hour of the day.
-        24 values in L.s-1
+        values[stage] = stage_function(*[values[name] for name in stage_inputs])
 
-        #centrifugedvolumepers_list_wholeunit : List of the averaged(from 1 hour to 1 s)
-        volumetric flows centrifuged every hour of the day,
-        considering the whole PBR unit and not just 1m2.
-        24 values in L.s-1
+    [hourly_collected_power_list, hourly_temperature_list] = values['climate'][0:2]
 
-        #hourly_temperature_list : list of the air temperatures, for every hour of the day
-        24 values in °C
+    [facility_volume, exchangearea, m] = values['geometry']
 
+    [totalwater_centrifuged_perday,
+     volumetodrypers_list,
+     supernatant_pers_list,
+     centrifugedvolumepers_list,
+     centrifugedvolumepers_list_wholeunit] = values['harvest'][0:5]
 
-        #hourly_collected_power_list : list of solar irradiance powers collected by 1m2 of the PBR, 
-        for every hour of the day
-        24 values in W.
+    [totalenergycool,
+     totalenergyheat,
+     totalwaterpumpedfacility,
+     totalwaterpumpedwell,
+     totalenergytocentrifugeaverage,
+     flatdaytotaltemp,
+     totalenergyheatexchanger,
+     totalwaterpumpedheatexchanger,
+     Tmeanperhour] = thermosimulation_1day_ensemble(values['hconv'],
+                                                    values['Twell'],
+                                                    values['depth_well'],
+                                                    values['Cp'],
+                                                    exchangearea,
+                                                    values['Tmax'],
+                                                    values['Tmin'],
+                                                    m,
+                                                    values['pumpefficiency'],
+                                                    values['recyclingrateaftercentrifuge'],
+                                                    volumetodrypers_list,
+                                                    supernatant_pers_list,
+                                                    centrifugedvolumepers_list,
+                                                    centrifugedvolumepers_list_wholeunit,
+                                                    hourly_temperature_list,
+                                                    hourly_collected_power_list,
+                                                    values['rhoalgae'],
+                                                    values['rhomedium'],
+                                                    values['dcell'],
+                                                    values['night_monitoring'],
+                                                    temperature_evolution=True,
+                                                    night_steady_state=values['night_steady_state'],
+                                                    timestep=values['timestep'])
 
-        #rhoalgae : Density of the algae cell ; kg.m-3
-        #rhomedium : Density of the medium (without algae) ; kg.m-3
-        #dcell : Diameter of the cell ; m
-        #night_monitoring: 'yes' = Thermoregulation  at night,
-        'no' = No Thermoregulation  at night
+    points_per_hour = thermal_time_grid(values['timestep'])[0]
 
+    # Temperature at the start of each hour of harvest, weighted by the fractions
+    temperature_harvest = (schedules*flatdaytotaltemp[:, ::points_per_hour]).sum(axis=1)
 
-    #Outputs :
+    # Columns in the order of "thermal_summary_fields"
+    return pd.DataFrame(np.column_stack((totalenergycool,
+                                         totalenergyheat,
+                                         totalwaterpumpedfacility,
+                                         totalwaterpumpedwell,
+                                         totalenergytocentrifugeaverage,
+                                         totalenergyheatexchanger,
+                                         totalwaterpumpedheatexchanger,
+                                         flatdaytotaltemp.mean(axis=1),
+                                         temperature_harvest,
+                                         flatdaytotaltemp[:, -1])),
+                        columns=thermal_summary_fields)
 
-        #totalenergycool : Total thermal energy demand for cooling over a day ; kWh.d-1
-        #totalenergyheat : total thermal energy demand for heating over a day ; kWh.d-1
-        #totalwaterpumpedfacility : Total water needed to be pumped from the facility  over a day ; L.d-1
-        #totalwaterpumpedwell : Total water needed to be pumped from the well over a day ; L.d-1
-        #totalenergytocentrifugeaverage : Total enery needed to centrifuge and harvest the culture, over a day ; kwH.day-1
-        #flatdaytotaltemp : Temperature evolution over a day ;  °C
-        #flatdaytotalEcentrifugkwh : Evolution of the thermal energy provided
-        by the recyling/recplacement of the supernatant, over a day; kWh
 
-        #flatdaytotalEdryingheatkw : Evolution of the thermal energy provided
-        by the recycling of vapor(0 due to the modificaton), over a day ; kWh
 
-        #flatdaytotalEdryingcoolkwh : Evolution of the thermal energy provided
-        by the replacement of vaporized water by well/river water, over a day ; kWh
 
-        #flatdaytotalEdryingmixkwh : Evolution of the thermal energy provided
-        by the replacement of vaporized water by well/river water when there is
-        no need for thermoregulation, over a day  ; kWh
 
-        #flatdaytotalEheatkwh : Evolution of the thermal energy demand for heating over a day ; kWh
+#################
+# Batches of days
+#################
 
-        #flatdaytotalEcoolkwh : Evolution of the thermal energy demand for cooling over a day ; kWh
 
-        #flatdaytotalenergyforheatexchangerkwh : Evolution of the energy demand
-        for the cooling heat exchanger over a day ; kWh
+# Maximum number of days integrated together by "cultivation_simulation_batch"
+# (the temperatures of all the points of the days are kept : 
+# 8640 values per day with a time step of 10 s)
+cultivation_batch_size = 512
 
-        #totalenergyheatexchanger : total  energy demand for the cooling
-        heat exchanger, over a day ; kWh.d-1
+# Days of a batch integrated together : same site, month and options
+cultivation_batch_group_inputs = ['lat', 'long', 'month', 'azimuthfrontal', 'transposition',
+                                  'solar_data', 'night_steady_state', 'timestep']
 
-        #flatdaytotalwaterforheatexchanger : Evolution of water demand for the cooling
-        heat exchanger over a day; L
 
-        #totalwaterpumpedheatexchanger : Total water demand for the cooling
-        heat exchanger over a day; L.d-1
+def cultivation_simulation_batch(days):
+    '''
+    Simulates many days at once, for instance the average day of each month 
+    for all the sets of parameters of a Monte Carlo sample. The stages which
+    do not depend on the temperature are calculated for each day, and the days
+    with the same site, month and options ("cultivation_batch_group_inputs") 
+    are integrated together with "thermosimulation_1day_ensemble" 
+    (fixed-step integrator, whatever the engine), by chunks of 
+    "cultivation_batch_size" days. The ensemble advances all the days of a
+    chunk step by step : it is faster than simulating the days one by one 
+    only for large groups (hundreds of days).
+
+    #Inputs :
+
+        #days : list of dictionnaries with the arguments of 
+        "cultivation_simulation_timestep10" for each day (default values for 
+        the missing ones). trajectories is not used and initial_temperature
+        must be None.
+
+    #Outputs :
+
+        #summaries : list with the summary of each day, as given by
+        "cultivation_simulation_timestep10" with trajectories=False
+        (values in the order of "day_summary_fields")
 
         '''
 
-    t = range(1, 361)  # 3600s per hour, but time step 10s
+    # Days of each group, in the order of the days
+    groups = collections.OrderedDict()
 
-    #Initializing the lists that will contain the reuslts of the integration
-    # of all variables over a day
-    daytotaltemp = []  # °C
-    daytotalEcool = []  # kJ  (1 kW for 1 s = 1kJ  )
-    daytotalEheat = []  # kJ
-    daytotalEcentrifug = []  # kJ
-    daytotalEdryingheat = []  # kJ
-    daytotalEdryingcool = []  # kJ
-    daytotalEdryingmix = []  # kJ
-    daytotalwaterpumpedwell = []  # L
-    daytotalwaterpumpedfacility = []  # L
-    daytotalenergyforheatexchanger = []  # kJ
-    daytotalwaterforheatexchanger = []  # L
+    days_values = []
 
+    for day in days:
 
-    # Initializing values for the integration over the first hour
-    x0 = [0, 0, 5, 0, 0, 0, 0, 0, 0, 0, 0]
+        arguments = cultivation_signature.bind(**day)
 
-    #By default, temperature at 12.00 PM is set at 5 degrees but this
-    #has no influence on the final result
+        arguments.apply_defaults()
 
-    # Initializing the variable that will contain the total energy demand for
-    # centrifugation
-    totalenergytocentrifugeaverage = 0
+        values = dict(arguments.arguments)
 
-    # For each hour, we integrate all the variables starting with the last
-    # point of the previous hour.
-    for hour in range(0, 24):
-        # For each hour, the associated value of each variable is chosen
-        Tair = hourly_temperature_list[hour]
+        if values['initial_temperature'] is not None:
+            raise ValueError('initial_temperature is not possible in a batch of days')
 
-        Qsun = hourly_collected_power_list[hour]
+        values['trajectories'] = False
 
-        centrifugedvolumepers = centrifugedvolumepers_list[hour]
+        if values['timestep'] != timestep_reference:
+            record_timestep_error_sample(values)
 
-        supernatant_pers = supernatant_pers_list[hour]
+        content = hashlib.sha256()
 
-        volumetodrypers = volumetodrypers_list[hour]
+        for name in cultivation_batch_group_inputs:
+            cultivation_key_update(content, name, values[name])
 
-        # Only needed for centrifugation energy requirement as non linear.
-        centrifugedvolumepers_wholeunit = centrifugedvolumepers_list_wholeunit[hour]
+        groups.setdefault(content.hexdigest(), []).append(len(days_values))
 
-        # Integration of all variables over an hour
-        x = odeint(modelthermo_1hour_timestep10,
-                   x0,
-                   t,
-                   args=(Qsun, Tair, Twell, depth_well,  # environment
-                         Cp, exchangearea, hconv,  # thermo
-                         Tmax, Tmin, m,  # strain
-                         centrifugedvolumepers,
-                         supernatant_pers,
-                         volumetodrypers,
-                         recyclingrateaftercentrifuge,
-                         pumpefficiency,
-                         night_monitoring,))
-
-        x0[0] = x[-1, 0]  # new starting temperature for next hour
-        x0[1] = x[-1, 1]  # new starting Cooling energy demand for next hour
-        x0[2] = x[-1, 2]  # etc.
-        x0[3] = x[-1, 3]
-        x0[4] = x[-1, 4]
-        x0[5] = x[-1, 5]
-        x0[6] = x[-1, 6]
-        x0[7] = x[-1, 7]
-        x0[8] = x[-1, 8]
-        x0[9] = x[-1, 9]
-        x0[10] = x[-1, 10]
-
-        # Each list for each variable receives the evolution of the variable over this hour.
-        
-        daytotalEcool.append(x[:, 0])  # kJ
-        daytotalEheat.append(x[:, 1])  # kJ
-        daytotaltemp.append(x[:, 2])   # °C
-        daytotalEcentrifug.append(x[:, 3])  # kJ
-        daytotalEdryingheat.append(x[:, 4])  # kJ
-        daytotalEdryingcool.append(x[:, 5])  # kJ
-        daytotalEdryingmix.append(x[:, 6])  # kJ
-        daytotalwaterpumpedwell.append(x[:, 7])  # L
-        daytotalwaterpumpedfacility.append(x[:, 8])  # L
-        daytotalenergyforheatexchanger.append(x[:, 9])  # kJ
-        daytotalwaterforheatexchanger.append(x[:, 10])  # L
-
-        #############
-        # Centrifuging energy calculation
-        #############
-
-        # The energey to centrifuge 1m3 depends on the temperature
-        # So we collect the average temperature during this hour
-        Tmeanperhour = sum(x[:, 2])/361
-
-        # The energy requirement to centrifuge 1m3 depends non linearly on the
-        # centrifugating flow (harvesting flow).
-        # Assuming that there is one centrifuge for each square meter is wrong
-        #and we instead assume that there is one centrifuge for the whole PBR unit.
-
-        #MODIF : In this version, the harvesting flow is constant and fixed at
-        #5m3.h-1 for the whole unit
-        #This does not change the validity of the line below.
+        days_values.append(values)
+
+    summaries = [None]*len(days_values)
+
+    # Climates already calculated in the batch (same PBR geometry)
+    climates = {}
+
+    for group in groups.values():
+
+        # Stages which do not depend on the temperature
+        for index in group:
+
+            values = days_values[index]
+
+            [stage_function, stage_inputs] = cultivation_stages['climate']
+
+            content = hashlib.sha256()
+
+            for name in stage_inputs:
+                cultivation_key_update(content, name, values[name])
+
+            key = content.hexdigest()
+
+            if key not in climates:
+                climates[key] = stage_function(*[values[name] for name in stage_inputs])
+
+            values['climate'] = climates[key]
+
+            for stage in ['geometry', 'production', 'harvest']:
+
+                [stage_function, stage_inputs] = cultivation_stages[stage]
+
+                values[stage] = stage_function(*[values[name] for name in stage_inputs])
+
+        first_values = days_values[group[0]]
+
+        points_per_hour = thermal_time_grid(first_values['timestep'])[0]
+
+        for start in range(0, len(group), cultivation_batch_size):
+
+            chunk = [days_values[index] for index in group[start:start + cultivation_batch_size]]
+
+            # Parameters of the days, one value per day
+            parameters = {name: np.array([values[name] for values in chunk])
+                          for name in ['hconv', 'Twell', 'depth_well', 'Cp', 'Tmax', 'Tmin',
+                                       'pumpefficiency', 'recyclingrateaftercentrifuge',
+                                       'rhoalgae', 'rhomedium', 'dcell', 'night_monitoring']}
+
+            [exchangearea, m] = [np.array([values['geometry'][position] for values in chunk])
+                                 for position in [1, 2]]
+
+            # Collected power and air temperature (days x 24 hours)
+            [hourly_collected_power_list,
+             hourly_temperature_list] = [np.array([values['climate'][position] for values in chunk],
+                                                  dtype=np.float64)
+                                         for position in [0, 1]]
+
+            # Harvest flows (days x 24 hours)
+            [volumetodrypers_list,
+             supernatant_pers_list,
+             centrifugedvolumepers_list,
+             centrifugedvolumepers_list_wholeunit] = [np.array([values['harvest'][position] for values in chunk],
+                                                               dtype=np.float64)
+                                                      for position in [1, 2, 3, 4]]
+
+            [totalenergycool,
+             totalenergyheat,
+             totalwaterpumpedfacility,
+             totalwaterpumpedwell,
+             totalenergytocentrifugeaverage,
+             flatdaytotaltemp,
+             totalenergyheatexchanger,
+             totalwaterpumpedheatexchanger,
+             Tmeanperhour] = thermosimulation_1day_ensemble(parameters['hconv'],
+                                                            parameters['Twell'],
+                                                            parameters['depth_well'],
+                                                            parameters['Cp'],
+                                                            exchangearea,
+                                                            parameters['Tmax'],
+                                                            parameters['Tmin'],
+                                                            m,
+                                                            parameters['pumpefficiency'],
+                                                            parameters['recyclingrateaftercentrifuge'],
+                                                            volumetodrypers_list,
+                                                            supernatant_pers_list,
+                                                            centrifugedvolumepers_list,
+                                                            centrifugedvolumepers_list_wholeunit,
+                                                            hourly_temperature_list,
+                                                            hourly_collected_power_list,
+                                                            parameters['rhoalgae'],
+                                                            parameters['rhomedium'],
+                                                            parameters['dcell'],
+                                                            parameters['night_monitoring'],
+                                                            temperature_evolution=True,
+                                                            night_steady_state=first_values['night_steady_state'],
+                                                            timestep=first_values['timestep'])
+
+            # Temperature at the start of each hour of harvest, weighted by the fractions
+            schedules = np.array([harvest_schedule_array(values['harvest_schedule']) for values in chunk])
+
+            temperature_harvest = (schedules*flatdaytotaltemp[:, ::points_per_hour]).sum(axis=1)
+
+            # Values in the order of "thermal_summary_fields"
+            thermal_summaries = np.column_stack((totalenergycool,
+                                                 totalenergyheat,
+                                                 totalwaterpumpedfacility,
+                                                 totalwaterpumpedwell,
+                                                 totalenergytocentrifugeaverage,
+                                                 totalenergyheatexchanger,
+                                                 totalwaterpumpedheatexchanger,
+                                                 flatdaytotaltemp.mean(axis=1),
+                                                 temperature_harvest,
+                                                 flatdaytotaltemp[:, -1]))
+
+            for [index, thermal_summary] in zip(group[start:start + cultivation_batch_size], thermal_summaries):
+
+                values = days_values[index]
+
+                values['thermal'] = thermal_summary.tolist()
+
+                [stage_function, stage_inputs] = cultivation_stages['day']
+
+                summaries[index] = stage_function(*[values[name] for name in stage_inputs])
+
+    return summaries
+
+
+
+
+
+#################
+# Hourly time series
+#################
+
+
+# Daily results kept when simulating a whole time series
+# (the trajectories over the day are not kept to bound the memory)
+# First values of the summary of the day of "cultivation_simulation_timestep10"
+daily_results_names = day_summary_fields[:12]
+
+
+def cultivation_simulation_days(hconv,
+                                Twell,
+                                depth_well,
+                                lat,
+                                long,
+                                azimuthfrontal,
+                                climatic_data_path,
+                                Cp, 
+                                height,
+                                tubediameter,
+                                gapbetweentubes,
+                                horizontaldistance,
+                                length_of_PBRunit,
+                                width_of_PBR_unit, 
+                                rhoalgae,
+                                rhomedium,
+                                rhosuspension,
+                                dcell,
+                                Tmax,
+                                Tmin,
+                                Biodict,
+                                ash_dw,
+                                Nsource, 
+                                fraction_maxyield, 
+                                biomassconcentration,
+                                flowrate,  
+                                centrifugation_efficiency,
+                                pumpefficiency, 
+                                slurry_concentration,
+                                water_after_drying,
+                                recyclingrateaftercentrifuge,
+                                night_monitoring,
+                                elemental_contents,
+                                sky_model='haydavies',
+                                engine='odeint',
+                                night_steady_state='twopass',
+                                timestep=10):
+    '''
+    #Generator that simulates the cultivation for each day of an hourly time
+    series (PVGIS seriescalc or typical meteorological year, see
+    "stream_hourly_climatic_data"). The file is read by chunks of days and
+    only the daily results are kept.
+
+    #Inputs : same as "cultivation_simulation_timestep10" except :
+
+        #climatic_data_path : path of the csv with the hourly data (replaces month)
+        #sky_model : 'haydavies' or 'isotropic', used to calculate the irradiance
+        on the sides of the PBR from the horizontal irradiance. See Solar_transposition_1.
+        #engine : integrator for the temperature, 'odeint', 'fixedstep', 'analytical' or 'reduced'.
+        See "thermosimulation_1day_timestep10".
+        #night_steady_state : 'twopass' or 'periodic', start of the day without
+        thermoregulation at night. See "thermosimulation_1day_timestep10".
+        #timestep : time step of the thermal simulation ; s
+
+    # Outputs (for each day):
+
+        #date : date of the day ; "YYYYMMDD"
+        #daily_results : array with the results listed in "daily_results_names"
+
+        '''
+
+    for [date, day_of_year, time_offset, hourly_data] in solardata.stream_hourly_climatic_data(climatic_data_path):
+
+        solar_data = solardata.Qreceived_bym2PBR_day(lat,
+                                                     long,
+                                                     day_of_year,
+                                                     azimuthfrontal,
+                                                     height,
+                                                     tubediameter,
+                                                     gapbetweentubes,
+                                                     horizontaldistance,
+                                                     length_of_PBRunit,
+                                                     width_of_PBR_unit,
+                                                     hourly_data,
+                                                     time_offset,
+                                                     sky_model)
+
+        results = cultivation_simulation_timestep10(hconv,
+                                                    Twell,
+                                                    depth_well,
+                                                    lat,
+                                                    long,
+                                                    azimuthfrontal,
+                                                    int(date[4:6]),
+                                                    Cp, 
+                                                    height,
+                                                    tubediameter,
+                                                    gapbetweentubes,
+                                                    horizontaldistance,
+                                                    length_of_PBRunit,
+                                                    width_of_PBR_unit, 
+                                                    rhoalgae,
+                                                    rhomedium,
+                                                    rhosuspension,
+                                                    dcell,
+                                                    Tmax,
+                                                    Tmin,
+                                                    Biodict,
+                                                    ash_dw,
+                                                    Nsource, 
+                                                    fraction_maxyield, 
+                                                    biomassconcentration,
+                                                    flowrate,  
+                                                    centrifugation_efficiency,
+                                                    pumpefficiency, 
+                                                    slurry_concentration,
+                                                    water_after_drying,
+                                                    recyclingrateaftercentrifuge,
+                                                    night_monitoring,
+                                                    elemental_contents,
+                                                    solar_data=solar_data,
+                                                    engine=engine,
+                                                    night_steady_state=night_steady_state,
+                                                    trajectories=False,
+                                                    timestep=timestep)
+
+        yield [date, np.array(results[:len(daily_results_names)], dtype=np.float64)]
+
+
+def cultivation_simulation_hourly_series(*args, **kwargs):
+    '''
+    #Function that simulates the cultivation for each day of an hourly time
+    series and aggregates the results by month.
+
+    #Inputs : same as "cultivation_simulation_days"
+
+    # Outputs :
+
+        #daily_results : dataframe with one row per day (index = date) and
+        the columns "daily_results_names"
         
-        # Conversion flow from L.s-1 to m3.h-1  #Disk centrifuge
-        centrifuging_energy_averaged = ((centrifugedvolumepers/1000)
-                                        * 3600
-                                        * functions.Centrifugationenergy_m3(rhoalgae,
-                                                                          rhomedium,
-                                                                          Tmeanperhour,
-                                                                          dcell,
-                                                                          (centrifugedvolumepers_wholeunit/1000) * 3600)[0])  
+        #monthly_results : dataframe with one row per month of the series
+        (index = "YYYYMM") with the sums of the daily results, except for
+        the volumetric yield which is averaged, and the number of days simulated
 
-        # Summing over the day
-        totalenergytocentrifugeaverage += centrifuging_energy_averaged
+        '''
 
-    #############
-    # If there is no thermoregulation at night,
-    # then the initial temperature value at 12 PM must be the final temperature
-    # value of the simulated day (simulate steady state over a month)
-    #############
+    dates = []
+    rows = []
+
+    for [date, daily_results] in cultivation_simulation_days(*args, **kwargs):
+
+        dates.append(date)
+        rows.append(daily_results)
+
+    daily_results = pd.DataFrame(np.array(rows).reshape((-1, len(daily_results_names))),
+                                 index=dates,
+                                 columns=daily_results_names)
+
+    months = [date[0:6] for date in dates]
+
+    monthly_results = daily_results.groupby(months).sum()
+
+    monthly_results['volumetric_yield_g_m3'] = daily_results['volumetric_yield_g_m3'].groupby(months).mean()
+
+    monthly_results['days'] = daily_results['production_g'].groupby(months).count()
+
+    return [daily_results, monthly_results]
+
+
+
+#################
+# Consecutive days
+#################
+
+
+def cultivation_simulation_season(hconv,
+                                  Twell,
+                                  depth_well,
+                                  lat,
+                                  long,
+                                  azimuthfrontal,
+                                  months,
+                                  Cp, 
+                                  height,
+                                  tubediameter,
+                                  gapbetweentubes,
+                                  horizontaldistance,
+                                  length_of_PBRunit,
+                                  width_of_PBR_unit, 
+                                  rhoalgae,
+                                  rhomedium,
+                                  rhosuspension,
+                                  dcell,
+                                  Tmax,
+                                  Tmin,
+                                  Biodict,
+                                  ash_dw,
+                                  Nsource, 
+                                  fraction_maxyield, 
+                                  biomassconcentration,
+                                  flowrate,  
+                                  centrifugation_efficiency,
+                                  pumpefficiency, 
+                                  slurry_concentration,
+                                  water_after_drying,
+                                  recyclingrateaftercentrifuge,
+                                  night_monitoring,
+                                  elemental_contents,
+                                  transposition=None,
+                                  engine='odeint',
+                                  night_steady_state='twopass',
+                                  timestep=10,
+                                  initial_temperature=None,
+                                  initial_biomassconcentration=None,
+                                  day_simulation=None):
+    '''
+    #Generator that simulates the consecutive days of the cultivation period
+    (for instance April to September), with the average day of each month 
+    for the climate. The temperature and the biomass concentration at the 
+    end of each day are the initial values of the next day, instead of the 
+    steady state of an isolated average day. Only the summary of the current
+    day is kept in memory.
 
-    # We resimulate the day with the new initial value for the temperature
-    if night_monitoring == 'no':
+    A day starting with the same temperature and concentration as the 
+    previous day of the same month gives the same results and is not
+    simulated again.
 
-        # Modification of the initial temperature
-        x0 = [0, 0, daytotaltemp[-1][-1], 0, 0, 0, 0, 0, 0, 0, 0]
+    #Inputs : same as "cultivation_simulation_timestep10" except :
 
-        # Identical section to simulate the day
+        #months : months of the cultivation period, simulated in this order
+        with the number of days of each month (non leap year) ; list of month numbers.
+        If a month does not follow the previous one, the cultivation starts again
+        with initial_temperature and initial_biomassconcentration.
 
-        daytotaltemp = []  # C
-        daytotalEcool = []  # kJ
-        daytotalEheat = []  # kJ
-        daytotalEcentrifug = []  # kJ
-        daytotalEdryingheat = []  # kJ
-        daytotalEdryingcool = []  # kJ
-        daytotalEdryingmix = []  # kJ
-        daytotalwaterpumpedwell = []  # L
-        daytotalwaterpumpedfacility = []  # L
-        daytotalenergyforheatexchanger = []  # kJ
-        daytotalwaterforheatexchanger = []  # L
+        #initial_temperature : temperature at midnight of the first day ; °C.
+        None to start with the steady state of the first average day.
+        #initial_biomassconcentration : biomass concentration at midnight of 
+        the first day (for instance after inoculation) ; g.L-1. 
+        None to start at biomassconcentration.
+        The harvest then brings the concentration back to biomassconcentration.
 
-        totalenergytocentrifugeaverage = 0
+        #day_simulation : function used to simulate each day, 
+        "cultivation_simulation_timestep10" by default, or
+        "cultivation_simulation_cached" or "cultivation_simulation_staged".
 
-        # For each hour, we integrate all the variables starting with the last
-        # point of the previous hour.
-        for hour in range(0, 24):
-            # For each hour, the associated value of each variable is chosen
-            Tair = hourly_temperature_list[hour]
-            Qsun = hourly_collected_power_list[hour]
-            centrifugedvolumepers = centrifugedvolumepers_list[hour]
-            supernatant_pers = supernatant_pers_list[hour]
-            volumetodrypers = volumetodrypers_list[hour]
+    # Outputs (for each day):
 
-            # Only needed for centrifugation energy requirement as non linear.
-            centrifugedvolumepers_wholeunit = centrifugedvolumepers_list_wholeunit[hour]
-    
-            # Integration of all variables over an hour
-            x = odeint(modelthermo_1hour_timestep10,
-                       x0,
-                       t,
-                       args=(Qsun, Tair, Twell, depth_well,  # environment
-                             Cp, exchangearea, hconv,  # thermo
-                             Tmax, Tmin, m,  # strain
-                             centrifugedvolumepers,
-                             supernatant_pers,
-                             volumetodrypers,
-                             recyclingrateaftercentrifuge,
-                             pumpefficiency,
-                             night_monitoring,))
-
-            x0[0] = x[-1, 0]  # new starting temperature for next hour
-            x0[1] = x[-1, 1]  # new starting Cooling energy demand for next hour
-            x0[2] = x[-1, 2]  # etc.
-            x0[3] = x[-1, 3]
-            x0[4] = x[-1, 4]
-            x0[5] = x[-1, 5]
-            x0[6] = x[-1, 6]
-            x0[7] = x[-1, 7]
-            x0[8] = x[-1, 8]
-            x0[9] = x[-1, 9]
-            x0[10] = x[-1, 10]
-
-            # Each list for each variable receives the evolution of the variable over this hour.
-            daytotaltemp.append(x[:, 2])
-
-            daytotalEcool.append(x[:, 0])  # kJ
-
-            daytotalEheat.append(x[:, 1])  # kJ
-
-            daytotalEcentrifug.append(x[:, 3])  # kJ
-
-            daytotalEdryingheat.append(x[:, 4])  # kJ
-
-            daytotalEdryingcool.append(x[:, 5])  # kJ
-
-            daytotalEdryingmix.append(x[:, 6])  # kJ
-
-            daytotalwaterpumpedwell.append(x[:, 7])  # L
-            
-            daytotalwaterpumpedfacility.append(x[:, 8])  # L
+        #month : month number
+        #day : day of the month
+        #summary : array with the summary of the day, in the order of "day_summary_fields"
 
-            daytotalenergyforheatexchanger.append(x[:, 9])  # kJ
+        '''
 
-            daytotalwaterforheatexchanger.append(x[:, 10])  # L
+    if day_simulation is None:
+        day_simulation = cultivation_simulation_timestep10
 
-            #############
-            # Centrifuging energy calculation
-            #############
+    temperature_end_index = day_summary_fields.index('temperature_end_C')
 
-            # The energey to centrifuge 1m3 depends on the temperature
-            # So we collect the average temperature during this hour
-            Tmeanperhour = sum(x[:, 2])/361
+    concentration_end_index = day_summary_fields.index('biomass_concentration_end_g_L')
 
+    temperature = initial_temperature
 
-            # The energy requirement to centrifuge 1m3 depends non linearly on the
-            #centrifugating flow (harvesting flow).
-            #Assuming that there is one centrifuge for each square meter is wrong 
-            #and we instead assume that there is one centrifuge for the whole PBR unit.
+    concentration = initial_biomassconcentration
 
-            #MODIF : In this version, the harvesting flow is constant and fixed at 
-            #5m3.h-1 for the whole unit
-            #This does not change the validity of the line below.
+    previous_month = None
 
-            centrifuging_energy_averaged = ((centrifugedvolumepers/1000)
-                                          * 3600
-                                          * functions.Centrifugationenergy_m3(rhoalgae,
-                                                                              rhomedium,
-                                                                              Tmeanperhour,
-                                                                              dcell,
-                                                                              (centrifugedvolumepers_wholeunit/1000) * 3600)[0])  
+    for month in months:
 
-            # Conversion flow from L.s-1 to m3.h-1  #Disk centrifuge
+        if previous_month is not None and month != previous_month % 12 + 1:
 
-            # Summing over the day
-            totalenergytocentrifugeaverage += centrifuging_energy_averaged
+            # Not consecutive, the cultivation starts again
+            temperature = initial_temperature
+
+            concentration = initial_biomassconcentration
+
+        previous_month = month
+
+        previous_start = None
+
+        for day in range(1, calendar.mdays[month] + 1):
+
+            start = [temperature, concentration]
+
+            if start != previous_start:
+
+                summary = np.array(day_simulation(hconv,
+                                                  Twell,
+                                                  depth_well,
+                                                  lat,
+                                                  long,
+                                                  azimuthfrontal,
+                                                  month,
+                                                  Cp, 
+                                                  height,
+                                                  tubediameter,
+                                                  gapbetweentubes,
+                                                  horizontaldistance,
+                                                  length_of_PBRunit,
+                                                  width_of_PBR_unit, 
+                                                  rhoalgae,
+                                                  rhomedium,
+                                                  rhosuspension,
+                                                  dcell,
+                                                  Tmax,
+                                                  Tmin,
+                                                  Biodict,
+                                                  ash_dw,
+                                                  Nsource, 
+                                                  fraction_maxyield, 
+                                                  biomassconcentration,
+                                                  flowrate,  
+                                                  centrifugation_efficiency,
+                                                  pumpefficiency, 
+                                                  slurry_concentration,
+                                                  water_after_drying,
+                                                  recyclingrateaftercentrifuge,
+                                                  night_monitoring,
+                                                  elemental_contents,
+                                                  transposition,
+                                                  engine=engine,
+                                                  night_steady_state=night_steady_state,
+                                                  trajectories=False,
+                                                  timestep=timestep,
+                                                  initial_temperature=temperature,
+                                                  initial_biomassconcentration=concentration),
+                                   dtype=np.float64)
+
+            previous_start = start
+
+            yield [month, day, summary]
+
+            # Carried over to the next day
+            temperature = summary[temperature_end_index]
+
+            concentration = summary[concentration_end_index]
+
+
+def cultivation_season_months(season):
+    '''
+    #Generator that aggregates the days of "cultivation_simulation_season"
+    by month while they are simulated.
+
+    #Inputs :
+
+        #season : generator "cultivation_simulation_season"
+
+    # Outputs (for each month):
+
+        #month : month number
+        #number_days : number of days simulated in the month
+        #mean_day : array with the mean over the days of the month of each 
+        value of "day_summary_fields" (totals of the month = mean_day*number_days)
+
+        '''
+
+    month = None
+
+    for [day_month, day, summary] in season:
+
+        if day == 1:
+
+            if month is not None:
+                yield [month, number_days, totals/number_days]
+
+            month = day_month
+
+            number_days = 0
+
+            totals = np.zeros(len(day_summary_fields))
+
+        number_days += 1
+
+        totals += summary
+
+    if month is not None:
+        yield [month, number_days, totals/number_days]
+
+
+
+#################
+# Memoization of the daily simulations
+#################
+
+
+# Maximum number of days kept in memory by "cultivation_simulation_cached"
+cultivation_cache_size = 4096
+
+# Days kept in memory, the most recently used at the end (least recently used cache)
+cultivation_cache = collections.OrderedDict()
+
+# Hits and misses since the last call to "reset_cultivation_cache_stats"
+cultivation_cache_stats = {'calls': 0,
+                           'memory_hits': 0,
+                           'disk_hits': 0,
+                           'misses': 0}
+
+# Inputs of "cultivation_simulation_timestep10", to identify the arguments
+# of a call whether they are given by position or by name
+cultivation_signature = inspect.signature(cultivation_simulation_timestep10)
+
+# Parameters of Biodict used by "cultivation_simulation_timestep10"
+cultivation_biodict_keys = ['lipid_af_dw',
+                            'PAR',
+                            'losspigmentantenna',
+                            'quantumyield',
+                            'lossvoltagejump',
+                            'losstoATPNADPH',
+                            'losstohexose',
+                            'lossrespiration',
+                            'phospholipid_fraction']
+
+
+def cultivation_key_update(content, name, value):
+    '''
+    Adds an input of "cultivation_simulation_timestep10" to a key being
+    calculated ("cultivation_cache_key", "cultivation_simulation_staged").
+
+    #Inputs :
+
+        #content : hashlib.sha256 object, updated in place
+        #name : name of the input in "cultivation_simulation_timestep10"
+        #value : value of the input
+
+        '''
+
+    if name == 'Biodict':
+        value = [value[key] for key in cultivation_biodict_keys]
+
+    elif name == 'solar_data' and value is not None:
+        value = [value[0].values, value[1].values, value[2].values]
+
+    elif name == 'elemental_contents':
+        # Same key for the table and the output of "elemental_contents_matrix"
+        value = functions.elemental_contents_matrix(value)
+
+    content.update(name.encode())
+
+    for element in (value if isinstance(value, list) else [value]):
+
+        if isinstance(element, (pd.DataFrame, pd.Series, np.ndarray)):
+
+            if isinstance(element, pd.DataFrame):
+                content.update(repr(list(element.columns)).encode())
+
+            content.update(np.ascontiguousarray(np.asarray(element, dtype=np.float64)).tobytes())
+
+        elif isinstance(element, (int, float, np.number)) and not isinstance(element, bool):
+
+            # Same key for 10, 10.0 and numpy.float64(10)
+            content.update(repr(float(element)).encode())
+
+        else:
+            content.update(repr(element).encode())
+
+        content.update(b';')
+
+
+def cultivation_cache_key(*args, **kwargs):
+    '''
+    Returns the key of a simulation of "cultivation_simulation_timestep10" :
+    hash (sha256) of the inputs on which the outputs depend.
+
+    The climatic data is identified by the location, month, azimuth and 
+    transposition (or by the values of solar_data for a given day of a time series),
+    Biodict by the parameters in "cultivation_biodict_keys" and 
+    elemental_contents by the values of its elemental matrix
+    ("elemental_contents_matrix").
+
+    #Inputs : same as "cultivation_simulation_timestep10"
+
+    #Outputs :
+
+        #key : hexadecimal string
+
+        '''
+
+    arguments = cultivation_signature.bind(*args, **kwargs)
+
+    arguments.apply_defaults()
+
+    content = hashlib.sha256()
+
+    for name in arguments.arguments:
+
+        cultivation_key_update(content, name, arguments.arguments[name])
+
+    return content.hexdigest()
+
+
+def cultivation_simulation_cached(*args, cache_folder=None, **kwargs):
+    '''
+    Same as "cultivation_simulation_timestep10" but the results are kept in 
+    memory (least recently used days, up to "cultivation_cache_size")
+    and optionally on disk, so that a day with the same inputs 
+    ("cultivation_cache_key") is only simulated once.
+
+    Prefer trajectories=False to keep only the summary of each day.
+    Hits and misses are counted in "cultivation_cache_stats".
+
+    #Inputs : same as "cultivation_simulation_timestep10" and :
+
+        #cache_folder : None to keep the results in memory only, or folder 
+        where the results are also saved (one pickle file per day), 
+        shared between runs and processes.
+
+    #Outputs : same as "cultivation_simulation_timestep10"
+
+        '''
+
+    key = cultivation_cache_key(*args, **kwargs)
+
+    cultivation_cache_stats['calls'] += 1
+
+    if key in cultivation_cache:
+
+        cultivation_cache_stats['memory_hits'] += 1
+
+        cultivation_cache.move_to_end(key)
 
-            ### End of the second simulation of the day for no night thermoregulation
+        return copy.deepcopy(cultivation_cache[key])
 
+    results = None
 
-    # Flaten the lists to obtain the whole day in one list
-    flatdaytotaltemp = list(itertools.chain(*daytotaltemp))  # kJ
+    if cache_folder is not None:
 
-    flatdaytotalEcool = list(itertools.chain(*daytotalEcool))  # kJ
+        path = os.path.join(cache_folder, key + '.pkl')
 
-    flatdaytotalEheat = list(itertools.chain(*daytotalEheat))  # kJ
+        if os.path.exists(path):
 
-    flatdaytotalEcentrifug = list(itertools.chain(*daytotalEcentrifug))  # kJ
+            try:
+                with open(path, 'rb') as cached_file:
+                    results = pickle.load(cached_file)
 
-    flatdaytotalEdryingheat = list(itertools.chain(*daytotalEdryingheat))  # kJ
+                cultivation_cache_stats['disk_hits'] += 1
 
-    flatdaytotalEdryingcool = list(itertools.chain(*daytotalEdryingcool))  # kJ
+            except (OSError, EOFError, pickle.UnpicklingError):
+                # Incomplete or corrupted file, simulated again
+                results = None
 
-    flatdaytotalEdryingmix = list(itertools.chain(*daytotalEdryingmix))  # kJ
+    if results is None:
 
-    flatdaytotalwaterpumpedwell = list(
-        itertools.chain(*daytotalwaterpumpedwell))  # L
+        cultivation_cache_stats['misses'] += 1
 
-    flatdaytotalwaterpumpedfacility = list(
-        itertools.chain(*daytotalwaterpumpedfacility))  # L
+        results = cultivation_simulation_timestep10(*args, **kwargs)
 
-    flatdaytotalenergyforheatexchanger = list(
-        itertools.chain(*daytotalenergyforheatexchanger))    # kJ
+        if cache_folder is not None:
 
-    flatdaytotalwaterforheatexchanger = list(
-        itertools.chain(*daytotalwaterforheatexchanger))    # L
+            os.makedirs(cache_folder, exist_ok=True)
 
-    # Conversion from kJ to kWh
-    flatdaytotalEcoolkwh = [a/3600 for a in flatdaytotalEcool]
+            solardata.atomic_write(path, pickle.dumps(results, protocol=pickle.HIGHEST_PROTOCOL))
 
-    flatdaytotalEheatkwh = [a/3600 for a in flatdaytotalEheat]
+    cultivation_cache[key] = results
 
-    flatdaytotalEcentrifugkwh = [a/3600 for a in flatdaytotalEcentrifug]
+    if len(cultivation_cache) > cultivation_cache_size:
+        cultivation_cache.popitem(last=False)
 
-    flatdaytotalEdryingheatkwh = [a/3600 for a in flatdaytotalEdryingheat]
+    return copy.deepcopy(results)
 
-    flatdaytotalEdryingcoolkwh = [a/3600 for a in flatdaytotalEdryingcool]
 
-    flatdaytotalEdryingmixkwh = [a/3600 for a in flatdaytotalEdryingmix]
+def cultivation_cache_hit_rate():
+    '''Returns the share of the calls to "cultivation_simulation_cached"
+    answered from memory or from disk since the last reset ; .'''
 
-    flatdaytotalenergyforheatexchangerkwh = [a/3600 for a in flatdaytotalenergyforheatexchanger]
+    if cultivation_cache_stats['calls'] == 0:
+        return 0
 
-    # Total  and water demands are  the last values of the list - the second values
-    # Removing the initial energies and water consumptions (first 10 sec of the day)
-    # allows to erase the effect of the arbitrary choice of an initial value for 
-    # the temperature in the case of a thermoregulation at night.
-    # It's a way to make the model operate at steady state.
+    return ((cultivation_cache_stats['memory_hits'] + cultivation_cache_stats['disk_hits'])
+            / cultivation_cache_stats['calls'])
 
-    totalenergycool = flatdaytotalEcoolkwh[-1]-flatdaytotalEcoolkwh[1] # kWh.d-1
 
-    totalenergyheat = flatdaytotalEheatkwh[-1] - flatdaytotalEheatkwh[1]  # kWh.d-1
+def reset_cultivation_cache_stats():
+    '''Sets all the counts in "cultivation_cache_stats" back to 0'''
 
+    for key in cultivation_cache_stats:
+        cultivation_cache_stats[key] = 0
 
-    totalenergyheatexchanger = (flatdaytotalenergyforheatexchangerkwh[-1] 
-                                - flatdaytotalenergyforheatexchangerkwh[1]) # kWh.d-1
 
-    totalwaterpumpedheatexchanger =(flatdaytotalwaterforheatexchanger[-1]
-                                    - flatdaytotalenergyforheatexchangerkwh[1]) # kWh.d-1
+def clear_cultivation_cache():
+    '''Removes all the days kept in memory by "cultivation_simulation_cached"'''
 
-    totalwaterpumpedfacility = flatdaytotalwaterpumpedfacility[-1]  # L
+    cultivation_cache.clear()
 
-    totalwaterpumpedwell = flatdaytotalwaterpumpedwell[-1]  # L
 
-    return [totalenergycool,
-            totalenergyheat,
-            totalwaterpumpedfacility,
-            totalwaterpumpedwell,
-            totalenergytocentrifugeaverage,
-            flatdaytotaltemp,
-            flatdaytotalEcentrifugkwh,
-            flatdaytotalEdryingheatkwh,
-            flatdaytotalEdryingcoolkwh,
-            flatdaytotalEdryingmixkwh,
-            flatdaytotalEheatkwh,
-            flatdaytotalEcoolkwh,
-            flatdaytotalenergyforheatexchangerkwh,
-            totalenergyheatexchanger,
-            flatdaytotalwaterforheatexchanger,
-            totalwaterpumpedheatexchanger]
 
+#################
+# Staged daily simulations
+#################
 
-def cultivation_simulation_timestep10(hconv,
-                                      Twell,
-                                      depth_well,
-                                      lat,
-                                      long,
-                                      azimuthfrontal,
-                                      month,
-                                      Cp, 
-                                      height,
-                                      tubediameter,
-                                      gapbetweentubes,
-                                      horizontaldistance,
-                                      length_of_PBRunit,
-                                      width_of_PBR_unit, 
-                                      rhoalgae,
-                                      rhomedium,
-                                      rhosuspension,
-                                      dcell,
-                                      Tmax,
-                                      Tmin,
-                                      Biodict,
-                                      ash_dw,
-                                      Nsource, 
-                                      fraction_maxyield, 
-                                      biomassconcentration,
-                                      flowrate,  
-                                      centrifugation_efficiency,
-                                      pumpefficiency, 
-                                      slurry_concentration,
-                                      water_after_drying,
-                                      recyclingrateaftercentrifuge,
-                                      night_monitoring,
-                                      elemental_contents):
 
+# Maximum number of results kept in memory for each stage 
+# by "cultivation_simulation_staged"
+cultivation_stage_cache_size = 64
 
-    '''
-    #function that simulates the cultivation over a day.
+# Results of each stage, the most recently used at the end (least recently used caches)
+cultivation_stage_caches = {stage: collections.OrderedDict() for stage in cultivation_stages}
 
-    #Inputs :
+# Hits and misses of each stage since the last call to "reset_cultivation_stage_stats"
+cultivation_stage_stats = {stage: {'hits': 0, 'misses': 0} for stage in cultivation_stages}
 
-        #hconv : convective coefficient air  ; W m−2 K−1
-        #Twell : Well water temperature ; °C
-        #depth_well : Well depth ; m
-        #PBR geometry parameters :
-            height ; m
-            tubediameter ; m
-            gapbetweentube ; m
-            horizontaldistance ; m
-            length_of_PBRunit ; m
-            width_of_PBR_unit ; m
 
-        #location parameters :
-            lat : latitute expressed in format ; XX.XXX or X.XXX
-            long : longitude expressed in format ; XX.XXX or X.XXX
-            azimuthfrontal : azimuth of the frontal side of the PBR unit ;  180:-180
+def cultivation_simulation_staged(*args, **kwargs):
+    '''
+    Same as "cultivation_simulation_timestep10" but the results of each stage
+    ("cultivation_stages") are kept in memory, so that only the stages
+    downstream of the inputs which changed are calculated again.
 
-        #rhoalgae : Density of the algae cell ; kg.m-3
-        #rhomedium : Density of the medium (without algae) ; kg.m-3
-        #rhosuspension : Density of the culture suspension ; kg.m-3
-        #dcell : Diameter of the cell ; m
-        #Tmax : Maximal temperature for the strain ; °C
-        #Tmin : Minimal temperature for the strain ; °C
+    The key of a stage is calculated from the values of its inputs 
+    ("cultivation_key_update") and from the keys of the stages it depends on.
+    For instance, the parameters of Biodict only change the production and
+    the harvest flows : only the hours from the harvest are integrated again
+    ("cultivation_thermal_before_harvest_stage"), and the second simulation
+    of the day without thermoregulation at night (night_steady_state='twopass').
+    With night_steady_state='periodic' and without thermoregulation at night,
+    the whole day is integrated again.
+    Hits and misses are counted in "cultivation_stage_stats".
 
+    #Inputs : same as "cultivation_simulation_timestep10"
 
-        #Biodict : Dictionnary containing all strain specific parameters.
+    #Outputs : same as "cultivation_simulation_timestep10"
 
-        *No conflict with other parameters called individually.
-        Avoids having too many input parameters in the function.
+        '''
 
-        #ash_dw : ash content in dry biomass ; g.g-1 dw
-        #Nsource :Source of nitrogen ; Nitrate or Ammonium (no3 or nh3)
-        #pourcentage yield : Fraction of the maximum yield achieved ; .
-        # biomassconcentration : Biomass concentration ; g.L-1
-        #flowrate : Flow rate in the pipe ; m.s-1
-        #centrifugation_efficiency : Fraction of the biomass which is separated
-        and harvested ; .
+    arguments = cultivation_signature.bind(*args, **kwargs)
 
-        #pumpefficiency, efficiency of the pump ; .
-        # slurry_concentration : Mass Fraction biomass in the slurry ; kg dw.kg slurry-1
-        #water_after_drying : Mass fraction of water in the dried biomass ; kg water.kg dbio-1
-        #recyclingrateaftercentrifuge : share of the supernatant which can
-          be reinjected in the PBR ; .
+    arguments.apply_defaults()
 
-        #night_monitoring: 'yes' = Thermoregulation  at night,
-        'no' = No Thermoregulation  at night
+    # Values of the arguments, completed with the outputs of each stage
+    values = dict(arguments.arguments)
 
+    if values['timestep'] != timestep_reference:
+        record_timestep_error_sample(values)
 
-    # Outputs :
-  
-       #totalenergyneeded_tocool_perday : Total thermal enery demand for cooling the system over a day  ; kWh.d-1
-       #totalenergyneeded_toheat_perday : Total thermal energy demand for heating over a day ; kWh.d-1
-       #totalwaterpumpedfromthefacility_perday : Total water which needs to be pumped from the facility  over a day ; L.d-1
-       #totalwaterpumpedfromthewell_perday : Total water which needs to be pumped from the well over a day ; L.d-1
-       #totalproduction : Total daily production ; g.d-1
-       #totalproduction_harvested : Total harvested daily production ; g.d-1
-       #totalproduction_loss : Total lost daily production ; g.d-1
-       #volumetric_yield : Volumetric yield ; g.m-3
-       #totalenergyneededtocentrifuge : Total energy demand for centrifugation ; kWh.d-1
-       #temperature_evolution ; Temperature evolution over the day (8640 points) ; °C  
-       #energy_evolution_supernatant_recycling_replacing_kWh : Evolution of the energy
-       provided by supernatant recycling/replacement ; kWh
+    keys = {}
 
-       #energy_evolution_drying_heat_kWh : Evolution of the energy provided by 
-       recycling vapor when heating is required ; kWh# MODIF: Always 0.
+    for stage in cultivation_stages:
 
-       #energy_evolution_drying_cool_kWh : Evolution of the energy provided by 
-       replacing the vapor  ; kWh
-       MODIF: The vapor is always replaced by well water.
+        [stage_function, stage_inputs] = cultivation_stages[stage]
 
-       #energy_evolution_drying_mix_kWh : Evolution of the energy provided by 
-       replacing the vapor when no thermoregulation is needed  ; kWh 
-       MODIF: The vapor is always replaced by well water.
-              
-       #heatingenergyevolution : Evolution of the thermal energy demand for heating ; kWh   
-       #coolingenergyevolution : Evolution of the thermal energy demand for cooling ; kWh
-       #energyevolution_heatexchanger : Evolution of the energy demand for 
-       the cooling heat exchanger ; kWh
+        content = hashlib.sha256(stage.encode())
 
-       #totalenergyneeded_heatexchanger_perday : Total energy demand for the cooling heating exchanger over a day ; kWh.d-1 
-       #heatexchanger_water_evolution : Evolution of water demand for the heat exchanger ; kWh
-       #totalwaterheatexchanger : Total water demand for the heat exchanger over a day; kWh.d-1
-       
-       
-       
-       #centrifugedvolumepers_list_wholeunit : List of the averaged(from 1 hour to 1 s)
-        volumetric flows centrifuged every hour of the day,
-        considering the whole PBR unit and not just 1m2.
-        24 values in L.s-1
-        
-        
-       #totalwater_centrifuged_perday : total amount of water centrifuged over a day ; L.d-1
+        for name in stage_inputs:
 
-       '''
+            if name in keys:
+                content.update(keys[name].encode())
+            else:
+                cultivation_key_update(content, name, values[name])
 
-    # Collecting some geometric features
-    geometry = functions.PBR_geometry(height,
-                                      tubediameter,
-                                      gapbetweentubes,
-                                      horizontaldistance,
-                                      length_of_PBRunit,
-                                      width_of_PBR_unit)
+        keys[stage] = content.hexdigest()
 
-    facility_volume = geometry[0]  # m3
-    exchangearea = geometry[5]  # m2
+        stage_cache = cultivation_stage_caches[stage]
 
-    # Collecting climatic data
-    data = solardata.Qreceived_bym2PBR_month(lat,
-                                             long,
-                                             month,
-                                             azimuthfrontal,
-                                             height,
-                                             tubediameter,
-                                             gapbetweentubes,
-                                             horizontaldistance,
-                                             length_of_PBRunit,
-                                             width_of_PBR_unit)
+        if keys[stage] in stage_cache:
 
+            cultivation_stage_stats[stage]['hits'] += 1
 
+            stage_cache.move_to_end(keys[stage])
 
-    # List of sunlight powers collected by the PBR (averaged over 1m2), for each hour    
-    hourly_collected_power_list = data[0]['Average']  # W
-    # Also equivalent to Wh as it's the average power over an hour. 
-    # 1 W during 1h = 1Wh 
-    
-    # List of air temperature, for each hour
-    hourly_temperature_list = data[1]  # °C
+        else:
 
-    # List of ground irradiances, for each hour    
-    hourly_ground_irradiance_list = data[2]
+            cultivation_stage_stats[stage]['misses'] += 1
 
-    # Maximum theoretical yield in g ashfree dw.h-1    
-    yieldbiomass_on_energy = functions.energeticyield_biomass_perkjenergy(Biodict['lipid_af_dw'], #g ashfree dw.kJsunlight-1
-                                                                          ash_dw,
-                                                                          water_after_drying,
-                                                                          Biodict['PAR'],
-                                                                          Biodict['losspigmentantenna'],
-                                                                          Biodict['quantumyield'],
-                                                                          Biodict['lossvoltagejump'],
-                                                                          Biodict['losstoATPNADPH'],
-                                                                          Biodict['losstohexose'],
-                                                                          Biodict['lossrespiration'],
-                                                                          Nsource,
-                                                                          Biodict['phospholipid_fraction'],
-                                                                          elemental_contents)  
+            stage_cache[keys[stage]] = stage_function(*[values[name] for name in stage_inputs])
 
-    # Maximum theoretical productions per hour without ash
-    # *3.6 to convert irradiance (Wh) into kJ
-    maximum_production_per_hour_list = (hourly_ground_irradiance_list #g ashfree dw.h-1
-                                        * 3.6
-                                        * yieldbiomass_on_energy)
-    
-    # Maximum theoretical production with ash
-    maximum_production_per_hour_list_with_ash = (maximum_production_per_hour_list  # g dw .h-1
-                                                 / (1 - ash_dw))  
+            if len(stage_cache) > cultivation_stage_cache_size:
+                stage_cache.popitem(last=False)
 
-    # Actual production depending on how much of the maximum yield can be achieved
-    actual_production_per_hour_list = maximum_production_per_hour_list_with_ash*fraction_maxyield  # g dw.h-1
+        values[stage] = stage_cache[keys[stage]]
 
-    # Total production over the dat
-    totalproduction = sum(actual_production_per_hour_list)  # g dw.d-1
+    return copy.deepcopy(values['day'])
 
-    # The biomass at the end of the day
-    biomass_at_harvest = (biomassconcentration                   # g.L-1
-                          + totalproduction/(facility_volume*1000))
 
-    ###
-    # Centrifuged volumes and water recycling/reinjection
-    ###
+def reset_cultivation_stage_stats():
+    '''Sets all the counts in "cultivation_stage_stats" back to 0'''
 
-    # We consider the centrifugation efficiency and the recycling of part of 
-    # the biomass so that the biomass concentration at the end of the day is
-    # exactly the same as at the beginning
-    totalwater_centrifuged_perday = (totalproduction           # L.d-1
-                                     / (biomass_at_harvest
-                                        * (centrifugation_efficiency
-                                           + (1 - centrifugation_efficiency)
-                                           * (1-recyclingrateaftercentrifuge))))
+    for stage in cultivation_stage_stats:
+        cultivation_stage_stats[stage]['hits'] = 0
+        cultivation_stage_stats[stage]['misses'] = 0
 
 
-    # To simplify the code, we assume that all the thermal exchanges due to the 
-    #harvesting are concentrated over 1h (21h), even if  the real harvest (5m3.h-1 for the whole unit) 
-    # may take more or less time
+def clear_cultivation_stage_caches():
+    '''Removes all the results kept in memory by "cultivation_simulation_staged"'''
 
-    centrifugedvolumeperhour_list = [0]*24
+    for stage in cultivation_stage_caches:
+        cultivation_stage_caches[stage].clear()
 
-    # Harvest at 9PM.
-    centrifugedvolumeperhour_list[21] = totalwater_centrifuged_perday  # L
 
-    centrifugedvolumepers_list = [a/3600 for a in centrifugedvolumeperhour_list]
 
-    centrifugedvolumepers_list = pd.Series(centrifugedvolumepers_list)
+#################
+# Time resolution
+#################
 
 
-    # The energy requirement to centrifuge 1m3 depends non linearly on the
-    # centrifugating flow (harvesting flow).
-    # Assuming that there is one centrifuge for each square meter is wrong
-    # and we instead assume that there is one centrifuge for the whole PBR unit.
-    
-    centrifugedvolumepers_list_wholeunit = [0]*24
+# Time step of the reference simulations ; s
+timestep_reference = 10
 
-    centrifugedvolumepers_list_wholeunit[21] = 5000/3600  # L.s-1 # 5m3.h-1
+# Maximum number of days kept to estimate the error of the simulations 
+# with another time step
+timestep_error_sample_size = 20
 
-    centrifugedvolumepers_list_wholeunit = pd.Series(centrifugedvolumepers_list_wholeunit)
+# Arguments of a random sample of the days simulated with another time step 
+# than timestep_reference since the last call to "reset_timestep_error_sample"
+# (reservoir sampling), and number of these days
+timestep_error_sample = {'days': 0,
+                         'arguments': []}
 
+# Random generator of the sampling, seeded for reproducible estimates
+timestep_error_random = random.Random(0)
 
-    # Calculation of the volumes of water to vaporize and the volumes of
-    # supernatant for each hour
 
-    modified_harvested_production_per_hour_list = [0]*24
+def record_timestep_error_sample(values):
+    '''
+    Keeps the arguments of a day simulated with another time step than 
+    timestep_reference in "timestep_error_sample" with a probability such 
+    that all the days simulated have the same chance to be kept.
 
-    modified_harvested_production_per_hour_list[21] = totalproduction
+    #Inputs :
 
-    modified_harvested_production_per_hour_list = pd.Series(modified_harvested_production_per_hour_list)
+        #values : dictionnary with the values of all the arguments of
+        "cultivation_simulation_timestep10"
 
-    Water_in_1kg_slurry = 1-slurry_concentration  # kgwater.kgslurry-1
+        '''
 
-    Water_in_slurry__producedperhour_list = (Water_in_1kg_slurry    #  L
-                                             * modified_harvested_production_per_hour_list 
-                                             / (1000*slurry_concentration))  
+    timestep_error_sample['days'] += 1
 
-    Water_in_slurry__producedpers_list = [
-        a/3600 for a in Water_in_slurry__producedperhour_list]  # L
+    if len(timestep_error_sample['arguments']) < timestep_error_sample_size:
 
-    #If the centrifuged water is not in the slurry, it is in the supernatant
-    supernatant_perhour_list =(centrifugedvolumeperhour_list
-                                -Water_in_slurry__producedperhour_list)
+        position = len(timestep_error_sample['arguments'])
 
-    supernatant_pers_list = [a/3600 for a in supernatant_perhour_list]
+        timestep_error_sample['arguments'].append(None)
 
-    volumetodrypers_list = [(1-water_after_drying/slurry_concentration)
-                            * a for a in Water_in_slurry__producedpers_list]  # L
+    else:
 
+        position = timestep_error_random.randrange(timestep_error_sample['days'])
 
+        if position >= timestep_error_sample_size:
+            return
 
-    # Calculating the mass of the culture in 1 m2 of PBR
-    m = rhosuspension*facility_volume  # kg
+    # Only the arguments, not the outputs of the stages added afterwards.
+    # Copied as the caller keeps modifying its dictionnaries (Biodict etc.)
+    timestep_error_sample['arguments'][position] = copy.deepcopy(
+        {name: values[name] for name in cultivation_signature.parameters})
 
 
-    ###
-    # Temperature
-    ###
+def reset_timestep_error_sample():
+    '''Removes all the days kept in "timestep_error_sample"'''
 
-    # Call the function that simulates temperature and thermoregulation
-    resultsthermo = thermosimulation_1day_timestep10(hconv,
-                                                     Twell,
-                                                     depth_well,
-                                                     Cp,
-                                                     facility_volume,
-                                                     exchangearea,
-                                                     Tmax,
-                                                     Tmin,
-                                                     fraction_maxyield,
-                                                     biomassconcentration,
-                                                     flowrate,
-                                                     m,
-                                                     centrifugation_efficiency,
-                                                     pumpefficiency,
-                                                     slurry_concentration,
-                                                     water_after_drying,
-                                                     recyclingrateaftercentrifuge,
-                                                     volumetodrypers_list,
-                                                     supernatant_pers_list,
-                                                     centrifugedvolumepers_list,
-                                                     centrifugedvolumepers_list_wholeunit,
-                                                     hourly_temperature_list,
-                                                     hourly_collected_power_list,
-                                                     rhoalgae,
-                                                     rhomedium,
-                                                     dcell,
-                                                     night_monitoring)
+    timestep_error_sample['days'] = 0
+    timestep_error_sample['arguments'] = []
 
-    #Collecting results
 
-    totalenergyneeded_tocool_perday = resultsthermo[0]
+def timestep_error_estimate(day_arguments=None, reference_timestep=None):
+    '''
+    Estimates the error due to the time step by simulating a sample of days
+    again with the reference time step and comparing the summaries of the days.
 
-    totalenergyneeded_toheat_perday = resultsthermo[1]
+    #Inputs :
 
-    totalwaterpumpedfromthefacility_perday = resultsthermo[2]
+        #day_arguments : list of dictionnaries with the arguments of 
+        "cultivation_simulation_timestep10" for each day, including the time step
+        to evaluate. None to use the days kept in "timestep_error_sample".
+        #reference_timestep : time step of the reference ; s.
+        None for timestep_reference.
 
-    totalwaterpumpedfromthewell_perday = resultsthermo[3]
+    #Outputs :
 
-    totalenergyneededtocentrifuge = resultsthermo[4]
+        #errors : dataframe with one row per field of "day_summary_fields" 
+        and the columns :
+            mean_abs_error : mean absolute difference with the reference over the days
+            max_abs_error : maximum absolute difference with the reference
+            max_rel_error : maximum relative difference with the reference 
+            (days where the reference is not 0), NaN if the reference is always 0
 
-    temperature_evolution = resultsthermo[5]
+        '''
 
-    energy_evolution_supernatant_recycling_replacing_kWh = resultsthermo[6]
+    if day_arguments is None:
+        day_arguments = timestep_error_sample['arguments']
 
-    energy_evolution_drying_heat_kWh = resultsthermo[7]
+    if reference_timestep is None:
+        reference_timestep = timestep_reference
 
-    energy_evolution_drying_cool_kWh = resultsthermo[8]
+    summaries = []
+    summaries_reference = []
 
-    energy_evolution_drying_mix_kWh = resultsthermo[9]
+    for arguments in day_arguments:
 
-    heatingenergyevolution = resultsthermo[10]
+        # The stages are called directly so that the days are not sampled again
+        summaries.append(cultivation_stages_results(dict(arguments,
+                                                         trajectories=False)))
 
-    coolingenergyevolution = resultsthermo[11]
+        summaries_reference.append(cultivation_stages_results(dict(arguments,
+                                                                   trajectories=False,
+                                                                   timestep=reference_timestep)))
 
-    energyevolution_heatexchanger = resultsthermo[12]
+    summaries = np.array(summaries, dtype=np.float64).reshape((-1, len(day_summary_fields)))
+    summaries_reference = np.array(summaries_reference, dtype=np.float64).reshape((-1, len(day_summary_fields)))
 
-    totalenergyneeded_heatexchanger_perday = resultsthermo[13]
+    differences = np.abs(summaries - summaries_reference)
 
-    heatexchanger_water_evolution = resultsthermo[14]
+    nonzero = summaries_reference != 0
 
-    totalwaterheatexchanger = resultsthermo[15]
+    relative_differences = np.where(nonzero, differences/np.where(nonzero, np.abs(summaries_reference), 1), np.nan)
 
+    errors = pd.DataFrame(index=day_summary_fields,
+                          columns=['mean_abs_error', 'max_abs_error', 'max_rel_error'],
+                          dtype=np.float64)
 
+    if len(day_arguments) > 0:
 
-    #Adjusting the actual harvested and lost productions
+        errors['mean_abs_error'] = differences.mean(axis=0)
+        errors['max_abs_error'] = differences.max(axis=0)
 
-    totalproduction_harvested = (totalproduction                
-                                 * (centrifugation_efficiency
-                                    + (1 - centrifugation_efficiency)
-                                    * recyclingrateaftercentrifuge))
-    
-    totalproduction_loss = totalproduction - totalproduction_harvested #g.d-1
+        for field in range(len(day_summary_fields)):
 
-    volumetric_yield = totalproduction/facility_volume  # g.m-3
+            if nonzero[:, field].any():
+                errors.iloc[field, 2] = np.nanmax(relative_differences[:, field])
 
-    return [totalenergyneeded_tocool_perday,
-            totalenergyneeded_toheat_perday,
-            totalwaterpumpedfromthefacility_perday,
-            totalwaterpumpedfromthewell_perday,
-            totalproduction,
-            totalproduction_harvested,
-            totalproduction_loss,
-            volumetric_yield,
-            totalenergyneededtocentrifuge,
-            temperature_evolution,
-            energy_evolution_supernatant_recycling_replacing_kWh,
-            energy_evolution_drying_heat_kWh,
-            energy_evolution_drying_cool_kWh,
-            energy_evolution_drying_mix_kWh,
-            heatingenergyevolution,
-            coolingenergyevolution,
-            energyevolution_heatexchanger,
-            totalenergyneeded_heatexchanger_perday,
-            heatexchanger_water_evolution,
-            totalwaterheatexchanger,
-            centrifugedvolumepers_list_wholeunit,
-            totalwater_centrifuged_perday]
+    return errors
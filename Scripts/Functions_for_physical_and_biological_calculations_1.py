@@ -50,6 +50,54 @@ os.chdir(currentfolder)
 ###########
 
 
+def elemental_contents_matrix(elemental_contents):
+    """Returns the elemental composition of each macronutrient as an array,
+    to be extracted once from the table and used by the composition functions.
+
+    #Inputs:
+
+        #elemental_contents: table containing the elemental composition of
+                             each macronutrient ; g.g macronutrient-1
+
+    #Outputs:
+
+        #elemental_matrix: array 4 x 3, rows protein, lipid, phospholipid,
+        carbohydrate and columns C, N, P ; g.g macronutrient-1
+
+        """
+
+    if isinstance(elemental_contents, pd.DataFrame):
+
+        elemental_contents = elemental_contents.to_numpy(dtype=float)
+
+    return np.asarray(elemental_contents, dtype=float)[0:4, 0:3]
+
+
+# Names of the outputs of "biomasscompo", in the same order
+
+biomass_composition_fields = ['prot_af_dw',
+                              'carb_af_dw',
+                              'lip_dw',
+                              'prot_dw',
+                              'carb_dw',
+                              'lip_dried_biomass',
+                              'prot_dried_biomass',
+                              'carb_dried_biomass',
+                              'ash_dried_biomass',
+                              'C_af_dw',
+                              'N_af_dw',
+                              'P_af_dw',
+                              'K_af_dw',
+                              'Mg_af_dw',
+                              'S_af_dw',
+                              'C_dw',
+                              'N_dw',
+                              'P_dw',
+                              'K_dw',
+                              'Mg_dw',
+                              'S_dw']
+
+
 def biomasscompo(lipid_af_dw,
                  ash_dw,
                  water_after_drying,
@@ -67,6 +115,10 @@ def biomasscompo(lipid_af_dw,
         #phospholipid_fraction: share of phospholipds among lipids ; g.g lipids-1
         #elemental_contents: table containing the elemental composition of 
                              each macronutrient ; g.g macronutrient-1
+                             (or output of "elemental_contents_matrix", 
+                             used as it is)
+
+        The contents can also be arrays with 1 value per biomass.
 
     #Outputs:
 
@@ -96,6 +148,13 @@ def biomasscompo(lipid_af_dw,
         #ash_dried_biomass: ash content dried biomass ; g.g dbio -1
         """
 
+    # Extracting the elemental compositions unless already done
+    if isinstance(elemental_contents, np.ndarray):
+        elemental_matrix = elemental_contents
+
+    else:
+        elemental_matrix = elemental_contents_matrix(elemental_contents)
+
     # ash-free dry weight
 
     prot_af_dw = (1 - lipid_af_dw)/(5/3)
@@ -117,30 +176,30 @@ def biomasscompo(lipid_af_dw,
 
     # Elemental composition
 
-    C_lip = lipid_af_dw*(elemental_contents.iloc[1, 0]
+    C_lip = lipid_af_dw*(elemental_matrix[1, 0]
                          * (1 -phospholipid_fraction)
-                         + elemental_contents.iloc[2, 0]*phospholipid_fraction)
+                         + elemental_matrix[2, 0]*phospholipid_fraction)
 
-    C_prot = prot_af_dw * elemental_contents.iloc[0, 0]
-    C_carb = carb_af_dw * elemental_contents.iloc[3, 0]
+    C_prot = prot_af_dw * elemental_matrix[0, 0]
+    C_carb = carb_af_dw * elemental_matrix[3, 0]
 
     C_af_dw = C_lip + C_prot + C_carb
     C_dw = C_af_dw*(1 - ash_dw)
 
-    N_lip = lipid_af_dw*(elemental_contents.iloc[1, 1]*(
-        1-phospholipid_fraction)+elemental_contents.iloc[2, 1]*phospholipid_fraction)
+    N_lip = lipid_af_dw*(elemental_matrix[1, 1]*(
+        1-phospholipid_fraction)+elemental_matrix[2, 1]*phospholipid_fraction)
 
-    N_prot = prot_af_dw * elemental_contents.iloc[0, 1]
-    N_carb = carb_af_dw * elemental_contents.iloc[3, 1]
+    N_prot = prot_af_dw * elemental_matrix[0, 1]
+    N_carb = carb_af_dw * elemental_matrix[3, 1]
 
     N_af_dw = N_lip + N_prot + N_carb
     N_dw = N_af_dw*(1 - ash_dw)
 
-    P_lip = lipid_af_dw*(elemental_contents.iloc[1, 2]*(
-        1-phospholipid_fraction)+elemental_contents.iloc[2, 2]*phospholipid_fraction)
+    P_lip = lipid_af_dw*(elemental_matrix[1, 2]*(
+        1-phospholipid_fraction)+elemental_matrix[2, 2]*phospholipid_fraction)
 
-    P_prot = prot_af_dw * elemental_contents.iloc[0, 2]
-    P_carb = carb_af_dw * elemental_contents.iloc[3, 2]
+    P_prot = prot_af_dw * elemental_matrix[0, 2]
+    P_carb = carb_af_dw * elemental_matrix[3, 2]
 
     P_af_dw = P_lip + P_prot + P_carb
     P_dw = P_af_dw*(1 - ash_dw)
@@ -182,6 +241,42 @@ def biomasscompo(lipid_af_dw,
             S_dw]
 
 
+def biomasscompo_array(lipid_af_dw,
+                       ash_dw,
+                       water_after_drying,
+                       phospholipid_fraction,
+                       elemental_matrix):
+    """Returns the composition of many biomasses at once, as calculated by
+    "biomasscompo", with the elemental compositions extracted beforehand.
+
+    #Inputs:
+
+        #lipid_af_dw, ash_dw, water_after_drying, phospholipid_fraction:
+        as in "biomasscompo", arrays with 1 value per biomass (or single values)
+        #elemental_matrix: output of "elemental_contents_matrix"
+
+    #Outputs:
+
+        #composition: array with 1 row per biomass and 1 column per output
+        of "biomasscompo" (columns in "biomass_composition_fields")
+
+        """
+
+    lipid_af_dw, ash_dw, water_after_drying, phospholipid_fraction = np.broadcast_arrays(
+        np.atleast_1d(np.asarray(lipid_af_dw, dtype=float)),
+        np.asarray(ash_dw, dtype=float),
+        np.asarray(water_after_drying, dtype=float),
+        np.asarray(phospholipid_fraction, dtype=float))
+
+    composition = biomasscompo(lipid_af_dw,
+                               ash_dw,
+                               water_after_drying,
+                               phospholipid_fraction,
+                               elemental_matrix)
+
+    return np.column_stack(np.broadcast_arrays(*composition))
+
+
 def conversion_hexose_tobiomass(lipid_af_dw, ash_dw, water_after_drying,
                                phospholipid_fraction, elemental_contents):
     """Returns the ratios of conversion from hexose to ash-free biomass dw
@@ -195,6 +290,9 @@ def conversion_hexose_tobiomass(lipid_af_dw, ash_dw, water_after_drying,
         #phospholipid_fraction: share of phospholipds among lipids ; g.g lip -1
         #elemental_contents: table containing the elemental composition of
                              each macronutrient ; g.g macronutrient-1
+                             (or output of "elemental_contents_matrix")
+
+        The contents can also be arrays with 1 value per biomass.
 
     #Outputs:
 
@@ -202,13 +300,13 @@ def conversion_hexose_tobiomass(lipid_af_dw, ash_dw, water_after_drying,
 
         """
 
-    prot_af_dw = biomasscompo(lipid_af_dw, ash_dw,
-                              water_after_drying,phospholipid_fraction,
-                              elemental_contents)[0]
+    biomass_composition = biomasscompo(lipid_af_dw, ash_dw,
+                                       water_after_drying,phospholipid_fraction,
+                                       elemental_contents)
+
+    prot_af_dw = biomass_composition[0]
 
-    carb_af_dw = biomasscompo(lipid_af_dw, ash_dw,
-                              water_after_drying,phospholipid_fraction,
-                              elemental_contents)[1]
+    carb_af_dw = biomass_composition[1]
 
     ratio = 1/(1.11*carb_af_dw+1.7*prot_af_dw+2.6*lipid_af_dw)
 
@@ -295,6 +393,7 @@ def energeticyield_biomass_perkjenergy(lipid_af_dw, ash_dw, water_after_drying,
         #phospholipid_fraction: share of phospholipds among lipids ; g.g lip -1
         #elemental_contents: table containing the elemental composition of
                              each macronutrient ; g.g macronutrient-1
+                             (or output of "elemental_contents_matrix")
 
     #Outputs:
 
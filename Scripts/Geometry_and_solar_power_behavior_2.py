@@ -47,21 +47,14 @@ import Functions_for_physical_and_biological_calculations_1 as functions
 
 # Assuming the PBR unit is a rectangle with width=length/3
 
-df_resultslength= pd.DataFrame(columns=['Upper','Lower','Average'])
-
 length_values=range(1,50)
 
-for length in length_values:
-    
-    datacollection=solardata.Qreceived_bym2PBR_month(43.695, 1.922, 3, 90, 1.5, 0.03, 0.01, 0.2, length, length/3)
+lengths=np.array(length_values)
 
-    averageday_persquaremeter=sum(datacollection[0]['Average'])
-    
-    upperday_persquaremeter=sum(datacollection[0]['Upper'])
-    
-    lowerday_persquaremeter=sum(datacollection[0]['Lower'])
+# All the geometries at once : geometries x 24 hours x (Upper,Lower,Average)
+datacollection=solardata.Qreceived_bym2PBR_month_batch(43.695, 1.922, 3, 90, 1.5, 0.03, 0.01, 0.2, lengths, lengths/3)
 
-    df_resultslength.loc[length]=[upperday_persquaremeter,lowerday_persquaremeter,averageday_persquaremeter]
+df_resultslength=pd.DataFrame(datacollection.sum(axis=1),index=length_values,columns=['Upper','Lower','Average'])
 
 plt.plot(length_values,df_resultslength)
 
@@ -79,25 +72,15 @@ plt.savefig('../Plot/Sensitivity_length_Qm2',dpi=600)
 
 
 
-df_resultsdiameter=pd.DataFrame(columns=['Upper','Lower','Average'])
 
 diameter_values=range(1,11)
 
 diameter_values=[a/100 for a in diameter_values]
 
 
-for diameter in diameter_values:
-    
-    
-    datacollection=solardata.Qreceived_bym2PBR_month(43.695, 1.922, 3, 90, 1.5, diameter, 0.01, 0.2, 25, 25/3)
-
-    averageday_persquaremeter=sum(datacollection[0]['Average'])
-    
-    upperday_persquaremeter=sum(datacollection[0]['Upper'])
-    
-    lowerday_persquaremeter=sum(datacollection[0]['Lower'])
+datacollection=solardata.Qreceived_bym2PBR_month_batch(43.695, 1.922, 3, 90, 1.5, np.array(diameter_values), 0.01, 0.2, 25, 25/3)
 
-    df_resultsdiameter.loc[diameter]=[upperday_persquaremeter,lowerday_persquaremeter,averageday_persquaremeter]
+df_resultsdiameter=pd.DataFrame(datacollection.sum(axis=1),index=diameter_values,columns=['Upper','Lower','Average'])
 
 plt.plot(diameter_values,df_resultsdiameter)
 plt.ylabel('Wh collected per day')
@@ -110,23 +93,14 @@ plt.savefig('../Plot/Sensitivity_Tube_diameter',dpi=600)
 ###Influence of the gap between tubes
 
 
-df_resultsgap=pd.DataFrame(columns=['Upper','Lower','Average'])
 
 gap_values=range(1,30)
 
 gap_values=[a/100 for a in gap_values]
 
-for gap in gap_values:
-    
-    datacollection=solardata.Qreceived_bym2PBR_month(43.695, 1.922, 3, 90, 1.5, 0.03,gap, 0.2, 25, 25/3)
-
-    averageday_persquaremeter=sum(datacollection[0]['Average'])
-    
-    upperday_persquaremeter=sum(datacollection[0]['Upper'])
-    
-    lowerday_persquaremeter=sum(datacollection[0]['Lower'])
+datacollection=solardata.Qreceived_bym2PBR_month_batch(43.695, 1.922, 3, 90, 1.5, 0.03,np.array(gap_values), 0.2, 25, 25/3)
 
-    df_resultsgap.loc[gap]=[upperday_persquaremeter,lowerday_persquaremeter,averageday_persquaremeter]
+df_resultsgap=pd.DataFrame(datacollection.sum(axis=1),index=gap_values,columns=['Upper','Lower','Average'])
 
 plt.plot(gap_values,df_resultsgap)
 plt.ylabel('Wh collected per day')
@@ -138,23 +112,14 @@ plt.savefig('../Plot/Sensitivity_horizontal_distance',dpi=600)
 ###Influence of the horizontal distance between stacks
 
 
-df_resultshori_dist=pd.DataFrame(columns=['Upper','Lower','Average'])
 
 hori_dist_values=range(30,300,10)
 
 hori_dist_values=[a/100 for a in hori_dist_values]
 
-for hori_dist in hori_dist_values:
-    
-    datacollection=solardata.Qreceived_bym2PBR_month(43.695, 1.922, 3, 90, 1.5, 0.60,0.01, hori_dist, 25, 25/3)
-
-    averageday_persquaremeter=sum(datacollection[0]['Average'])
-    
-    upperday_persquaremeter=sum(datacollection[0]['Upper'])
-    
-    lowerday_persquaremeter=sum(datacollection[0]['Lower'])
+datacollection=solardata.Qreceived_bym2PBR_month_batch(43.695, 1.922, 3, 90, 1.5, 0.60,0.01, np.array(hori_dist_values), 25, 25/3)
 
-    df_resultshori_dist.loc[hori_dist]=[upperday_persquaremeter,lowerday_persquaremeter,averageday_persquaremeter]
+df_resultshori_dist=pd.DataFrame(datacollection.sum(axis=1),index=hori_dist_values,columns=['Upper','Lower','Average'])
 
 plt.plot(hori_dist_values,df_resultshori_dist)
 plt.ylabel('Wh collected per day')
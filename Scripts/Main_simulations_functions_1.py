@@ -28,6 +28,7 @@ from itertools import *
 from math import*
 import csv
 import copy
+import functools
 
 import bw2data
 import bw2io
@@ -50,6 +51,8 @@ from mpl_toolkits import mplot3d
 
 import Cultivation_simul_Night_Harvest_1 as cultsimul
 import Functions_for_physical_and_biological_calculations_1 as functions
+import Retrieving_solar_and_climatic_data_1 as solardata
+import Thermoregulation_emulator_1 as emulation
 
 
 # Set working directory to file location 
@@ -433,7 +436,14 @@ def LCI_one_strain_uniquevalues(Biodict,
                                 months_suitable_for_cultivation,
                                 fraction_maxyield,
                                 fishfeed_table,
-                                elemental_contents):
+                                elemental_contents,
+                                transposition=None,
+                                engine='odeint',
+                                night_steady_state='twopass',
+                                cache=False,
+                                timestep=10,
+                                multiday=False,
+                                emulator=None):
     
     '''Calculate the LCI for one set of parameters given in input by simulating 
     the cultivation and scaling the values to the FU.
@@ -449,6 +459,34 @@ def LCI_one_strain_uniquevalues(Biodict,
         #fraction_maxyield : Fraction of the maximum yield achieved ; .
         #fishfeed_table : DataFrame with fish feed composition
         #elemental_contents : Table with elemental compositons of macronutrients
+        #transposition : None to use the PVGIS vertical surfaces, or sky model
+        used to calculate them locally from the horizontal surface
+        ('haydavies' or 'isotropic'). See Solar_transposition_1.
+        #engine : integrator for the temperature, 'odeint', 'fixedstep', 'analytical' or 'reduced'.
+        See "thermosimulation_1day_timestep10" in Cultivation_simul_Night_Harvest_1.
+        #night_steady_state : 'twopass' or 'periodic', start of the day without
+        thermoregulation at night. See "thermosimulation_1day_timestep10" in Cultivation_simul_Night_Harvest_1.
+        #cache : False to simulate every day, True to keep the simulated days
+        in memory, or folder to also keep them on disk. The days with the same
+        inputs are then simulated only once.
+        See "cultivation_simulation_cached" in Cultivation_simul_Night_Harvest_1.
+        'stages' to keep the results of each stage of the simulation in memory,
+        so that only the stages depending on the parameters which changed are
+        calculated again. See "cultivation_simulation_staged".
+        #timestep : time step of the thermal simulation ; s. 10 s by default,
+        60 s or 300 s for faster screening runs.
+        See "thermal_time_grid" in Cultivation_simul_Night_Harvest_1.
+        #multiday : False to simulate an average day for each month (x 30.4 days),
+        True to simulate the consecutive days of the cultivation period with 
+        the temperature and the biomass concentration carried over from one 
+        day to the next. The days are aggregated by month while they are simulated.
+        See "cultivation_simulation_season" in Cultivation_simul_Night_Harvest_1.
+        #emulator : None to simulate the temperature of each day, or emulator 
+        (output of "train_thermal_emulator" or path of the file where it is saved)
+        predicting the thermal summary of the days in its context and domain, 
+        the other days being simulated. As the month is part of the context,
+        a dictionnary month : emulator ("train_thermal_emulators") covers 
+        the whole cultivation period. See Thermoregulation_emulator_1.
         
 
     Outputs:
@@ -483,12 +521,286 @@ def LCI_one_strain_uniquevalues(Biodict,
     
         
     
-    LCIdict_updated = LCIdict.copy()
-    
-    # Collecting all values from the dictionnaries and creating local variables
+    # Qualitative parameters are determined based on the probabilities
+
+    [Nsource,
+     biochemicalclass,
+     night_monitoring,
+     market_for_substitution] = LCI_qualitative_parameters(Biodict, Tech_opdict)
+
+    # Cultivation simulation
+
+    cultivation_period = cultivation_period_simulation(Biodict,
+                                                       Physicdict,
+                                                       Tech_opdict,
+                                                       Locationdict,
+                                                       months_suitable_for_cultivation,
+                                                       fraction_maxyield,
+                                                       elemental_contents,
+                                                       Nsource,
+                                                       night_monitoring,
+                                                       transposition,
+                                                       engine,
+                                                       night_steady_state,
+                                                       cache,
+                                                       timestep,
+                                                       multiday,
+                                                       emulator)
+
+    # LCI calculated as a sample of 1 set of parameters
+
+    parameters = pd.DataFrame([{**Tech_opdict, **Physicdict, **Biodict, **Locationdict}])
+
+    qualitative = pd.DataFrame([[Nsource,
+                                 biochemicalclass,
+                                 night_monitoring,
+                                 market_for_substitution]],
+                               columns=LCI_qualitative_fields)
+
+    LCI = LCI_matrix(parameters,
+                     qualitative,
+                     [cultivation_period],
+                     LCIdict,
+                     fishfeed_table,
+                     elemental_contents)
+
+    LCIdict_updated = LCI[0].iloc[0].to_dict()
+
+    # Other outputs in the order of "LCI_outputs_fields"
+    return [LCIdict_updated] + list(LCI[1].iloc[0])  # []
+
+
+
+
+def LCI_qualitative_parameters(Biodict, Tech_opdict):
+    '''Determines the qualitative parameters of one set of parameters
+    based on their probabilities.
+
+    Inputs:
+        #Biodict : Dictionnary with biological parameters
+        #Tech_opdict : Dictionnary with techno-operational parameters
+
+    Outputs:
+        #Nsource : Nitrogen source, 'no3' or 'nh3'
+        #biochemicalclass : Biochemical class of the molecule, 'lip', 'carb' or 'prot'
+        #night_monitoring : Thermoregulation at night, 'yes' or 'no'
+        #market_for_substitution : Market that the coproducts enter,
+        'animal feed' or 'fish feed'
+
+    '''
+
+    # Nsource
+
+    if random() < Biodict['prob_no3']: # Then the source is Nitrate
+        Nsource = 'no3'
+    else:
+        Nsource = 'nh3'
+
+
+    # FOR STOCHASTICITY # NOT USED IN PAPER
+
+    # dice =random()
+    # if dice<0.3:
+    #     #print('okC1')
+
+    #     biochemicalclass='lip'
+    # elif 0.3<dice<0.6  :
+    #     #print('okC2')
+
+    #     biochemicalclass='prot'
+    # else:
+    #     #print('okC2')
+
+    #     biochemicalclass='carb'
+
+
+    # The molecule is a carbohydrate
+
+    biochemicalclass = 'carb'
+
+
+    # Thermoregulation at night
+    if random() < Tech_opdict['prob_night_monitoring']:
+
+        night_monitoring = 'yes'
+
+    else:
+        night_monitoring = 'no'
+
+
+    # Market for substitution
+
+    if random() < Tech_opdict['prob_market_subst_animal_feed']:
+
+        market_for_substitution = 'animal feed'
+
+    else:
+        market_for_substitution = 'fish feed'
+
+    return [Nsource,
+            biochemicalclass,
+            night_monitoring,
+            market_for_substitution]
+
+
+
+# Names of the qualitative parameters in the LCI
+# (same order as the outputs of "LCI_qualitative_parameters")
+
+LCI_qualitative_fields = ['Nsource',
+                          'Bio_class',
+                          'night_monitoring',
+                          'market_for_substitution']
+
+
+# Totals over the cultivation period
+# (same order as the outputs of "cultivation_period_simulation")
+
+cultivation_period_fields = ['totalheating',  # kWh
+                             'totalcooling',  # kWh
+                             'totalcooling_thermal',  # kWh
+                             'total_elec_centrifuge',  # kWh
+                             'total_elec_mixing',  # kWh
+                             'totalproduction',  # g dw
+                             'totalproduction_harvested',  # g dw
+                             'totalproduction_loss',  # g dw
+                             'totalwaterpumpedfromthefacility',  # L
+                             'totalwaterpumpedfromthewell',  # L
+                             'totalwatercentrifuged',  # L
+                             'meantemp_at_harvest_time_cultivationperiod',  # °C
+                             'min_centrifugation_rate_m3_h',  # m3.h-1
+                             'max_centrifugation_rate_m3_h',  # m3.h-1
+                             'numberofcultivationdays']  # days
+
+
+def cultivation_period_days(Biodict,
+                            Physicdict,
+                            Tech_opdict,
+                            Locationdict,
+                            months_suitable_for_cultivation,
+                            fraction_maxyield,
+                            elemental_contents,
+                            Nsource,
+                            night_monitoring,
+                            transposition=None,
+                            engine='odeint',
+                            night_steady_state='twopass',
+                            timestep=10):
+    '''Returns the arguments of "cultivation_simulation_timestep10" for the
+    average day of each month of the cultivation period of one set of parameters.
+
+    Inputs:
+        #Biodict, Physicdict, Tech_opdict, Locationdict, months_suitable_for_cultivation,
+        fraction_maxyield, elemental_contents, Nsource, night_monitoring,
+        transposition, engine, night_steady_state, timestep : 
+        See "cultivation_period_simulation"
+
+    Outputs:
+        #days : list of dictionnaries argument : value, one per month
+
+    '''
+
+    # Conversion to Tmax, Tmin for simpler calculation
+    Tmax = Biodict['Topt'] + Biodict['T_plateau']/2
+    Tmin = Biodict['Topt'] - Biodict['T_plateau']/2
+
+    # Elemental composition of the macronutrients, extracted once for all the days
+    elemental_matrix = functions.elemental_contents_matrix(elemental_contents)
+
+    days = []
+
+    for month in months_suitable_for_cultivation:
+
+        days.append({'hconv': Physicdict['hconv'],
+                     'Twell': Locationdict['Twell'],
+                     'depth_well': Locationdict['depth_well'],
+                     'lat': Locationdict['lat'],
+                     'long': Locationdict['long'],
+                     'azimuthfrontal': Locationdict['azimuthfrontal'],
+                     'month': month,
+                     'Cp': Physicdict['Cp'],
+                     'height': Tech_opdict['height'],
+                     'tubediameter': Tech_opdict['tubediameter'],
+                     'gapbetweentubes': Tech_opdict['gapbetweentubes'],
+                     'horizontaldistance': Tech_opdict['horizontaldistance'],
+                     'length_of_PBRunit': Tech_opdict['length_of_PBRunit'],
+                     'width_of_PBR_unit': Tech_opdict['width_of_PBR_unit'],
+                     'rhoalgae': Biodict['rhoalgae'],
+                     'rhomedium': Physicdict['rhomedium'],
+                     'rhosuspension': Tech_opdict['rhosuspension'],
+                     'dcell': Biodict['dcell'],
+                     'Tmax': Tmax,
+                     'Tmin': Tmin,
+                     'Biodict': Biodict,
+                     'ash_dw': Biodict['ash_dw'],
+                     'Nsource': Nsource,
+                     'fraction_maxyield': fraction_maxyield,
+                     'biomassconcentration': Tech_opdict['biomassconcentration'],
+                     'flowrate': Tech_opdict['flowrate'],
+                     'centrifugation_efficiency': Tech_opdict['centrifugation_efficiency'],
+                     'pumpefficiency': Tech_opdict['pumpefficiency'],
+                     'slurry_concentration': Tech_opdict['slurry_concentration'],
+                     'water_after_drying': Tech_opdict['water_after_drying'],
+                     'recyclingrateaftercentrifuge': Tech_opdict['recyclingrateaftercentrifuge'],
+                     'night_monitoring': night_monitoring,
+                     'elemental_contents': elemental_matrix,
+                     'transposition': transposition,
+                     'engine': engine,
+                     'night_steady_state': night_steady_state,
+                     'timestep': timestep})
+
+    return days
+
+
+def cultivation_period_simulation(Biodict,
+                                  Physicdict,
+                                  Tech_opdict,
+                                  Locationdict,
+                                  months_suitable_for_cultivation,
+                                  fraction_maxyield,
+                                  elemental_contents,
+                                  Nsource,
+                                  night_monitoring,
+                                  transposition=None,
+                                  engine='odeint',
+                                  night_steady_state='twopass',
+                                  cache=False,
+                                  timestep=10,
+                                  multiday=False,
+                                  emulator=None,
+                                  day_summaries=None):
+    '''Simulates the cultivation over the cultivation period for one set of
+    parameters and returns the totals needed to calculate its LCI.
+
+    Inputs:
+        #Biodict : Dictionnary with biological parameters
+        #Physicdict : Dictionnary with physical parameters
+        #Tech_opdict : Dictionnary with techno-operational parameters
+        #Locationdict : Dictionnary with geographic parameters
+        #months_suitable_for_cultivation : Months for cultivation ;
+        list of month numbers : [a,b,c]
+
+        #fraction_maxyield : Fraction of the maximum yield achieved ; .
+        #elemental_contents : Table with elemental compositons of macronutrients
+        #Nsource : Nitrogen source, 'no3' or 'nh3'
+        #night_monitoring : Thermoregulation at night, 'yes' or 'no'
+
+        #transposition, engine, night_steady_state, cache, timestep, multiday,
+        emulator : See "LCI_one_strain_uniquevalues"
+        #day_summaries : None to simulate the average day of each month, or 
+        summaries of these days already simulated (outputs of 
+        "cultivation_simulation_batch" for the days of "cultivation_period_days")
+
+    Outputs:
+        # List of totals over the cultivation period, in the order of
+        "cultivation_period_fields"
+
+    '''
+
+    # Collecting the values needed for the simulation
+
+    # Tech_opdict
 
-    # Tech_opdict 
-    
     height = Tech_opdict['height']
     tubediameter = Tech_opdict['tubediameter']
     gapbetweentubes = Tech_opdict['gapbetweentubes']
@@ -504,40 +816,16 @@ def LCI_one_strain_uniquevalues(Biodict,
     recyclingrateaftercentrifuge = Tech_opdict['recyclingrateaftercentrifuge']
     roughness = Tech_opdict['roughness']
     rhosuspension = Tech_opdict['rhosuspension']
-    cleaningvolumeVSfacilityvolume = Tech_opdict['cleaningvolumeVSfacilityvolume']
-    concentration_hypo = Tech_opdict['concentration_hypo']
-    concentration_hydro = Tech_opdict['concentration_hydro']
-    boilerefficiency = Tech_opdict['boilerefficiency']
-    glass_life_expectancy = Tech_opdict['glass_life_expectancy']
-    prob_night_monitoring = Tech_opdict['prob_night_monitoring']
-    extraction = Tech_opdict['extraction']
-    prob_market_subst_animal_feed = Tech_opdict['prob_market_subst_animal_feed']
-
 
     # Physicdict
 
     Cp = Physicdict['Cp']
     hconv = Physicdict['hconv']
-    rhomedium = Physicdict['rhomedium']  
-    rhowater = Physicdict['rhowater']  
-    Cw = Physicdict['Cw']  
+    rhomedium = Physicdict['rhomedium']
 
     # Biodict
 
-    lipid_af_dw = Biodict['lipid_af_dw']
     rhoalgae = Biodict['rhoalgae']
-    MJ_kglip = Biodict['MJ_kglip']
-    MJ_kgcarb = Biodict['MJ_kgcarb']
-    MJ_kgprot = Biodict['MJ_kgprot']
-    PAR = Biodict['PAR']
-    losspigmentantenna = Biodict['losspigmentantenna']
-    quantumyield = Biodict['quantumyield']
-    lossvoltagejump = Biodict['lossvoltagejump']
-    losstoATPNADPH = Biodict['losstoATPNADPH']
-    losstohexose = Biodict['losstohexose']
-    lossrespiration = Biodict['lossrespiration']
-    bioact_fraction_molec = Biodict['bioact_fraction_molec']
-    prob_no3 = Biodict['prob_no3']
     Topt = Biodict['Topt']
     T_plateau = Biodict['T_plateau']
 
@@ -546,11 +834,7 @@ def LCI_one_strain_uniquevalues(Biodict,
     Tmin = Topt-T_plateau/2
 
     dcell = Biodict['dcell']
-    incorporation_rate = Biodict['incorporation_rate']
     ash_dw = Biodict['ash_dw']
-    nutrient_utilisation = Biodict['nutrient_utilisation']
-    co2_utilisation = Biodict['co2_utilisation']
-    phospholipid_fraction = Biodict['phospholipid_fraction']
 
     # Locationdict
 
@@ -560,65 +844,492 @@ def LCI_one_strain_uniquevalues(Biodict,
     depth_well = Locationdict['depth_well']
     azimuthfrontal = Locationdict['azimuthfrontal']
 
-    # Qualitative parameters are determined based on the probabilities
-    # and a new entry is created in the LCI dict
+    # Tube length for the mixing
 
-    # Nsource
+    tubelength = functions.PBR_geometry(height,
+                                        tubediameter,
+                                        gapbetweentubes,
+                                        horizontaldistance,
+                                        length_of_PBRunit,
+                                        width_of_PBR_unit)[1]
 
-    if random() < prob_no3: # Then the source is Nitrate
-        Nsource = 'no3'
+    # Elemental composition of the macronutrients, extracted once for all the days
+    elemental_matrix = functions.elemental_contents_matrix(elemental_contents)
+
+    # Intializing variables
+    totalcooling_thermal = 0
+    totalcooling = 0
+    totalheating = 0
+    totalproduction = 0
+    totalproduction_loss = 0
+    totalproduction_harvested = 0
+    totalwaterpumpedfromthefacility = 0
+    totalwaterpumpedfromthewell = 0
+    total_elec_centrifuge = 0
+    total_elec_mixing = 0
+    totalwatercentrifuged = 0
+
+    meantemp_at_harvest_time_cultivationperiod = 0
+    min_centrifugation_rate_list = []
+    max_centrifugation_rate_list = []
+    cultivation_days = 0
+
+    # Calling the cultivation simulation function
+    if cache is False:
+        cultivation_simulation = cultsimul.cultivation_simulation_timestep10
+    elif cache is True:
+        cultivation_simulation = cultsimul.cultivation_simulation_cached
+    elif cache == 'stages':
+        cultivation_simulation = cultsimul.cultivation_simulation_staged
     else:
-        Nsource = 'nh3'
+        cultivation_simulation = functools.partial(cultsimul.cultivation_simulation_cached,
+                                                   cache_folder=cache)
+
+    if emulator is not None:
+        # Thermal simulation replaced by the emulator when possible
+        cultivation_simulation = functools.partial(emulation.cultivation_simulation_emulated,
+                                                   emulator=emulator,
+                                                   day_simulation=cultivation_simulation)
+
+    if multiday:
+        # Consecutive days of the cultivation period, aggregated by month
+        # while they are simulated
+        season = cultsimul.cultivation_simulation_season(hconv,
+                                                         Twell,
+                                                         depth_well,
+                                                         lat,
+                                                         long,
+                                                         azimuthfrontal,  
+                                                         months_suitable_for_cultivation,  
+                                                         Cp,  
+                                                         height,
+                                                         tubediameter,
+                                                         gapbetweentubes,
+                                                         horizontaldistance,
+                                                         length_of_PBRunit,
+                                                         width_of_PBR_unit,  
+                                                         rhoalgae, 
+                                                         rhomedium,
+                                                         rhosuspension, 
+                                                         dcell, 
+                                                         Tmax,
+                                                         Tmin,
+                                                         Biodict, 
+                                                         ash_dw,
+                                                         Nsource,  
+                                                         fraction_maxyield,  
+                                                         biomassconcentration,
+                                                         flowrate,  
+                                                         centrifugation_efficiency,
+                                                         pumpefficiency,  
+                                                         slurry_concentration,
+                                                         water_after_drying,
+                                                         recyclingrateaftercentrifuge,
+                                                         night_monitoring,
+                                                         elemental_matrix,
+                                                         transposition,
+                                                         engine=engine,
+                                                         night_steady_state=night_steady_state,
+                                                         timestep=timestep,
+                                                         day_simulation=cultivation_simulation)
+
+        season_months = cultsimul.cultivation_season_months(season)
+
+    elif day_summaries is None:
+        # Arguments of the average day of each month
+        days = cultivation_period_days(Biodict,
+                                       Physicdict,
+                                       Tech_opdict,
+                                       Locationdict,
+                                       months_suitable_for_cultivation,
+                                       fraction_maxyield,
+                                       elemental_matrix,
+                                       Nsource,
+                                       night_monitoring,
+                                       transposition,
+                                       engine,
+                                       night_steady_state,
+                                       timestep)
 
-    LCIdict_updated['Nsource'] = Nsource
+    # Simulating an average day for each month of the cultivation period
+    for month_index in range(len(months_suitable_for_cultivation)):
 
+        if multiday:
+            # Mean day of the month and number of days simulated
+            [month, days_in_month, simulation_averageday] = next(season_months)
 
-    # FOR STOCHASTICITY # NOT USED IN PAPER
+            cultivation_days += days_in_month
 
-    # dice =random()
-    # if dice<0.3:
-    #     #print('okC1')
+        elif day_summaries is not None:
+            # average number of days in a month : 30.4
+            days_in_month = 30.4
 
-    #     biochemicalclass='lip'
-    # elif 0.3<dice<0.6  :
-    #     #print('okC2')
+            # Average day already simulated
+            simulation_averageday = day_summaries[month_index]
 
-    #     biochemicalclass='prot'
-    # else:
-    #     #print('okC2')
+        else:
+            # average number of days in a month : 30.4
+            days_in_month = 30.4
 
-    #     biochemicalclass='carb'
+            simulation_averageday = cultivation_simulation(**days[month_index],
+                                                           trajectories=False)
 
+        # Summary of the day, values in the order of "day_summary_fields"
+        # in Cultivation_simul_Night_Harvest_1
 
-    # The molecule is a carbohydrate
+        # Collecting results and multiplying by 
+        # the number of days in the month
 
-    biochemicalclass = 'carb'
+        monthly_heating_energy = simulation_averageday[1]*days_in_month #kWh
+      
+        monthly_waterpumped_from_the_facility = simulation_averageday[2]*days_in_month  # L
 
-    LCIdict_updated['Bio_class'] = biochemicalclass
+        monthly_waterpumped_from_the_well = simulation_averageday[3]*days_in_month  # L
 
+        monthly_production = simulation_averageday[4]*days_in_month  # g dw
 
-    # Thermoregulation at night
-    if random() < prob_night_monitoring:
+        monthly_production_harvested = simulation_averageday[5]*days_in_month  # g dw
+
+        monthly_production_loss = simulation_averageday[6]*days_in_month  # g dw
+
+        monthly_volumetric_yield = simulation_averageday[7]*days_in_month  # g dw.m-3
+
+        monthly_energy_tocentrifuge = simulation_averageday[8]*days_in_month  # kWh
+
+        monthly_cooling_energy_thermal = simulation_averageday[9]*days_in_month  # kWh
+
+        monthly_cooling_energy = simulation_averageday[9]*days_in_month  # kWh
+
+        # water centrifuged L
+        water_centrifuged = simulation_averageday[11]*days_in_month
+
+        # Collection min and max centrifugation rate (Obsolete)
         
-        night_monitoring = 'yes'
+        min_centrifugation_rate_list.append(simulation_averageday[14])
 
-    else:
-        night_monitoring = 'no'
+        max_centrifugation_rate_list.append(simulation_averageday[15])
+        
+        # Temperature : Some processes have temperature as an input for their 
+        # electricity consumption 
+        #
 
-    LCIdict_updated['night_monitoring'] = night_monitoring
 
+        # For Mixing : Mixing is needed at any time of the day and night.
+        meantemp_daytotal = simulation_averageday[12]
+
+        monthly_Electricity_mixing_day = functions.mixing_perday(
+            rhosuspension,
+            tubediameter,
+            pumpefficiency,
+            flowrate,
+            roughness,
+            meantemp_daytotal,
+            biomassconcentration,
+            tubelength)[0] * days_in_month  # MJ.m-2.month
+        
+        # For Drying : Drying requires to heat the slurry to 100 C and the
+        # energy will depend on the initial temperature : temperature of the
+        # culture at harvest time (9PM)
+        
+        temp_at_harvest_time = simulation_averageday[13]
 
-    # Market for substitution
 
-    if random() < prob_market_subst_animal_feed:
+
+
+        # Summing over months in the loop
+        totalproduction += monthly_production  # g dw
         
-        market_for_substitution = 'animal feed'
+        totalproduction_harvested += monthly_production_harvested  # g dw
+        
+        totalproduction_loss += monthly_production_loss  # g dw
+
+        totalcooling_thermal += monthly_cooling_energy_thermal # kWh
 
+        totalcooling += monthly_cooling_energy  # kWh
+        
+        totalheating += monthly_heating_energy  # kWh
+        
+        total_elec_centrifuge += monthly_energy_tocentrifuge  # kWh
+        
+        total_elec_mixing += monthly_Electricity_mixing_day/3.6  # conversion to kWh
+
+        totalwaterpumpedfromthefacility += monthly_waterpumped_from_the_facility  # L
+        
+        totalwaterpumpedfromthewell += monthly_waterpumped_from_the_well  # L
+
+        totalwatercentrifuged += water_centrifuged  # L
+
+        # Collecting the mean temperature over the cultivation period
+
+        # For drying
+        meantemp_at_harvest_time_cultivationperiod += temp_at_harvest_time/len(months_suitable_for_cultivation) # °C
+
+    # End of the loop
+    # Collecting min and max centrifugation rate during cultivation period (Obsolete)
+
+    min_centrifugation_rate_m3_h = min(
+        min_centrifugation_rate_list)*3.6  # m3.h-1
+    
+    max_centrifugation_rate_m3_h = max(
+        max_centrifugation_rate_list)*3.6  # m3.h-1
+
+    # Number of days of the cultivation period
+
+    if multiday:
+        numberofcultivationdays = cultivation_days # days
     else:
-        market_for_substitution = 'fish feed' 
+        numberofcultivationdays = len(months_suitable_for_cultivation)*30.4 # days
+
+    return [totalheating,
+            totalcooling,
+            totalcooling_thermal,
+            total_elec_centrifuge,
+            total_elec_mixing,
+            totalproduction,
+            totalproduction_harvested,
+            totalproduction_loss,
+            totalwaterpumpedfromthefacility,
+            totalwaterpumpedfromthewell,
+            totalwatercentrifuged,
+            meantemp_at_harvest_time_cultivationperiod,
+            min_centrifugation_rate_m3_h,
+            max_centrifugation_rate_m3_h,
+            numberofcultivationdays]
+
+
+
+# Compiled LCI schemas, keyed by the names of their flows
+
+LCI_schemas = {}
+
+
+def LCI_schema(LCIdict, fishfeed_table):
+    '''Returns the compiled schema of the LCI : a structured dtype with 1 float
+    field per numerical flow of the LCI dictionnary and per fish feed ingredient,
+    each flow being a fixed column of the LCI matrix. The schema is compiled once
+    for each LCI dictionnary.
+
+    Inputs:
+        #LCIdict : Initialized LCI dictionnary
+        #fishfeed_table : DataFrame with fish feed composition
+
+    Outputs:
+        #schema : Structured dtype of the records of the LCI matrix
+
+    '''
+
+    flows = tuple([flow for flow in LCIdict if flow not in LCI_qualitative_fields]
+                  + [ingredient for ingredient in fishfeed_table['Ingredient']
+                     if ingredient not in LCIdict])
+
+    if flows not in LCI_schemas:
+
+        LCI_schemas[flows] = np.dtype([(flow, np.float64) for flow in flows])
+
+    return LCI_schemas[flows]
+
+
+def LCI_schema_records(schema, number_sets, LCIdict):
+    '''Preallocates the LCI matrix of a sample of sets of parameters,
+    initialized with the values of the LCI dictionnary.
+    Each record is a view of 1 row of the matrix and each field a view of
+    1 column, so that the LCI is written directly in the matrix.
+
+    Inputs:
+        #schema : Compiled schema (output of "LCI_schema")
+        #number_sets : Number of sets of parameters
+        #LCIdict : Initialized LCI dictionnary
+
+    Outputs:
+        #LCI_records : Structured array with 1 record per set of parameters.
+        LCI_records.view((np.float64, len(schema.names))) is the same
+        matrix without the names of the flows.
+
+    '''
+
+    LCI_records = np.zeros(number_sets, dtype=schema)
+
+    for flow in schema.names:
+
+        if flow in LCIdict:
+
+            LCI_records[flow] = LCIdict[flow]
+
+    return LCI_records
+
+
+def LCI_schema_table(LCI_records, qualitative, LCIdict):
+    '''Returns the LCI matrix and the qualitative parameters as 1 DataFrame
+    with the flows in the order of the LCI dictionnary.
+
+    Inputs:
+        #LCI_records : LCI matrix (output of "LCI_schema_records")
+        #qualitative : DataFrame with the columns "LCI_qualitative_fields"
+        #LCIdict : Initialized LCI dictionnary
+
+    Outputs:
+        #LCI_table : DataFrame with 1 row per set of parameters and 1 column
+        per entry of the LCI
+
+    '''
+
+    # Entries of the LCI dictionnary, then the qualitative parameters and
+    # the ingredients which are not in the dictionnary
+    names = (list(LCIdict)
+             + [name for name in LCI_qualitative_fields if name not in LCIdict]
+             + [flow for flow in LCI_records.dtype.names if flow not in LCIdict])
+
+    return pd.DataFrame({name: (qualitative[name].to_numpy()
+                                if name in LCI_qualitative_fields
+                                else LCI_records[name])
+                         for name in names})
+
+
+# Outputs of the LCI other than the LCI figures
+# (same order as the outputs of "LCI_one_strain_uniquevalues")
+
+LCI_outputs_fields = ['surfaceyield',
+                      'volumetricyield',
+                      'optimization_performance',
+                      'needed_dbio_check',
+                      'substitution_check',
+                      'total_production_kg_dw',
+                      'total_production_harvested_kg_dw',
+                      'total_production_loss_kg_dw',
+                      'conc_waste_water_nutrient_N',
+                      'conc_waste_water_nutrient_P',
+                      'conc_waste_water_nutrient_K',
+                      'conc_waste_water_nutrient_Mg',
+                      'conc_waste_water_biomass',
+                      'conc_waste_water_C',
+                      'conc_waste_water_nutrient_S',
+                      'bioact_molec_dbio',
+                      'min_centrifugation_rate_m3_h',
+                      'max_centrifugation_rate_m3_h',
+                      'totalwatercentrifuged',
+                      'tubelength',
+                      'facilityvolume',
+                      'exchange_area',
+                      'totalcooling_thermal']
+
+
+def LCI_matrix(parameters,
+               qualitative,
+               cultivation_periods,
+               LCIdict,
+               fishfeed_table,
+               elemental_contents):
+    '''Calculates the LCIs of a whole sample of parameters sets at once,
+    from the totals of their simulated cultivation periods.
+    The mass and energy balances are calculated on arrays with 1 value per set.
+    Only the fish feed substitution is optimized for each different composition
+    of the biomass.
+
+    Inputs:
+        #parameters : DataFrame with 1 row per set of parameters and 1 column
+        per parameter of Biodict, Physicdict, Tech_opdict and Locationdict
+        #qualitative : DataFrame with 1 row per set of parameters and the columns
+        "LCI_qualitative_fields" (outputs of "LCI_qualitative_parameters")
+        #cultivation_periods : Array with 1 row per set of parameters and the
+        columns "cultivation_period_fields" (outputs of "cultivation_period_simulation")
+        #LCIdict : Initialized LCI dictionnary, with all the flows calculated
+        #fishfeed_table : DataFrame with fish feed composition
+        #elemental_contents : Table with elemental compositons of macronutrients
+
+    Outputs:
+        #LCI_table : DataFrame with 1 row per set of parameters and 1 column
+        per entry of the LCI dictionnary, in the order of "LCI_one_strain_uniquevalues"
+        #LCI_outputs : DataFrame with 1 row per set of parameters and the columns
+        "LCI_outputs_fields" (other outputs of "LCI_one_strain_uniquevalues")
+        #LCI_records : LCI matrix, 1 record per set of parameters and 1 field
+        per flow of the compiled schema (see "LCI_schema")
+
+    '''
+
+    number_sets = len(parameters)
+
+    # LCI matrix preallocated with the compiled schema, 1 record per set
+
+    LCI_records = LCI_schema_records(LCI_schema(LCIdict, fishfeed_table),
+                                     number_sets,
+                                     LCIdict)
+
+    # Collecting all parameters columns
+
+    # Tech_opdict
+
+    height = parameters['height'].to_numpy(dtype=float)
+    tubediameter = parameters['tubediameter'].to_numpy(dtype=float)
+    gapbetweentubes = parameters['gapbetweentubes'].to_numpy(dtype=float)
+    horizontaldistance = parameters['horizontaldistance'].to_numpy(dtype=float)
+    length_of_PBRunit = parameters['length_of_PBRunit'].to_numpy(dtype=float)
+    width_of_PBR_unit = parameters['width_of_PBR_unit'].to_numpy(dtype=float)
+    pumpefficiency = parameters['pumpefficiency'].to_numpy(dtype=float)
+    slurry_concentration = parameters['slurry_concentration'].to_numpy(dtype=float)
+    water_after_drying = parameters['water_after_drying'].to_numpy(dtype=float)
+    recyclingrateaftercentrifuge = parameters['recyclingrateaftercentrifuge'].to_numpy(dtype=float)
+    cleaningvolumeVSfacilityvolume = parameters['cleaningvolumeVSfacilityvolume'].to_numpy(dtype=float)
+    concentration_hypo = parameters['concentration_hypo'].to_numpy(dtype=float)
+    concentration_hydro = parameters['concentration_hydro'].to_numpy(dtype=float)
+    boilerefficiency = parameters['boilerefficiency'].to_numpy(dtype=float)
+    glass_life_expectancy = parameters['glass_life_expectancy'].to_numpy(dtype=float)
+    extraction = (parameters['extraction'] == 'yes').to_numpy()
+
+    # Physicdict
+
+    Cp = parameters['Cp'].to_numpy(dtype=float)
+    rhowater = parameters['rhowater'].to_numpy(dtype=float)
+    Cw = parameters['Cw'].to_numpy(dtype=float)
+
+    # Biodict
+
+    lipid_af_dw = parameters['lipid_af_dw'].to_numpy(dtype=float)
+    MJ_kglip = parameters['MJ_kglip'].to_numpy(dtype=float)
+    MJ_kgcarb = parameters['MJ_kgcarb'].to_numpy(dtype=float)
+    MJ_kgprot = parameters['MJ_kgprot'].to_numpy(dtype=float)
+    bioact_fraction_molec = parameters['bioact_fraction_molec'].to_numpy(dtype=float)
+    Topt = parameters['Topt'].to_numpy(dtype=float)
+    T_plateau = parameters['T_plateau'].to_numpy(dtype=float)
+
+    # Conversion to Tmin for simpler calculation
+    Tmin = Topt-T_plateau/2
+
+    incorporation_rate = parameters['incorporation_rate'].to_numpy(dtype=float)
+    ash_dw = parameters['ash_dw'].to_numpy(dtype=float)
+    nutrient_utilisation = parameters['nutrient_utilisation'].to_numpy(dtype=float)
+    co2_utilisation = parameters['co2_utilisation'].to_numpy(dtype=float)
+    phospholipid_fraction = parameters['phospholipid_fraction'].to_numpy(dtype=float)
+
+    # Locationdict
 
-    LCIdict_updated['market_for_substitution'] = market_for_substitution
+    Twell = parameters['Twell'].to_numpy(dtype=float)
+    depth_well = parameters['depth_well'].to_numpy(dtype=float)
 
+    # Qualitative parameters
+
+    Nsource = qualitative['Nsource'].to_numpy()
+    biochemicalclass = qualitative['Bio_class'].to_numpy()
+    market_for_substitution = qualitative['market_for_substitution'].to_numpy()
+
+    # Totals over the cultivation periods
+
+    cultivation_periods = np.asarray(cultivation_periods, dtype=float)
+
+    [totalheating,
+     totalcooling,
+     totalcooling_thermal,
+     total_elec_centrifuge,
+     total_elec_mixing,
+     totalproduction,
+     totalproduction_harvested,
+     totalproduction_loss,
+     totalwaterpumpedfromthefacility,
+     totalwaterpumpedfromthewell,
+     totalwatercentrifuged,
+     meantemp_at_harvest_time_cultivationperiod,
+     min_centrifugation_rate_m3_h,
+     max_centrifugation_rate_m3_h,
+     numberofcultivationdays] = cultivation_periods.T
 
     # Collecting PBR geometry
 
@@ -635,18 +1346,14 @@ def LCI_one_strain_uniquevalues(Biodict,
     # LCI values which do not depend on the cultivation simulation
 
     # Calculating biomass composition at different levels
+    # 1 column per set, 1 row per output of "biomasscompo"
 
-    biomass_composition = functions.biomasscompo(
+    biomass_composition = functions.biomasscompo_array(
         lipid_af_dw,
         ash_dw,
         water_after_drying,
         phospholipid_fraction,
-        elemental_contents)
-
-
-    # ash-free biomass composition (af_dw)
-    prot_af_dw = biomass_composition[0]
-    carb_af_dw = biomass_composition[1]
+        functions.elemental_contents_matrix(elemental_contents)).T
 
     # Including ash (dw)
     lip_dw = biomass_composition[2]
@@ -661,13 +1368,6 @@ def LCI_one_strain_uniquevalues(Biodict,
 
     # Elementary composition
 
-    C_af_dw = biomass_composition[9]
-    N_af_dw = biomass_composition[10]
-    P_af_dw = biomass_composition[11]
-    K_af_dw = biomass_composition[12]
-    Mg_af_dw = biomass_composition[13]
-    S_af_dw = biomass_composition[14]
-
     C_dw = biomass_composition[15]
     N_dw = biomass_composition[16]
     P_dw = biomass_composition[17]
@@ -676,18 +1376,17 @@ def LCI_one_strain_uniquevalues(Biodict,
     S_dw = biomass_composition[20]
 
     # Calculating the absolute bioactive molecule content in the dried biomass
-    if biochemicalclass == 'lip':
-        bioact_molec_dbio = bioact_fraction_molec * lip_dbio
-
-    elif biochemicalclass == 'carb':
-        bioact_molec_dbio = bioact_fraction_molec * carb_dbio
-
-    elif biochemicalclass == 'prot':
-        bioact_molec_dbio = bioact_fraction_molec * prot_dbio
+    bioact_molec_dbio = np.select([biochemicalclass == 'lip',
+                                   biochemicalclass == 'carb',
+                                   biochemicalclass == 'prot'],
+                                  [bioact_fraction_molec * lip_dbio,
+                                   bioact_fraction_molec * carb_dbio,
+                                   bioact_fraction_molec * prot_dbio],
+                                  np.nan)
 
     # Nutrients
 
-    # Nitrogen consumption 
+    # Nitrogen consumption
 
     # considering ash content
 
@@ -701,20 +1400,14 @@ def LCI_one_strain_uniquevalues(Biodict,
 
     #Only the correct source of N is updated
 
-    if Nsource == 'nh3':
-        # Already as N in Ecoinvent
-        LCIdict_updated['market for ammonium sulfate, as N PBR'] = N_input
-        
-        LCIdict_updated['market for calcium nitrate PBR'] = 0
+    # Already as N in Ecoinvent
+    LCI_records['market for ammonium sulfate, as N PBR'] = np.where(Nsource == 'nh3', N_input, 0)
 
-    if Nsource == 'no3':
-        LCIdict_updated['market for ammonium sulfate, as N PBR'] = 0
-        
-        # Conversion from N to Calcium nitrate 
-        LCIdict_updated['market for calcium nitrate PBR'] = N_input/0.15
+    # Conversion from N to Calcium nitrate
+    LCI_records['market for calcium nitrate PBR'] = np.where(Nsource == 'no3', N_input/0.15, 0)
 
 
-    # Phosphorus consumption 
+    # Phosphorus consumption
 
     P_demand = P_dw * ((1/bioact_molec_dbio) * (1/(1 - water_after_drying)))
 
@@ -725,230 +1418,60 @@ def LCI_one_strain_uniquevalues(Biodict,
 
     P_waste = P2O5_input*0.4366 - P_demand
 
-    LCIdict_updated['P source production PBR'] = P2O5_input
-
-    # C
-    
-    C_demand = C_dw * ((1 / bioact_molec_dbio) * (1 / (1 - water_after_drying)))
-    
-    CO2_demand = C_demand * (44/12)  # Conversion C to CO2
-
-    CO2_input = CO2_demand / co2_utilisation
-    
-    CO2_direct_emission = CO2_input - CO2_demand
-
-    LCIdict_updated['Microalgae CO2 PBR'] = CO2_input
-    LCIdict_updated['CO2 direct emissions PBR'] = CO2_direct_emission
-
-    # K
-
-    K_demand = K_dw * ((1/bioact_molec_dbio) * (1/(1 - water_after_drying)))
-
-    K2O5_demand = K_demand*1.2 # Conversion to K2O5
-
-    K2O5_input = (K2O5_demand / nutrient_utilisation + K2O5_demand *
-                  recyclingrateaftercentrifuge) / (1 + recyclingrateaftercentrifuge)  # Recycling
-
-    K2O5_waste = K2O5_input - K2O5_demand
-    K_waste = K2O5_input/1.2 - K_demand
-
-    LCIdict_updated['K source production PBR'] = K2O5_input
-
-    # Mg
-    
-    Mg_demand = Mg_dw * ((1 / bioact_molec_dbio)*(1/(1 - water_after_drying)))
-    MgSO4_demand = Mg_demand * (120.4/24.3)
-
-    MgSO4_input = (MgSO4_demand / nutrient_utilisation + MgSO4_demand *
-                   recyclingrateaftercentrifuge) / (1 + recyclingrateaftercentrifuge)  # Recycling
-
-    Mg_input = MgSO4_input * (24.3/120.4)
-
-    Mg_waste = Mg_input-Mg_demand
-
-    LCIdict_updated['Mg source production PBR'] = MgSO4_input
-
-    # S
-    
-    S_demand = S_dw * ((1/bioact_molec_dbio) * (1/(1-water_after_drying)))
-
-    S_input = MgSO4_input*(32/120.4)
-    
-    if Nsource == 'nh3':  # Then ammonium sulfate also brings sulfate
-    
-        # N input --> (NH4)2SO4 input --> S input
-        
-        S_input += (N_input/0.21) * 0.24
-        
-    S_waste = S_input-S_demand
-
-
-
-
-    # Cultivation simulation
-
-    # Intializing variables
-    totalcooling_thermal = 0
-    totalcooling = 0
-    totalheating = 0
-    totalproduction = 0
-    totalproduction_loss = 0
-    totalproduction_harvested = 0
-    totalwaterpumpedfromthefacility = 0
-    totalwaterpumpedfromthewell = 0
-    total_elec_centrifuge = 0
-    total_elec_mixing = 0
-    totalwatercentrifuged = 0
-
-    meantemp_at_harvest_time_cultivationperiod = 0
-    min_centrifugation_rate_list = []
-    max_centrifugation_rate_list = []
-
-    # Simulating an average day for each month of the cultivation period
-    for month in months_suitable_for_cultivation:
-
-        # Calling the cultivation simulation function
-        simulation_averageday = cultsimul.cultivation_simulation_timestep10(hconv,
-                                                                            Twell,
-                                                                            depth_well,
-                                                                            lat,
-                                                                            long,
-                                                                            azimuthfrontal,  
-                                                                            month,  
-                                                                            Cp,  
-                                                                            height,
-                                                                            tubediameter,
-                                                                            gapbetweentubes,
-                                                                            horizontaldistance,
-                                                                            length_of_PBRunit,
-                                                                            width_of_PBR_unit,  
-                                                                            rhoalgae, 
-                                                                            rhomedium,
-                                                                            rhosuspension, 
-                                                                            dcell, 
-                                                                            Tmax,
-                                                                            Tmin,
-                                                                            Biodict, 
-                                                                            ash_dw,
-                                                                            Nsource,  
-                                                                            fraction_maxyield,  
-                                                                            biomassconcentration,
-                                                                            flowrate,  
-                                                                            centrifugation_efficiency,
-                                                                            pumpefficiency,  
-                                                                            slurry_concentration,
-                                                                            water_after_drying,
-                                                                            recyclingrateaftercentrifuge,
-                                                                            night_monitoring,
-                                                                            elemental_contents)
-
-        # Collecting results and multiplying by 
-        # average number of days in a month : 30.4
-
-        monthly_heating_energy = simulation_averageday[1]*30.4 #kWh
-      
-        monthly_waterpumped_from_the_facility = simulation_averageday[2]*30.4  # L
-
-        monthly_waterpumped_from_the_well = simulation_averageday[3]*30.4  # L
-
-        monthly_production = simulation_averageday[4]*30.4  # g dw
-
-        monthly_production_harvested = simulation_averageday[5]*30.4  # g dw
-
-        monthly_production_loss = simulation_averageday[6]*30.4  # g dw
+    LCI_records['P source production PBR'] = P2O5_input
 
-        monthly_volumetric_yield = simulation_averageday[7]*30.4  # g dw.m-3
+    # C
 
-        monthly_energy_tocentrifuge = simulation_averageday[8]*30.4  # kWh
-        
-        collectedtemperatureevolution = simulation_averageday[9]  # °C
+    C_demand = C_dw * ((1 / bioact_molec_dbio) * (1 / (1 - water_after_drying)))
 
-        monthly_cooling_energy_thermal = simulation_averageday[17]*30.4  # kWh
+    CO2_demand = C_demand * (44/12)  # Conversion C to CO2
 
-        monthly_cooling_energy = simulation_averageday[17]*30.4  # kWh
+    CO2_input = CO2_demand / co2_utilisation
 
-        # Collection min and max centrifugation rate (Obsolete)
+    CO2_direct_emission = CO2_input - CO2_demand
 
-        # list centrifugation rate L.s-1
-        list_centrifugation_rate_wholeunit = simulation_averageday[20]
+    LCI_records['Microalgae CO2 PBR'] = CO2_input
+    LCI_records['CO2 direct emissions PBR'] = CO2_direct_emission
 
-        # list centrifugation rate L.s-1
-        water_centrifuged = simulation_averageday[21]*30.4
+    # K
 
-        
-        list_centrifugation_rate_wholeunit_not_0 = [
-            i for i in list_centrifugation_rate_wholeunit if i != 0]
-        
-        min_centrifugation_rate_list.append(
-            min(list_centrifugation_rate_wholeunit_not_0))
+    K_demand = K_dw * ((1/bioact_molec_dbio) * (1/(1 - water_after_drying)))
 
-        max_centrifugation_rate_list.append(
-            max(list_centrifugation_rate_wholeunit_not_0))
-        
-        # Temperature : Some processes have temperature as an input for their 
-        # electricity consumption 
-        #
+    K2O5_demand = K_demand*1.2 # Conversion to K2O5
 
+    K2O5_input = (K2O5_demand / nutrient_utilisation + K2O5_demand *
+                  recyclingrateaftercentrifuge) / (1 + recyclingrateaftercentrifuge)  # Recycling
 
-        # For Mixing : Mixing is needed at any time of the day and night.
-        meantemp_daytotal = (sum(collectedtemperatureevolution) / 
-            len(collectedtemperatureevolution))
+    K_waste = K2O5_input/1.2 - K_demand
 
-        monthly_Electricity_mixing_day = functions.mixing_perday(
-            rhosuspension,
-            tubediameter,
-            pumpefficiency,
-            flowrate,
-            roughness,
-            meantemp_daytotal,
-            biomassconcentration,
-            tubelength)[0] * 30.4  # MJ.m-2.month
-        
-        # For Drying : Drying requires to heat the slurry to 100 C and the
-        # energy will depend on the initial temperature : temperature of the
-        # culture at harvest time (9PM)
-        
-        temp_at_harvest_time = collectedtemperatureevolution[7560]
+    LCI_records['K source production PBR'] = K2O5_input
 
+    # Mg
 
+    Mg_demand = Mg_dw * ((1 / bioact_molec_dbio)*(1/(1 - water_after_drying)))
+    MgSO4_demand = Mg_demand * (120.4/24.3)
 
+    MgSO4_input = (MgSO4_demand / nutrient_utilisation + MgSO4_demand *
+                   recyclingrateaftercentrifuge) / (1 + recyclingrateaftercentrifuge)  # Recycling
 
-        # Summing over months in the loop
-        totalproduction += monthly_production  # g dw
-        
-        totalproduction_harvested += monthly_production_harvested  # g dw
-        
-        totalproduction_loss += monthly_production_loss  # g dw
+    Mg_input = MgSO4_input * (24.3/120.4)
 
-        totalcooling_thermal += monthly_cooling_energy_thermal # kWh
+    Mg_waste = Mg_input-Mg_demand
 
-        totalcooling += monthly_cooling_energy  # kWh
-        
-        totalheating += monthly_heating_energy  # kWh
-        
-        total_elec_centrifuge += monthly_energy_tocentrifuge  # kWh
-        
-        total_elec_mixing += monthly_Electricity_mixing_day/3.6  # conversion to kWh
+    LCI_records['Mg source production PBR'] = MgSO4_input
 
-        totalwaterpumpedfromthefacility += monthly_waterpumped_from_the_facility  # L
-        
-        totalwaterpumpedfromthewell += monthly_waterpumped_from_the_well  # L
+    # S
 
-        totalwatercentrifuged += water_centrifuged  # L
+    S_demand = S_dw * ((1/bioact_molec_dbio) * (1/(1-water_after_drying)))
 
-        # Collecting the mean temperature over the cultivation period
+    S_input = MgSO4_input*(32/120.4)
 
-        # For drying
-        meantemp_at_harvest_time_cultivationperiod += temp_at_harvest_time/len(months_suitable_for_cultivation) # °C
+    # Then ammonium sulfate also brings sulfate
+    # N input --> (NH4)2SO4 input --> S input
+    S_input = np.where(Nsource == 'nh3', S_input + (N_input/0.21) * 0.24, S_input)
 
-    # End of the loop
-    # Collecting min and max centrifugation rate during cultivation period (Obsolete)
+    S_waste = S_input-S_demand
 
-    min_centrifugation_rate_m3_h = min(
-        min_centrifugation_rate_list)*3.6  # m3.h-1
-    
-    max_centrifugation_rate_m3_h = max(
-        max_centrifugation_rate_list)*3.6  # m3.h-1
 
     # Total production conversion to kg
 
@@ -958,40 +1481,37 @@ def LCI_one_strain_uniquevalues(Biodict,
 
     total_production_loss_kg_dw = totalproduction_loss/1000
 
-    # Adding the energy for the initial heating of the well water 
+    # Adding the energy for the initial heating of the well water
 
     # Water of the well is heaten to Tmin
-    if Twell < Tmin:
-        initalheating = facilityvolume*Cp*(Tmin-Twell)/3.6  # kWh
-
-    else: # If the water is already warm enough
-        initalheating = 0  # KwH
+    # (0 if the water is already warm enough)
+    initalheating = np.where(Twell < Tmin, facilityvolume*Cp*(Tmin-Twell)/3.6, 0)  # kWh
 
     #Updating LCI with calculated values
-    
+
     # Scaling down to 1 kg of  molecule in dried biomass
-    LCIdict_updated['Heating kWh PBR'] = ((totalheating + initalheating)/total_production_harvested_kg_dw)*(
-        1/bioact_molec_dbio)*(1/(1-water_after_drying))  
-    
-    LCIdict_updated['Cooling kWh PBR'] = (
+    LCI_records['Heating kWh PBR'] = ((totalheating + initalheating)/total_production_harvested_kg_dw)*(
+        1/bioact_molec_dbio)*(1/(1-water_after_drying))
+
+    LCI_records['Cooling kWh PBR'] = (
         totalcooling/total_production_harvested_kg_dw)*(1/bioact_molec_dbio)*(1/(1-water_after_drying))
-    
-    LCIdict_updated['Electricity centrifuge kWh PBR'] = (
+
+    LCI_records['Electricity centrifuge kWh PBR'] = (
         total_elec_centrifuge/total_production_harvested_kg_dw) * (1/bioact_molec_dbio)*(1/(1-water_after_drying))
 
-    LCIdict_updated['Electricity mixing kWh PBR'] = (
+    LCI_records['Electricity mixing kWh PBR'] = (
         total_elec_mixing/total_production_harvested_kg_dw) * (1/bioact_molec_dbio)*(1/(1-water_after_drying))
 
 
     # In this version, no electricity consumption is assumed for aeration
-    LCIdict_updated['Electricity aeration kWh PBR'] = 0 
+    LCI_records['Electricity aeration kWh PBR'] = 0
 
     # Pumping water from the well and facility
-    
+
     #Calling the function  for depth = well depth
     energy_perm3_fromthewell = functions.pumping_per_m3(
         rhowater, depth_well, pumpefficiency)
-    
+
     # Pumping from the facility
     energy_perm3_fromthefacility = functions.pumping_per_m3(
         rhowater, 1, pumpefficiency)
@@ -1011,7 +1531,7 @@ def LCI_one_strain_uniquevalues(Biodict,
 
     totalenergypumping = initialpumping+pumpingforcleaning + pumping_during_cultiv
 
-    LCIdict_updated['Electricity pumping kWh PBR'] = ((
+    LCI_records['Electricity pumping kWh PBR'] = ((
         (totalenergypumping/3.6)
         / total_production_harvested_kg_dw)
         * (1/bioact_molec_dbio)
@@ -1022,18 +1542,18 @@ def LCI_one_strain_uniquevalues(Biodict,
     # Assuming a constant wall thickness of 2 mm.
     glass_perm2 = exchange_area * 0.002 # m3 of glass
 
-    glass_volume_perkgmolecule = ((glass_perm2/total_production_harvested_kg_dw) 
+    glass_volume_perkgmolecule = ((glass_perm2/total_production_harvested_kg_dw)
                                   * (1/bioact_molec_dbio)
                                   * (1/(1 - water_after_drying))
                                   * 1/(glass_life_expectancy))  # m3
 
     glass_mass_perkgmolec = glass_volume_perkgmolecule * 2700  # kg # 2700 kg.m-3
 
-    LCIdict_updated['Glass PBR'] = (glass_mass_perkgmolec
-                                    *1/(glass_life_expectancy))
+    LCI_records['Glass PBR'] = (glass_mass_perkgmolec
+                                *1/(glass_life_expectancy))
 
     # Drying
-    
+
     water_to_vaporize_perkilo_dbio = ((1/slurry_concentration)
         * (1 - slurry_concentration)
         * (1 - water_after_drying))  # L. kg-1 dbio
@@ -1043,51 +1563,47 @@ def LCI_one_strain_uniquevalues(Biodict,
                                 * (Cw + Cp*(100-meantemp_at_harvest_time_cultivationperiod))
                                 / (boilerefficiency*1000))/3.6  # kWh.kg dbio-1
 
-    LCIdict_updated['Electricity drying kWh PBR'] = (Electricity_drying_perkg *
+    LCI_records['Electricity drying kWh PBR'] = (Electricity_drying_perkg *
         (1/bioact_molec_dbio))  # Scaled up to 1 kg of molecule kWh
 
     # Water consumption
 
     initialfilling = facilityvolume  # m3
-     
-    
-    refillingduringcultivation = totalwaterpumpedfromthewell/1000 # m3 
 
-    totalwater = (initialfilling 
-                  + refillingduringcultivation 
-                  + cleaningvolumeVSfacilityvolume*initialfilling)  # m3
-    
+
+    refillingduringcultivation = totalwaterpumpedfromthewell/1000 # m3
+
     # Water used for cultivation and not for cleaning
     totalwater_cultivation = refillingduringcultivation + initialfilling  # m3
 
-    totalwater_cultivation_perkgmolecule = ((totalwater_cultivation/total_production_harvested_kg_dw) 
+    totalwater_cultivation_perkgmolecule = ((totalwater_cultivation/total_production_harvested_kg_dw)
                                             * (1/bioact_molec_dbio)
                                             * (1/(1-water_after_drying)))  # m3
 
-    LCIdict_updated['Water(Cultivation) PBR'] = totalwater_cultivation_perkgmolecule # m3
+    LCI_records['Water(Cultivation) PBR'] = totalwater_cultivation_perkgmolecule # m3
 
     #Cleaning
-    totalwater_cleaning_perkgmolecule = ((cleaningvolumeVSfacilityvolume*initialfilling/total_production_harvested_kg_dw) 
+    totalwater_cleaning_perkgmolecule = ((cleaningvolumeVSfacilityvolume*initialfilling/total_production_harvested_kg_dw)
                                             * (1/bioact_molec_dbio)
                                             * (1/(1-water_after_drying)))
 
-    LCIdict_updated['Water Cleaning PBR'] = totalwater_cleaning_perkgmolecule  # m3
+    LCI_records['Water Cleaning PBR'] = totalwater_cleaning_perkgmolecule  # m3
 
     # Wastewater
 
     # All water used for cultivatiion - what has been vaporized during drying   (scaled per kg molecule)
-    
+
     # / 1000 to convert  water_to_vaporize_perkilo_dbio from L to m3
     totalwater_towaste_perkgmolecule = (totalwater_cultivation_perkgmolecule
                                         - water_to_vaporize_perkilo_dbio
                                         * (1/bioact_molec_dbio) / 1000)  # m3
 
     #  Negative sign as waste treatment activity (specific to brightway)
-    LCIdict_updated['Wastewater treatment PBR'] = - totalwater_towaste_perkgmolecule
-    
+    LCI_records['Wastewater treatment PBR'] = - totalwater_towaste_perkgmolecule
+
     # Not scaled to molecule for easier wastewater concentration calculation
-    totalwater_towaste = (totalwater_cultivation 
-                          - water_to_vaporize_perkilo_dbio*total_production_harvested_kg_dw 
+    totalwater_towaste = (totalwater_cultivation
+                          - water_to_vaporize_perkilo_dbio*total_production_harvested_kg_dw
                           * (1-water_after_drying) / 1000) # m3
 
     # Average Concentration waste water in biomass
@@ -1095,22 +1611,22 @@ def LCI_one_strain_uniquevalues(Biodict,
 
     # kg.m-3 or g.L-1  Waste nutrient per kg molecule produced/total wastewater per kg molecule produced
     # Includes the elements in the biomass
-    conc_waste_water_nutrient_N = ((N_waste/totalwater_towaste_perkgmolecule 
+    conc_waste_water_nutrient_N = ((N_waste/totalwater_towaste_perkgmolecule
                                     + conc_waste_water_biomass * N_dw)) # kg.m-3 or g.L-1
-    
 
-    conc_waste_water_nutrient_P = ((P_waste/totalwater_towaste_perkgmolecule 
+
+    conc_waste_water_nutrient_P = ((P_waste/totalwater_towaste_perkgmolecule
                                     + conc_waste_water_biomass * P_dw)) # kg.m-3 or g.L-1
-    
-    conc_waste_water_nutrient_K = ((K_waste/totalwater_towaste_perkgmolecule 
+
+    conc_waste_water_nutrient_K = ((K_waste/totalwater_towaste_perkgmolecule
                                     + conc_waste_water_biomass * K_dw)) # kg.m-3 or g.L-1
-    
-    conc_waste_water_nutrient_Mg =((Mg_waste/totalwater_towaste_perkgmolecule 
+
+    conc_waste_water_nutrient_Mg =((Mg_waste/totalwater_towaste_perkgmolecule
                                     + conc_waste_water_biomass * Mg_dw)) # kg.m-3 or g.L-1
-    
-    conc_waste_water_nutrient_S = ((S_waste/totalwater_towaste_perkgmolecule 
+
+    conc_waste_water_nutrient_S = ((S_waste/totalwater_towaste_perkgmolecule
                                     + conc_waste_water_biomass * S_dw)) # kg.m-3 or g.L-1
-    
+
 
     # Carbon only in biomass, CO2 is degazed
     conc_waste_water_C = C_dw * conc_waste_water_biomass  # kg.m-3
@@ -1118,167 +1634,150 @@ def LCI_one_strain_uniquevalues(Biodict,
 
     # Land
 
-    LCIdict_updated['Land PBR'] = (
+    LCI_records['Land PBR'] = (
         1/total_production_harvested_kg_dw)*(1/bioact_molec_dbio)*(1/(1-water_after_drying))  # m2
 
 
     # Cleaning substances
 
     # Half of the water with 1 substance, half with the other one
-    
+
     #Hypochlorite
-    totalhypo = ((cleaningvolumeVSfacilityvolume*facilityvolume)/2) * concentration_hypo  # kg  
-    
+    totalhypo = ((cleaningvolumeVSfacilityvolume*facilityvolume)/2) * concentration_hypo  # kg
+
     #Hydrogen peroxide
-    totalhydro = ((cleaningvolumeVSfacilityvolume*facilityvolume)/2) * concentration_hydro  # kg   
+    totalhydro = ((cleaningvolumeVSfacilityvolume*facilityvolume)/2) * concentration_hydro  # kg
 
-    LCIdict_updated['Hydrogen peroxyde PBR'] = (
+    LCI_records['Hydrogen peroxyde PBR'] = (
         totalhydro/total_production_harvested_kg_dw)*(1/bioact_molec_dbio)*(1/(1-water_after_drying))  # kg
-    
-    LCIdict_updated['Hypochlorite PBR'] = (
+
+    LCI_records['Hypochlorite PBR'] = (
         totalhypo/total_production_harvested_kg_dw) *(1/bioact_molec_dbio)*(1/(1-water_after_drying))  # kg
 
 
     #Extraction and substitution
 
-    if extraction == 'yes':
-        # 1 kWh to disrupt 1 kg of microalgal biomass (kg dbio)
-        LCIdict_updated['Electricity cell disruption kWh PBR'] = 1 * (1/bioact_molec_dbio)  # kWh.kg-1
+    # 1 kWh to disrupt 1 kg of microalgal biomass (kg dbio) if extraction
+    LCI_records['Electricity cell disruption kWh PBR'] = np.where(extraction, 1 * (1/bioact_molec_dbio), 0)  # kWh.kg-1
 
+    # if no extraction (molecule given to fish directly), no extraction process (Obsolete)
+    LCI_records['Extraction electricity kWh PBR'] = np.where(
+        extraction, LCI_records['Extraction electricity kWh PBR'], 0)
+    LCI_records['Co solvent Extraction PBR'] = np.where(
+        extraction, LCI_records['Co solvent Extraction PBR'], 0)
 
-        # If extraction, then the 
-        # remaining biomass composition is changed according to the biochemical class of the extracted molecule
+    # If extraction, then the remaining biomass composition is changed
+    # according to the biochemical class of the extracted molecule.
+    # Otherwise the biomass composition stays the same.
 
-        if biochemicalclass == 'lip':
-            lip_dbio_after_extract = (lip_dbio - bioact_molec_dbio)/(1-bioact_molec_dbio)
-            
-            carb_dbio_after_extract = carb_dbio / (1-bioact_molec_dbio)
-            
-            prot_dbio_after_extract = prot_dbio / (1-bioact_molec_dbio)
-            
-            ash_dbio_after_extract = ash_dbio / (1-bioact_molec_dbio)
-            
-            water_dbio_after_extract = water_after_drying /(1-bioact_molec_dbio)
+    lip_dbio_after_extract = np.where(
+        extraction,
+        (lip_dbio - np.where(biochemicalclass == 'lip', bioact_molec_dbio, 0))/(1-bioact_molec_dbio),
+        lip_dbio)
 
-        elif biochemicalclass == 'carb':
-            lip_dbio_after_extract = lip_dbio / (1-bioact_molec_dbio)
-            
-            carb_dbio_after_extract = (carb_dbio-bioact_molec_dbio) / (1-bioact_molec_dbio)
-            
-            prot_dbio_after_extract = prot_dbio / (1-bioact_molec_dbio)
-            
-            ash_dbio_after_extract = ash_dbio / (1-bioact_molec_dbio)
-            
-            water_dbio_after_extract = water_after_drying / (1-bioact_molec_dbio)
+    carb_dbio_after_extract = np.where(
+        extraction,
+        (carb_dbio - np.where(biochemicalclass == 'carb', bioact_molec_dbio, 0))/(1-bioact_molec_dbio),
+        carb_dbio)
 
-        elif biochemicalclass == 'prot':
-            lip_dbio_after_extract = lip_dbio / (1-bioact_molec_dbio)
-            
-            carb_dbio_after_extract = carb_dbio / (1-bioact_molec_dbio)
-            
-            prot_dbio_after_extract = (prot_dbio-bioact_molec_dbio) / (1-bioact_molec_dbio)
-            
-            ash_dbio_after_extract = ash_dbio / (1-bioact_molec_dbio)
-            
-            water_dbio_after_extract = water_after_drying / (1-bioact_molec_dbio)
-
-
-        # After extraction, the substitution will occur with the new composition of the biomass
-        
-        # Call the function which calculates the masses of subsituted fish feed ingredient
-        substitution = functions.optimization_for_fishfeed_substitution(fishfeed_table,
-                                                                        lip_dbio_after_extract,
-                                                                        prot_dbio_after_extract,
-                                                                        carb_dbio_after_extract,
-                                                                        water_dbio_after_extract, 
-                                                                        ash_dbio_after_extract,
-                                                                        incorporation_rate,
-                                                                        MJ_kgcarb,
-                                                                        MJ_kgprot,
-                                                                        MJ_kglip)
-
-    # if no extraction (molecule given to fish directly), 
-    #  the biomass composition stays the same (Obsolete)
-    else:  
-        LCIdict_updated['Electricity cell disruption kWh PBR'] = 0  # kWH.kg-1
-        LCIdict_updated['Extraction electricity kWh PBR'] = 0
-        LCIdict_updated['Co solvent Extraction PBR'] = 0
-
-        substitution = functions.optimization_for_fishfeed_substitution(fishfeed_table,
-                                                                        lip_dbio,
-                                                                        prot_dbio,
-                                                                        carb_dbio,
-                                                                        water_after_drying,
-                                                                        ash_dbio,
-                                                                        incorporation_rate,
-                                                                        MJ_kgcarb,
-                                                                        MJ_kgprot,
-                                                                        MJ_kglip)
+    prot_dbio_after_extract = np.where(
+        extraction,
+        (prot_dbio - np.where(biochemicalclass == 'prot', bioact_molec_dbio, 0))/(1-bioact_molec_dbio),
+        prot_dbio)
+
+    ash_dbio_after_extract = np.where(extraction, ash_dbio/(1-bioact_molec_dbio), ash_dbio)
+
+    water_dbio_after_extract = np.where(extraction,
+                                        water_after_drying/(1-bioact_molec_dbio),
+                                        water_after_drying)
+
+    # After extraction, the substitution will occur with the new composition of the biomass
+
+    # The optimization is done once for each different composition
+    compositions = np.column_stack((lip_dbio_after_extract,
+                                    prot_dbio_after_extract,
+                                    carb_dbio_after_extract,
+                                    water_dbio_after_extract,
+                                    ash_dbio_after_extract,
+                                    incorporation_rate,
+                                    MJ_kgcarb,
+                                    MJ_kgprot,
+                                    MJ_kglip))
+
+    unique_compositions, index_compositions = np.unique(compositions,
+                                                        axis=0,
+                                                        return_inverse=True)
+
+    # Call the function which calculates the masses of subsituted fish feed ingredient
+    substitutions = [functions.optimization_for_fishfeed_substitution(fishfeed_table,
+                                                                      *composition)
+                     for composition in unique_compositions]
+
+    kgfeedprot = np.array([substitution[0] for substitution in substitutions])[index_compositions]
+
+    MJfeedenergy = np.array([substitution[1] for substitution in substitutions])[index_compositions]
+
+    # Masses of fish feed ingredient replaced by the given biomass composition.
+    # in kg. kg dbio-1 (sum =1 kg), 1 column per ingredient
+    vect_subst = np.array([substitution[5] for substitution in substitutions])[index_compositions]
+
+    performance = np.array([substitution[-1] for substitution in substitutions])[index_compositions]
 
     # Choose the market that the dependent coproducts enter
 
-    if market_for_substitution == 'animal feed':  # (Obsolete, always fish feed)
+    animal_feed = market_for_substitution == 'animal feed'  # (Obsolete, always fish feed)
 
-        # Model substitution 1  Animal Feed
+    fish_feed = market_for_substitution == 'fish feed'
 
-        # kg #the same subsitution occurs for every kilo
-        feedprot_m1 = substitution[0] * (1/bioact_molec_dbio - 1) # kg
-        feedenergy_m1 = substitution[1] * (1/bioact_molec_dbio - 1)  # MJ
+    # Model substitution 1  Animal Feed
 
-        LCIdict_updated['Feed energy PBR'] = feedenergy_m1
-        LCIdict_updated['Feed protein PBR'] = feedprot_m1
+    # kg #the same subsitution occurs for every kilo
+    # Model substitution 2 Fish Feed does not use Model 1
+    LCI_records['Feed energy PBR'] = np.where(animal_feed,
+                                              MJfeedenergy * (1/bioact_molec_dbio - 1),  # MJ
+                                              np.where(fish_feed, 0, LCI_records['Feed energy PBR']))
 
-        optimization_performance = 'No optimization'
-        substitution_check = 'No optimization'
+    LCI_records['Feed protein PBR'] = np.where(animal_feed,
+                                               kgfeedprot * (1/bioact_molec_dbio - 1),  # kg
+                                               np.where(fish_feed, 0, LCI_records['Feed protein PBR']))
 
     # Model substitution 2 Fish Feed
-    
-    elif market_for_substitution == 'fish feed':
 
-        LCIdict_updated['Feed energy PBR'] = 0  # Do not use Model 1
-        LCIdict_updated['Feed protein PBR'] = 0
+    # If extraction the substituion only takes place with the remaining biomass
+    # (1/bioact_molec_dbio-1) = remaining biomass after extraction of the FU : 1kg of molecule
+    # Otherwise the molecule incorporated in the biomass takes part in the substutition
+    remaining_biomass = np.where(extraction, 1/bioact_molec_dbio - 1, 1/bioact_molec_dbio)  # kg
 
-        if extraction == 'yes':  # Then the substituion only takes place with the remaining biomass
-        
-            # vect_substitution is a list containing the masses of fish feed ingredient substituted by the remaining biomass
-            # (1/bioact_molec_dbio-1) = remaining biomass after extraction of the FU : 1kg of molecule
-            
-            # substitution[5] is the list of masses of fish feed ingredient 
-            # replaced by the given biomass composition. in kg. kg dbio-1 (sum =1 kg)
+    vect_substitution = vect_subst * remaining_biomass[:, None]  # kg
 
-            vect_substitution = substitution[5]*(1/bioact_molec_dbio-1)  # kg
+    # evaluation of the optimized recipe
+    optimization_performance = (performance*remaining_biomass).astype(object)
 
-            # evaluation of the optimized recipe
-            optimization_performance = substitution[-1]*(1/bioact_molec_dbio-1)
+    optimization_performance[animal_feed] = 'No optimization'
 
-        else:  # then the molecule incorporated in the biomass takes part in the substutition
+    # Adding the ingredients of the fish feed to the LCI for substitution
 
-            # substitution[5] is the list of masses of fish feed ingredient
-            # replaced by the given biomass composition. in kg. kg dbio-1 (sum =1 kg)
-            vect_substitution = substitution[5]*(1/bioact_molec_dbio)  # kg
-            
-            # evaluation of the optimized recipe
-            optimization_performance = substitution[-1]*(1/bioact_molec_dbio)
+    substitution_check = np.zeros(number_sets) # Obsolete
 
-        # Adding the ingredients of the fish feed to the LCI for substitution
+    for a in range(0, len(fishfeed_table['Ingredient'])):
 
-        substitution_check = 0 # Obsolete
-        
-        for a in range(0, len(fishfeed_table['Ingredient'])):
-            
-            # Ingredients are ranked in the same order in the vector and in the fish feed table
-            LCIdict_updated[fishfeed_table['Ingredient'][a]] = vect_substitution[a]
-            
-            substitution_check = (substitution_check
-                                  + LCIdict_updated[fishfeed_table['Ingredient'][a]]) #Obsolete
+        # Ingredients are ranked in the same order in the vector and in the fish feed table
+        LCI_records[fishfeed_table['Ingredient'][a]] = np.where(fish_feed,
+                                                                vect_substitution[:, a],
+                                                                LCI_records[fishfeed_table['Ingredient'][a]])
+
+        substitution_check = (substitution_check
+                              + vect_substitution[:, a]) #Obsolete
+
+    substitution_check = substitution_check.astype(object)
+
+    substitution_check[animal_feed] = 'No optimization'
 
     # Yields
 
-    numberofcultivationdays = len(months_suitable_for_cultivation)*30.4 # days
-    
-    volumetricyield = (total_production_kg_dw 
+    volumetricyield = (total_production_kg_dw
                        / (facilityvolume*1000*numberofcultivationdays))  # kg.L-1.d-1
-    
+
     surfaceyield = total_production_kg_dw/numberofcultivationdays  # kg.days-1
 
 
@@ -1287,30 +1786,181 @@ def LCI_one_strain_uniquevalues(Biodict,
     needed_dbio_check = 1/(lipid_af_dw * (1-ash_dw) *
                            (1-water_after_drying) * bioact_molec_dbio)
 
-    return [LCIdict_updated,
-            surfaceyield,
-            volumetricyield,
-            optimization_performance,
-            needed_dbio_check,
-            substitution_check,
-            total_production_kg_dw,
-            total_production_harvested_kg_dw,
-            total_production_loss_kg_dw,
-            conc_waste_water_nutrient_N,
-            conc_waste_water_nutrient_P,
-            conc_waste_water_nutrient_K,
-            conc_waste_water_nutrient_Mg,
-            conc_waste_water_biomass,
-            conc_waste_water_C,
-            conc_waste_water_nutrient_S,
-            bioact_molec_dbio,
-            min_centrifugation_rate_m3_h,
-            max_centrifugation_rate_m3_h,
-            totalwatercentrifuged,
-            tubelength,
-            facilityvolume,
-            exchange_area,
-            totalcooling_thermal]  # []
+    LCI_outputs = pd.DataFrame(dict(zip(LCI_outputs_fields,
+                                        [surfaceyield,
+                                         volumetricyield,
+                                         optimization_performance,
+                                         needed_dbio_check,
+                                         substitution_check,
+                                         total_production_kg_dw,
+                                         total_production_harvested_kg_dw,
+                                         total_production_loss_kg_dw,
+                                         conc_waste_water_nutrient_N,
+                                         conc_waste_water_nutrient_P,
+                                         conc_waste_water_nutrient_K,
+                                         conc_waste_water_nutrient_Mg,
+                                         conc_waste_water_biomass,
+                                         conc_waste_water_C,
+                                         conc_waste_water_nutrient_S,
+                                         bioact_molec_dbio,
+                                         min_centrifugation_rate_m3_h,
+                                         max_centrifugation_rate_m3_h,
+                                         totalwatercentrifuged,
+                                         tubelength,
+                                         facilityvolume,
+                                         exchange_area,
+                                         totalcooling_thermal])))
+
+    # LCI table with the qualitative parameters, in the order of the LCI dictionnary
+
+    LCI_table = LCI_schema_table(LCI_records, qualitative, LCIdict)
+
+    return [LCI_table, LCI_outputs, LCI_records]
+
+
+
+
+def LCIA_one_LCI(dict_mono_technosphere_lcas,
+                 LCI,
+                 methods):
+    '''Calculates the LCIA for one LCI calculated with "LCI_one_strain_uniquevalues".
+    
+    Inputs:
+        #dict_mono_technosphere_lcas : Dictionnary with the impacts of 1 unit of 
+        each technosphere input to the molecule production, for each method
+        #LCI : Output of "LCI_one_strain_uniquevalues"
+        #methods : List of Impact categories to apply for the LCA
+
+    Outputs:
+        #list_LCA_res : List with the total impact for each method
+        #new_dict_mono_technosphere_lcas : Dictionnary with the impacts of each 
+        process of the LCI, for each method (for the contribution analysis)
+        
+    '''
+
+    LCIdict_collected = LCI[0]
+
+    conc_waste_water_nutrient_N = LCI[9]  # kg.m-3
+
+    conc_waste_water_nutrient_P = LCI[10]  # kg.m-3
+    
+    conc_waste_water_nutrient_K = LCI[11]  # kg.m-3
+
+    conc_waste_water_nutrient_Mg = LCI[12]  # kg.m-3
+
+    conc_waste_water_C = LCI[14]  # kg.m-3
+
+    conc_waste_water_nutrient_S = LCI[15]  # kg.m-3
+
+    # Copy that will be modified for calculation of the LCA for this LCI
+    
+    new_dict_mono_technosphere_lcas = copy.deepcopy(dict(dict_mono_technosphere_lcas))
+
+    # Calling the fuction that calculates the impacts associated to the emissions 
+    # of the wastewater treatment of 1 cubic meter of the wastewater
+
+    list_sum_impacts_biosphere_waste_water= waste_water_impact_biosphere(
+                  conc_waste_water_nutrient_N,
+                  conc_waste_water_nutrient_P,
+                  conc_waste_water_C,
+                  conc_waste_water_nutrient_Mg,
+                  conc_waste_water_nutrient_K,
+                  conc_waste_water_nutrient_S,
+                  methods)
+    
+    # Adding the biosphere flows for 1 cubic meter of wastewater
+    
+    new_dict_mono_technosphere_lcas['Wastewater treatment PBR'] =[a+b for (a,b) in zip(new_dict_mono_technosphere_lcas['Wastewater treatment PBR'],list_sum_impacts_biosphere_waste_water) ]
+
+    # Multipliying each impact per unit of input processes by the input amount in the calculated LCI
+    
+    for i in new_dict_mono_technosphere_lcas:
+        
+        new_dict_mono_technosphere_lcas[i]=[LCIdict_collected[i]*a for a in new_dict_mono_technosphere_lcas[i]]
+    
+    # Calculating total LCA by summing
+    
+    list_LCA_res =[]
+    
+    for meth_index in range(len(methods)):
+        
+        sum_impact = sum([new_dict_mono_technosphere_lcas[flow][meth_index] for flow in new_dict_mono_technosphere_lcas ])
+
+
+        list_LCA_res.append(sum_impact)
+
+    return [list_LCA_res, new_dict_mono_technosphere_lcas]
+
+
+
+def LCIA_matrix(dict_mono_technosphere_lcas,
+                LCI_table,
+                LCI_outputs,
+                methods):
+    '''Calculates the LCIAs of all the LCIs calculated with "LCI_matrix".
+
+    Inputs:
+        #dict_mono_technosphere_lcas : Dictionnary with the impacts of 1 unit of
+        each technosphere input to the molecule production, for each method
+        #LCI_table : DataFrame with 1 row per LCI (first output of "LCI_matrix")
+        or LCI matrix (third output of "LCI_matrix")
+        #LCI_outputs : DataFrame with the other outputs of the LCIs
+        (second output of "LCI_matrix")
+        #methods : List of Impact categories to apply for the LCA
+
+    Outputs:
+        #LCA_res : Array with the total impact for each LCI (rows) and
+        each method (columns)
+        #process_impacts : Dictionnary with the impacts of each process of
+        the LCIs, arrays with 1 row per LCI and 1 column per method
+        (for the contribution analysis)
+
+    '''
+
+    # Impacts associated to the emissions of the wastewater treatment of
+    # 1 cubic meter of each wastewater, 1 row per LCI
+
+    impacts_biosphere_waste_water = np.array([waste_water_impact_biosphere(
+                  conc_N,
+                  conc_P,
+                  conc_C,
+                  conc_Mg,
+                  conc_K,
+                  conc_S,
+                  methods) for (conc_N,
+                                conc_P,
+                                conc_C,
+                                conc_Mg,
+                                conc_K,
+                                conc_S) in zip(LCI_outputs['conc_waste_water_nutrient_N'],
+                                               LCI_outputs['conc_waste_water_nutrient_P'],
+                                               LCI_outputs['conc_waste_water_C'],
+                                               LCI_outputs['conc_waste_water_nutrient_Mg'],
+                                               LCI_outputs['conc_waste_water_nutrient_K'],
+                                               LCI_outputs['conc_waste_water_nutrient_S'])],
+                                             dtype=float).reshape(len(LCI_table), len(methods))
+
+    process_impacts = {}
+
+    LCA_res = np.zeros((len(LCI_table), len(methods)))
+
+    for process in dict_mono_technosphere_lcas:
+
+        impacts_per_unit = np.array(dict_mono_technosphere_lcas[process], dtype=float)
+
+        # Adding the biosphere flows for 1 cubic meter of wastewater
+        if process == 'Wastewater treatment PBR':
+
+            impacts_per_unit = impacts_per_unit + impacts_biosphere_waste_water
+
+        # Multipliying each impact per unit of input process by the input amount in the LCIs
+        process_impacts[process] = (np.asarray(LCI_table[process], dtype=float)[:, None]
+                                    * impacts_per_unit)
+
+        # Calculating total LCA by summing
+        LCA_res = LCA_res + process_impacts[process]
+
+    return [LCA_res, process_impacts]
 
 
 
@@ -1615,7 +2265,15 @@ def final_function_simulations(dict_mono_technosphere_lcas,
                                methods,
                                categories_contribution, 
                                processes_in_categories,
-                               type_sens):
+                               type_sens,
+                               transposition=None,
+                               engine='odeint',
+                               night_steady_state='twopass',
+                               cache=False,
+                               timestep=10,
+                               multiday=False,
+                               emulator=None,
+                               batch=False):
     '''Function which calls all other functions and generates the LCA results, 
     uncertainty, sensitivity and contribution analysis.
     
@@ -1648,6 +2306,39 @@ def final_function_simulations(dict_mono_technosphere_lcas,
         #categories_contribution : Names of process categories considered for the contribution analysis
         #processes_in_categories : List of processes to assign to categories (same order)
         #type_sens: "SOBOL" or "FAST"
+        #transposition : None to use the PVGIS vertical surfaces, or sky model
+        used to calculate them locally from the horizontal surface
+        ('haydavies' or 'isotropic'). See Solar_transposition_1.
+        #engine : integrator for the temperature, 'odeint', 'fixedstep', 'analytical' or 'reduced'.
+        See "thermosimulation_1day_timestep10" in Cultivation_simul_Night_Harvest_1.
+        #night_steady_state : 'twopass' or 'periodic', start of the day without
+        thermoregulation at night. See "thermosimulation_1day_timestep10" in Cultivation_simul_Night_Harvest_1.
+        #cache : False to simulate every day, True to keep the simulated days
+        in memory, or folder to also keep them on disk. The days with the same
+        inputs are then simulated only once.
+        See "cultivation_simulation_cached" in Cultivation_simul_Night_Harvest_1.
+        'stages' to keep the results of each stage of the simulation in memory,
+        so that only the stages depending on the parameters which changed are
+        calculated again. See "cultivation_simulation_staged".
+        #timestep : time step of the thermal simulation ; s. 10 s by default,
+        60 s or 300 s for faster screening runs.
+        See "thermal_time_grid" in Cultivation_simul_Night_Harvest_1.
+        #multiday : False to simulate an average day for each month (x 30.4 days),
+        True to simulate the consecutive days of the cultivation period with 
+        the temperature and the biomass concentration carried over from one 
+        day to the next. The days are aggregated by month while they are simulated.
+        See "cultivation_simulation_season" in Cultivation_simul_Night_Harvest_1.
+        #emulator : None to simulate the temperature of each day, or emulator 
+        (output of "train_thermal_emulator" or path of the file where it is saved)
+        predicting the thermal summary of the days in its context and domain, 
+        the other days being simulated. As the month is part of the context,
+        a dictionnary month : emulator ("train_thermal_emulators") covers 
+        the whole cultivation period. See Thermoregulation_emulator_1.
+        #batch : True to simulate the average days of all the sets of parameters
+        together after drawing them, the days of each month (same site) being 
+        integrated at once ("cultivation_simulation_batch" in 
+        Cultivation_simul_Night_Harvest_1, fixed-step integrator whatever the
+        engine, without cache). Not possible with multiday or emulator.
     
     
     Outputs :
@@ -1736,12 +2427,44 @@ def final_function_simulations(dict_mono_technosphere_lcas,
 
     problem_sobol_FAST = sampling_res[6]
 
+    # Download all the missing climatic data before the simulations start
+
+    climatic_data_requests = solardata.plan_climatic_data_requests(sample,
+                                                                   names_param,
+                                                                   Locationdict,
+                                                                   months_suitable_for_cultivation,
+                                                                   transposition)
+
+    # Corrupted csvs found during this run
+    solardata.reset_climatic_data_stats()
+
+    [downloaded, failed_downloads] = solardata.prefetch_climatic_data(climatic_data_requests)
+
+    if len(downloaded) != 0:
+        print(len(downloaded), 'climatic data files downloaded')
 
-    # Initialize variables that will receive results
+    for key in failed_downloads:
+        print('Climatic data could not be downloaded for', key, ':', failed_downloads[key])
+
+
+    # Initialize variables that will receive the parameters, the qualitative 
+    # parameters and the cultivation totals of each set.
+    # The LCIs of all sets are then calculated at once.
+    
+    parameter_rows = []
+    
+    qualitative_rows = []
     
-    results_table = np.empty((0,
-                              len(names_param)+len(LCIdict) +len(names_suppl_info)+len(columns_not_float)+len(methods)),
-                             dtype=float)
+    cultivation_periods = []
+
+    if batch and (multiday or emulator is not None):
+        raise ValueError('batch is not possible with multiday or emulator')
+
+    # With batch, parameters of each set and arguments of its days,
+    # simulated after the loop
+    batch_sets = []
+
+    batch_days = []
 
     # list of tables whih will contain the conribution of each process category to each impact category
     
@@ -1756,19 +2479,19 @@ def final_function_simulations(dict_mono_technosphere_lcas,
                                          dtype=float) for i in range(len(methods))] 
 
     print('ok1')
-    count = -1
-    
-    list_opti_perfo = []
+
+    # Hit rate of the cache for this run
+    cultsimul.reset_cultivation_cache_stats()
+    cultsimul.reset_cultivation_stage_stats()
+
+    # Days sampled to estimate the error due to the time step
+    cultsimul.reset_timestep_error_sample()
+
+    # Days emulated in this run
+    emulation.reset_thermal_emulator_stats()
     
     for param_set in sample:  # One set of uncertain parameters
          
-    
-        # Copy that will be modified for calculation of the LCA for this set of parameters
-        
-        new_dict_mono_technosphere_lcas = copy.deepcopy(dict(dict_mono_technosphere_lcas))
-
-    
-        count += 1
 
         # Update the dictionnaries whith the values of the sample
 
@@ -1838,167 +2561,209 @@ def final_function_simulations(dict_mono_technosphere_lcas,
         
 
 
-        # Calculates LCI for this set with the updated dictionnaries
-        
-        LCI = LCI_one_strain_uniquevalues(Biodict,
-                                          Physicdict,
-                                          Tech_opdict,
-                                          Locationdict,
-                                          LCIdict,
-                                          months_suitable_for_cultivation,
-                                          fraction_maxyield, 
-                                          fishfeed_table,
-                                          elemental_contents)
-        
-        # Collecting the results of the function
-        LCIdict_collected = LCI[0]
-
-
-        surfaceyield = LCI[1]  # kg dw .d-1
-        
-        volumetricyield = LCI[2]  # kg dw.L-1.d-1
-        
-        optimization_performance = LCI[3]  # kg dw.d-1
-        
-        total_production_kg_dw = LCI[6]  # kg dw
-
-        total_production_harvested_kg_dw = LCI[7]  # kg dw
-
-        total_production_loss_kg_dw = LCI[8]  # kg dw
-
-        conc_waste_water_nutrient_N = LCI[9]  # kg.m-3
+        # Qualitative parameters and cultivation simulation for this set
 
-        conc_waste_water_nutrient_P = LCI[10]  # kg.m-3
-        
-        conc_waste_water_nutrient_K = LCI[11]  # kg.m-3
+        qualitative = LCI_qualitative_parameters(Biodict, Tech_opdict)
+
+        if batch:
+            # Copies as the dictionnaries are updated for the next set
+            dictionnaries = [dict(Biodict), dict(Physicdict), dict(Tech_opdict), dict(Locationdict)]
+
+            batch_sets.append(dictionnaries + [qualitative])
+
+            batch_days += cultivation_period_days(*dictionnaries,
+                                                  months_suitable_for_cultivation,
+                                                  fraction_maxyield,
+                                                  elemental_contents,
+                                                  qualitative[0],  # Nsource
+                                                  qualitative[2],  # night_monitoring
+                                                  transposition,
+                                                  engine,
+                                                  night_steady_state,
+                                                  timestep)
+
+        else:
+            cultivation_period = cultivation_period_simulation(Biodict,
+                                                               Physicdict,
+                                                               Tech_opdict,
+                                                               Locationdict,
+                                                               months_suitable_for_cultivation,
+                                                               fraction_maxyield,
+                                                               elemental_contents,
+                                                               qualitative[0],  # Nsource
+                                                               qualitative[2],  # night_monitoring
+                                                               transposition,
+                                                               engine,
+                                                               night_steady_state,
+                                                               cache,
+                                                               timestep,
+                                                               multiday,
+                                                               emulator)
 
-        conc_waste_water_nutrient_Mg = LCI[12]  # kg.m-3
+            cultivation_periods.append(cultivation_period)
 
-        conc_waste_water_biomass = LCI[13]  # kg.m-3
+        parameter_rows.append({**Tech_opdict, **Physicdict, **Biodict, **Locationdict})
 
-        conc_waste_water_C = LCI[14]  # kg.m-3
+        qualitative_rows.append(qualitative)
 
-        conc_waste_water_nutrient_S = LCI[15]  # kg.m-3
+    if batch:
+        # The average days of all the sets, integrated together month by month
+        day_summaries = cultsimul.cultivation_simulation_batch(batch_days)
 
-        bioact_molec_dbio = LCI[16]  # .
+        number_months = len(months_suitable_for_cultivation)
 
-        min_centrifugation_rate_m3_h = LCI[17]
+        for set_index in range(len(batch_sets)):
 
-        max_centrifugation_rate_m3_h = LCI[18]
+            [Biodict_set, Physicdict_set, Tech_opdict_set, Locationdict_set, qualitative] = batch_sets[set_index]
 
-        totalwater_centrifuged = LCI[19]
+            cultivation_periods.append(cultivation_period_simulation(Biodict_set,
+                                                                     Physicdict_set,
+                                                                     Tech_opdict_set,
+                                                                     Locationdict_set,
+                                                                     months_suitable_for_cultivation,
+                                                                     fraction_maxyield,
+                                                                     elemental_contents,
+                                                                     qualitative[0],  # Nsource
+                                                                     qualitative[2],  # night_monitoring
+                                                                     transposition,
+                                                                     engine,
+                                                                     night_steady_state,
+                                                                     timestep=timestep,
+                                                                     day_summaries=day_summaries[set_index*number_months:
+                                                                                                 (set_index + 1)*number_months]))
 
-        totalwater_centrifuged = LCI[19]
+    # Calculates the LCIs of all sets at once
 
-        tubelength = LCI[20]
+    LCI = LCI_matrix(pd.DataFrame(parameter_rows),
+                     pd.DataFrame(qualitative_rows, columns=LCI_qualitative_fields),
+                     cultivation_periods,
+                     LCIdict,
+                     fishfeed_table,
+                     elemental_contents)
 
-        facilityvolume = LCI[21]
+    # Collecting the results of the function
+    LCI_table = LCI[0]
 
-        exchange_area = LCI[22]
+    LCI_outputs = LCI[1]
 
-        totalcooling_thermal = LCI[23]
+    LCI_records = LCI[2]
 
-        list_opti_perfo.append(optimization_performance)
+    list_opti_perfo = list(LCI_outputs['optimization_performance'])
 
-        # List containing simualtions values which are not LCI or LCIA
-        # (same order as their names in names_suppl_info)
-        
-        values_simu = [bioact_molec_dbio,
-                       surfaceyield,
-                       tubelength,
-                       facilityvolume,
-                       exchange_area,
-                       totalcooling_thermal,
-                       volumetricyield,
-                       total_production_kg_dw,
-                       total_production_harvested_kg_dw,
-                       total_production_loss_kg_dw,
-                       conc_waste_water_nutrient_N,
-                       conc_waste_water_nutrient_P,
-                       conc_waste_water_nutrient_K,
-                       conc_waste_water_nutrient_Mg,
-                       conc_waste_water_biomass,
-                       conc_waste_water_C,
-                       conc_waste_water_nutrient_S,
-                       min_centrifugation_rate_m3_h,
-                       max_centrifugation_rate_m3_h,
-                       totalwater_centrifuged]
+    names_LCI = list(LCI_table.columns)
 
-        values_LCI = [LCIdict_collected[i] for i in LCIdict_collected]
+    # Simulations values which are not LCI or LCIA
+    # (same order as their names in names_suppl_info)
 
-        names_LCI = [a for a in LCIdict_collected]
-        
+    values_simu = LCI_outputs[['bioact_molec_dbio',
+                               'surfaceyield',
+                               'tubelength',
+                               'facilityvolume',
+                               'exchange_area',
+                               'totalcooling_thermal',
+                               'volumetricyield',
+                               'total_production_kg_dw',
+                               'total_production_harvested_kg_dw',
+                               'total_production_loss_kg_dw',
+                               'conc_waste_water_nutrient_N',
+                               'conc_waste_water_nutrient_P',
+                               'conc_waste_water_nutrient_K',
+                               'conc_waste_water_nutrient_Mg',
+                               'conc_waste_water_biomass',
+                               'conc_waste_water_C',
+                               'conc_waste_water_nutrient_S',
+                               'min_centrifugation_rate_m3_h',
+                               'max_centrifugation_rate_m3_h',
+                               'totalwatercentrifuged']].to_numpy()
+
+    # Now calculating the LCIA for all LCIs
+
+    LCIA = LCIA_matrix(dict_mono_technosphere_lcas,
+                       LCI_records,
+                       LCI_outputs,
+                       methods)
+
+    list_LCA_res = LCIA[0]
+
+    # Impacts of each process of the LCIs
+    process_impacts = LCIA[1]
+
+    # Results dataframe with 1 row per set (Uncertain parameters values, LCI figures, Other values about the simulation, LCIA)
+
+    names_methods_adjusted = [a[-1] for a in methods]
+
+    names_for_df = names_param + names_LCI + names_suppl_info + names_methods_adjusted
 
-        # Now calculating the LCIA for this row
-        
-        # Calling the fuction that calculates the impacts associated to the emissions 
-        # of the wastewater treatment of 1 cubic meter of the wastewater
+    results_table_df = pd.concat([pd.DataFrame(sample, columns=names_param),
+                                  LCI_table,
+                                  pd.DataFrame(values_simu, columns=names_suppl_info),
+                                  pd.DataFrame(list_LCA_res, columns=names_methods_adjusted)],
+                                 axis=1)
 
-        list_sum_impacts_biosphere_waste_water= waste_water_impact_biosphere(
-                      conc_waste_water_nutrient_N,
-                      conc_waste_water_nutrient_P,
-                      conc_waste_water_C,
-                      conc_waste_water_nutrient_Mg,
-                      conc_waste_water_nutrient_K,
-                      conc_waste_water_nutrient_S,
-                      methods)
-        
-        # Adding the biosphere flows for 1 cubic meter of wastewater
-        
-        new_dict_mono_technosphere_lcas['Wastewater treatment PBR'] =[a+b for (a,b) in zip(new_dict_mono_technosphere_lcas['Wastewater treatment PBR'],list_sum_impacts_biosphere_waste_water) ]
+    results_table = results_table_df.to_numpy()
 
-        # Multipliying each impact per unit of input processes by the input amount in the calculated LCI
-        
-        for i in new_dict_mono_technosphere_lcas:
-            
-            new_dict_mono_technosphere_lcas[i]=[LCIdict_collected[i]*a for a in new_dict_mono_technosphere_lcas[i]]
-        
-        # Calculating total LCA by summing
-        
-        list_LCA_res =[]
+    # Contribution per process category
+    for process in process_impacts :
         
-        for meth_index in range(len(methods)):
-            
-            sum_impact = sum([new_dict_mono_technosphere_lcas[flow][meth_index] for flow in new_dict_mono_technosphere_lcas ])
-
-
-            list_LCA_res.append(sum_impact)
-            
-            
+        # browsing the categories
+        for index_content_categ in range(len(processes_in_categories)):
             
-        # Row to add to the results dataframe (Uncertain parameters values, LCI figures, Other values about the simulation, LCIA)
-       
-
-        row_to_add = list(param_set) + values_LCI + values_simu + list_LCA_res
 
-        # Adding this new row
+            # if this process belongs to category
+            if process in processes_in_categories[index_content_categ]:
+                
+                # Then we add this value to the corresponding colum in the  list_tables_contribution
+                for meth_index in range(len(methods)): #we do this for all methods 
 
-        results_table = np.vstack((results_table, row_to_add))  
+                    list_tables_contribution[meth_index][:, index_content_categ] = (
+                        list_tables_contribution[meth_index][:, index_content_categ] 
+                        + process_impacts[process][:, meth_index])
 
-        names_methods_adjusted = [a[-1] for a in methods]
-        
-        names_for_df = names_param + names_LCI + names_suppl_info + names_methods_adjusted
+    print('ok2')
 
-        results_table_df = pd.DataFrame(results_table, columns=names_for_df)
-        
-        # Contribution per process category
-        for process in new_dict_mono_technosphere_lcas :
-            
-            # browsing the categories
-            for index_content_categ in range(len(processes_in_categories)):
-                
-    
-                # if this process belongs to category
-                if process in processes_in_categories[index_content_categ]:
-                    
-                    # Then we add this value to the corresponding colum in the  list_tables_contribution
-                    for meth_index in range(len(methods)): #we do this for all methods 
-    
-                        list_tables_contribution[meth_index][count, index_content_categ] = (
-                            list_tables_contribution[meth_index][count, index_content_categ] 
-                            + new_dict_mono_technosphere_lcas[process][meth_index])
+    if cache == 'stages':
+        print('Cultivation stages (hits, misses) :',
+              {stage: (cultsimul.cultivation_stage_stats[stage]['hits'],
+                       cultsimul.cultivation_stage_stats[stage]['misses'])
+               for stage in cultsimul.cultivation_stage_stats})
+
+    elif cache is not False:
+        print('Cultivation cache :',
+              cultsimul.cultivation_cache_stats['calls'], 'days,',
+              round(cultsimul.cultivation_cache_hit_rate()*100, 1), '% hits')
+
+    # Accuracy lost with a coarser time step, on a sample of the simulated days
+    if timestep != cultsimul.timestep_reference:
+        print('Time step', timestep, 's, error compared to',
+              cultsimul.timestep_reference, 's on',
+              len(cultsimul.timestep_error_sample['arguments']), 'days :')
+        print(cultsimul.timestep_error_estimate())
+
+    # Days predicted by the emulators, days simulated by reason and
+    # out-of-sample errors of the emulators
+    if emulator is not None:
+        print('Thermal emulator :',
+              emulation.thermal_emulator_stats['emulated'], 'days emulated,',
+              emulation.thermal_emulator_stats['simulated'], 'days simulated')
+
+        if emulation.thermal_emulator_stats['simulated'] != 0:
+            print('Days simulated : trajectories',
+                  emulation.thermal_emulator_stats['simulated_trajectories'],
+                  ', input not a number',
+                  emulation.thermal_emulator_stats['simulated_not_a_number'],
+                  ', no emulator for the context',
+                  emulation.thermal_emulator_stats['simulated_context'],
+                  ', outside the domain',
+                  emulation.thermal_emulator_stats['simulated_domain'])
+
+        for emulator_used in emulation.thermal_emulators(emulator):
+            print(emulator_used['validation'])
+
+    # Downloaded again
+    if len(solardata.climatic_data_stats['corrupted_files']) != 0:
+        print('Corrupted climatic data files :',
+              solardata.climatic_data_stats['corrupted_files'])
 
-    print('ok2')
     # Contribution 
 
     # Calculating % contribution
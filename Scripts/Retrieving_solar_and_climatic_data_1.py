@@ -20,6 +20,24 @@ of the European Photovoltaic Geographical Information System and estimate
 import requests
 import matplotlib.pyplot as plt
 import os
+import re
+import io
+import hashlib
+import threading
+import contextlib
+import itertools
+import datetime
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
 
 # Set working directory to file location 
 # (works only when executing the whole file and not only sections (Run Current cell))
@@ -28,6 +46,7 @@ currentfolder=os.path.dirname(os.path.realpath(__file__))
 os.chdir(currentfolder)
 
 import Functions_for_physical_and_biological_calculations_1 as functions
+import Solar_transposition_1 as solartransposition
 import pandas as pd
 import decimal
 import random
@@ -42,7 +61,15 @@ import numpy as np
 # The downloaded csv has 4 colums without header : Time with format "XX:XX", Global horizontal irradiciance(direct+diffuse), direct, diffuse, temperature (Celsius)
 # takes latitude,longitude, month number, angle and azimuth as inputs
 
-def downloadclimaticdata(lat, long, month, angle, azimuth):
+# Root of the PVGIS API
+pvgis_api_url = "https://re.jrc.ec.europa.eu/api/"
+
+# Folder containing the downloaded csvs, the manifest and the climate store
+climatic_data_folder = "../climatic_data/"
+
+def downloadclimaticdata(lat, long, month, angle, azimuth,
+                         session=None,
+                         base_url=pvgis_api_url):
     """API importer. Download a csv file from the European Photovoltaic
     Geographical Information System  with hourly climatic data for
     an average day in the given location and month. The file is downloaded in
@@ -60,78 +87,1487 @@ def downloadclimaticdata(lat, long, month, angle, azimuth):
         #month : month of the year ; number of the month
         #angle : Tilt angle of the surface  ; 0= horizontal, 90 = vertical
         #azimuth : azimuth of surface ;  180:-180
+        #session : requests.Session to reuse the connections of a pool.
+        If None, a new connection is opened.
+        #base_url : root of the API ; str
+
+    #Outputs:
+
+        #True if the file is in the folder, False otherwise
         
 
-        
+        """
+
+    key = climate_store_key(lat, long, month, angle, azimuth)
+
+    # No need to download again if already here
+    if climatic_data_lookup(*key) is not None:
+        return True
+
+    [lat, long, month, angle, azimuth] = key
+
+    # Create the name of the link from which data will be retrieved
+    namelink = (base_url
+                + "DRcalc?lat="
+                + str(lat)
+                + "&lon="
+                + str(long)
+                + "&month="
+                + str(month)
+                + "&global=1&angle="
+                + str(angle)
+                + "&showtemperatures=1&aspect="
+                + str(azimuth)
+                + "&outputformat=basic")
+
+    if session is None:
+        response = requests.get(namelink)
+    else:
+        response = session.get(namelink)
+
+    # Code 200 means the connection with the API was successful.
+    # it can be due to the non existance of data for the zone
+    # (for instance : ocean area)
+    if response.status_code != 200:
+        return False
+
+    # Write the retrieved data in the folder and record it in the manifest
+    add_climatic_data_file(key, response.content)
+
+    return True
+
+
+
+
+
+#################
+# Climatic data files and manifest
+#################
+
+# The csvs are named after the canonical key of the data they contain
+# (see "climate_store_key") so that the same location is never downloaded
+# twice with a different formatting of the coordinates.
+
+# The manifest lists the csvs of the folder with their key,
+# sha256 checksum and size in bytes. It is rebuilt from the folder if missing.
+
+climatic_data_manifest_file = "climatic_data_manifest.csv"
+
+climatic_data_manifest_columns = ['lat', 'long', 'month', 'angle', 'azimuth',
+                                  'filename', 'sha256', 'bytes']
+
+# Loaded once and shared by all callers in the process
+# key --> [filename, sha256, bytes]
+climatic_data_manifest = {'entries': None}
+
+# The manifest can be updated by several download threads
+climatic_data_manifest_lock = threading.RLock()
+
+# Csvs found corrupted (checksum different from the manifest) and removed from
+# the manifest since the last call to "reset_climatic_data_stats".
+# They are downloaded again when needed and reported by the caller.
+climatic_data_stats = {'corrupted_files': []}
+
+
+def reset_climatic_data_stats():
+    '''Empties the lists in "climatic_data_stats"'''
+
+    for key in climatic_data_stats:
+        climatic_data_stats[key] = []
+
+
+def climatic_data_filename(key):
+    """Returns the name of the csv containing the PVGIS average day of a key.
+
+    #Inputs:
+
+        #key : key given by "climate_store_key"
+
+    #Outputs:
+
+        #nameofthefile : name of the csv ; str
+
+        """
+
+    [lat, long, month, angle, azimuth] = key
+
+    return ("dailydataforlat="
+            + str(lat)
+            + "andlong="
+            + str(long)
+            + "formonth"
+            + str(month)
+            + "forangle"
+            + str(angle)
+            + "forazimuth"
+            + str(azimuth)
+            + ".csv")
+
+
+def atomic_write(path, content):
+    """Writes bytes to a file through a temporary file in the same folder,
+    so that the file is either complete or not modified. The temporary file
+    is created with the permissions of a file created with open() (0o666
+    minus the umask, applied by the system).
+
+    #Inputs:
+
+        #path : path of the file ; str
+        #content : bytes to write
+
+        """
+
+    while True:
+
+        temporary_path = path + "." + os.urandom(6).hex() + ".tmp"
+
+        try:
+            descriptor = os.open(temporary_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+            break
+
+        except FileExistsError:
+            continue
+
+    try:
+        with os.fdopen(descriptor, 'wb') as temporary_file:
+            temporary_file.write(content)
+            temporary_file.flush()
+            os.fsync(temporary_file.fileno())
+
+        os.replace(temporary_path, path)
+
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+
+
+def build_climatic_data_manifest(folder=climatic_data_folder):
+    """Builds the manifest from the csvs "dailydataforlat=..." of a folder.
+    Csvs with non canonical names (ex : "43.6950") are listed under their
+    canonical key. If several csvs have the same key, the one with the
+    canonical name is kept.
+
+    #Inputs:
+
+        #folder : folder containing the csvs ; str
+
+    #Outputs:
+
+        #entries : dictionnary key --> [filename, sha256, bytes]
+
+        """
+
+    pattern = re.compile(r"dailydataforlat=(.+)andlong=(.+)formonth(\d+)"
+                         r"forangle(.+)forazimuth(.+)\.csv$")
+
+    entries = {}
+
+    for nameofthefile in sorted(os.listdir(folder)):
+
+        match = pattern.match(nameofthefile)
+
+        if match is None:
+            continue
+
+        key = climate_store_key(*match.groups())
+
+        if key in entries and nameofthefile != climatic_data_filename(key):
+            continue
+
+        with open(folder + nameofthefile, 'rb') as csv_file:
+            content = csv_file.read()
+
+        entries[key] = [nameofthefile, hashlib.sha256(content).hexdigest(), len(content)]
+
+    return entries
+
+
+def save_climatic_data_manifest(folder=climatic_data_folder):
+    """Writes the manifest in the folder (atomic write).
+
+    #Inputs:
+
+        #folder : folder containing the csvs ; str
+
+        """
+
+    lines = [";".join(climatic_data_manifest_columns)]
+
+    for key, [nameofthefile, checksum, size] in sorted(climatic_data_manifest['entries'].items()):
+
+        lines.append(";".join([str(value) for value in key]
+                              + [nameofthefile, checksum, str(size)]))
+
+    atomic_write(folder + climatic_data_manifest_file,
+                 ("\n".join(lines) + "\n").encode())
+
+
+def load_climatic_data_manifest(folder=climatic_data_folder):
+    """Loads the manifest of the folder. The manifest is only loaded once
+    and then shared by all callers. If it does not exist yet, it is built
+    from the csvs in the folder.
+
+    #Inputs:
+
+        #folder : folder containing the csvs ; str
+
+    #Outputs:
+
+        #entries : dictionnary key --> [filename, sha256, bytes]
+
+        """
+
+    with climatic_data_manifest_lock:
+
+        if climatic_data_manifest['entries'] is not None:
+
+            return climatic_data_manifest['entries']
+
+        if not os.path.exists(folder + climatic_data_manifest_file):
+
+            climatic_data_manifest['entries'] = build_climatic_data_manifest(folder)
+
+            save_climatic_data_manifest(folder)
+
+            return climatic_data_manifest['entries']
+
+        entries = {}
+
+        with open(folder + climatic_data_manifest_file, 'r') as manifest_file:
+
+            # Skipping the header
+            for line in manifest_file.read().splitlines()[1:]:
+
+                [lat, long, month, angle, azimuth,
+                 nameofthefile, checksum, size] = line.split(";")
+
+                key = climate_store_key(lat, long, month, angle, azimuth)
+
+                # Lines written with a previous "climate_store_key" can share a key,
+                # the file named after the key is kept as in "build_climatic_data_manifest"
+                if key in entries and nameofthefile != climatic_data_filename(key):
+                    continue
+
+                entries[key] = [nameofthefile, checksum, int(size)]
+
+        climatic_data_manifest['entries'] = entries
+
+        return entries
+
+
+def climatic_data_lookup(lat, long, month, angle, azimuth,
+                         folder=climatic_data_folder):
+    """Single lookup for the csvs on the disk. Returns the path of the csv
+    containing the PVGIS average day for the given location, month and
+    orientation if it is listed in the manifest with the right size.
+
+    #Inputs:
+
+        #lat : latitute expressed in format ; XX.XXX or X.XXX
+        #long : longitude expressed in format ; XX.XXX or X.XXX
+        #month : month of the year ; number of the month
+        #angle : Tilt angle of the surface  ; 0= horizontal, 90 = vertical
+        #azimuth : azimuth of surface ;  180:-180
+        #folder : folder containing the csvs ; str
+
+    #Outputs:
+
+        #path : path of the csv ; str
+        None if the csv is not in the folder.
+
+        """
+
+    entries = load_climatic_data_manifest(folder)
+
+    entry = entries.get(climate_store_key(lat, long, month, angle, azimuth))
+
+    if entry is None:
+        return None
+
+    path = folder + entry[0]
+
+    if not os.path.exists(path) or os.path.getsize(path) != entry[2]:
+        return None
+
+    return path
+
+
+def add_climatic_data_file(key, content, folder=climatic_data_folder):
+    """Checks that a downloaded csv is a PVGIS average day, then writes it 
+    in the folder under its canonical name and records it in the manifest
+    (atomic writes). Nothing is written if the content cannot be read.
+
+    #Inputs:
+
+        #key : key given by "climate_store_key"
+        #content : content of the csv ; bytes
+        #folder : folder containing the csvs ; str
+
+    #Outputs:
+
+        #values : array (24 hours x 4) with Global irradiance, direct,
+        diffuse, temperature ; W.m-2 and °C
+
+        """
+
+    nameofthefile = climatic_data_filename(key)
+
+    # Parsing the payload before it replaces anything on the disk
+    try:
+        values = read_pvgis_daily_file(content)
+
+    except ValueError as error:
+        raise ValueError('Invalid climatic data downloaded for ' + str(key)
+                         + ' (' + nameofthefile + ') : ' + str(error))
+
+    atomic_write(folder + nameofthefile, content)
+
+    with climatic_data_manifest_lock:
+
+        entries = load_climatic_data_manifest(folder)
+
+        entries[key] = [nameofthefile, hashlib.sha256(content).hexdigest(), len(content)]
+
+        save_climatic_data_manifest(folder)
+
+    return values
+
+
+def read_climatic_data_content(key, folder=climatic_data_folder):
+    """Returns the content of the csv of a key after checking its checksum
+    against the manifest.
+
+    #Inputs:
+
+        #key : key given by "climate_store_key"
+        #folder : folder containing the csvs ; str
+
+    #Outputs:
+
+        #content : content of the csv ; bytes
+        None if the csv is missing or corrupted.
+
+        """
+
+    path = climatic_data_lookup(*key, folder=folder)
+
+    if path is None:
+        return None
+
+    with open(path, 'rb') as csv_file:
+        content = csv_file.read()
+
+    if hashlib.sha256(content).hexdigest() != load_climatic_data_manifest(folder)[key][1]:
+
+        # The file will be downloaded again
+        with climatic_data_manifest_lock:
+
+            climatic_data_stats['corrupted_files'].append(path)
+
+            climatic_data_manifest['entries'].pop(key, None)
+
+            save_climatic_data_manifest(folder)
+
+        return None
+
+    return content
+
+
+def read_climatic_data_file(key, folder=climatic_data_folder):
+    """Reads the csv of a key after checking its checksum against the manifest.
+
+    #Inputs:
+
+        #key : key given by "climate_store_key"
+        #folder : folder containing the csvs ; str
+
+    #Outputs:
+
+        #values : array (24 hours x 4) with Global irradiance, direct,
+        diffuse, temperature ; W.m-2 and °C
+        None if the csv is missing or corrupted.
+
+        """
+
+    content = read_climatic_data_content(key, folder)
+
+    if content is None:
+        return None
+
+    return read_pvgis_daily_file(content)
+
+
+
+
+
+#################
+# Climate store
+#################
+
+# The climate store gathers all the downloaded PVGIS average days in one
+# binary file with fixed-width records instead of one csv per
+# (lat, long, month, angle, azimuth).
+
+# climate_store_index.npy : array with 1 row per record :
+# lat, long, month, angle, azimuth
+
+# climate_store_values.dat : raw float64 records of 24 rows (hours)
+# and 3 columns : Global irradiance, direct, diffuse
+
+# The air temperature is the same for all the orientations of a location
+# and month. It is stored only once per (lat, long, month) :
+
+# climate_store_temperature_index.npy : array with 1 row per record :
+# lat, long, month
+
+# climate_store_temperature_values.dat : raw float64 records of 24 hours (Celsius)
+
+# The values are memory-mapped : the pages are only read from the disk when
+# needed and are shared by all the processes reading the same store.
+
+# Several processes (workers of the siting grid) can add records to the same
+# store : the records are only appended, and the appends and rebuilds are
+# serialized by a lock on climate_store.lock ("climate_store_file_lock").
+
+climate_store_folder = climatic_data_folder
+
+climate_store_index_file = "climate_store_index.npy"
+
+climate_store_values_file = "climate_store_values.dat"
+
+climate_store_temperature_index_file = "climate_store_temperature_index.npy"
+
+climate_store_temperature_values_file = "climate_store_temperature_values.dat"
+
+climate_store_lock_file = "climate_store.lock"
+
+# Shape of one record
+climate_store_record_shape = (24, 3)
+
+climate_store_temperature_record_shape = (24,)
+
+# Loaded once and shared by all callers in the process
+climate_store = {'index': None,
+                 'values': None,
+                 'temperature_index': None,
+                 'temperature_values': None}
+
+
+def climate_store_key(lat, long, month, angle, azimuth):
+    """Returns the canonical key identifying a PVGIS average day in the
+    climate store and in the manifest. Coordinates are rounded to 3 decimals
+    and the month, angle and azimuth are integers, so that the same data is
+    not downloaded twice for "43.695" and "43.6950" or azimuth "90" and "90.0".
+    The azimuth is wrapped into [-180,180[ (180 and -180 are both the north,
+    the key is -180) and is 0 for a horizontal surface (angle 0), for which
+    it is unsignificant.
+
+    #Inputs:
+
+        #lat : latitute expressed in format ; XX.XXX or X.XXX
+        #long : longitude expressed in format ; XX.XXX or X.XXX
+        #month : month of the year ; number of the month
+        #angle : Tilt angle of the surface  ; 0= horizontal, 90 = vertical
+        #azimuth : azimuth of surface ;  180:-180
+
+    #Outputs:
+
+        #key : tuple (lat, long, month, angle, azimuth)
+
+        """
+
+    angle = int(round(float(angle)))
+
+    if angle == 0:
+        azimuth = 0
+    else:
+        azimuth = (int(round(float(azimuth))) + 180) % 360 - 180
+
+    return (round(float(lat), 3),
+            round(float(long), 3),
+            int(float(month)),
+            angle,
+            azimuth)
+
+
+def climate_store_site_key(lat, long, month):
+    """Returns the canonical key identifying the air temperature of a
+    location and month in the climate store.
+
+    #Inputs:
+
+        #lat : latitute expressed in format ; XX.XXX or X.XXX
+        #long : longitude expressed in format ; XX.XXX or X.XXX
+        #month : month of the year ; number of the month
+
+    #Outputs:
+
+        #key : tuple (lat, long, month)
+
+        """
+
+    return climate_store_key(lat, long, month, 0, 0)[:3]
+
+
+def read_pvgis_daily_csv(path):
+    """Reads a csv downloaded with "downloadclimaticdata" and returns
+    the 4 numeric columns as an array.
+
+    #Inputs:
+
+        #path : path of the csv file or file-like object
+
+    #Outputs:
+
+        #values : array (24 hours x 4) with Global irradiance, direct,
+        diffuse, temperature ; W.m-2 and °C
+
+        """
+
+    table = pd.read_csv(path, sep="\t", header=None,
+                        encoding='unicode_escape', engine='python')
+
+    return table.iloc[:, 1:5].to_numpy(dtype=np.float64)
+
+
+# The PVGIS "basic" daily output is always 24 rows of 5 fields separated by
+# tabulations : Time, Global, direct, diffuse, temperature.
+# Splitting on white spaces gives the 120 fields in order.
+
+pvgis_daily_fields = 5
+
+pvgis_daily_rows = 24
+
+
+def read_pvgis_daily_file(path, columns=(1, 2, 3, 4)):
+    """Fast reader for a csv downloaded with "downloadclimaticdata".
+    Only the requested columns are converted, directly into a float64 array.
+
+    #Inputs:
+
+        #path : path of the csv file, or its content ; str or bytes
+        #columns : numbers of the columns to read ; 1 = Global irradiance,
+        2 = direct, 3 = diffuse, 4 = temperature
+
+    #Outputs:
+
+        #values : array (24 hours x columns) ; W.m-2 and °C
+
+        """
+
+    if isinstance(path, bytes):
+        content = path
+    else:
+        with open(path, 'rb') as csv_file:
+            content = csv_file.read()
+
+    fields = content.split()
+
+    if len(fields) != pvgis_daily_fields*pvgis_daily_rows:
+        raise ValueError('Not a PVGIS daily file : ' + str(len(fields)) + ' fields')
+
+    # Every 5th field starting from the column
+    return np.array([fields[column::pvgis_daily_fields] for column in columns],
+                    dtype=np.float64).T.copy()
+
+
+def read_pvgis_daily_files(paths, columns=(1, 2, 3, 4)):
+    """Batch version of "read_pvgis_daily_file". All the files are
+    converted in a single operation.
+
+    #Inputs:
+
+        #paths : list of paths of csv files, or of their contents ; str or bytes
+        #columns : numbers of the columns to read ; 1 = Global irradiance,
+        2 = direct, 3 = diffuse, 4 = temperature
+
+    #Outputs:
+
+        #values : array (files x 24 hours x columns) ; W.m-2 and °C
+
+        """
+
+    contents = []
+
+    for path in paths:
+        if isinstance(path, bytes):
+            contents.append(path)
+        else:
+            with open(path, 'rb') as csv_file:
+                contents.append(csv_file.read())
+
+    fields = b" ".join(contents).split()
+
+    if len(fields) != pvgis_daily_fields*pvgis_daily_rows*len(contents):
+        raise ValueError('Not PVGIS daily files : ' + str(len(fields))
+                         + ' fields for ' + str(len(contents)) + ' files')
+
+    values = np.array([fields[column::pvgis_daily_fields] for column in columns],
+                      dtype=np.float64)
+
+    # columns x (files*24) --> files x 24 x columns
+    return np.ascontiguousarray(values.reshape((len(columns), len(contents), pvgis_daily_rows)).transpose(1, 2, 0))
+
+
+def memmap_climate_store_values(path, number_records, record_shape):
+    """Memory-maps a file of fixed-width float64 records.
+
+    #Inputs:
+
+        #path : path of the file ; str
+        #number_records : number of records in the file
+        #record_shape : shape of one record
+
+    #Outputs:
+
+        #values : memory-mapped array (records x record_shape),
+        None if there is no record
+
+        """
+
+    if number_records == 0:
+        return None
+
+    return np.memmap(path,
+                     dtype=np.float64,
+                     mode='r',
+                     shape=(number_records,) + record_shape)
+
+
+def climate_store_is_complete(folder=climate_store_folder):
+    """Checks that all the files of the climate store exist, that the
+    sizes of the values files match their indexes and that the keys of the
+    index are canonical (not written with a previous "climate_store_key").
+
+    #Inputs:
+
+        #folder : folder containing the climate store ; str
+
+    #Outputs:
+
+        #True if the store can be loaded, False if it must be rebuilt
+
+        """
+
+    for (index_file, values_file, record_shape) in [(climate_store_index_file,
+                                                     climate_store_values_file,
+                                                     climate_store_record_shape),
+                                                    (climate_store_temperature_index_file,
+                                                     climate_store_temperature_values_file,
+                                                     climate_store_temperature_record_shape)]:
+
+        if not os.path.exists(folder + index_file):
+            return False
+
+        keys = np.load(folder + index_file)
+
+        if index_file == climate_store_index_file and any(tuple(key) != climate_store_key(*key)
+                                                          for key in keys):
+            return False
+
+        expected_size = len(keys)*int(np.prod(record_shape))*8
+
+        if expected_size == 0:
+            continue
+
+        if not os.path.exists(folder + values_file) or os.path.getsize(folder + values_file) != expected_size:
+            return False
+
+    return True
+
+
+def release_climate_store():
+    """Releases the memory maps. The store will be loaded again at the next call."""
+
+    for part in climate_store:
+        climate_store[part] = None
+
+
+def load_climate_store(folder=climate_store_folder):
+    """Loads the indexes of the climate store and memory-maps its values.
+    The store is only loaded once and then shared by all callers.
+    If the store does not exist yet, it is created from the csvs in the folder.
+
+    #Inputs:
+
+        #folder : folder containing the climate store ; str
+
+    #Outputs:
+
+        #climate_store : dictionnary with :
+            'index' : dictionnary key --> record number
+            'values' : memory-mapped array (records x 24 x 3)
+            'temperature_index' : dictionnary (lat, long, month) --> record number
+            'temperature_values' : memory-mapped array (records x 24)
+
+        """
+
+    if climate_store['index'] is not None:
+
+        return climate_store
+
+    # Also rebuilds stores written in a previous format
+    if not climate_store_is_complete(folder):
+
+        with climate_store_file_lock(folder):
+
+            # Unless rebuilt or completed by another process in the meantime
+            if not climate_store_is_complete(folder):
+
+                import_climatic_data_to_store(folder)
+
+    keys = np.load(folder + climate_store_index_file)
+
+    temperature_keys = np.load(folder + climate_store_temperature_index_file)
+
+    climate_store['index'] = {climate_store_key(*key): record
+                              for record, key in enumerate(keys)}
+
+    climate_store['values'] = memmap_climate_store_values(folder + climate_store_values_file,
+                                                          len(keys),
+                                                          climate_store_record_shape)
+
+    climate_store['temperature_index'] = {climate_store_site_key(*key): record
+                                          for record, key in enumerate(temperature_keys)}
+
+    climate_store['temperature_values'] = memmap_climate_store_values(folder + climate_store_temperature_values_file,
+                                                                      len(temperature_keys),
+                                                                      climate_store_temperature_record_shape)
+
+    return climate_store
+
+
+def import_climatic_data_to_store(folder=climate_store_folder):
+    """Importer. Converts all the csvs listed in the manifest of a folder into
+    a climate store (indexes + fixed-width records) in the same folder.
+
+    #Inputs:
+
+        #folder : folder containing the csvs ; str
+
+    #Outputs:
+
+        #number_records : number of records in the new store
+
+        """
+
+    keys = []
+    contents = []
+
+    for key in sorted(load_climatic_data_manifest(folder)):
+
+        content = read_climatic_data_content(key, folder)
+
+        if content is None:
+            continue
+
+        keys.append(key)
+
+        contents.append(content)
+
+    values = read_pvgis_daily_files(contents).reshape((len(contents), 24, 4))
+
+    # One temperature record per location and month
+    temperature_keys = []
+    temperature_records = []
+
+    for record, key in enumerate(keys):
+
+        if climate_store_site_key(*key[:3]) not in temperature_keys:
+
+            temperature_keys.append(climate_store_site_key(*key[:3]))
+
+            temperature_records.append(record)
+
+    # Releasing the memory maps before replacing the files
+    release_climate_store()
+
+    atomic_write(folder + climate_store_values_file,
+                 np.ascontiguousarray(values[:, :, 0:3]).tobytes())
+
+    atomic_write(folder + climate_store_temperature_values_file,
+                 np.ascontiguousarray(values[temperature_records, :, 3]).tobytes())
+
+    save_climate_store_index(np.array(keys, dtype=np.float64).reshape((len(keys), 5)),
+                             folder)
+
+    save_climate_store_index(np.array(temperature_keys, dtype=np.float64).reshape((len(temperature_keys), 3)),
+                             folder,
+                             climate_store_temperature_index_file)
+
+    return len(keys)
+
+
+def save_climate_store_index(keys, folder=climate_store_folder,
+                             index_file=climate_store_index_file):
+    """Writes an index of the climate store (atomic write).
+
+    #Inputs:
+
+        #keys : array (records x key length) with the keys of the records
+        #folder : folder containing the climate store ; str
+        #index_file : name of the index file ; str
+
+        """
+
+    index_bytes = io.BytesIO()
+
+    np.save(index_bytes, keys)
+
+    atomic_write(folder + index_file, index_bytes.getvalue())
+
+
+@contextlib.contextmanager
+def climate_store_file_lock(folder=climate_store_folder):
+    """Holds an exclusive lock on the climate store of a folder, shared by
+    all the processes using the folder (fcntl.flock, or msvcrt.locking on
+    Windows).
+
+    #Inputs:
+
+        #folder : folder containing the climate store ; str
+
+        """
+
+    with open(folder + climate_store_lock_file, 'a+b') as lock_file:
+
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            while True:
+                try:
+                    # Raises after 10 s of waiting
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+
+        try:
+            yield
+
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def append_climate_store_record(key, values, index_file, values_file,
+                                folder=climate_store_folder):
+    """Appends a record at the end of a values file of the climate store
+    and its key at the end of the index, under "climate_store_file_lock".
+    The index is read again from the disk under the lock, as other processes
+    may have appended records since the store was loaded : the record is
+    written after the last indexed record and not added twice.
+
+    #Inputs:
+
+        #key : key of the record ; tuple
+        #values : array with the values of the record
+        #index_file : name of the index file ; str
+        #values_file : name of the values file ; str
+        #folder : folder containing the climate store ; str
+
+        """
+
+    record = np.ascontiguousarray(values, dtype=np.float64).tobytes()
+
+    with climate_store_file_lock(folder):
+
+        keys = np.load(folder + index_file)
+
+        keys = keys.reshape((len(keys), len(key)))
+
+        # Added by another process
+        if np.any(np.all(keys == np.array(key, dtype=np.float64), axis=1)):
+            return
+
+        # Fixed-width records can just be appended at the end of the file.
+        # Bytes left after the last indexed record by an interrupted append
+        # are overwritten.
+        with open(folder + values_file, 'r+b') as values_file_object:
+            values_file_object.seek(len(keys)*len(record))
+            values_file_object.write(record)
+            values_file_object.truncate()
+
+        keys = np.vstack((keys, np.array([key], dtype=np.float64)))
+
+        save_climate_store_index(keys, folder, index_file)
+
+
+def add_to_climate_store(key, values, folder=climate_store_folder):
+    """Appends a new record to the climate store, and the air temperature
+    if the location and month are new.
+
+    #Inputs:
+
+        #key : key given by "climate_store_key"
+        #values : array (24 hours x 4) with Global irradiance, direct,
+        diffuse, temperature ; W.m-2 and °C
+        #folder : folder containing the climate store ; str
+
+        """
+
+    store = load_climate_store(folder)
+
+    site_key = climate_store_site_key(*key[:3])
+
+    new_record = key not in store['index']
+
+    new_temperature = site_key not in store['temperature_index']
+
+    if not new_record and not new_temperature:
+        return
+
+    # Releasing the memory maps before extending the files
+    release_climate_store()
+
+    if new_record:
+        append_climate_store_record(key,
+                                    values[:, 0:3],
+                                    climate_store_index_file,
+                                    climate_store_values_file,
+                                    folder)
+
+    if new_temperature:
+        append_climate_store_record(site_key,
+                                    values[:, 3],
+                                    climate_store_temperature_index_file,
+                                    climate_store_temperature_values_file,
+                                    folder)
+
+
+def climate_store_lookup(lat, long, month, angle, azimuth,
+                         folder=climate_store_folder):
+    """Returns the irradiance of the PVGIS average day stored for the given
+    location, month and orientation.
+
+    #Inputs:
+
+        #lat : latitute expressed in format ; XX.XXX or X.XXX
+        #long : longitude expressed in format ; XX.XXX or X.XXX
+        #month : month of the year ; number of the month
+        #angle : Tilt angle of the surface  ; 0= horizontal, 90 = vertical
+        #azimuth : azimuth of surface ;  180:-180
+        #folder : folder containing the climate store ; str
+
+    #Outputs:
+
+        #values : array (24 hours x 3) with Global irradiance, direct,
+        diffuse ; W.m-2
+        None if not in the store.
+
+        """
+
+    store = load_climate_store(folder)
+
+    record = store['index'].get(climate_store_key(lat, long, month, angle, azimuth))
+
+    if record is None:
+        return None
+
+    return store['values'][record]
+
+
+def climate_store_temperature_lookup(lat, long, month,
+                                     folder=climate_store_folder):
+    """Returns the air temperature of the PVGIS average day stored for the
+    given location and month.
+
+    #Inputs:
+
+        #lat : latitute expressed in format ; XX.XXX or X.XXX
+        #long : longitude expressed in format ; XX.XXX or X.XXX
+        #month : month of the year ; number of the month
+        #folder : folder containing the climate store ; str
+
+    #Outputs:
+
+        #temperatures : array (24 hours) with the air temperature ; °C
+        None if not in the store.
+
+        """
+
+    store = load_climate_store(folder)
+
+    record = store['temperature_index'].get(climate_store_site_key(lat, long, month))
+
+    if record is None:
+        return None
+
+    return store['temperature_values'][record]
+
+
+def get_daily_climatic_data(lat, long, month, angle, azimuth):
+    """Returns the PVGIS average day for the given location, month and
+    orientation. Uses the climate store and only downloads and adds the
+    data to the store if missing.
+
+    #Inputs:
+
+        #lat : latitute expressed in format ; XX.XXX or X.XXX
+        #long : longitude expressed in format ; XX.XXX or X.XXX
+        #month : month of the year ; number of the month
+        #angle : Tilt angle of the surface  ; 0= horizontal, 90 = vertical
+        #azimuth : azimuth of surface ;  180:-180
+
+    #Outputs:
+
+        #values : array (24 hours x 3) with Global irradiance, direct,
+        diffuse ; W.m-2
+
+        """
+
+    key = climate_store_key(lat, long, month, angle, azimuth)
+
+    values = climate_store_lookup(*key)
+
+    if values is None:
+
+        # csv already on the disk but not in the store yet
+        values = read_climatic_data_file(key)
+
+        if values is None:
+
+            if not downloadclimaticdata(*key):
+                raise ValueError('No climatic data for ' + str(key))
+
+            values = read_climatic_data_file(key)
+
+            if values is None:
+                raise ValueError('Climatic data for ' + str(key)
+                                 + ' could not be read after the download ('
+                                 + climatic_data_filename(key) + ')')
+
+        add_to_climate_store(key, values)
+
+        values = values[:, 0:3]
+
+    return values
+
+
+def get_daily_air_temperature(lat, long, month):
+    """Returns the air temperature of the PVGIS average day for the given
+    location and month. The air temperature is the same in the data of all
+    orientations and is stored only once per location and month.
+
+    #Inputs:
+
+        #lat : latitute expressed in format ; XX.XXX or X.XXX
+        #long : longitude expressed in format ; XX.XXX or X.XXX
+        #month : month of the year ; number of the month
+
+    #Outputs:
+
+        #temperatures : array (24 hours) with the air temperature ; °C
+
+        """
+
+    temperatures = climate_store_temperature_lookup(lat, long, month)
+
+    if temperatures is None:
+
+        key = climate_store_key(lat, long, month, 0, 0)
+
+        # Any orientation brings the temperature of the location and month
+        get_daily_climatic_data(*key)
+
+        temperatures = climate_store_temperature_lookup(lat, long, month)
+
+        if temperatures is None:
+
+            # The orientation was already in the store without the temperature,
+            # which is taken again from its csv
+            values = read_climatic_data_file(key)
+
+            if values is None:
+                raise ValueError('No air temperature for ' + str(key[:3])
+                                 + ' : the csv of ' + str(key) + ' is missing or corrupted ('
+                                 + climatic_data_filename(key) + ')')
+
+            add_to_climate_store(key, values)
+
+            temperatures = climate_store_temperature_lookup(lat, long, month)
+
+    return temperatures
+
+
+
+
+
+
+
+
+#################
+# Prefetch of climatic data
+#################
+
+# All the climatic data needed by a set of simulations is known before the
+# simulations start. The missing data is downloaded concurrently over a pool
+# of connections instead of one blocking request at a time during the simulations.
+
+
+def plan_climatic_data_requests(sample,
+                                names_param,
+                                Locationdict,
+                                months_suitable_for_cultivation,
+                                transposition=None):
+    """Returns all the PVGIS average days needed to simulate a sample.
+
+    #Inputs:
+
+        #sample : Generated sample. Array with 1 row = 1 combination of
+        uncertain parameters (see "sampling_func")
+        #names_param : List of names of the uncertain parameters
+        #Locationdict : Dictionnary with the location parameters
+        #months_suitable_for_cultivation : Months for cultivation ; 
+        list of month numbers : [a,b,c]
+        #transposition : None to use the PVGIS vertical surfaces, or sky model
+        used to calculate them locally ('haydavies' or 'isotropic').
+        Only the horizontal surface is needed in that case.
+
+    #Outputs:
+
+        #requests_list : sorted list of unique keys 
+        (lat, long, month, angle, azimuth) given by "climate_store_key"
+
+        """
+
+    # Value of a location parameter for each row of the sample
+    def location_values(param):
+        if param in names_param:
+            return np.asarray(sample)[:, names_param.index(param)]
+        else:
+            return [Locationdict[param]]*len(sample)
+
+    locations = set(zip(location_values('lat'),
+                        location_values('long'),
+                        location_values('azimuthfrontal')))
+
+    requests_set = set()
+
+    for (lat, long, azimuthfrontal) in locations:
+
+        azimuths = PBR_sides_azimuths(azimuthfrontal)
+
+        for month in months_suitable_for_cultivation:
+
+            # Horizontal surface, the same for all azimuths
+            requests_set.add(climate_store_key(lat, long, month, 0, 0))
+
+            if transposition is not None:
+                continue
+
+            # 4 vertical sides
+            for azimuth in azimuths:
+                requests_set.add(climate_store_key(lat, long, month, 90, azimuth))
+
+    return sorted(requests_set)
+
+
+def climatic_data_session(max_workers=8, retries=3, backoff_factor=0.5):
+    """Returns a requests.Session with a pool of connections and
+    retries for the PVGIS API.
+
+    #Inputs:
+
+        #max_workers : number of connections kept in the pool
+        #retries : maximum number of retries for one request
+        #backoff_factor : factor for the waiting time between retries ; s
+
+    #Outputs:
+
+        #session : requests.Session
+
+        """
+
+    retry = Retry(total=retries,
+                  backoff_factor=backoff_factor,
+                  status_forcelist=(429, 500, 502, 503, 504),
+                  raise_on_status=False)
+
+    adapter = HTTPAdapter(pool_connections=max_workers,
+                          pool_maxsize=max_workers,
+                          max_retries=retry)
+
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    return session
+
+
+def prefetch_climatic_data(requests_list,
+                           max_workers=8,
+                           retries=3,
+                           base_url=pvgis_api_url):
+    """Downloads concurrently the PVGIS average days which are not in the
+    climate store yet and adds them to the store.
+
+    #Inputs:
+
+        #requests_list : list of tuples (lat, long, month, angle, azimuth),
+        as given by "plan_climatic_data_requests"
+        #max_workers : maximum number of simultaneous requests
+        #retries : maximum number of retries for one request
+        #base_url : root of the API ; str
+
+    #Outputs:
+
+        #downloaded : list of the tuples downloaded and added to the store
+        #failed : dictionnary tuple --> reason, for the tuples which could not
+        be downloaded (non existing land location, problem with connection,
+        invalid or unreadable data)
+
+        """
+
+    missing = sorted(set(climate_store_key(*key) for key in requests_list
+                         if climate_store_lookup(*key) is None))
+
+    if len(missing) == 0:
+        return [[], {}]
+
+    session = climatic_data_session(max_workers, retries)
+
+    # None if downloaded, reason of the failure otherwise
+    def download(key):
+        try:
+            if downloadclimaticdata(*key, session=session, base_url=base_url):
+                return None
+            return 'non existing land location or problem with connection'
+        except requests.RequestException as error:
+            return 'problem with connection : ' + str(error)
+        except ValueError as error:
+            # Payload which is not a PVGIS average day
+            return str(error)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        reasons = list(executor.map(download, missing))
+
+    session.close()
+
+    downloaded = []
+
+    failed = {}
+
+    # The store is only modified by this thread
+    for key, reason in zip(missing, reasons):
+
+        if reason is not None:
+            failed[key] = reason
+            continue
+
+        values = read_climatic_data_file(key)
+
+        # Removed from the manifest if corrupted in the meantime
+        if values is None:
+            failed[key] = ('could not be read after the download ('
+                           + climatic_data_filename(key) + ')')
+            continue
+
+        add_to_climate_store(key, values)
+
+        downloaded.append(key)
+
+    return [downloaded, failed]
+
+
+
+
+
+
+
+
+#################
+# Cache of solar power profiles
+#################
+
+# The irradiance received by the sides of the PBR and the air temperature
+# only change with the location, the month and the orientation of the PBR.
+# The parsed profiles are kept in a bounded LRU cache so that a simulation
+# with a fixed location does not read the same data again for each sample.
+
+solar_profiles_cache_maxsize = 256
+
+# key (lat, long, month, azimuthfrontal) --> array (24 hours x 6)
+solar_profiles_cache = OrderedDict()
+
+solar_profiles_cache_counters = {'hits': 0,
+                                 'misses': 0,
+                                 'evictions': 0}
+
+
+def PBR_sides_azimuths(azimuthfrontal):
+    """Returns the azimuths of the 4 sides of the PBR unit based on the 
+    azimuth of the frontal side. See Azimuth scheme and appendix.
+
+    #Inputs:
+
+        #azimuthfrontal : azimuth of the frontal side of the PBR unit ;  180:-180
+
+    #Outputs:
+
+        #azimuthfrontal : azimuth of the frontal side ;  180:-180
+        #azimuthfrontal2 : azimuth of the opposite frontal side ;  180:-180
+        #azimuthlateral : azimuth of the lateral side ;  180:-180
+        #azimuthlateral2 : azimuth of the opposite lateral side ;  180:-180
+
+        """
+
+    if azimuthfrontal <= 0:
+        azimuthfrontal2 = 180 + azimuthfrontal
+        if azimuthfrontal > -90:
+            azimuthlateral = azimuthfrontal - 90
+            azimuthlateral2 = azimuthfrontal + 90
+        elif azimuthfrontal <= - 90:
+            azimuthlateral = 270 + azimuthfrontal
+            azimuthlateral2 = azimuthfrontal + 90
+
+    elif azimuthfrontal > 0:
+        azimuthfrontal2 = azimuthfrontal - 180
+        if azimuthfrontal < 90:
+            azimuthlateral = azimuthfrontal - 90
+            azimuthlateral2 = azimuthfrontal + 90
+
+        elif azimuthfrontal >= 90:
+            azimuthlateral = azimuthfrontal-90
+            azimuthlateral2 = azimuthfrontal-270
+
+    return [azimuthfrontal, azimuthfrontal2, azimuthlateral, azimuthlateral2]
+
+
+def solar_profiles_month(lat, long, month, azimuthfrontal, transposition=None):
+    """Returns the irradiance received by 1m2 of solid surface oriented as 
+    each side of the PBR and the air temperature for each hour of an average day.
+    The profiles are kept in a bounded LRU cache.
+
+    #Inputs:
+
+        #lat : latitute expressed in format ; XX.XXX or X.XXX
+        #long : longitude expressed in format ; XX.XXX or X.XXX
+        #month : month of the year ; number of the month
+        #azimuthfrontal : azimuth of the frontal side of the PBR unit ;  180:-180
+        #transposition : None to use the PVGIS vertical surfaces, or sky model
+        used to calculate them locally from the horizontal surface
+        ('haydavies' or 'isotropic'). See Solar_transposition_1.
+
+    #Outputs:
+
+        #profiles : read-only array (24 hours x 6) with the columns :
+            frontal side, frontal side 2, lateral side, lateral side 2,
+            horizontal surface (W.m-2), air temperature (°C)
+
+        """
+
+    # Same canonical rounding as the climate store, so that the profiles of 
+    # "43.695" and "43.6950000001" are the same entry.
+    # With transposition the azimuth can take any value and is kept with 3 decimals.
+    [lat, long, month, angle, azimuth_store] = climate_store_key(lat, long, month, 90, azimuthfrontal)
+
+    if transposition is None:
+        azimuthfrontal = azimuth_store
+    else:
+        azimuthfrontal = round(float(azimuthfrontal), 3)
+
+    key = (lat, long, month, azimuthfrontal, transposition)
+
+    profiles = solar_profiles_cache.get(key)
+
+    if profiles is not None:
+
+        solar_profiles_cache_counters['hits'] += 1
+
+        # Most recently used
+        solar_profiles_cache.move_to_end(key)
+
+        return profiles
+
+    solar_profiles_cache_counters['misses'] += 1
+
+    [azimuthfrontal,
+     azimuthfrontal2,
+     azimuthlateral,
+     azimuthlateral2] = PBR_sides_azimuths(azimuthfrontal)
+
+    # Collect data for the 4 sides of the PBR + horizontal one.
+
+    # The data is taken from the climate store and only downloaded if missing.
+
+    profiles = np.empty((24, 6))
+
+    # Azimuth is unisignificant for a horizontal surface,
+    # the same record is used with and without transposition.
+    horizontal_data = get_daily_climatic_data(lat, long, month, 0, 0)
+
+    if transposition is None:
+
+        profiles[:, 0] = get_daily_climatic_data(lat, long, month, 90, azimuthfrontal)[:, 0]
+        profiles[:, 1] = get_daily_climatic_data(lat, long, month, 90, azimuthfrontal2)[:, 0]
+        profiles[:, 2] = get_daily_climatic_data(lat, long, month, 90, azimuthlateral)[:, 0]
+        profiles[:, 3] = get_daily_climatic_data(lat, long, month, 90, azimuthlateral2)[:, 0]
+
+    else:
+
+        # Only the horizontal surface is needed
+        profiles[:, 0:4] = solartransposition.transposed_irradiance_month(lat,
+                                                                          long,
+                                                                          month,
+                                                                          horizontal_data,
+                                                                          [90, 90, 90, 90],
+                                                                          [azimuthfrontal,
+                                                                           azimuthfrontal2,
+                                                                           azimuthlateral,
+                                                                           azimuthlateral2],
+                                                                          sky_model=transposition).T
+
+    profiles[:, 4] = horizontal_data[:, 0]
+
+    # The air temperature is the same regardless of the side of the PBR.
+    profiles[:, 5] = get_daily_air_temperature(lat, long, month)
+
+    # Shared by all callers, must not be modified
+    profiles.flags.writeable = False
+
+    solar_profiles_cache[key] = profiles
+
+    if len(solar_profiles_cache) > solar_profiles_cache_maxsize:
 
-        """
+        # Least recently used
+        solar_profiles_cache.popitem(last=False)
 
-    # No need to download again if already here
-    if not os.path.exists("../Climatic_data/dailydataforlat="
-                          + str(lat)
-                          + "andlong="
-                          + str(long)
-                          + "formonth"
-                          + str(month)
-                          + "forangle"
-                          + str(angle)
-                          + "forazimuth"
-                          + str(azimuth)
-                          + ".csv"):
-
-        # Create the name of the link from which data will be retrieved
-        namelink = ("https://re.jrc.ec.europa.eu/api/DRcalc?lat="
-                    + str(lat)
-                    + "&lon="
-                    + str(long)
-                    + "&month="
-                    + str(month)
-                    + "&global=1&angle="
-                    + str(angle)
-                    + "&showtemperatures=1&aspect="
-                    + str(azimuth)
-                    + "&outputformat=basic")
+        solar_profiles_cache_counters['evictions'] += 1
 
-        response = requests.get(namelink)
+    return profiles
 
-        # Code 200 means the connection with the API was successful.
-        # it can be due to the non existance of data for the zone
-        # (for instance : ocean area)
-        if response.status_code != 200:
-            print('non existing land location or problem with connection')
-            return False
-        else:
 
-            url_content = response.content  # get the content from the link
+def solar_profiles_cache_info():
+    """Returns the counters of the cache of solar power profiles.
 
-            # Name of the file in the folder
-            nameofthefile = ("../Climatic_data/dailydataforlat="
-                             + str(lat)
-                             + "andlong="
-                             + str(long)
-                             + "formonth"
-                             + str(month)
-                             + "forangle"
-                             + str(angle)
-                             + "forazimuth"
-                             + str(azimuth)
-                             + ".csv")
-            # Create a csv file in the folder,
-            # ready to be written with the retrieved data
-            csv_file = open("../Climatic_data/"+nameofthefile, 'wb')
+    #Outputs:
 
-            # Overwrite the empty csv file with retrieved data
-            csv_file.write(url_content)
+        #info : dictionnary with the number of hits, misses, evictions,
+        the current size and the maximum size of the cache
 
-            csv_file.close()
+        """
 
-            return True
+    info = dict(solar_profiles_cache_counters)
+
+    info['size'] = len(solar_profiles_cache)
+
+    info['maxsize'] = solar_profiles_cache_maxsize
+
+    return info
 
-    else:
-        return True
 
+def clear_solar_profiles_cache():
+    """Empties the cache of solar power profiles and resets its counters."""
 
+    solar_profiles_cache.clear()
 
+    for counter in solar_profiles_cache_counters:
+        solar_profiles_cache_counters[counter] = 0
 
 
 
@@ -157,7 +1593,8 @@ def Qreceived_bym2PBR_month(lat,
                             gapbetweentubes,
                             horizontaldistance,
                             length_of_PBRunit,
-                            width_of_PBR_unit):
+                            width_of_PBR_unit,
+                            transposition=None):
     """Functin which estimates the solar power received by 1m2 of a given 
     PBR for each hour of a day.
 
@@ -174,7 +1611,9 @@ def Qreceived_bym2PBR_month(lat,
         #horizontaldistance: Horizontal distance between stacks ; m
         #length_of_PBRunit: Length of the  PBR unit ; m
         #width_of_PBR_unit: width of the PBR unit ; m
-        
+        #transposition : None to use the PVGIS vertical surfaces, or sky model
+        used to calculate them locally from the horizontal surface
+        ('haydavies' or 'isotropic'). See Solar_transposition_1.
         
         
     # Outputs :
@@ -193,205 +1632,614 @@ def Qreceived_bym2PBR_month(lat,
         
 
   
-  # Azimuth calculation for the 4 sides of the PBR based on the 
-  # input azimuth for the frontal side 1. See Azimuth scheme and appendix.
+    # Solar power received by 1m2 of solid surface oriented as each side
+    # of the PBR, and air temperature. 24 values for 24 hours
 
-    if azimuthfrontal <= 0:
-        azimuthfrontal2 = 180 + azimuthfrontal
-        if azimuthfrontal > -90:
-            azimuthlateral = azimuthfrontal - 90
-            azimuthlateral2 = azimuthfrontal + 90
-        elif azimuthfrontal <= - 90:
-            azimuthlateral = 270 + azimuthfrontal
-            azimuthlateral2 = azimuthfrontal + 90
+    profiles = solar_profiles_month(lat, long, month, azimuthfrontal, transposition)
 
-    elif azimuthfrontal > 0:
-        azimuthfrontal2 = azimuthfrontal - 180
-        if azimuthfrontal < 90:
-            azimuthlateral = azimuthfrontal - 90
-            azimuthlateral2 = azimuthfrontal + 90
+    Qhorizontal = profiles[:, 4]
 
-        elif azimuthfrontal >= 90:
-            azimuthlateral = azimuthfrontal-90
-            azimuthlateral2 = azimuthfrontal-270
+    # Collect temperatures
+    # The air temperature in the csvs is same regardless of the side of the PBR.
+    temperatures = pd.Series(profiles[:, 5])
+
+    # Upper bound, lower bound and average for the 24 hours
+    bounds = Qreceived_bym2PBR_month_batch(lat,
+                                           long,
+                                           month,
+                                           azimuthfrontal,
+                                           height,
+                                           tubediameter,
+                                           gapbetweentubes,
+                                           horizontaldistance,
+                                           length_of_PBRunit,
+                                           width_of_PBR_unit,
+                                           transposition)[0]
 
-    # Collect data for the 4 sides of the PBR + horizontal one.
+    # 1 row = 1 hour
+    daily_received_solarpower = pd.DataFrame(bounds,
+                                             columns=['Upper', 'Lower', 'Average'])
 
-    # First we download the files  for each side :
+    return [daily_received_solarpower, temperatures, pd.Series(Qhorizontal)]
 
-    downloadclimaticdata(lat, long, month, 90, azimuthfrontal)
-    downloadclimaticdata(lat, long, month, 90, azimuthfrontal2)
-    downloadclimaticdata(lat, long, month, 90, azimuthlateral2)
-    downloadclimaticdata(lat, long, month, 90, azimuthlateral)
-    downloadclimaticdata(lat, long, month, 0, azimuthlateral)
 
-    # Then, we open the csvs that we just downloaded and create dataframes for
-    # each side of the PBR
+
+def Qreceived_bym2PBR_month_batch(lat, 
+                                  long,
+                                  month,
+                                  azimuthfrontal,
+                                  height,
+                                  tubediameter,
+                                  gapbetweentubes,
+                                  horizontaldistance,
+                                  length_of_PBRunit,
+                                  width_of_PBR_unit,
+                                  transposition=None):
+    """Array version of "Qreceived_bym2PBR_month" which estimates the solar 
+    power received by 1m2 of a batch of PBR geometries for each hour of a day,
+    in one numpy operation.
     
-    # Qfrontalside = Solar power received by 1m2 of solid surface oriented 
-    # as the frontal side of the PBR. 24 values for 24 hours
-
-    Qfrontalside = pd.read_csv("../Climatic_data/dailydataforlat="
-                               + str(lat)
-                               + "andlong="
-                               + str(long)
-                               + "formonth"
-                               + str(month)
-                               + "forangle"
-                               + str(90)
-                               + "forazimuth"
-                               + str(azimuthfrontal)
-                               + ".csv", sep="\t", header=None, encoding='unicode_escape', engine='python')
-
-    Qfrontalside2 = pd.read_csv("../Climatic_data/dailydataforlat="
-                                + str(lat)
-                                + "andlong="
-                                + str(long)
-                                + "formonth"
-                                + str(month)
-                                + "forangle"
-                                + str(90)
-                                + "forazimuth"
-                                + str(azimuthfrontal2)
-                                + ".csv", sep="\t", header=None, encoding='unicode_escape', engine='python')
-
-    Qlateralside = pd.read_csv("../Climatic_data/dailydataforlat="
-                               + str(lat)
-                               + "andlong="
-                               + str(long)
-                               + "formonth"
-                               + str(month)
-                               + "forangle"
-                               + str(90)
-                               + "forazimuth"
-                               + str(azimuthlateral)
-                               + ".csv", sep="\t", header=None, encoding='unicode_escape', engine='python')
-
-    Qlateralside2 = pd.read_csv("../Climatic_data/dailydataforlat="
-                                + str(lat)
-                                + "andlong="
-                                + str(long)
-                                + "formonth"
-                                + str(month)
-                                + "forangle"
-                                + str(90)
-                                + "forazimuth"
-                                + str(azimuthlateral2)
-                                + ".csv", sep="\t", header=None, encoding='unicode_escape', engine='python')
-
-    Qhorizontal = pd.read_csv("../Climatic_data/dailydataforlat="
-                              + str(lat)
-                              + "andlong="
-                              + str(long)
-                              + "formonth"
-                              + str(month)
-                              + "forangle"
-                              + str(0)
-                              + "forazimuth"
-                              + str(azimuthlateral)
-                              + ".csv", sep="\t", header=None, encoding='unicode_escape', engine='python')  # Note that azimuth is unisignificant for a horizontal surface
+    The geometry parameters can be arrays (same length) or numbers.
 
-    # Collect temperatures
-    # The air temperature in the csvs is same regardless of the side of the PBR.
-    temperatures = Qhorizontal[4]
+    #Inputs:
+
+        #lat : latitute expressed in format ; XX.XXX or X.XXX
+        #long : longitude expressed in format ; XX.XXX or X.XXX
+        #month : month of the year ; number of the month
+        #azimuthfrontal : azimuth of the frontal side of the PBR unit ;  180:-180
+        #height: Height of the PBR, ; m
+        #tubediameter: Tube diameter  ; m
+        #gapbetweentubes: Vertical gap between tubes ; m
+        #horizontaldistance: Horizontal distance between stacks ; m
+        #length_of_PBRunit: Length of the  PBR unit ; m
+        #width_of_PBR_unit: width of the PBR unit ; m
+        #transposition : None to use the PVGIS vertical surfaces, or sky model
+        used to calculate them locally from the horizontal surface
+        ('haydavies' or 'isotropic'). See Solar_transposition_1.
+
+    # Outputs :
+
+        #received_solarpower : array (geometries x 24 hours x 3) with 
+        the upperbound, the lowerbound and the average for the
+        Solar power received by 1m2 of PBR for each hour of the day ; W
+
+        """
+
+    profiles = solar_profiles_month(lat, long, month, azimuthfrontal, transposition)
+
+    return received_solarpower_batch(profiles,
+                                     height,
+                                     tubediameter,
+                                     gapbetweentubes,
+                                     horizontaldistance,
+                                     length_of_PBRunit,
+                                     width_of_PBR_unit)
+
+
+def received_solarpower_batch(profiles,
+                              height,
+                              tubediameter,
+                              gapbetweentubes,
+                              horizontaldistance,
+                              length_of_PBRunit,
+                              width_of_PBR_unit):
+    """Estimates the solar power received by 1m2 of a batch of PBR geometries 
+    for each hour of a day, from the irradiance received by each side.
+
+    The geometry parameters can be arrays (same length) or numbers.
+
+    #Inputs:
+
+        #profiles : array (24 hours x 5 or more) as given by "solar_profiles_month"
+        #height: Height of the PBR, ; m
+        #tubediameter: Tube diameter  ; m
+        #gapbetweentubes: Vertical gap between tubes ; m
+        #horizontaldistance: Horizontal distance between stacks ; m
+        #length_of_PBRunit: Length of the  PBR unit ; m
+        #width_of_PBR_unit: width of the PBR unit ; m
+
+    # Outputs :
+
+        #received_solarpower : array (geometries x 24 hours x 3) with 
+        the upperbound, the lowerbound and the average for the
+        Solar power received by 1m2 of PBR for each hour of the day ; W
+
+        """
+
+    # One value per geometry for each parameter
+    [height,
+     tubediameter,
+     gapbetweentubes,
+     horizontaldistance,
+     length_of_PBRunit,
+     width_of_PBR_unit] = np.broadcast_arrays(*[np.atleast_1d(np.asarray(parameter, dtype=np.float64))
+                                               for parameter in [height,
+                                                                 tubediameter,
+                                                                 gapbetweentubes,
+                                                                 horizontaldistance,
+                                                                 length_of_PBRunit,
+                                                                 width_of_PBR_unit]])
+
+    # Irradiance received by the 2 frontal sides, the 2 lateral sides 
+    # and the horizontal surface. 3 rows x 24 hours
+    sides = np.array([profiles[:, 0] + profiles[:, 1],
+                      profiles[:, 2] + profiles[:, 3],
+                      profiles[:, 4]])
 
     # Collect actual surfaces for each side, as a function of geometry
+    geometry = functions.PBR_geometry(height,
+                                      tubediameter,
+                                      gapbetweentubes,
+                                      horizontaldistance,
+                                      length_of_PBRunit,
+                                      width_of_PBR_unit)
 
-    frontal_side_surface = functions.PBR_geometry(height, tubediameter,
-                                                  gapbetweentubes,
-                                                  horizontaldistance,
-                                                  length_of_PBRunit,
-                                                  width_of_PBR_unit)[2]
-    
-    lateral_side_surface = functions.PBR_geometry(height, tubediameter,
-                                                  gapbetweentubes,
-                                                  horizontaldistance,
-                                                  length_of_PBRunit,
-                                                  width_of_PBR_unit)[3]
-
-    horizontal_surface = functions.PBR_geometry(height, tubediameter,
-                                                gapbetweentubes,
-                                                horizontaldistance,
-                                                length_of_PBRunit,
-                                                width_of_PBR_unit)[4]
- 
-    # Calculate upper and lower bounds for each time of the day
-
-    # Will contain the upper bound, the lower bound,
-    # and the average for the solar power received by the PBR for the 24 hours.
-    # 1 row = 1 hour
+    frontal_side_surface = geometry[2]
+    lateral_side_surface = geometry[3]
+    horizontal_surface = geometry[4]
 
-    daily_received_solarpower = pd.DataFrame(np.zeros((24, 3)),
-                                             columns=['Upper', 'Lower', 'Average'])
+    ground_surface = width_of_PBR_unit*length_of_PBRunit
 
-    for time in range(0, 24):  # each hour of the day
+    # Upper bound : the sides of the parallelepiped receive all the light.
+    # Energy received by each side of the parallelepiped per m2 of ground
+    upper_coefficients = np.stack([height*length_of_PBRunit/ground_surface,
+                                   height*width_of_PBR_unit/ground_surface,
+                                   np.ones_like(ground_surface)], axis=-1)
 
-        # Upper bound
-        
-        Qreceived_by_frontal_side_of_the_parallelepiped = (Qfrontalside[1][time] 
-                                                           * height
-                                                           * length_of_PBRunit)
-
-        Qreceived_by_frontal_side2_of_the_parallelepiped = (Qfrontalside2[1][time]
-                                                            * height
-                                                            * length_of_PBRunit)
-
-        Qreceived_by_lateral_side_of_the_parallelepiped = (Qlateralside[1][time] 
-                                                           * height
-                                                           * width_of_PBR_unit)
-
-        Qreceived_by_lateral_side2_of_the_parallelepiped = (Qlateralside2[1][time]
-                                                            * height
-                                                            * width_of_PBR_unit)
-
-        Qreceived_by_horizontalsurface_of_the_parallelepiped = (Qhorizontal[1][time]
-                                                                * width_of_PBR_unit
-                                                                * length_of_PBRunit)
-
-        upperbound_totalPBRunit = (Qreceived_by_frontal_side_of_the_parallelepiped
-                                   + Qreceived_by_frontal_side2_of_the_parallelepiped
-                                   + Qreceived_by_lateral_side_of_the_parallelepiped
-                                   + Qreceived_by_lateral_side2_of_the_parallelepiped
-                                   + Qreceived_by_horizontalsurface_of_the_parallelepiped)
-       
- 
-        upperbound_per_squaremeter = upperbound_totalPBRunit/(width_of_PBR_unit*length_of_PBRunit)
-
-        # Lower bound
-        # The energy received by an actual side of the PBR is :   
-        # Energy received by the side of the paralleleliped *(Actual surface / surface of the paralleleliped's side)
-        
-        Qreceived_by_frontal_side_of_the_actualPBR = (Qreceived_by_frontal_side_of_the_parallelepiped
-                                                      * (frontal_side_surface/(height*length_of_PBRunit)))
+    # Lower bound
+    # The energy received by an actual side of the PBR is :   
+    # Energy received by the side of the paralleleliped *(Actual surface / surface of the paralleleliped's side)
+    lower_coefficients = np.stack([frontal_side_surface/ground_surface,
+                                   lateral_side_surface/ground_surface,
+                                   horizontal_surface/ground_surface], axis=-1)
+
+    received_solarpower = np.empty((len(upper_coefficients), 24, 3))
+
+    received_solarpower[:, :, 0] = upper_coefficients @ sides
+    received_solarpower[:, :, 1] = lower_coefficients @ sides
+    received_solarpower[:, :, 2] = (received_solarpower[:, :, 0]
+                                    + received_solarpower[:, :, 1])/2
+
+    return received_solarpower
+
+
+
+
+
+
+
+
+#################
+# Hourly time series
+#################
+
+# Instead of one average day per month, the cultivation can be simulated
+# day by day over one or several years with hourly data :
+
+    # -PVGIS hourly radiation time series (seriescalc) on a horizontal surface
+    # with the beam and diffuse components. Time with format "YYYYMMDD:HHMM" (UTC)
+
+    # -PVGIS typical meteorological year (tmy), or any local file with the same format.
+
+# The files are read in chunks of days so that the memory does not grow
+# with the length of the series. The irradiance on the sides of the PBR is
+# calculated for each day with Solar_transposition_1.
+
+
+def hourly_climatic_data_filename(lat, long, startyear, endyear):
+    """Returns the name of the csv with the PVGIS hourly time series
+    of a location.
+
+    #Inputs:
+
+        #lat : latitute expressed in format ; XX.XXX or X.XXX
+        #long : longitude expressed in format ; XX.XXX or X.XXX
+        #startyear : first year of the series
+        #endyear : last year of the series
+
+    #Outputs:
+
+        #nameofthefile : name of the csv ; str
+
+        """
+
+    [lat, long] = climate_store_key(lat, long, 1, 0, 0)[:2]
+
+    return ("hourlydataforlat="
+            + str(lat)
+            + "andlong="
+            + str(long)
+            + "fromyear"
+            + str(int(startyear))
+            + "toyear"
+            + str(int(endyear))
+            + ".csv")
+
+
+def tmy_filename(lat, long):
+    """Returns the name of the csv with the PVGIS typical meteorological
+    year of a location.
+
+    #Inputs:
+
+        #lat : latitute expressed in format ; XX.XXX or X.XXX
+        #long : longitude expressed in format ; XX.XXX or X.XXX
+
+    #Outputs:
+
+        #nameofthefile : name of the csv ; str
+
+        """
+
+    [lat, long] = climate_store_key(lat, long, 1, 0, 0)[:2]
+
+    return ("tmyforlat="
+            + str(lat)
+            + "andlong="
+            + str(long)
+            + ".csv")
+
+
+def check_hourly_climatic_data(content):
+    """Checks that the content of a downloaded csv is a PVGIS hourly table
+    (time series or typical meteorological year) : header line starting with
+    "time" followed by at least one day (24 rows) of numeric values.
+
+    #Inputs:
+
+        #content : content of the csv ; bytes
+
+        """
+
+    lines = content.decode('utf-8', errors='replace').splitlines()
 
-        Qreceived_by_frontal_side2_of_the_actualPBR = (Qreceived_by_frontal_side2_of_the_parallelepiped
-                                                       * (frontal_side_surface/(height*length_of_PBRunit)))
+    header_numbers = [number for number in range(len(lines)) if lines[number].startswith('time')]
 
-        Qreceived_by_lateral_side_of_the_actualPBR = (Qreceived_by_lateral_side_of_the_parallelepiped
-                                                      * (lateral_side_surface/(height*width_of_PBR_unit)))
+    if len(header_numbers) == 0:
+        raise ValueError('No hourly table (no header starting with "time")')
 
-        Qreceived_by_lateral_side2_of_the_actualPBR = (Qreceived_by_lateral_side2_of_the_parallelepiped
-                                                       * (lateral_side_surface/(height*width_of_PBR_unit)))
+    number_fields = len(lines[header_numbers[0]].split(','))
 
-        Qreceived_by_horizontalsurface_of_the_actualPBR =( Qreceived_by_horizontalsurface_of_the_parallelepiped
-                                                          *(horizontal_surface/(length_of_PBRunit*width_of_PBR_unit)))
+    # The table is followed by an empty line and the legend
+    table_lines = list(itertools.takewhile(lambda line: line[:1].isdigit(),
+                                           lines[header_numbers[0] + 1:]))
 
-        lowerbound_totalPBRunit = (Qreceived_by_frontal_side_of_the_actualPBR 
-                                   + Qreceived_by_frontal_side2_of_the_actualPBR 
-                                   + Qreceived_by_lateral_side_of_the_actualPBR
-                                   + Qreceived_by_lateral_side2_of_the_actualPBR
-                                   + Qreceived_by_horizontalsurface_of_the_actualPBR)
+    if len(table_lines) < 24:
+        raise ValueError('Less than 24 hours in the hourly table : ' + str(len(table_lines)) + ' rows')
 
+    for line in table_lines[:24]:
 
-        lowerbound_per_squaremeter = lowerbound_totalPBRunit /(width_of_PBR_unit*length_of_PBRunit)
+        fields = line.strip().split(',')
 
-        # Updating the table with the calculate value for the correspond time
+        if len(fields) != number_fields:
+            raise ValueError('Row with ' + str(len(fields)) + ' fields instead of '
+                             + str(number_fields) + ' : ' + line)
 
-        daily_received_solarpower['Upper'][time] = upperbound_per_squaremeter
+        try:
+            [float(field) for field in fields[1:]]
 
-        daily_received_solarpower['Lower'][time] = lowerbound_per_squaremeter
+        except ValueError:
+            raise ValueError('Row with non numeric values : ' + line)
 
-        daily_received_solarpower['Average'][time] = (
-            upperbound_per_squaremeter+lowerbound_per_squaremeter)/2
 
-    return [daily_received_solarpower, temperatures, Qhorizontal[1]]
+def download_hourly_file(namelink, path, session=None):
+    """Downloads a file from the PVGIS API if it is not in the folder yet
+    (atomic write). The content is checked ("check_hourly_climatic_data")
+    before being written, so that an error page or a truncated table
+    is never kept in the folder.
+
+    #Inputs:
+
+        #namelink : link to the data ; str
+        #path : path of the file ; str
+        #session : requests.Session to reuse the connections of a pool.
+        If None, a new connection is opened.
+
+    #Outputs:
+
+        #path : path of the file ; str
+        None if the download failed (sea or problem with the connection).
+        ValueError if the content is not a PVGIS hourly table.
+
+        """
+
+    if os.path.exists(path):
+        return path
+
+    if session is None:
+        response = requests.get(namelink)
+    else:
+        response = session.get(namelink)
+
+    if response.status_code != 200:
+        return None
+
+    try:
+        check_hourly_climatic_data(response.content)
+
+    except ValueError as error:
+        raise ValueError('Invalid hourly climatic data downloaded from ' + namelink
+                         + ' (' + path + ') : ' + str(error))
+
+    atomic_write(path, response.content)
+
+    return path
+
+
+def downloadhourlyclimaticdata(lat, long, startyear, endyear,
+                               session=None,
+                               base_url=pvgis_api_url,
+                               folder=climatic_data_folder):
+    """API importer. Downloads the PVGIS hourly time series of irradiance
+    on a horizontal surface (beam, diffuse) and air temperature for a
+    location and a range of years.
+
+    #Inputs:
+
+        #lat : latitute expressed in format ; XX.XXX or X.XXX
+        #long : longitude expressed in format ; XX.XXX or X.XXX
+        #startyear : first year of the series
+        #endyear : last year of the series
+        #session : requests.Session to reuse the connections of a pool.
+        If None, a new connection is opened.
+        #base_url : root of the API ; str
+        #folder : folder containing the climatic data ; str
+
+    #Outputs:
+
+        #path : path of the csv ; str
+        None if the download failed.
+
+        """
+
+    [lat, long] = climate_store_key(lat, long, 1, 0, 0)[:2]
+
+    namelink = (base_url
+                + "seriescalc?lat="
+                + str(lat)
+                + "&lon="
+                + str(long)
+                + "&startyear="
+                + str(int(startyear))
+                + "&endyear="
+                + str(int(endyear))
+                + "&angle=0&components=1&outputformat=csv")
+
+    return download_hourly_file(namelink,
+                                folder + hourly_climatic_data_filename(lat, long, startyear, endyear),
+                                session)
+
+
+def downloadtmy(lat, long,
+                session=None,
+                base_url=pvgis_api_url,
+                folder=climatic_data_folder):
+    """API importer. Downloads the PVGIS typical meteorological year of a location.
+
+    #Inputs:
+
+        #lat : latitute expressed in format ; XX.XXX or X.XXX
+        #long : longitude expressed in format ; XX.XXX or X.XXX
+        #session : requests.Session to reuse the connections of a pool.
+        If None, a new connection is opened.
+        #base_url : root of the API ; str
+        #folder : folder containing the climatic data ; str
+
+    #Outputs:
+
+        #path : path of the csv ; str
+        None if the download failed.
+
+        """
+
+    [lat, long] = climate_store_key(lat, long, 1, 0, 0)[:2]
+
+    namelink = (base_url
+                + "tmy?lat="
+                + str(lat)
+                + "&lon="
+                + str(long)
+                + "&outputformat=csv")
+
+    return download_hourly_file(namelink, folder + tmy_filename(lat, long), session)
+
+
+def stream_hourly_climatic_data(path, chunk_days=31):
+    """Generator which reads a PVGIS hourly time series or typical
+    meteorological year and yields the data day by day.
+    The file is read in chunks of days and each chunk is converted at once.
+
+    #Inputs:
+
+        #path : path of the csv ; str
+        #chunk_days : number of days read at once
+
+    #Outputs (for each day):
+
+        #date : date of the day ; "YYYYMMDD"
+        #day_of_year : day of the year ; 1:366
+        #time_offset : the values of the hour XX:00 are given at XX:00 + time_offset ; h
+        #values : array (24 hours x 4) with Global irradiance, direct,
+        diffuse on a horizontal surface, temperature ; W.m-2 and °C
+
+        """
+
+    with open(path, 'r', encoding='utf-8', errors='replace') as hourly_file:
+
+        # Skipping the description of the location until the header of the table
+        for line in hourly_file:
+            if line.startswith('time'):
+                header = line.strip().split(',')
+                break
+        else:
+            raise ValueError('No hourly table in ' + path)
+
+        columns = {name: number for number, name in enumerate(header)}
+
+        if 'G(h)' in columns and 'Gd(h)' in columns:
+            # Typical meteorological year
+            series_format = 'tmy'
+
+        elif 'Gb(i)' in columns and 'Gd(i)' in columns:
+            # Time series with components
+            series_format = 'seriescalc'
+
+        else:
+            raise ValueError('The hourly data must include the beam and diffuse irradiance'
+                             + ' (components=1 for a PVGIS time series)')
+
+        finished = False
+
+        while not finished:
+
+            lines = list(itertools.islice(hourly_file, 24*chunk_days))
+
+            # The table is followed by an empty line and the legend
+            table_lines = list(itertools.takewhile(lambda line: line[:1].isdigit(), lines))
+
+            finished = len(table_lines) < 24*chunk_days
+
+            if len(table_lines) == 0:
+                break
+
+            if len(table_lines) % 24 != 0:
+                raise ValueError('Incomplete day in ' + path)
+
+            fields = np.array([line.strip().split(',') for line in table_lines])
+
+            if series_format == 'tmy':
+                global_irradiance = fields[:, columns['G(h)']].astype(np.float64)
+                diffuse = fields[:, columns['Gd(h)']].astype(np.float64)
+                direct = global_irradiance - diffuse
+
+            else:
+                direct = fields[:, columns['Gb(i)']].astype(np.float64)
+                diffuse = fields[:, columns['Gd(i)']].astype(np.float64)
+                global_irradiance = direct + diffuse + fields[:, columns['Gr(i)']].astype(np.float64)
+
+            temperature = fields[:, columns['T2m']].astype(np.float64)
+
+            # days x 24 hours x 4
+            values = np.stack([global_irradiance, direct, diffuse, temperature],
+                              axis=-1).reshape((-1, 24, 4))
+
+            times = fields[:, 0].reshape((-1, 24))
+
+            for day in range(len(values)):
+
+                # Time with format "YYYYMMDD:HHMM"
+                date = times[day, 0][0:8]
+
+                if times[day, 23][0:8] != date or times[day, 0][9:11] != '00':
+                    raise ValueError('Hours missing around ' + date + ' in ' + path)
+
+                day_of_year = datetime.datetime.strptime(date, '%Y%m%d').timetuple().tm_yday
+
+                time_offset = int(times[day, 0][11:13])/60
+
+                yield [date, day_of_year, time_offset, values[day]]
+
+
+def solar_profiles_day(lat, long, day_of_year, azimuthfrontal, hourly_data,
+                       time_offset=0,
+                       sky_model='haydavies'):
+    """Returns the irradiance received by 1m2 of solid surface oriented as 
+    each side of the PBR and the air temperature for each hour of a given day.
+
+    #Inputs:
+
+        #lat : latitute expressed in format ; XX.XXX or X.XXX
+        #long : longitude expressed in format ; XX.XXX or X.XXX
+        #day_of_year : day of the year ; 1:366
+        #azimuthfrontal : azimuth of the frontal side of the PBR unit ;  180:-180
+        #hourly_data : array (24 hours x 4) with Global irradiance, direct,
+        diffuse on a horizontal surface, temperature ; W.m-2 and °C
+        #time_offset : the values of the hour XX:00 are given at XX:00 + time_offset ; h
+        #sky_model : 'haydavies' or 'isotropic'
+
+    #Outputs:
+
+        #profiles : array (24 hours x 6) with the columns :
+            frontal side, frontal side 2, lateral side, lateral side 2,
+            horizontal surface (W.m-2), air temperature (°C)
+
+        """
+
+    profiles = np.empty((24, 6))
+
+    profiles[:, 0:4] = solartransposition.plane_of_array_irradiance(lat,
+                                                                    long,
+                                                                    day_of_year,
+                                                                    hourly_data,
+                                                                    [90, 90, 90, 90],
+                                                                    PBR_sides_azimuths(azimuthfrontal),
+                                                                    sky_model=sky_model,
+                                                                    time_offset=time_offset).T
+
+    profiles[:, 4] = hourly_data[:, 0]
+
+    profiles[:, 5] = hourly_data[:, 3]
+
+    return profiles
+
+
+def Qreceived_bym2PBR_day(lat, 
+                          long,
+                          day_of_year,
+                          azimuthfrontal,
+                          height,
+                          tubediameter,
+                          gapbetweentubes,
+                          horizontaldistance,
+                          length_of_PBRunit,
+                          width_of_PBR_unit,
+                          hourly_data,
+                          time_offset=0,
+                          sky_model='haydavies'):
+    """Same as "Qreceived_bym2PBR_month" for a given day of an hourly
+    time series instead of the average day of a month.
+
+    #Inputs:
+
+        #lat : latitute expressed in format ; XX.XXX or X.XXX
+        #long : longitude expressed in format ; XX.XXX or X.XXX
+        #day_of_year : day of the year ; 1:366
+        #azimuthfrontal : azimuth of the frontal side of the PBR unit ;  180:-180
+        #height: Height of the PBR, ; m
+        #tubediameter: Tube diameter  ; m
+        #gapbetweentubes: Vertical gap between tubes ; m
+        #horizontaldistance: Horizontal distance between stacks ; m
+        #length_of_PBRunit: Length of the  PBR unit ; m
+        #width_of_PBR_unit: width of the PBR unit ; m
+        #hourly_data : array (24 hours x 4) as given by "stream_hourly_climatic_data"
+        #time_offset : the values of the hour XX:00 are given at XX:00 + time_offset ; h
+        #sky_model : 'haydavies' or 'isotropic'
+
+    # Outputs :
+
+        #daily_received_solarpower : a dataframe with 3 columns :
+            -the the upperbound,the lowerbound and the average for 
+            Solar power received by 1m2 of PBR for each hour of the day ; W
+
+        #temperatures : series of the air temperature for each hour of the day ; °C
+
+        #Qhorizontal : series of the ground irradiance on a horizontal surface for each hour ; W
+
+        """
+
+    profiles = solar_profiles_day(lat, long, day_of_year, azimuthfrontal,
+                                  hourly_data, time_offset, sky_model)
+
+    bounds = received_solarpower_batch(profiles,
+                                       height,
+                                       tubediameter,
+                                       gapbetweentubes,
+                                       horizontaldistance,
+                                       length_of_PBRunit,
+                                       width_of_PBR_unit)[0]
+
+    # 1 row = 1 hour
+    daily_received_solarpower = pd.DataFrame(bounds,
+                                             columns=['Upper', 'Lower', 'Average'])
+
+    return [daily_received_solarpower, pd.Series(profiles[:, 5]), pd.Series(profiles[:, 4])]
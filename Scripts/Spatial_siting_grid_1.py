@@ -0,0 +1,620 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 17:12:05 2026
+
+@author: Pierre Jouannais, Department of Planning, DCEA, Aalborg University
+pijo@plan.aau.dk
+"""
+
+
+'''
+Script containing the functions which evaluate the deterministic LCI and LCIA
+for each cell of a latitude/longitude grid and each month of cultivation
+(siting studies).
+
+The grid is divided into square tiles which are simulated in parallel
+(one process per core). Each tile is saved in the output folder as soon as
+it is finished, so that an interrupted run restarts from the missing tiles.
+Each tile and the cube record the hash of the inputs they were calculated with
+("grid_context"), so that a tile calculated with other parameters, methods or
+options is calculated again.
+The results are then assembled in a raster cube :
+
+    latitude x longitude x month x indicator
+
+The climatic data for all cells is downloaded before the simulations
+(or collected from the climate store if already available).
+The cells for which PVGIS has no data (sea) are left empty (nan).
+
+The qualitative parameters are drawn with the probabilities in Tech_opdict
+and Biodict (prob_night_monitoring, prob_no3, prob_market_subst_animal_feed) :
+use 0 or 1 to obtain deterministic results.
+
+With multiprocessing on Windows, the functions must be called from a script
+protected by "if __name__ == '__main__':".
+
+'''
+
+
+import os
+import io
+import hashlib
+import multiprocessing
+import numpy as np
+import pandas as pd
+
+# Set working directory to file location
+# (works only when executing the whole file and not only sections (Run Current cell))
+
+currentfolder=os.path.dirname(os.path.realpath(__file__))
+os.chdir(currentfolder)
+
+import Main_simulations_functions_1 as mainfunc
+import Retrieving_solar_and_climatic_data_1 as solardata
+
+
+
+
+# Number of cells on each side of a tile
+grid_tile_size = 8
+
+siting_grid_output_folder = "../Outputs/siting_grid/"
+
+siting_grid_cube_file = "siting_grid_cube.npz"
+
+# Simulation outputs saved in the cube after the LCIA of each method
+# (name, position in the outputs of "LCI_one_strain_uniquevalues")
+grid_supplementary_indicators = [['Areal productivity kg.m-2.d-1', 1],
+                                 ['Volumetric productivity kg.L-1.d-1', 2],
+                                 ['total cooling (thermal kWh)', 23]]
+
+
+
+
+def siting_grid(lat_min, lat_max, long_min, long_max, resolution):
+    """Returns the coordinates of the centers of the cells of a grid
+    covering a bounding box.
+
+    #Inputs:
+
+        #lat_min, lat_max : latitudes of the bounding box ; XX.XXX
+        #long_min, long_max : longitudes of the bounding box ; XX.XXX
+        #resolution : size of a cell ; decimal degrees
+
+    #Outputs:
+
+        #lats : array of the latitudes of the cells (ascending)
+        #longs : array of the longitudes of the cells (ascending)
+
+        """
+
+    if resolution <= 0 or lat_max < lat_min or long_max < long_min:
+        raise ValueError('Wrong bounding box or resolution')
+
+    number_lats = int(np.floor((lat_max - lat_min)/resolution + 1e-9)) + 1
+    number_longs = int(np.floor((long_max - long_min)/resolution + 1e-9)) + 1
+
+    # Same rounding as the climatic data (3 decimals)
+    lats = np.round(lat_min + resolution*np.arange(number_lats), 3)
+    longs = np.round(long_min + resolution*np.arange(number_longs), 3)
+
+    return [lats, longs]
+
+
+def grid_tiles(number_lats, number_longs, tile_size=grid_tile_size):
+    """Divides a grid into square tiles.
+
+    #Inputs:
+
+        #number_lats : number of latitudes of the grid
+        #number_longs : number of longitudes of the grid
+        #tile_size : number of cells on each side of a tile
+
+    #Outputs:
+
+        #tiles : list of [name of the tile, first latitude index, last latitude index + 1,
+        first longitude index, last longitude index + 1]
+
+        """
+
+    tiles = []
+
+    for lat_start in range(0, number_lats, tile_size):
+
+        for long_start in range(0, number_longs, tile_size):
+
+            tiles.append(['tile_' + str(lat_start//tile_size) + '_' + str(long_start//tile_size),
+                          lat_start,
+                          min(lat_start + tile_size, number_lats),
+                          long_start,
+                          min(long_start + tile_size, number_longs)])
+
+    return tiles
+
+
+def grid_indicators(methods):
+    """Returns the names of the indicators of the cube :
+    LCIA for each method and supplementary simulation outputs.
+    """
+
+    return [method[-1] for method in methods] + [indicator[0] for indicator in grid_supplementary_indicators]
+
+
+def prefetch_grid_climatic_data(lats,
+                                longs,
+                                Locationdict,
+                                months_suitable_for_cultivation,
+                                transposition=None):
+    """Downloads all the missing climatic data for the cells of a grid.
+
+    #Inputs:
+
+        #lats : latitudes of the cells
+        #longs : longitudes of the cells
+        #Locationdict : Dictionnary with the location parameters (azimuthfrontal)
+        #months_suitable_for_cultivation : Months for cultivation ;
+        list of month numbers : [a,b,c]
+        #transposition : None to use the PVGIS vertical surfaces, or sky model
+        used to calculate them locally from the horizontal surface
+        ('haydavies' or 'isotropic'). See Solar_transposition_1.
+
+    #Outputs:
+
+        #downloaded : number of climatic data files downloaded
+        #failed_cells : dictionnary (lat, long) --> reason, for the cells
+        for which data is missing (sea, connection problem, invalid data)
+
+        """
+
+    cells = [[lat, long] for lat in lats for long in longs]
+
+    climatic_data_requests = solardata.plan_climatic_data_requests(cells,
+                                                                   ['lat', 'long'],
+                                                                   Locationdict,
+                                                                   months_suitable_for_cultivation,
+                                                                   transposition)
+
+    [downloaded, failed_downloads] = solardata.prefetch_climatic_data(climatic_data_requests)
+
+    # One reason per cell
+    failed_cells = {(key[0], key[1]): failed_downloads[key] for key in failed_downloads}
+
+    return [len(downloaded), failed_cells]
+
+
+def save_npz(path, **arrays):
+    """Saves arrays in a npz file without leaving an incomplete file
+    if the process is interrupted."""
+
+    content = io.BytesIO()
+
+    np.savez_compressed(content, **arrays)
+
+    solardata.atomic_write(path, content.getvalue())
+
+
+def grid_context_update(content, value):
+    """Adds a value to a hash being calculated by "grid_context"
+    (dictionnaries, lists, DataFrames, arrays and numbers, nested or not).
+
+    #Inputs:
+
+        #content : hashlib.sha256 object, updated in place
+        #value : value to add
+
+        """
+
+    if isinstance(value, dict):
+
+        content.update(b'{')
+
+        for key in sorted(value, key=repr):
+
+            content.update(repr(key).encode() + b':')
+
+            grid_context_update(content, value[key])
+
+        content.update(b'}')
+
+    elif isinstance(value, (list, tuple, set, frozenset)):
+
+        if isinstance(value, (set, frozenset)):
+            value = sorted(value, key=repr)
+
+        content.update(b'[')
+
+        for element in value:
+            grid_context_update(content, element)
+
+        content.update(b']')
+
+    elif isinstance(value, (pd.DataFrame, pd.Series)):
+
+        if isinstance(value, pd.DataFrame):
+            content.update(repr(list(value.columns)).encode())
+
+        content.update(pd.util.hash_pandas_object(value, index=True).values.tobytes())
+
+    elif isinstance(value, np.ndarray):
+
+        content.update(repr((value.dtype.str, value.shape)).encode())
+
+        if value.dtype.kind in 'biufc':
+            content.update(np.ascontiguousarray(value).tobytes())
+        else:
+            content.update(repr(value.tolist()).encode())
+
+    elif isinstance(value, (int, float, np.number)) and not isinstance(value, bool):
+
+        # Same hash for 10, 10.0 and numpy.float64(10)
+        content.update(repr(float(value)).encode())
+
+    else:
+        content.update(repr(value).encode())
+
+    content.update(b';')
+
+
+def grid_context(lats, longs, months, failed_cells, cell_arguments):
+    """Returns the hash (sha256) of all the inputs of a tile or of the cube :
+    cells, months, cells without climatic data and inputs of "evaluate_grid_cell".
+
+    #Inputs:
+
+        #lats, longs : latitudes and longitudes of the cells
+        #months : months of cultivation
+        #failed_cells : set of (lat, long) without climatic data
+        #cell_arguments : inputs of "evaluate_grid_cell" after month
+
+    #Outputs:
+
+        #context : hexadecimal string
+
+        """
+
+    content = hashlib.sha256()
+
+    # Only the cells without climatic data which are in the tile
+    tile_lats = set(lats)
+    tile_longs = set(longs)
+
+    failed_cells = set((lat, long) for (lat, long) in failed_cells
+                       if lat in tile_lats and long in tile_longs)
+
+    for value in [np.asarray(lats, dtype=np.float64),
+                  np.asarray(longs, dtype=np.float64),
+                  list(months),
+                  failed_cells,
+                  cell_arguments]:
+
+        grid_context_update(content, value)
+
+    return content.hexdigest()
+
+
+def load_grid_tile(path, lats, longs, months, indicators, context):
+    """Returns the values of a tile saved in the output folder or None if the
+    tile is missing or was calculated for another grid or with other inputs
+    (context given by "grid_context").
+    """
+
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with np.load(path) as tile:
+
+            same_grid = ('context' in tile.files
+                         and str(tile['context']) == context
+                         and np.array_equal(tile['lats'], lats)
+                         and np.array_equal(tile['longs'], longs)
+                         and np.array_equal(tile['months'], months)
+                         and list(tile['indicators']) == list(indicators))
+
+            if not same_grid:
+                return None
+
+            return tile['values']
+
+    except (OSError, ValueError, KeyError):
+        # Corrupted file
+        return None
+
+
+def evaluate_grid_cell(lat,
+                       long,
+                       month,
+                       dict_mono_technosphere_lcas,
+                       Tech_opdict,
+                       Biodict,
+                       Locationdict,
+                       Physicdict,
+                       LCIdict,
+                       fraction_maxyield,
+                       fishfeed_table,
+                       elemental_contents,
+                       methods,
+                       transposition=None,
+                       engine='odeint',
+                       night_steady_state='twopass',
+                       timestep=10):
+    """Calculates the LCI and the LCIA for a cell of the grid cultivated
+    during one month.
+
+    #Inputs:
+
+        #lat, long : coordinates of the cell ; XX.XXX
+        #month : month of cultivation
+        #Other inputs as in "LCI_one_strain_uniquevalues" and "LCIA_one_LCI"
+
+    #Outputs:
+
+        #values : array with the indicators as in "grid_indicators"
+
+        """
+
+    Locationdict_cell = dict(Locationdict)
+
+    Locationdict_cell['lat'] = lat
+    Locationdict_cell['long'] = long
+
+    LCI = mainfunc.LCI_one_strain_uniquevalues(dict(Biodict),
+                                               dict(Physicdict),
+                                               dict(Tech_opdict),
+                                               Locationdict_cell,
+                                               LCIdict,
+                                               [month],
+                                               fraction_maxyield,
+                                               fishfeed_table,
+                                               elemental_contents,
+                                               transposition,
+                                               engine,
+                                               night_steady_state,
+                                               timestep=timestep)
+
+    list_LCA_res = mainfunc.LCIA_one_LCI(dict_mono_technosphere_lcas,
+                                         LCI,
+                                         methods)[0]
+
+    return np.array(list_LCA_res + [LCI[indicator[1]] for indicator in grid_supplementary_indicators],
+                    dtype=np.float64)
+
+
+def evaluate_grid_tile(tile_arguments):
+    """Calculates all the cells of a tile for all months and saves the tile
+    in the output folder. Called by the processes of the pool.
+
+    #Inputs:
+
+        #tile_arguments : list with the path of the tile, the latitudes and
+        longitudes of the tile, the months, the cells without climatic data,
+        the inputs of "evaluate_grid_cell" after month and the context of 
+        the tile ("grid_context")
+
+    #Outputs:
+
+        #path : path of the saved tile
+
+        """
+
+    [path, lats, longs, months, failed_cells, cell_arguments, context] = tile_arguments
+
+    # Methods
+    indicators = grid_indicators(cell_arguments[9])
+
+    values = np.full((len(lats), len(longs), len(months), len(indicators)),
+                     np.nan,
+                     dtype=np.float32)
+
+    for lat_index in range(len(lats)):
+
+        for long_index in range(len(longs)):
+
+            lat = lats[lat_index]
+            long = longs[long_index]
+
+            if (lat, long) in failed_cells:
+                continue
+
+            for month_index in range(len(months)):
+
+                try:
+                    values[lat_index, long_index, month_index] = evaluate_grid_cell(lat,
+                                                                                    long,
+                                                                                    months[month_index],
+                                                                                    *cell_arguments)
+                except ValueError as error:
+                    # Climatic data not available
+                    print('Cell', lat, long, 'month', months[month_index], ':', error)
+
+    save_npz(path,
+             lats=lats,
+             longs=longs,
+             months=np.array(months),
+             indicators=np.array(indicators),
+             context=np.array(context),
+             values=values)
+
+    return path
+
+
+def siting_grid_simulations(dict_mono_technosphere_lcas,
+                            Tech_opdict,
+                            Biodict,
+                            Locationdict,
+                            Physicdict,
+                            LCIdict,
+                            lat_min,
+                            lat_max,
+                            long_min,
+                            long_max,
+                            resolution,
+                            months_suitable_for_cultivation,
+                            fraction_maxyield,
+                            elemental_contents,
+                            fishfeed_table,
+                            methods,
+                            output_folder=siting_grid_output_folder,
+                            tile_size=grid_tile_size,
+                            processes=None,
+                            transposition=None,
+                            engine='odeint',
+                            night_steady_state='twopass',
+                            timestep=10):
+    """Calculates the deterministic LCI and LCIA for each cell of a grid and
+    each month of cultivation and saves the raster cube in the output folder.
+    The tiles already calculated in the output folder for the same grid and
+    the same inputs are reused.
+
+    #Inputs:
+
+        #dict_mono_technosphere_lcas : Dictionnary with the impacts of 1 unit of
+        each technosphere input to the molecule production, for each method
+        #Tech_opdict, Biodict, Locationdict, Physicdict : Dictionnaries with
+        the primary parameters. lat and long in Locationdict are replaced by
+        the coordinates of the cells.
+        #LCIdict: the  LCI dictionnary
+        #lat_min, lat_max, long_min, long_max : bounding box ; XX.XXX
+        #resolution : size of a cell ; decimal degrees
+        #months_suitable_for_cultivation : Months for cultivation ;
+        list of month numbers : [a,b,c]
+        #fraction_maxyield : Fraction of the maximum yield achieved ; .
+        #elemental_contents : DataFrame with elemental compositons of macronutrients
+        #fishfeed_table : DataFrame with fish feed composition
+        #methods : List of Impact categories to apply for the LCA
+        #output_folder : folder for the tiles and the cube ; str
+        #tile_size : number of cells on each side of a tile
+        #processes : number of processes. None for the number of cores
+        #transposition : None to use the PVGIS vertical surfaces, or sky model
+        used to calculate them locally from the horizontal surface
+        ('haydavies' or 'isotropic'). See Solar_transposition_1.
+        #engine : integrator for the temperature, 'odeint', 'fixedstep', 'analytical' or 'reduced'.
+        See "thermosimulation_1day_timestep10" in Cultivation_simul_Night_Harvest_1.
+        #night_steady_state : 'twopass' or 'periodic', start of the day without
+        thermoregulation at night. See "thermosimulation_1day_timestep10" in Cultivation_simul_Night_Harvest_1.
+        #timestep : time step of the thermal simulation ; s.
+        See "thermal_time_grid" in Cultivation_simul_Night_Harvest_1.
+
+    #Outputs:
+
+        #cube : array (latitudes x longitudes x months x indicators).
+        LCIA per FU for 1 month of cultivation. nan for the cells without climatic data.
+        #lats : latitudes of the cells
+        #longs : longitudes of the cells
+        #months : months of the cube
+        #indicators : names of the indicators
+
+        """
+
+    [lats, longs] = siting_grid(lat_min, lat_max, long_min, long_max, resolution)
+
+    months = list(months_suitable_for_cultivation)
+
+    indicators = grid_indicators(methods)
+
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+
+    [downloaded, failed_cells] = prefetch_grid_climatic_data(lats,
+                                                             longs,
+                                                             Locationdict,
+                                                             months,
+                                                             transposition)
+
+    if downloaded != 0:
+        print(downloaded, 'climatic data files downloaded')
+
+    if len(failed_cells) != 0:
+        print(len(failed_cells), 'cells without climatic data :', failed_cells)
+
+    failed_cells = set(failed_cells)
+
+    cell_arguments = [dict_mono_technosphere_lcas,
+                      Tech_opdict,
+                      Biodict,
+                      Locationdict,
+                      Physicdict,
+                      LCIdict,
+                      fraction_maxyield,
+                      fishfeed_table,
+                      elemental_contents,
+                      methods,
+                      transposition,
+                      engine,
+                      night_steady_state,
+                      timestep]
+
+    tiles = grid_tiles(len(lats), len(longs), tile_size)
+
+    # Inputs of each tile
+    tile_contexts = [grid_context(lats[lat_start:lat_stop],
+                                  longs[long_start:long_stop],
+                                  months,
+                                  failed_cells,
+                                  cell_arguments)
+                     for [name, lat_start, lat_stop, long_start, long_stop] in tiles]
+
+    # Tiles which are not already calculated with the same inputs
+    missing_tiles = []
+
+    for [[name, lat_start, lat_stop, long_start, long_stop], context] in zip(tiles, tile_contexts):
+
+        path = output_folder + name + '.npz'
+
+        if load_grid_tile(path,
+                          lats[lat_start:lat_stop],
+                          longs[long_start:long_stop],
+                          months,
+                          indicators,
+                          context) is None:
+
+            missing_tiles.append([path,
+                                  lats[lat_start:lat_stop],
+                                  longs[long_start:long_stop],
+                                  months,
+                                  failed_cells,
+                                  cell_arguments,
+                                  context])
+
+    print(len(tiles) - len(missing_tiles), 'tiles already calculated,', len(missing_tiles), 'to calculate')
+
+    if len(missing_tiles) != 0:
+
+        # Releasing the memory-mapped climate store before starting the processes
+        solardata.release_climate_store()
+
+        with multiprocessing.Pool(processes) as pool:
+
+            for path in pool.imap_unordered(evaluate_grid_tile, missing_tiles):
+
+                print('Tile saved :', path)
+
+    # Assembling the cube
+
+    cube = np.full((len(lats), len(longs), len(months), len(indicators)),
+                   np.nan,
+                   dtype=np.float32)
+
+    for [[name, lat_start, lat_stop, long_start, long_stop], context] in zip(tiles, tile_contexts):
+
+        tile_values = load_grid_tile(output_folder + name + '.npz',
+                                     lats[lat_start:lat_stop],
+                                     longs[long_start:long_stop],
+                                     months,
+                                     indicators,
+                                     context)
+
+        if tile_values is None:
+            raise ValueError('Tile ' + name + ' missing or calculated with other inputs in ' + output_folder)
+
+        cube[lat_start:lat_stop, long_start:long_stop] = tile_values
+
+    save_npz(output_folder + siting_grid_cube_file,
+             lats=lats,
+             longs=longs,
+             months=np.array(months),
+             indicators=np.array(indicators),
+             context=np.array(grid_context(lats, longs, months, failed_cells, cell_arguments)),
+             values=cube)
+
+    return [cube, lats, longs, months, indicators]
@@ -0,0 +1,711 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 17:12:05 2026
+
+@author: Pierre Jouannais, Department of Planning, DCEA, Aalborg University
+pijo@plan.aau.dk
+"""
+
+
+'''
+Script containing the functions which train and use an emulator (surrogate
+model) of the thermal simulation of the day ("thermosimulation_1day_timestep10")
+to replace it in the Monte Carlo simulations.
+
+The emulator is trained for one context : all the arguments of
+"cultivation_simulation_timestep10" (location, month, night monitoring,
+engine etc.) are fixed except the inputs varied in a domain
+(name : [minimum, maximum]). The inputs are arguments of
+"cultivation_simulation_timestep10" with scalar values (hconv, Twell,
+tubediameter etc.) or parameters of Biodict (lipid_af_dw etc.).
+
+The emulator is a polynomial chaos expansion (Legendre polynomials up to
+a total degree) of each value of the thermal summary of the day
+("thermal_summary_fields"), fitted by least squares on a latin hypercube
+design and validated on another latin hypercube design.
+
+As the month is part of the context, a cultivation period is covered by
+one emulator per month ("train_thermal_emulators"), given as a dictionnary
+month : emulator. The days outside the context or the domain of all the
+emulators are simulated with the full model and counted by reason.
+
+'''
+
+
+import itertools
+import hashlib
+import numpy as np
+import pandas as pd
+from numpy.polynomial import legendre
+
+import Cultivation_simul_Night_Harvest_1 as cultsimul
+
+
+
+
+#################
+# Polynomial chaos expansion
+#################
+
+
+def latin_hypercube(number_points, number_inputs, seed=0):
+    '''
+    Space-filling design in the unit hypercube : each input takes one value
+    in each of the number_points intervals of same width.
+
+    #Inputs :
+
+        #number_points : number of points of the design
+        #number_inputs : number of inputs
+        #seed : seed of the random generator
+
+    #Outputs :
+
+        #points : array (number_points x number_inputs) in [0,1]
+
+        '''
+
+    generator = np.random.default_rng(seed)
+
+    points = np.empty((number_points, number_inputs))
+
+    for column in range(number_inputs):
+
+        points[:, column] = ((generator.permutation(number_points)
+                              + generator.random(number_points))
+                             / number_points)
+
+    return points
+
+
+def polynomial_chaos_indices(number_inputs, degree):
+    '''
+    Multi-indices of the polynomial chaos expansion with a total degree
+    lower or equal to degree.
+
+    #Inputs :
+
+        #number_inputs : number of inputs
+        #degree : maximum total degree
+
+    #Outputs :
+
+        #indices : array (number of terms x number_inputs) with the degree
+        of the Legendre polynomial of each input in each term
+
+        '''
+
+    indices = []
+
+    for total_degree in range(degree + 1):
+
+        for inputs in itertools.combinations_with_replacement(range(number_inputs), total_degree):
+
+            index = [0]*number_inputs
+
+            for element in inputs:
+                index[element] += 1
+
+            indices.append(index)
+
+    return np.array(indices, dtype=np.int64).reshape((-1, number_inputs))
+
+
+def polynomial_chaos_basis(points, indices):
+    '''
+    Values of the terms of the polynomial chaos expansion.
+
+    #Inputs :
+
+        #points : array (number of points x number of inputs) in [-1,1]
+        #indices : output of "polynomial_chaos_indices"
+
+    #Outputs :
+
+        #basis : array (number of points x number of terms)
+
+        '''
+
+    degree = int(indices.max()) if indices.size > 0 else 0
+
+    basis = np.ones((points.shape[0], indices.shape[0]))
+
+    for column in range(points.shape[1]):
+
+        # Legendre polynomials of degree 0 to degree of this input
+        polynomials = legendre.legvander(points[:, column], degree)
+
+        basis *= polynomials[:, indices[:, column]]
+
+    return basis
+
+
+
+
+#################
+# Emulator of the thermal simulation
+#################
+
+
+# Values emulated, in the order of "thermal_summary_fields"
+thermal_emulator_outputs = cultsimul.thermal_summary_fields
+
+# Days emulated and simulated with the full model since the last call
+# to "reset_thermal_emulator_stats", and reasons of the simulations :
+# trajectories asked, an input which is not a number, no emulator trained
+# for the context of the day, or day outside the domain of the emulator
+# trained for its context
+thermal_emulator_stats = {'emulated': 0,
+                          'simulated': 0,
+                          'simulated_trajectories': 0,
+                          'simulated_not_a_number': 0,
+                          'simulated_context': 0,
+                          'simulated_domain': 0}
+
+# Emulators loaded by "thermal_emulator" with the path of their file
+loaded_thermal_emulators = {}
+
+
+def emulator_arguments(*args, **kwargs):
+    '''
+    Returns the values of all the arguments of "cultivation_simulation_timestep10"
+    (default values included).
+
+    #Inputs : same as "cultivation_simulation_timestep10"
+
+    #Outputs :
+
+        #values : dictionnary argument : value
+
+        '''
+
+    arguments = cultsimul.cultivation_signature.bind(*args, **kwargs)
+
+    arguments.apply_defaults()
+
+    return dict(arguments.arguments)
+
+
+def emulator_features(values, inputs):
+    '''
+    Returns the values of the inputs of an emulator for a day.
+
+    #Inputs :
+
+        #values : values of the arguments of "cultivation_simulation_timestep10"
+        #inputs : names of arguments of "cultivation_simulation_timestep10"
+        or parameters of Biodict
+
+    #Outputs :
+
+        #features : array of the values of the inputs,
+        None if one of them is not a number
+
+        '''
+
+    features = []
+
+    for name in inputs:
+
+        if name in values:
+            value = values[name]
+        else:
+            value = values['Biodict'].get(name)
+
+        if not isinstance(value, (int, float, np.number)) or isinstance(value, bool):
+            return None
+
+        features.append(value)
+
+    return np.array(features, dtype=np.float64)
+
+
+def emulator_context(values, inputs):
+    '''
+    Returns the key of the context of an emulator : hash of the values of
+    the arguments of "cultivation_simulation_timestep10" which are not inputs
+    of the emulator (trajectories excepted). See "cultivation_key_update".
+
+    #Inputs :
+
+        #values : values of the arguments of "cultivation_simulation_timestep10"
+        #inputs : inputs of the emulator
+
+    #Outputs :
+
+        #context : hexadecimal string
+
+        '''
+
+    content = hashlib.sha256()
+
+    for name in values:
+
+        if name in inputs or name == 'trajectories':
+            continue
+
+        value = values[name]
+
+        if name == 'Biodict':
+            value = dict(value)
+
+            for key in inputs:
+                if key in value:
+                    value[key] = None
+
+        cultsimul.cultivation_key_update(content, name, value)
+
+    return content.hexdigest()
+
+
+def thermal_summary_simulated(values):
+    '''
+    Simulates a day with the full model and returns its thermal summary.
+
+    #Inputs :
+
+        #values : values of the arguments of "cultivation_simulation_timestep10"
+
+    #Outputs :
+
+        #thermal_summary : list of values in the order of "thermal_summary_fields"
+
+        '''
+
+    # The stages are called directly so that the days are not sampled
+    # for the error on the time step
+    values = dict(values, trajectories=False)
+
+    cultsimul.cultivation_stages_results(values)
+
+    return values['thermal']
+
+
+def design_values(reference, inputs, bounds, points):
+    '''
+    Returns the arguments of "cultivation_simulation_timestep10" for each
+    point of a design.
+
+    #Inputs :
+
+        #reference : values of all the arguments of "cultivation_simulation_timestep10"
+        #inputs : inputs of the emulator
+        #bounds : array (inputs x 2) with the minimum and maximum of each input
+        #points : array (number of points x inputs) in [0,1]
+
+    #Outputs :
+
+        #design : list of dictionnaries with the values of the arguments
+
+        '''
+
+    design = []
+
+    for point in bounds[:, 0] + points*(bounds[:, 1] - bounds[:, 0]):
+
+        values = dict(reference)
+
+        values['Biodict'] = dict(reference['Biodict'])
+
+        for [name, value] in zip(inputs, point):
+
+            if name in values:
+                values[name] = float(value)
+            else:
+                values['Biodict'][name] = float(value)
+
+        design.append(values)
+
+    return design
+
+
+def train_thermal_emulator(domain,
+                           *args,
+                           degree=2,
+                           training_size=None,
+                           validation_size=None,
+                           seed=0,
+                           **kwargs):
+    '''
+    Trains an emulator of the thermal summary of the day on a latin hypercube
+    design and estimates its error on another design (out-of-sample validation).
+
+    #Inputs :
+
+        #domain : dictionnary input : [minimum, maximum] with the inputs
+        varied (arguments of "cultivation_simulation_timestep10" or parameters
+        of Biodict)
+        #args, kwargs : arguments of "cultivation_simulation_timestep10"
+        defining the context of the emulator (the values of the inputs are
+        replaced by the values of the design)
+        #degree : total degree of the polynomial chaos expansion
+        #training_size : number of days simulated to fit the expansion,
+        None for 3 times the number of terms
+        #validation_size : number of days simulated to validate the expansion,
+        None for the third of training_size
+        #seed : seed of the random generator for the designs
+
+    #Outputs :
+
+        #emulator : dictionnary with
+            inputs : names of the inputs
+            bounds : array (inputs x 2)
+            indices : multi-indices of the expansion ("polynomial_chaos_indices")
+            coefficients : array (terms x outputs)
+            output_bounds : array (outputs x 2), minimum and maximum of the 
+            simulated values, to which the predictions are limited
+            context : key of the context ("emulator_context")
+            validation : dataframe with the validation errors, see "thermal_emulator_validation"
+
+        '''
+
+    inputs = list(domain)
+
+    bounds = np.array([domain[name] for name in inputs], dtype=np.float64).reshape((-1, 2))
+
+    reference = emulator_arguments(*args, **kwargs)
+
+    reference['trajectories'] = False
+
+    indices = polynomial_chaos_indices(len(inputs), degree)
+
+    if training_size is None:
+        training_size = 3*indices.shape[0]
+
+    if validation_size is None:
+        validation_size = max(training_size//3, 1)
+
+    emulator = {'inputs': inputs,
+                'bounds': bounds,
+                'indices': indices,
+                'context': emulator_context(reference, inputs)}
+
+    # Training
+    training_points = latin_hypercube(training_size, len(inputs), seed)
+
+    training_outputs = np.array([thermal_summary_simulated(values)
+                                 for values in design_values(reference, inputs, bounds, training_points)],
+                                dtype=np.float64)
+
+    basis = polynomial_chaos_basis(2*training_points - 1, indices)
+
+    emulator['coefficients'] = np.linalg.lstsq(basis, training_outputs, rcond=None)[0]
+
+    emulator['output_bounds'] = np.stack((training_outputs.min(axis=0),
+                                          training_outputs.max(axis=0)), axis=1)
+
+    # Out-of-sample validation
+    validation_points = latin_hypercube(validation_size, len(inputs), seed + 1)
+
+    validation_outputs = np.array([thermal_summary_simulated(values)
+                                   for values in design_values(reference, inputs, bounds, validation_points)],
+                                  dtype=np.float64)
+
+    predictions = np.clip(polynomial_chaos_basis(2*validation_points - 1, indices) @ emulator['coefficients'],
+                          emulator['output_bounds'][:, 0],
+                          emulator['output_bounds'][:, 1])
+
+    emulator['validation'] = thermal_emulator_validation(predictions, validation_outputs)
+
+    return emulator
+
+
+def train_thermal_emulators(domain, months, *args, **kwargs):
+    '''
+    Trains one emulator per month with "train_thermal_emulator", the other
+    arguments defining the context being the same.
+
+    #Inputs :
+
+        #domain : see "train_thermal_emulator"
+        #months : list of month numbers
+        #args, kwargs : arguments of "cultivation_simulation_timestep10"
+        (the month is replaced) and options of "train_thermal_emulator"
+
+    #Outputs :
+
+        #emulators : dictionnary month : emulator
+
+        '''
+
+    options = {name: kwargs.pop(name) for name in ['degree', 'training_size',
+                                                   'validation_size', 'seed']
+               if name in kwargs}
+
+    values = emulator_arguments(*args, **kwargs)
+
+    emulators = {}
+
+    for month in months:
+
+        values['month'] = month
+
+        emulators[month] = train_thermal_emulator(domain, **values, **options)
+
+    return emulators
+
+
+def thermal_emulator_validation(predictions, outputs):
+    '''
+    Errors of an emulator on a validation design.
+
+    #Inputs :
+
+        #predictions : array (days x outputs) predicted by the emulator
+        #outputs : array (days x outputs) simulated with the full model
+
+    #Outputs :
+
+        #errors : dataframe with one row per field of "thermal_summary_fields"
+        and the columns :
+            rmse : root mean square error
+            max_abs_error : maximum absolute error
+            normalized_rmse : rmse divided by the standard deviation of the
+            simulated values, NaN if they are constant
+
+        '''
+
+    differences = predictions - outputs
+
+    rmse = np.sqrt((differences**2).mean(axis=0))
+
+    deviation = outputs.std(axis=0)
+
+    errors = pd.DataFrame(index=thermal_emulator_outputs,
+                          columns=['rmse', 'max_abs_error', 'normalized_rmse'],
+                          dtype=np.float64)
+
+    errors['rmse'] = rmse
+    errors['max_abs_error'] = np.abs(differences).max(axis=0)
+    errors['normalized_rmse'] = np.where(deviation > 0, rmse/np.where(deviation > 0, deviation, 1), np.nan)
+
+    return errors
+
+
+def thermal_emulator_predict(emulator, features):
+    '''
+    Thermal summary of a day predicted by an emulator.
+
+    #Inputs :
+
+        #emulator : output of "train_thermal_emulator"
+        #features : values of the inputs of the emulator ("emulator_features")
+
+    #Outputs :
+
+        #thermal_summary : list of values in the order of "thermal_summary_fields"
+
+        '''
+
+    bounds = emulator['bounds']
+
+    point = 2*(features - bounds[:, 0])/(bounds[:, 1] - bounds[:, 0]) - 1
+
+    prediction = (polynomial_chaos_basis(point[None, :], emulator['indices'])
+                  @ emulator['coefficients'])[0]
+
+    # No extrapolation outside the values simulated for the training
+    return np.clip(prediction,
+                   emulator['output_bounds'][:, 0],
+                   emulator['output_bounds'][:, 1]).tolist()
+
+
+def save_thermal_emulator(emulator, path):
+    '''
+    Saves an emulator in a .npz file.
+
+    #Inputs :
+
+        #emulator : output of "train_thermal_emulator"
+        #path : path of the file
+
+        '''
+
+    np.savez(path,
+             inputs=np.array(emulator['inputs']),
+             bounds=emulator['bounds'],
+             indices=emulator['indices'],
+             coefficients=emulator['coefficients'],
+             output_bounds=emulator['output_bounds'],
+             context=np.array(emulator['context']),
+             outputs=np.array(thermal_emulator_outputs),
+             validation=emulator['validation'].values)
+
+
+def load_thermal_emulator(path):
+    '''
+    Loads an emulator saved with "save_thermal_emulator".
+
+    #Inputs :
+
+        #path : path of the file
+
+    #Outputs :
+
+        #emulator : same as "train_thermal_emulator"
+
+        '''
+
+    with np.load(path, allow_pickle=False) as content:
+
+        if content['outputs'].tolist() != list(thermal_emulator_outputs):
+            raise ValueError('The emulator in ' + str(path) + ' was trained for other outputs than '
+                             + str(thermal_emulator_outputs))
+
+        return {'inputs': content['inputs'].tolist(),
+                'bounds': content['bounds'],
+                'indices': content['indices'],
+                'coefficients': content['coefficients'],
+                'output_bounds': content['output_bounds'],
+                'context': str(content['context']),
+                'validation': pd.DataFrame(content['validation'],
+                                           index=thermal_emulator_outputs,
+                                           columns=['rmse', 'max_abs_error', 'normalized_rmse'])}
+
+
+def thermal_emulator(emulator):
+    '''
+    Returns an emulator given as itself or as the path of its file
+    (loaded only once). For a dictionnary of emulators
+    ("train_thermal_emulators"), see "thermal_emulators".
+
+    #Inputs :
+
+        #emulator : output of "train_thermal_emulator" or path of a file
+        saved with "save_thermal_emulator"
+
+    #Outputs :
+
+        #emulator : same as "train_thermal_emulator"
+
+        '''
+
+    if isinstance(emulator, dict):
+        return emulator
+
+    if emulator not in loaded_thermal_emulators:
+        loaded_thermal_emulators[emulator] = load_thermal_emulator(emulator)
+
+    return loaded_thermal_emulators[emulator]
+
+
+def thermal_emulators(emulator, month=None):
+    '''
+    Returns the emulators which can be used for a day.
+
+    #Inputs :
+
+        #emulator : emulator or path of its file, list of them, or
+        dictionnary month : emulator (or other keys, for instance contexts)
+        #month : month of the day
+
+    #Outputs :
+
+        #emulators : list of emulators ("train_thermal_emulator"), the one of the
+        month only for a dictionnary with the month as key
+
+        '''
+
+    if isinstance(emulator, dict) and 'coefficients' not in emulator:
+
+        if month in emulator:
+            return [thermal_emulator(emulator[month])]
+
+        emulator = list(emulator.values())
+
+    if isinstance(emulator, (list, tuple)):
+        return [thermal_emulator(element) for element in emulator]
+
+    return [thermal_emulator(emulator)]
+
+
+def cultivation_simulation_emulated(*args, emulator=None, day_simulation=None, **kwargs):
+    '''
+    Same as "cultivation_simulation_timestep10" with trajectories=False
+    but the thermal summary of the day is predicted by an emulator when the
+    day is in its context and domain. Otherwise, and with trajectories, the
+    day is simulated with the full model (day_simulation).
+    The days emulated and simulated are counted in "thermal_emulator_stats",
+    with the reason of each simulation.
+
+    #Inputs : same as "cultivation_simulation_timestep10" and :
+
+        #emulator : output of "train_thermal_emulator" or path of its file,
+        list of them or dictionnary month : emulator (see "thermal_emulators")
+        #day_simulation : function used to simulate the days outside the domain,
+        "cultivation_simulation_timestep10" by default, or
+        "cultivation_simulation_cached" or "cultivation_simulation_staged".
+
+    #Outputs : same as "cultivation_simulation_timestep10"
+
+        '''
+
+    if day_simulation is None:
+        day_simulation = cultsimul.cultivation_simulation_timestep10
+
+    values = emulator_arguments(*args, **kwargs)
+
+    if values['trajectories'] is not False:
+        reason = 'trajectories'
+
+    else:
+        reason = 'context'
+
+        # Contexts already calculated for the inputs of an emulator
+        contexts = {}
+
+        for emulator in thermal_emulators(emulator, values['month']):
+
+            features = emulator_features(values, emulator['inputs'])
+
+            if features is None:
+                reason = 'not_a_number'
+                continue
+
+            inputs = tuple(emulator['inputs'])
+
+            if inputs not in contexts:
+                contexts[inputs] = emulator_context(values, emulator['inputs'])
+
+            if contexts[inputs] != emulator['context']:
+                continue
+
+            if (np.any(features < emulator['bounds'][:, 0])
+                    or np.any(features > emulator['bounds'][:, 1])):
+                reason = 'domain'
+                continue
+
+            reason = None
+            break
+
+    if reason is not None:
+
+        thermal_emulator_stats['simulated'] += 1
+        thermal_emulator_stats['simulated_' + reason] += 1
+
+        return day_simulation(*args, **kwargs)
+
+    thermal_emulator_stats['emulated'] += 1
+
+    # The stages without the thermal simulation
+    for stage in cultsimul.cultivation_stages:
+
+        if stage == 'thermal_before_harvest':
+            values[stage] = None
+
+        elif stage == 'thermal':
+            values[stage] = thermal_emulator_predict(emulator, features)
+
+        else:
+            [stage_function, stage_inputs] = cultsimul.cultivation_stages[stage]
+
+            values[stage] = stage_function(*[values[name] for name in stage_inputs])
+
+    return values['day']
+
+
+def reset_thermal_emulator_stats():
+    '''Sets the counts of "thermal_emulator_stats" to 0'''
+
+    for name in thermal_emulator_stats:
+        thermal_emulator_stats[name] = 0